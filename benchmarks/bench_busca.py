@@ -0,0 +1,81 @@
+"""
+Benchmark: busca com LIKE '%termo%' vs. índice FTS5 conforme a tabela cresce
+
+Uso:
+    python -m benchmarks.bench_busca [tamanho1 tamanho2 ...]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from data.sql.experimento_sql import INSERIR_EXPERIMENTO, BUSCAR_EXPERIMENTOS
+from data.repo.experimento_repo import montar_consulta_busca
+from util.db_util import registrar_funcoes
+from util.html_util import derivar_texto
+from util.migracoes import aplicar_migracoes
+
+PALAVRAS = (
+    "água vinagre bicarbonato corante limão sal açúcar óleo vela balão garrafa "
+    "ímã ferro cobre papel alumínio copo leite detergente amido iodo pressão "
+    "densidade reação ácido base energia luz calor som cor cristal"
+).split()
+
+LIKE = """
+SELECT id, titulo, capa FROM experimento
+WHERE titulo LIKE ? OR descricao LIKE ? OR materiais LIKE ?
+ORDER BY titulo LIMIT 20;
+"""
+
+
+def gerar_html(rnd: random.Random, palavras: int) -> str:
+    texto = " ".join(rnd.choice(PALAVRAS) for _ in range(palavras))
+    return f'<p style="text-align: justify"><strong>{texto[:40]}</strong> {texto}</p>'
+
+
+def preparar(caminho: str, linhas: int) -> sqlite3.Connection:
+    rnd = random.Random(42)
+    conn = sqlite3.connect(caminho)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    dados = [
+        (f"Experimento {i}", gerar_html(rnd, 120), gerar_html(rnd, 15), None, None)
+        for i in range(linhas)
+    ]
+    # Um documento com um termo raro, como uma busca típica por nome
+    dados[linhas // 2] = ("Experimento do pêndulo", gerar_html(rnd, 120) + " periscópio", "barbante", None, None)
+    conn.executemany(INSERIR_EXPERIMENTO, [(*linha, *derivar_texto(linha[1], linha[2])) for linha in dados])
+    conn.commit()
+    return conn
+
+
+def medir(funcao, repeticoes: int = 20) -> float:
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main() -> None:
+    tamanhos = [int(t) for t in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(f"{'linhas':>8} {'LIKE (ms)':>12} {'FTS5 (ms)':>12}")
+    for linhas in tamanhos:
+        fd, caminho = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            conn = preparar(caminho, linhas)
+            padrao = "%periscópio%"
+            tempo_like = medir(lambda: conn.execute(LIKE, (padrao, padrao, padrao)).fetchall())
+            consulta = montar_consulta_busca("periscopio")
+            tempo_fts = medir(lambda: conn.execute(BUSCAR_EXPERIMENTOS, (consulta, 20)).fetchall())
+            print(f"{linhas:>8} {tempo_like:>12.2f} {tempo_fts:>12.2f}")
+            conn.close()
+        finally:
+            os.unlink(caminho)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark: vazão das páginas públicas enquanto um login está em andamento
+
+Compara o trabalho bloqueante (consulta + hash de senha + cópia de upload)
+executado direto no event loop com o mesmo trabalho enviado aos executores
+de util.executor.
+
+Uso:
+    python -m benchmarks.bench_concorrencia [segundos]
+"""
+import asyncio
+import hashlib
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from data.sql.experimento_sql import INSERIR_EXPERIMENTO, OBTER_PAGINA_RESUMO_EXPERIMENTO
+from util import db_util
+from util.html_util import derivar_texto
+from util.migracoes import aplicar_migracoes
+from util.executor import executar_banco, executar_cpu, executar_io, encerrar_executores
+
+try:
+    from util.security import criar_hash_senha, verificar_senha
+    HASH = criar_hash_senha("admin123")
+
+    def verificar(senha: str) -> bool:
+        return verificar_senha(senha, HASH)
+except ImportError:
+    # Sem passlib: PBKDF2 com custo equivalente ao bcrypt padrão (~200 ms)
+    def verificar(senha: str) -> bool:
+        hashlib.pbkdf2_hmac("sha256", senha.encode(), b"sal", 400_000)
+        return False
+
+
+def pagina_publica() -> int:
+    with db_util.get_connection() as conn:
+        return len(conn.execute(OBTER_PAGINA_RESUMO_EXPERIMENTO, (13,)).fetchall())
+
+
+def copiar_upload(tamanho: int = 20 * 1024 * 1024) -> None:
+    with tempfile.TemporaryFile() as destino:
+        shutil.copyfileobj(io.BytesIO(os.urandom(tamanho)), destino)
+
+
+async def cliente_publico(fim: float, latencias: list) -> None:
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        await executar_banco(pagina_publica)
+        latencias.append(time.perf_counter() - inicio)
+
+
+async def admin_bloqueante(fim: float) -> None:
+    while time.perf_counter() < fim:
+        verificar("senha-errada")
+        copiar_upload()
+        await asyncio.sleep(0)
+
+
+async def admin_no_executor(fim: float) -> None:
+    while time.perf_counter() < fim:
+        await executar_cpu(verificar, "senha-errada")
+        await executar_io(copiar_upload)
+
+
+async def rodada(admin, segundos: float, clientes: int = 8) -> list:
+    latencias: list = []
+    fim = time.perf_counter() + segundos
+    await asyncio.gather(
+        admin(fim),
+        *(cliente_publico(fim, latencias) for _ in range(clientes)),
+    )
+    return latencias
+
+
+def relatorio(nome: str, latencias: list, segundos: float) -> None:
+    latencias.sort()
+    p99 = latencias[int(len(latencias) * 0.99) - 1] * 1000 if latencias else float("nan")
+    print(f"{nome:<28} {len(latencias) / segundos:10.0f} páginas/s   p99 {p99:8.1f} ms")
+
+
+def main() -> None:
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(caminho)
+    db_util.registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    derivadas = derivar_texto("<p>descrição</p>", "<p>materiais</p>")
+    conn.executemany(INSERIR_EXPERIMENTO, [
+        (f"Experimento {i}", "<p>descrição</p>", "<p>materiais</p>", None, None, *derivadas)
+        for i in range(50)
+    ])
+    conn.commit()
+    conn.close()
+    db_util.DB_PATH = caminho
+    db_util._pool = db_util.PoolConexoes(caminho)
+    try:
+        relatorio("sem login em andamento", asyncio.run(rodada(lambda fim: asyncio.sleep(0), segundos)), segundos)
+        relatorio("login/upload no event loop", asyncio.run(rodada(admin_bloqueante, segundos)), segundos)
+        encerrar_executores()
+        relatorio("login/upload nos executores", asyncio.run(rodada(admin_no_executor, segundos)), segundos)
+    finally:
+        encerrar_executores()
+        db_util.fechar_pool()
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.unlink(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: latência por consulta com conexão nova vs. pool de conexões
+
+Uso:
+    python -m benchmarks.bench_conexoes [quantidade_consultas]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from data.sql.experimento_sql import INSERIR_EXPERIMENTO, OBTER_EXPERIMENTO_POR_ID
+from util.db_util import PoolConexoes, registrar_funcoes
+from util.html_util import derivar_texto
+from util.migracoes import aplicar_migracoes
+
+
+def preparar_banco(caminho: str, linhas: int = 1000) -> None:
+    conn = sqlite3.connect(caminho)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    derivadas = derivar_texto("<p>descrição</p>" * 20, "<p>materiais</p>")
+    conn.executemany(INSERIR_EXPERIMENTO, [
+        (f"Experimento {i}", "<p>descrição</p>" * 20, "<p>materiais</p>", None, None, *derivadas)
+        for i in range(linhas)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def consulta_conexao_nova(caminho: str, id: int) -> None:
+    # Comportamento antigo de get_connection(): connect a cada chamada
+    conn = sqlite3.connect(caminho)
+    conn.row_factory = sqlite3.Row
+    with conn:
+        conn.execute(OBTER_EXPERIMENTO_POR_ID, (id,)).fetchone()
+    conn.close()
+
+
+def consulta_pool(pool: PoolConexoes, id: int) -> None:
+    with pool.conexao() as conn:
+        conn.execute(OBTER_EXPERIMENTO_POR_ID, (id,)).fetchone()
+
+
+def medir(nome: str, funcao, quantidade: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(quantidade):
+        funcao(i % 1000 + 1)
+    total = time.perf_counter() - inicio
+    por_consulta = total / quantidade * 1_000_000
+    print(f"{nome:<20} {por_consulta:10.1f} µs/consulta")
+    return por_consulta
+
+
+def main() -> None:
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        preparar_banco(caminho)
+        pool = PoolConexoes(caminho)
+        antes = medir("conexão nova", lambda id: consulta_conexao_nova(caminho, id), quantidade)
+        depois = medir("pool", lambda id: consulta_pool(pool, id), quantidade)
+        print(f"ganho: {antes / depois:.1f}x")
+        pool.fechar()
+    finally:
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.unlink(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: memória da exportação em streaming vs. lista completa em memória
+
+Exporta N experimentos em CSV com os dois caminhos e mede o pico de
+memória alocada (tracemalloc) e o tempo. No streaming o pico depende do
+tamanho do lote, não do tamanho da tabela.
+
+Uso:
+    python -m benchmarks.bench_exportacao [linhas]
+"""
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_importacao import gerar
+from benchmarks.bench_paginacao import listar_experimentos_completos
+from data.repo import experimento_repo
+from util import db_util
+from util.exportacao import COLUNAS, formatar
+from util.migracoes import aplicar_migracoes
+
+
+class Descarte(io.TextIOBase):
+    """Destino que só conta os caracteres escritos"""
+
+    def __init__(self):
+        self.caracteres = 0
+
+    def write(self, texto):
+        self.caracteres += len(texto)
+        return len(texto)
+
+
+def com_lista(saida) -> None:
+    escritor = csv.writer(saida)
+    escritor.writerow(COLUNAS["experimentos"])
+    for e in listar_experimentos_completos():
+        escritor.writerow((e.id, e.titulo, e.descricao, e.materiais, e.capa, e.video_explicativo))
+
+
+def em_streaming(saida) -> None:
+    colunas = list(COLUNAS["experimentos"])
+    for parte in formatar("csv", colunas, experimento_repo.exportar_experimentos(colunas)):
+        saida.write(parte)
+
+
+def medir(funcao):
+    saida = Descarte()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao(saida)
+    tempo = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico, saida.caracteres
+
+
+def main() -> None:
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_util._pool = db_util.PoolConexoes(caminho)
+    try:
+        aplicar_migracoes()
+        experimento_repo.inserir_experimentos(gerar(linhas))
+        print(f"{linhas:,} experimentos em CSV")
+        print(f"{'caminho':<12} {'tempo (s)':>10} {'pico (MB)':>10} {'saída (MB)':>11}")
+        for nome, funcao in (("lista", com_lista), ("streaming", em_streaming)):
+            tempo, pico, caracteres = medir(funcao)
+            print(f"{nome:<12} {tempo:>10.2f} {pico / 2**20:>10.1f} {caracteres / 2**20:>11.1f}")
+    finally:
+        db_util.fechar_pool()
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.unlink(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
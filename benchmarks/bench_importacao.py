@@ -0,0 +1,83 @@
+"""
+Benchmark: importação um a um vs. em lote
+
+Compara inserir_experimento (uma conexão e um commit por item, como nos
+formulários do admin) com inserir_experimentos (executemany em uma
+transação), inclusive o upsert por título.
+
+Uso:
+    python -m benchmarks.bench_importacao [linhas] [linhas_um_a_um]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from data.model.experimento_model import Experimento
+from data.repo import experimento_repo
+from util import db_util
+from util.migracoes import aplicar_migracoes
+
+
+def gerar(linhas: int, inicio: int = 0):
+    return [
+        Experimento(
+            None, f"Experimento {i:06d}",
+            f"<p>Experimento número {i} com <strong>bicarbonato</strong> e vinagre.</p>",
+            "<ul><li>bicarbonato</li><li>vinagre</li></ul>", f"/static/capa{i}.jpg", None,
+        )
+        for i in range(inicio, inicio + linhas)
+    ]
+
+
+def novo_banco() -> str:
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_util._pool = db_util.PoolConexoes(caminho)
+    aplicar_migracoes()
+    return caminho
+
+
+def remover_banco(caminho: str) -> None:
+    db_util.fechar_pool()
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.unlink(caminho + sufixo)
+
+
+def main() -> None:
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    um_a_um = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+
+    caminho = novo_banco()
+    try:
+        inicio = time.perf_counter()
+        for experimento in gerar(um_a_um):
+            experimento_repo.inserir_experimento(experimento)
+        tempo = time.perf_counter() - inicio
+        print(f"um a um:   {um_a_um:>7,} em {tempo:6.2f}s ({um_a_um / tempo:>9,.0f}/s)"
+              f" -> {linhas:,} levariam ~{linhas / um_a_um * tempo:.0f}s")
+    finally:
+        remover_banco(caminho)
+
+    caminho = novo_banco()
+    try:
+        lote = gerar(linhas)
+        inicio = time.perf_counter()
+        resultado = experimento_repo.inserir_experimentos(lote)
+        tempo = time.perf_counter() - inicio
+        print(f"em lote:   {resultado.inseridos:>7,} em {tempo:6.2f}s ({linhas / tempo:>9,.0f}/s)")
+
+        # Metade já existe: atualiza 50% e insere o restante
+        lote = gerar(linhas, inicio=linhas // 2)
+        inicio = time.perf_counter()
+        resultado = experimento_repo.inserir_experimentos(lote, atualizar=True)
+        tempo = time.perf_counter() - inicio
+        print(f"upsert:    {resultado.total:>7,} em {tempo:6.2f}s ({linhas / tempo:>9,.0f}/s)"
+              f" [{resultado.inseridos:,} novos, {resultado.atualizados:,} atualizados]")
+    finally:
+        remover_banco(caminho)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark: latência das páginas públicas durante uma enxurrada de logins
+
+Vários clientes tentam logar sem parar (senha errada) enquanto outros leem
+a listagem pública em ritmo fixo (50 páginas/s cada). Compara o bcrypt no
+event loop, no executor de threads de CPU (como era) e no pool de processos
+de senhas (com limite de vagas e prazo de espera), com e sem o limite de
+tentativas por IP/email. "login p99" é o tempo até a resposta do login,
+incluindo a espera por vaga.
+
+Uso:
+    python -m benchmarks.bench_login [segundos] [atacantes]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from data.sql.experimento_sql import INSERIR_EXPERIMENTO, OBTER_PAGINA_RESUMO_EXPERIMENTO
+from util import db_util, tentativas
+from util.executor import ExecutorOcupado, encerrar_executores, executar_banco, executar_cpu, executar_senha
+from util.html_util import derivar_texto
+from util.migracoes import aplicar_migracoes
+from util.security import criar_hash_senha, verificar_e_atualizar_senha
+from util.tentativas import BaldeDeFichas, reservar_tentativa
+
+HASH = criar_hash_senha("admin123")
+
+# Ida e volta de rede de cada tentativa do atacante
+RTT = 0.005
+IPS_ATACANTES = 4
+
+# Cada cliente público pede uma página a cada 20 ms
+INTERVALO_PUBLICO = 0.02
+
+
+def pagina_publica() -> int:
+    with db_util.get_connection() as conn:
+        return len(conn.execute(OBTER_PAGINA_RESUMO_EXPERIMENTO, (13,)).fetchall())
+
+
+async def verificar_no_loop() -> None:
+    verificar_e_atualizar_senha("senha-errada", HASH)
+
+
+async def verificar_em_thread() -> None:
+    await executar_cpu(verificar_e_atualizar_senha, "senha-errada", HASH)
+
+
+async def verificar_em_processo() -> None:
+    await executar_senha(verificar_e_atualizar_senha, "senha-errada", HASH)
+
+
+async def atacante(n: int, verificar, limitar: bool, fim: float, resultados: Counter, logins: list) -> None:
+    ip = f"10.0.0.{n % IPS_ATACANTES}"
+    while time.perf_counter() < fim:
+        await asyncio.sleep(RTT)
+        inicio = time.perf_counter()
+        if limitar and reservar_tentativa(ip, "admin@ifes.com"):
+            resultados["429"] += 1
+            continue
+        try:
+            await verificar()
+            resultados["verificadas"] += 1
+        except ExecutorOcupado:
+            resultados["503"] += 1
+        logins.append(time.perf_counter() - inicio)
+
+
+async def cliente_publico(fim: float, latencias: list) -> None:
+    # Chegadas em ritmo fixo: o tempo em que o loop ficou travado antes de
+    # atender a requisição entra na latência
+    agendada = time.perf_counter()
+    while agendada < fim:
+        await asyncio.sleep(max(0.0, agendada - time.perf_counter()))
+        await executar_banco(pagina_publica)
+        latencias.append(time.perf_counter() - agendada)
+        agendada += INTERVALO_PUBLICO
+
+
+async def rodada(verificar, limitar: bool, segundos: float, atacantes: int, clientes: int = 8):
+    tentativas.tentativas_por_ip = BaldeDeFichas("ip", tentativas.CAPACIDADE_IP, tentativas.INTERVALO_IP)
+    tentativas.tentativas_por_email = BaldeDeFichas("email", tentativas.CAPACIDADE_EMAIL, tentativas.INTERVALO_EMAIL)
+    # Processos já criados, como num servidor que está no ar
+    await executar_senha(verificar_e_atualizar_senha, "aquecimento", HASH)
+    latencias: list = []
+    logins: list = []
+    resultados: Counter = Counter()
+    fim = time.perf_counter() + segundos
+    ataque = [atacante(n, verificar, limitar, fim, resultados, logins) for n in range(atacantes)] if verificar else []
+    await asyncio.gather(*ataque, *(cliente_publico(fim, latencias) for _ in range(clientes)))
+    return latencias, logins, resultados
+
+
+def percentil(valores: list, fracao: float) -> float:
+    if not valores:
+        return float("nan")
+    valores.sort()
+    return valores[max(0, int(len(valores) * fracao) - 1)] * 1000
+
+
+def relatorio(nome: str, latencias: list, logins: list, resultados: Counter, segundos: float) -> None:
+    print(
+        f"{nome:<34} {len(latencias) / segundos:9.0f} {percentil(latencias, 0.5):9.2f} "
+        f"{percentil(latencias, 0.99):9.1f} {percentil(logins, 0.99):10.0f} "
+        f"{resultados['verificadas']:>11} {resultados['429']:>7} {resultados['503']:>6}"
+    )
+
+
+def main() -> None:
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    atacantes = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    conn = sqlite3.connect(caminho)
+    db_util.registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    derivadas = derivar_texto("<p>descrição</p>", "<p>materiais</p>")
+    conn.executemany(INSERIR_EXPERIMENTO, [
+        (f"Experimento {i}", "<p>descrição</p>", "<p>materiais</p>", None, None, *derivadas)
+        for i in range(50)
+    ])
+    conn.commit()
+    conn.close()
+    db_util.DB_PATH = caminho
+    db_util._pool = db_util.PoolConexoes(caminho)
+
+    print(f"{atacantes} atacantes ({IPS_ATACANTES} IPs), {segundos:g} s por rodada")
+    print(
+        f"{'bcrypt':<34} {'páginas/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'login p99':>10} "
+        f"{'verificadas':>11} {'429':>7} {'503':>6}"
+    )
+    try:
+        for nome, verificar, limitar in (
+            ("sem logins", None, False),
+            ("no event loop", verificar_no_loop, False),
+            ("threads de CPU", verificar_em_thread, False),
+            ("pool de senhas", verificar_em_processo, False),
+            ("pool de senhas + limite IP/email", verificar_em_processo, True),
+        ):
+            latencias, logins, resultados = asyncio.run(rodada(verificar, limitar, segundos, atacantes))
+            relatorio(nome, latencias, logins, resultados, segundos)
+            encerrar_executores()
+    finally:
+        encerrar_executores()
+        db_util.fechar_pool()
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.unlink(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: montagem dos modelos a partir das linhas do banco
+
+Compara o caminho antigo (sqlite3.Row + dataclass comum montada por nome
+de coluna) com o atual (row factory posicional + dataclass com slots).
+Mede tempo de fetchall + montagem e memória por objeto.
+
+Uso:
+    python -m benchmarks.bench_modelos [linhas]
+"""
+import dataclasses
+import sqlite3
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+from data.model.experimento_model import Experimento
+from benchmarks.bench_paginacao import LISTAR_EXPERIMENTOS_COMPLETOS
+from data.sql.experimento_sql import INSERIR_EXPERIMENTO
+from util import db_util
+from util.html_util import derivar_texto
+from util.migracoes import aplicar_migracoes
+
+
+@dataclasses.dataclass
+class ExperimentoSemSlots:
+    id: int
+    titulo: str
+    descricao: str
+    materiais: str
+    capa: Optional[str] = None
+    video_explicativo: Optional[str] = None
+
+
+def preparar(linhas: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    db_util.registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    derivadas = derivar_texto("<p>Descrição</p>", "<ul><li>água</li></ul>")
+    conn.executemany(INSERIR_EXPERIMENTO, [
+        (f"Experimento {i:06d}", "<p>Descrição</p>", "<ul><li>água</li></ul>", "/static/capa.jpg", None, *derivadas)
+        for i in range(linhas)
+    ])
+    conn.commit()
+    return conn
+
+
+def por_nome(conn: sqlite3.Connection):
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    cursor.execute(LISTAR_EXPERIMENTOS_COMPLETOS, (-1,))
+    return [
+        ExperimentoSemSlots(
+            id=row["id"],
+            titulo=row["titulo"],
+            descricao=row["descricao"],
+            materiais=row["materiais"],
+            capa=row["capa"],
+            video_explicativo=row["video_explicativo"]
+        )
+        for row in cursor.fetchall()
+    ]
+
+
+def posicional(conn: sqlite3.Connection):
+    cursor = conn.cursor()
+    cursor.row_factory = db_util.fabrica_modelo(Experimento)
+    cursor.execute(LISTAR_EXPERIMENTOS_COMPLETOS, (-1,))
+    return cursor.fetchall()
+
+
+def tamanho_objeto(objeto) -> int:
+    tamanho = sys.getsizeof(objeto)
+    if hasattr(objeto, "__dict__"):
+        tamanho += sys.getsizeof(objeto.__dict__)
+    return tamanho
+
+
+def medir(conn: sqlite3.Connection, funcao, repeticoes: int = 5):
+    funcao(conn)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(conn)
+    tempo = (time.perf_counter() - inicio) / repeticoes * 1000
+
+    tracemalloc.start()
+    objetos = funcao(conn)
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objetos, tempo, memoria
+
+
+def main() -> None:
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    conn = preparar(linhas)
+    try:
+        print(f"{linhas:,} experimentos")
+        print(f"{'montagem':<12} {'tempo (ms)':>12} {'bytes/objeto':>14} {'bytes/linha*':>14}")
+        for nome, funcao in (("por nome", por_nome), ("posicional", posicional)):
+            objetos, tempo, memoria = medir(conn, funcao)
+            print(f"{nome:<12} {tempo:>12.1f} {tamanho_objeto(objetos[0]):>14} {memoria / linhas:>14.0f}")
+        print("* memória alocada por linha, incluindo as strings lidas do banco")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
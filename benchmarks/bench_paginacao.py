@@ -0,0 +1,104 @@
+"""
+Benchmark: listagem completa vs. página por cursor (keyset)
+
+Mede tempo e pico de memória da listagem completa (como era antes da
+paginação; o repositório não a oferece mais) e de uma página profunda de
+obter_resumos_paginados() conforme a tabela cresce.
+
+Uso:
+    python -m benchmarks.bench_paginacao [tamanho1 tamanho2 ...]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from data.model.experimento_model import Experimento
+from data.repo import experimento_repo
+from data.sql.experimento_sql import INSERIR_EXPERIMENTO
+from util import cache, db_util
+from util.html_util import derivar_texto
+from util.migracoes import aplicar_migracoes
+from util.paginacao import codificar_cursor
+
+
+# Experimentos inteiros em ordem de título; LIMIT -1 traz todos
+LISTAR_EXPERIMENTOS_COMPLETOS = """
+SELECT
+    e.id,
+    e.titulo,
+    e.descricao,
+    e.materiais,
+    e.capa,
+    e.video_explicativo,
+    e.resumo,
+    e.palavras,
+    e.minutos_leitura
+FROM experimento e
+ORDER BY e.titulo, e.id
+LIMIT ?;
+"""
+
+
+def listar_experimentos_completos(limite: int = -1) -> List[Experimento]:
+    with db_util.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = db_util.fabrica_modelo(Experimento)
+        cursor.execute(LISTAR_EXPERIMENTOS_COMPLETOS, (limite,))
+        return cursor.fetchall()
+
+
+def preparar(caminho: str, linhas: int) -> None:
+    conn = sqlite3.connect(caminho)
+    db_util.registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    descricao = "<p>descrição do experimento</p>" * 30
+    derivadas = derivar_texto(descricao, "<p>materiais</p>")
+    conn.executemany(INSERIR_EXPERIMENTO, [
+        (f"Experimento {i:07d}", descricao, "<p>materiais</p>", None, None, *derivadas)
+        for i in range(linhas)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def medir(funcao) -> tuple:
+    funcao()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao()
+    tempo = (time.perf_counter() - inicio) * 1000
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tempo, pico / 1024
+
+
+def main() -> None:
+    tamanhos = [int(t) for t in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    # Mede a consulta, não o cache de leituras dos repositórios
+    for c in cache._caches:
+        c.ttl = 0
+    print(f"{'linhas':>8} {'todos (ms)':>12} {'todos (KB)':>12} {'página (ms)':>12} {'página (KB)':>12}")
+    for linhas in tamanhos:
+        fd, caminho = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        db_util._pool = db_util.PoolConexoes(caminho)
+        try:
+            preparar(caminho, linhas)
+            # Página no meio da listagem, como quem navegou até lá
+            cursor = codificar_cursor((f"Experimento {linhas // 2:07d}", linhas // 2 + 1))
+            todos = medir(listar_experimentos_completos)
+            pagina = medir(lambda: experimento_repo.obter_resumos_paginados(12, depois=cursor))
+            print(f"{linhas:>8} {todos[0]:>12.1f} {todos[1]:>12.0f} {pagina[0]:>12.2f} {pagina[1]:>12.0f}")
+        finally:
+            db_util.fechar_pool()
+            for sufixo in ("", "-wal", "-shm"):
+                if os.path.exists(caminho + sufixo):
+                    os.unlink(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
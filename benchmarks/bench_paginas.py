@@ -0,0 +1,99 @@
+"""
+Benchmark: requisições/s nas páginas públicas com e sem cache
+
+Roda a aplicação em processo (httpx + ASGITransport, sem rede) contra um
+banco temporário e mede quatro configurações:
+    sem cache        - toda requisição consulta o SQLite e renderiza o Jinja
+    repositórios     - só o cache de leituras (util/cache.py)
+    + páginas        - também o cache de HTML renderizado (util/cache_paginas.py)
+    revalidação      - visitante que já tem a página (If-None-Match -> 304)
+
+Uso:
+    python -m benchmarks.bench_paginas [requisicoes_por_rota] [concorrencia]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.bench_importacao import gerar
+from data.model.integrante_model import Integrante
+from data.repo import experimento_repo, integrante_repo
+from util import cache, cache_paginas, db_util
+from util.executor import encerrar_executores
+from util.migracoes import aplicar_migracoes
+
+
+def preparar() -> None:
+    aplicar_migracoes()
+    experimento_repo.inserir_experimentos(gerar(200))
+    integrante_repo.inserir_integrantes([
+        Integrante(None, f"Integrante {i:03d}", "3A", "Pesquisa", "/static/foto.jpg", None)
+        for i in range(60)
+    ])
+
+
+def configurar(repositorios: bool, paginas: bool) -> None:
+    for c in cache._caches:
+        c.ttl = cache.TTL_PADRAO if repositorios else 0
+    cache_paginas.HABILITADO = paginas
+    cache.limpar_caches()
+
+
+async def medir(app, rotas, requisicoes: int, concorrencia: int, condicional: bool = False) -> float:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        etags = {}
+        for rota in rotas:
+            resposta = await cliente.get(rota)
+            assert resposta.status_code == 200, rota
+            etags[rota] = resposta.headers["etag"]
+        fila = [rota for rota in rotas for _ in range(requisicoes)]
+        vagas = asyncio.Semaphore(concorrencia)
+        esperado = 304 if condicional else 200
+
+        async def buscar(rota):
+            cabecalhos = {"If-None-Match": etags[rota]} if condicional else None
+            async with vagas:
+                assert (await cliente.get(rota, headers=cabecalhos)).status_code == esperado
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(buscar(rota) for rota in fila))
+        return len(fila) / (time.perf_counter() - inicio)
+
+
+def main() -> None:
+    requisicoes = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    concorrencia = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_util._pool = db_util.PoolConexoes(caminho)
+    try:
+        preparar()
+        from main import app
+        id_exp = experimento_repo.obter_resumos_paginados(1).itens[0].id
+        rotas = ["/", "/cliente/sobre_nos", "/cliente/experimentos",
+                 "/cliente/experimentos?q=bicarbonato", f"/cliente/experimentos/{id_exp}"]
+        print(f"{len(rotas)} rotas x {requisicoes} requisições, concorrência {concorrencia}")
+        for nome, repositorios, paginas, condicional in (
+            ("sem cache", False, False, False),
+            ("repositórios", True, False, False),
+            ("+ páginas", True, True, False),
+            ("revalidação", True, True, True),
+        ):
+            configurar(repositorios, paginas)
+            taxa = asyncio.run(medir(app, rotas, requisicoes, concorrencia, condicional))
+            encerrar_executores()  # os semáforos ficam presos ao loop de cada asyncio.run
+            print(f"{nome:<14} {taxa:>8,.0f} req/s")
+    finally:
+        db_util.fechar_pool()
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.unlink(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
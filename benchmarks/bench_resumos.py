@@ -0,0 +1,104 @@
+"""
+Benchmark: listagem com Experimento completo vs. ExperimentoResumo
+
+Cada experimento tem uma descrição grande, como as que trazem imagens
+coladas no editor (base64). Mede bytes trazidos do banco, tempo de busca
+e, se o Jinja2 estiver instalado, tempo de renderização da listagem.
+
+Uso:
+    python -m benchmarks.bench_resumos [linhas] [kb_por_descricao]
+"""
+import base64
+import dataclasses
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_paginacao import listar_experimentos_completos
+from data.model.pagina_model import Pagina
+from data.repo import experimento_repo
+from data.sql.experimento_sql import INSERIR_EXPERIMENTO
+from util import cache, db_util
+from util.html_util import derivar_texto
+from util.migracoes import aplicar_migracoes
+
+LIMITE = 12
+
+
+def preparar(caminho: str, linhas: int, kb: int) -> None:
+    conn = sqlite3.connect(caminho)
+    db_util.registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    imagem = base64.b64encode(os.urandom(kb * 768)).decode()
+    descricao = f'<p>Experimento com <strong>reação</strong> química.</p><img src="data:image/png;base64,{imagem}">'
+    conn.executemany(INSERIR_EXPERIMENTO, [
+        (f"Experimento {i:06d}", descricao, "<ul><li>água</li></ul>", "/static/capa.jpg", None,
+         *derivar_texto(descricao, "<ul><li>água</li></ul>"))
+        for i in range(linhas)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def tamanho(item) -> int:
+    valores = (getattr(item, campo.name) for campo in dataclasses.fields(item))
+    return sum(len(v) for v in valores if isinstance(v, str))
+
+
+def medir(funcao, repeticoes: int = 20):
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return resultado, (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def carregar_template():
+    try:
+        from jinja2 import Environment, FileSystemLoader
+    except ImportError:
+        return None
+    from util.imagens import imagem_responsiva
+    from util.recursos_estaticos import links_fontes, url_css
+    ambiente = Environment(loader=FileSystemLoader("templates"), autoescape=True)
+    ambiente.globals.update(url_css=url_css, links_fontes=links_fontes, imagem_responsiva=imagem_responsiva)
+    return ambiente.get_template("cliente/experimentos.html")
+
+
+def main() -> None:
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    kb = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    # Mede a consulta, não o cache de leituras dos repositórios
+    for c in cache._caches:
+        c.ttl = 0
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_util._pool = db_util.PoolConexoes(caminho)
+    template = carregar_template()
+    try:
+        preparar(caminho, linhas, kb)
+        print(f"{linhas} experimentos, ~{kb} KB de HTML cada, páginas de {LIMITE}")
+        print(f"{'consulta':<12} {'bytes/página':>14} {'busca (ms)':>12} {'render (ms)':>12}")
+        for nome, funcao in (
+            ("completo", lambda: Pagina(itens=listar_experimentos_completos(LIMITE), limite=LIMITE, total=linhas)),
+            ("resumo", lambda: experimento_repo.obter_resumos_paginados(LIMITE)),
+        ):
+            pagina, tempo_busca = medir(funcao)
+            bytes_pagina = sum(tamanho(item) for item in pagina.itens)
+            tempo_render = float("nan")
+            if template is not None:
+                contexto = {"experimentos": pagina.itens, "pagina": pagina,
+                            "url_base": "/cliente/experimentos", "flash_messages": []}
+                _, tempo_render = medir(lambda: template.render(**contexto))
+            print(f"{nome:<12} {bytes_pagina:>14,} {tempo_busca:>12.2f} {tempo_render:>12.2f}")
+    finally:
+        db_util.fechar_pool()
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.unlink(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
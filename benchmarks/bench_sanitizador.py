@@ -0,0 +1,82 @@
+"""
+Benchmark: sanitização do texto rico por lista de permissões
+
+Mede o sanitizador (util/sanitizador.py) em documentos grandes como os do
+editor: muitos parágrafos formatados, uma imagem colada em base64 e um
+texto com muitas tags não permitidas. Para comparação, a versão anterior
+(substituições de texto e uma regex de atributos on*, sem lista de
+permissões), que era mais rápida por fazer bem menos.
+
+O tempo da versão atual é pago uma vez, ao gravar; a página do
+experimento mostra o HTML gravado sem reprocessá-lo.
+
+Uso:
+    python -m benchmarks.bench_sanitizador [kb_por_documento] [repeticoes]
+"""
+import base64
+import os
+import re
+import sys
+import time
+
+from util.sanitizador import sanitizar_conteudo_html
+
+_PADRAO_ATRIBUTO_EVENTO = re.compile(r'\s+on\w+\s*=\s*["\'][^"\']*["\']', re.IGNORECASE)
+
+
+def sanitizar_anterior(conteudo: str) -> str:
+    """Implementação substituída (não filtra tags nem URLs)"""
+    if not conteudo:
+        return ""
+    conteudo = conteudo.replace('<script', '&lt;script').replace('</script>', '&lt;/script&gt;')
+    conteudo = conteudo.replace('<style', '&lt;style').replace('</style>', '&lt;/style&gt;')
+    return _PADRAO_ATRIBUTO_EVENTO.sub('', conteudo)
+
+
+def documento_editor(kb: int) -> str:
+    paragrafo = (
+        '<h2>Etapa</h2><p class="ql-align-justify">Misture <strong>50 ml</strong> de vinagre com '
+        '<em>duas colheres</em> de bicarbonato &amp; observe a <span style="color: rgb(230, 0, 0);">'
+        'reação</span>. Veja <a href="https://ifes.edu.br/ciencia" rel="noopener noreferrer" '
+        'target="_blank">o roteiro</a>.</p><ul><li>Béquer</li><li class="ql-indent-1">Funil</li></ul>'
+    )
+    return paragrafo * (kb * 1024 // len(paragrafo) + 1)
+
+
+def documento_imagem(kb: int) -> str:
+    imagem = base64.b64encode(os.urandom(kb * 768)).decode()
+    return f'<p>Resultado:</p><p><img src="data:image/png;base64,{imagem}"></p>'
+
+
+def documento_hostil(kb: int) -> str:
+    trecho = (
+        '<div onclick="x()"><font color=red>a</font><script>alert(1)</script>'
+        '<a href="javascript:alert(1)">b</a><iframe src="//x"></iframe><!-- c --></div>'
+    )
+    return trecho * (kb * 1024 // len(trecho) + 1)
+
+
+def medir(funcao, documento: str, repeticoes: int) -> float:
+    funcao(documento)
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(documento)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main() -> None:
+    kb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"Documentos de ~{kb} KB, {repeticoes} repetições")
+    print(f"{'documento':<12} {'anterior (ms)':>14} {'atual (ms)':>12} {'MB/s':>8} {'saída/entrada':>14}")
+    for nome, gerar in (("editor", documento_editor), ("imagem", documento_imagem), ("hostil", documento_hostil)):
+        documento = gerar(kb)
+        anterior = medir(sanitizar_anterior, documento, repeticoes)
+        atual = medir(sanitizar_conteudo_html, documento, repeticoes)
+        taxa = len(documento) / 1024 / 1024 / (atual / 1000)
+        proporcao = len(sanitizar_conteudo_html(documento)) / len(documento)
+        print(f"{nome:<12} {anterior:>14.2f} {atual:>12.2f} {taxa:>8.1f} {proporcao:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark: latência da primeira requisição (fria) vs. requisições seguintes
+
+Cada cenário roda em um processo novo, como um worker recém-iniciado
+depois de um deploy, com os caches em memória desligados (toda requisição
+consulta o banco e renderiza o template, então a diferença entre a
+primeira e as seguintes é o custo de carregar os templates):
+    sem bytecode     - primeiro deploy: o Jinja lê e compila cada template
+    bytecode         - reinício com o cache de bytecode já em disco
+    pré-compilado    - reinício + precompilar_templates() no startup
+
+Uso:
+    python -m benchmarks.bench_templates [repeticoes]
+"""
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+CENARIOS = ("sem bytecode", "bytecode", "pré-compilado")
+
+
+async def medir_rotas(app, rotas, repeticoes: int) -> dict:
+    from util.executor import executar_banco
+    transporte = httpx.ASGITransport(app=app)
+    resultado = {}
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        # Aquece o que não é template (roteamento, middlewares, threads do
+        # executor), como o startup e o health check fariam
+        await cliente.get("/nao-existe")
+        await executar_banco(lambda: None)
+        for rota in rotas:
+            inicio = time.perf_counter()
+            assert (await cliente.get(rota)).status_code == 200, rota
+            primeira = time.perf_counter() - inicio
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                await cliente.get(rota)
+                tempos.append(time.perf_counter() - inicio)
+            resultado[rota] = (primeira * 1000, statistics.median(tempos) * 1000)
+    return resultado
+
+
+def filho(cenario: str, pasta_cache: str, repeticoes: int) -> None:
+    """Um worker novo: prepara o banco, importa a app e mede"""
+    from benchmarks.bench_paginas import preparar
+    from data.repo import experimento_repo
+    from util import cache, cache_paginas, db_util
+    from util.recursos_estaticos import construir_recursos
+    from util.template_util import configurar_cache_templates, precompilar_templates
+
+    fd, caminho = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db_util._pool = db_util.PoolConexoes(caminho)
+    try:
+        preparar()
+        import main
+        cache_paginas.HABILITADO = False
+        for c in cache._caches:
+            c.ttl = 0
+        configurar_cache_templates(main.templates, pasta_cache, producao=True)
+        if cenario == "sem bytecode":
+            main.templates.env.bytecode_cache = None
+        construir_recursos()   # feito no startup em todos os cenários
+
+        startup = 0.0
+        if cenario == "pré-compilado":
+            inicio = time.perf_counter()
+            precompilar_templates(main.templates)
+            startup = (time.perf_counter() - inicio) * 1000
+
+        id_exp = experimento_repo.obter_resumos_paginados(1).itens[0].id
+        rotas = ["/", "/cliente/sobre_nos", "/cliente/experimentos", f"/cliente/experimentos/{id_exp}"]
+        resultado = asyncio.run(medir_rotas(main.app, rotas, repeticoes))
+        print(json.dumps({"startup": startup, "rotas": resultado}))
+    finally:
+        db_util.fechar_pool()
+        for sufixo in ("", "-wal", "-shm"):
+            if os.path.exists(caminho + sufixo):
+                os.unlink(caminho + sufixo)
+
+
+def rodar(cenario: str, pasta_cache: str, repeticoes: int) -> dict:
+    saida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_templates", "--filho", cenario, pasta_cache, str(repeticoes)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main() -> None:
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    from fastapi.templating import Jinja2Templates
+    from util.template_util import configurar_cache_templates, precompilar_templates
+
+    with tempfile.TemporaryDirectory() as pasta_cache:
+        print(f"mediana de {repeticoes} requisições após a primeira; tempos em ms")
+        print(f"{'cenário':<15} {'startup':>8} {'1ª req.':>8} {'mediana':>8}")
+        for cenario in CENARIOS:
+            if cenario == "bytecode":
+                # Simula o cache deixado pelo deploy/worker anterior
+                precompilar_templates(configurar_cache_templates(Jinja2Templates(directory="templates"), pasta_cache))
+            resultado = rodar(cenario, pasta_cache, repeticoes)
+            primeiras = [p for p, _ in resultado["rotas"].values()]
+            medianas = [m for _, m in resultado["rotas"].values()]
+            print(f"{cenario:<15} {resultado['startup']:>8.1f} "
+                  f"{statistics.mean(primeiras):>8.2f} {statistics.mean(medianas):>8.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--filho":
+        filho(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        main()
@@ -13,7 +13,7 @@ def criar_admin_inicial():
     except Exception as e:
         print("❌ Erro ao acessar o banco de dados!")
         print(f"💡 Erro: {str(e)}")
-        print("⚠️  Você precisa executar primeiro a migração do banco de dados (provavelmente 'python criar_banco.py')")
+        print("⚠️  Você precisa executar primeiro a migração do banco de dados ('python -m util.migracoes')")
         return False
 
     if not admins:
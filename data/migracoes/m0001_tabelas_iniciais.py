@@ -0,0 +1,11 @@
+from data.sql.administrador_sql import CRIAR_TABELA_ADMINISTRADOR
+from data.sql.experimento_sql import CRIAR_TABELA_EXPERIMENTO
+from data.sql.integrante_sql import CRIAR_TABELA_INTEGRANTE
+
+DESCRICAO = "Tabelas administrador, integrante e experimento"
+
+
+def aplicar(conn):
+    conn.execute(CRIAR_TABELA_ADMINISTRADOR)
+    conn.execute(CRIAR_TABELA_INTEGRANTE)
+    conn.execute(CRIAR_TABELA_EXPERIMENTO)
@@ -0,0 +1,12 @@
+from data.sql.experimento_sql import (
+    CRIAR_TABELA_EXPERIMENTO_BUSCA, CRIAR_TRIGGERS_EXPERIMENTO_BUSCA, POPULAR_EXPERIMENTO_BUSCA
+)
+
+DESCRICAO = "Índice FTS5 de busca de experimentos"
+
+
+def aplicar(conn):
+    conn.execute(CRIAR_TABELA_EXPERIMENTO_BUSCA)
+    for trigger in CRIAR_TRIGGERS_EXPERIMENTO_BUSCA:
+        conn.execute(trigger)
+    conn.execute(POPULAR_EXPERIMENTO_BUSCA)
@@ -0,0 +1,22 @@
+from data.sql.administrador_sql import CRIAR_INDICE_ADMINISTRADOR_EMAIL
+from data.sql.experimento_sql import CRIAR_INDICE_EXPERIMENTO_TITULO
+from data.sql.integrante_sql import (
+    CRIAR_INDICE_INTEGRANTE_NOME, CRIAR_INDICE_INTEGRANTE_TURMA, CRIAR_INDICE_INTEGRANTE_FUNCAO
+)
+
+DESCRICAO = "Índices de listagem e filtros; e-mail de administrador único"
+
+
+def aplicar(conn):
+    duplicados = conn.execute(
+        "SELECT email FROM administrador GROUP BY email HAVING COUNT(*) > 1"
+    ).fetchall()
+    if duplicados:
+        emails = ", ".join(row[0] for row in duplicados)
+        raise ValueError(f"E-mails de administrador duplicados, corrija antes de migrar: {emails}")
+
+    conn.execute(CRIAR_INDICE_ADMINISTRADOR_EMAIL)
+    conn.execute(CRIAR_INDICE_EXPERIMENTO_TITULO)
+    conn.execute(CRIAR_INDICE_INTEGRANTE_NOME)
+    conn.execute(CRIAR_INDICE_INTEGRANTE_TURMA)
+    conn.execute(CRIAR_INDICE_INTEGRANTE_FUNCAO)
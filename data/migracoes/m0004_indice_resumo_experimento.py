@@ -0,0 +1,9 @@
+from data.sql.experimento_sql import CRIAR_INDICE_EXPERIMENTO_RESUMO, REMOVER_INDICE_EXPERIMENTO_TITULO
+
+DESCRICAO = "Índice de cobertura (titulo, id, capa) para a listagem de resumos"
+
+
+def aplicar(conn):
+    # O novo índice atende as mesmas consultas por título que o anterior
+    conn.execute(REMOVER_INDICE_EXPERIMENTO_TITULO)
+    conn.execute(CRIAR_INDICE_EXPERIMENTO_RESUMO)
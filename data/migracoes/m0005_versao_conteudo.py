@@ -0,0 +1,12 @@
+from data.sql.versao_sql import (
+    CRIAR_TABELA_VERSAO_CONTEUDO, CRIAR_TRIGGERS_VERSAO_CONTEUDO, INICIALIZAR_VERSAO_CONTEUDO
+)
+
+DESCRICAO = "Versão do conteúdo público (ETag/Last-Modified das páginas)"
+
+
+def aplicar(conn):
+    conn.execute(CRIAR_TABELA_VERSAO_CONTEUDO)
+    conn.execute(INICIALIZAR_VERSAO_CONTEUDO)
+    for trigger in CRIAR_TRIGGERS_VERSAO_CONTEUDO:
+        conn.execute(trigger)
@@ -0,0 +1,9 @@
+from data.sql.arquivo_sql import CRIAR_TABELA_ARQUIVO, CRIAR_TRIGGERS_REFERENCIAS_ARQUIVO
+
+DESCRICAO = "Uploads endereçados pelo conteúdo, com contagem de referências"
+
+
+def aplicar(conn):
+    conn.execute(CRIAR_TABELA_ARQUIVO)
+    for trigger in CRIAR_TRIGGERS_REFERENCIAS_ARQUIVO:
+        conn.execute(trigger)
@@ -0,0 +1,9 @@
+from data.sql.arquivo_sql import ADICIONAR_DIMENSOES_ARQUIVO, CRIAR_TRIGGER_VERSAO_DIMENSOES
+
+DESCRICAO = "Largura e altura das imagens enviadas"
+
+
+def aplicar(conn):
+    for comando in ADICIONAR_DIMENSOES_ARQUIVO:
+        conn.execute(comando)
+    conn.execute(CRIAR_TRIGGER_VERSAO_DIMENSOES)
@@ -0,0 +1,8 @@
+from data.sql.tarefa_sql import CRIAR_INDICE_TAREFA_ESTADO, CRIAR_TABELA_TAREFA
+
+DESCRICAO = "Fila persistente de tarefas em segundo plano"
+
+
+def aplicar(conn):
+    conn.execute(CRIAR_TABELA_TAREFA)
+    conn.execute(CRIAR_INDICE_TAREFA_ESTADO)
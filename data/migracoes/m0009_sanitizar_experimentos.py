@@ -0,0 +1,59 @@
+"""
+Sanitiza a descrição e os materiais gravados antes da lista de permissões
+
+A lista de permissões abaixo é uma cópia da de util/sanitizador.py como
+estava quando esta migração foi escrita: mudanças posteriores nas regras
+valem para o que for gravado depois, mas não mudam o que esta migração faz
+em um banco novo (para limpar de novo com regras novas, crie outra
+migração). O mecanismo do sanitizador é o atual, com as correções que
+receber.
+"""
+import re
+
+from data.sql.experimento_sql import ALTERAR_CONTEUDO_EXPERIMENTO, OBTER_LOTE_CONTEUDO_EXPERIMENTO
+from util.sanitizador import RegrasHtml, sanitizar_conteudo_html
+
+DESCRICAO = "Descrição e materiais gravados antes da lista de permissões passam pelo sanitizador"
+
+TAMANHO_LOTE = 200
+
+_COR = re.compile(r"^(?:#[0-9a-f]{3,8}|rgba?\(\s*[\d.,%\s]+\)|[a-z]{3,20})$")
+
+REGRAS = RegrasHtml(
+    tags={
+        **{tag: frozenset() for tag in (
+            "p", "br", "strong", "b", "em", "i", "u", "s", "strike", "sub", "sup",
+            "h1", "h2", "h3", "h4", "h5", "h6",
+            "ul", "ol", "li", "blockquote", "pre", "code", "hr", "span", "div",
+        )},
+        "a": frozenset({"href", "title", "target", "rel"}),
+        "img": frozenset({"src", "alt", "title", "width", "height"}),
+    },
+    atributos_globais=frozenset({"class", "style"}),
+    tags_descartadas=frozenset({
+        "script", "style", "iframe", "object", "embed", "template", "noscript",
+        "textarea", "title", "svg", "math", "xmp", "noembed", "noframes",
+    }),
+    esquemas_link=frozenset({"http", "https", "mailto", "tel"}),
+    esquemas_imagem=frozenset({"http", "https"}),
+    estilos={
+        "color": _COR,
+        "background-color": _COR,
+        "text-align": re.compile(r"^(?:left|right|center|justify)$"),
+    },
+)
+
+
+def aplicar(conn):
+    ultimo = 0
+    while True:
+        lote = conn.execute(OBTER_LOTE_CONTEUDO_EXPERIMENTO, (ultimo, TAMANHO_LOTE)).fetchall()
+        if not lote:
+            return
+        alterados = []
+        for id, descricao, materiais in lote:
+            limpos = (sanitizar_conteudo_html(descricao, REGRAS), sanitizar_conteudo_html(materiais, REGRAS))
+            if limpos != (descricao, materiais):
+                alterados.append((*limpos, id))
+        conn.executemany(ALTERAR_CONTEUDO_EXPERIMENTO, alterados)
+        ultimo = lote[-1][0]
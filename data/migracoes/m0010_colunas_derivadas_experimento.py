@@ -0,0 +1,35 @@
+from data.sql.experimento_sql import (
+    ADICIONAR_COLUNAS_DERIVADAS_EXPERIMENTO, ALTERAR_COLUNAS_DERIVADAS_EXPERIMENTO,
+    CRIAR_TRIGGERS_EXPERIMENTO_BUSCA_TEXTO, OBTER_LOTE_CONTEUDO_EXPERIMENTO,
+    RECRIAR_INDICE_EXPERIMENTO_RESUMO, REMOVER_TRIGGERS_EXPERIMENTO_BUSCA_HTML,
+)
+from util.html_util import derivar_texto
+
+DESCRICAO = "Texto puro, resumo, palavras e tempo de leitura gravados junto com o HTML"
+
+TAMANHO_LOTE = 200
+
+
+def aplicar(conn):
+    for comando in ADICIONAR_COLUNAS_DERIVADAS_EXPERIMENTO:
+        conn.execute(comando)
+
+    # Preenche as linhas existentes; os triggers de busca ainda são os que
+    # leem o HTML e não disparam com as colunas novas
+    ultimo = 0
+    while True:
+        lote = conn.execute(OBTER_LOTE_CONTEUDO_EXPERIMENTO, (ultimo, TAMANHO_LOTE)).fetchall()
+        if not lote:
+            break
+        conn.executemany(
+            ALTERAR_COLUNAS_DERIVADAS_EXPERIMENTO,
+            [(*derivar_texto(descricao, materiais), id) for id, descricao, materiais in lote],
+        )
+        ultimo = lote[-1][0]
+
+    for comando in REMOVER_TRIGGERS_EXPERIMENTO_BUSCA_HTML:
+        conn.execute(comando)
+    for trigger in CRIAR_TRIGGERS_EXPERIMENTO_BUSCA_TEXTO:
+        conn.execute(trigger)
+    for comando in RECRIAR_INDICE_EXPERIMENTO_RESUMO:
+        conn.execute(comando)
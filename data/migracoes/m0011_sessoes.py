@@ -0,0 +1,8 @@
+from data.sql.sessao_sql import CRIAR_INDICE_SESSAO_EXPIRA_EM, CRIAR_TABELA_SESSAO
+
+DESCRICAO = "Sessões guardadas no servidor (o cookie leva só o id)"
+
+
+def aplicar(conn):
+    conn.execute(CRIAR_TABELA_SESSAO)
+    conn.execute(CRIAR_INDICE_SESSAO_EXPIRA_EM)
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(slots=True)
+class Arquivo:
+    url: str
+    resumo: str            # SHA-256 do conteúdo
+    tamanho: int           # bytes
+    referencias: int = 0
+    enviado_em: float = 0.0   # segundos desde 1970 (UTC) do último envio
+    largura: Optional[int] = None   # pixels, só para imagens
+    altura: Optional[int] = None
@@ -1,11 +1,32 @@
 from dataclasses import dataclass
 from typing import Optional
 
-@dataclass
+@dataclass(slots=True)
 class Experimento:
     id: int
     titulo: str
     descricao: str
     materiais: str
     capa: Optional[str] = None  
-    video_explicativo: Optional[str] = None
\ No newline at end of file
+    video_explicativo: Optional[str] = None
+    # Derivados do HTML ao gravar (o repositório ignora os valores recebidos)
+    resumo: str = ""
+    palavras: int = 0
+    minutos_leitura: int = 0
+
+
+@dataclass(slots=True)
+class ExperimentoResumo:
+    id: int
+    titulo: str
+    capa: Optional[str] = None
+    resumo: str = ""    # início da descrição em texto puro (gravado)
+
+
+@dataclass(slots=True)
+class ResultadoBusca:
+    id: int
+    titulo: str
+    capa: Optional[str]
+    trecho: str         # HTML seguro com os termos encontrados em <mark>
+    relevancia: float   # bm25 (quanto menor, mais relevante)
@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class ResultadoImportacao:
+    inseridos: int = 0
+    atualizados: int = 0
+    ignorados: int = 0     # já existiam (ou repetidos no lote) e não foram atualizados
+
+    @property
+    def total(self) -> int:
+        return self.inseridos + self.atualizados + self.ignorados
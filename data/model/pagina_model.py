@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+@dataclass
+class Pagina(Generic[T]):
+    itens: List[T] = field(default_factory=list)
+    limite: int = 0
+    total: int = 0
+    proximo: Optional[str] = None   # cursor para ?after= (None na última página)
+    anterior: Optional[str] = None  # cursor para ?before= (None na primeira página)
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class Sessao:
+    id: str           # aleatório, o mesmo valor do cookie
+    dados: str        # JSON do dicionário da sessão
+    expira_em: float  # segundos desde 1970 (UTC)
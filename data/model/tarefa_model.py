@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(slots=True)
+class Tarefa:
+    id: Optional[int]
+    tipo: str                 # nome registrado com @tarefa(...) em util/tarefas.py
+    argumentos: str = "{}"    # JSON com os argumentos nomeados do tratador
+    chave: Optional[str] = None   # idempotência: uma só pendente por chave
+    estado: str = "pendente"      # pendente, executando, concluida, falhou
+    tentativas: int = 0
+    max_tentativas: int = 5
+    executar_em: float = 0.0      # segundos desde 1970 (UTC)
+    criada_em: float = 0.0
+    iniciada_em: Optional[float] = None
+    concluida_em: Optional[float] = None
+    erro: Optional[str] = None
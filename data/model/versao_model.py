@@ -0,0 +1,6 @@
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class VersaoConteudo:
+    versao: int
+    alterado_em: float     # segundos desde 1970 (UTC)
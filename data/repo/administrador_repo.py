@@ -1,7 +1,7 @@
 from typing import Optional, List
 from data.model.administrador_model import Administrador
 from data.sql.administrador_sql import *
-from util.db_util import get_connection
+from util.db_util import fabrica_modelo, get_connection
 
 
 def inserir_administrador(admin: Administrador) -> Optional[int]:
@@ -23,6 +23,14 @@ def alterar_administrador(admin: Administrador) -> bool:
         return cursor.rowcount > 0
 
 
+def alterar_senha_administrador(id: int, senha_hash: str) -> bool:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ALTERAR_SENHA_ADMINISTRADOR, (senha_hash, id))
+        conn.commit()
+        return cursor.rowcount > 0
+
+
 def excluir_administrador(id: int) -> bool:
     with get_connection() as conn:
         cursor = conn.cursor()
@@ -34,60 +42,32 @@ def excluir_administrador(id: int) -> bool:
 def obter_administrador_por_id(id: int) -> Optional[Administrador]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Administrador)
         cursor.execute(OBTER_POR_ID_ADMINISTRADOR, (id,))
-        row = cursor.fetchone()
-        if row is None:
-            return None
-        return Administrador(
-            id=row["id"],
-            email=row["email"],
-            senha=row["senha"]
-        )
+        return cursor.fetchone()
 
 
 def obter_todos_administradores() -> List[Administrador]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Administrador)
         cursor.execute(OBTER_TODOS_ADMINISTRADOR)
-        rows = cursor.fetchall()
-        return [
-            Administrador(
-                id=row["id"],
-                email=row["email"],
-                senha=row["senha"]
-            )
-            for row in rows
-        ]
+        return cursor.fetchall()
 
 
 def obter_administrador_por_email(email: str) -> Optional[Administrador]:
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, email, senha FROM administrador WHERE email = ?",
-            (email,)
-        )
-        row = cursor.fetchone()
-        if row is None:
-            return None
-        return Administrador(
-            id=row["id"],
-            email=row["email"],
-            senha=row["senha"]
-        )
+        cursor.row_factory = fabrica_modelo(Administrador)
+        cursor.execute(OBTER_ADMINISTRADOR_POR_EMAIL, (email,))
+        return cursor.fetchone()
 
 
 def email_existe(email: str, excluir_id: Optional[int] = None) -> bool:
     with get_connection() as conn:
         cursor = conn.cursor()
         if excluir_id:
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM administrador WHERE email = ? AND id != ?",
-                (email, excluir_id)
-            )
+            cursor.execute(CONTAR_ADMINISTRADOR_POR_EMAIL_EXCETO_ID, (email, excluir_id))
         else:
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM administrador WHERE email = ?",
-                (email,)
-            )
+            cursor.execute(CONTAR_ADMINISTRADOR_POR_EMAIL, (email,))
         return cursor.fetchone()["count"] > 0
\ No newline at end of file
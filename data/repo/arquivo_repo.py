@@ -0,0 +1,104 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from data.model.arquivo_model import Arquivo
+from data.sql.arquivo_sql import *
+from util.cache import conteudo_alterado
+from util.db_util import fabrica_modelo, get_connection, ler_em_lotes
+from util.exportacao import TAMANHO_LOTE
+from util.html_util import urls_de_imagens
+from util.versao_conteudo import escrita_de_conteudo
+
+
+def registrar_arquivo(arquivo: Arquivo) -> None:
+    """Cria o registro do arquivo ou, se o conteúdo já existe, soma as referências"""
+    with get_connection() as conn:
+        conn.execute(REGISTRAR_ARQUIVO, (
+            arquivo.url,
+            arquivo.resumo,
+            arquivo.tamanho,
+            arquivo.referencias,
+            arquivo.enviado_em
+        ))
+        conn.commit()
+
+
+def obter_arquivo_por_url(url: str) -> Optional[Arquivo]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Arquivo)
+        cursor.execute(OBTER_ARQUIVO_POR_URL, (url,))
+        return cursor.fetchone()
+
+
+def obter_dimensoes_arquivos(urls: List[str]) -> Dict[str, Tuple[int, int]]:
+    """(largura, altura) das URLs que já têm dimensões; uma consulta por lote"""
+    dimensoes = {}
+    with get_connection() as conn:
+        for inicio in range(0, len(urls), TAMANHO_LOTE):
+            lote = urls[inicio:inicio + TAMANHO_LOTE]
+            sql = OBTER_DIMENSOES_ARQUIVOS.format(marcadores=", ".join("?" * len(lote)))
+            for url, largura, altura in conn.execute(sql, lote):
+                dimensoes[url] = (largura, altura)
+    return dimensoes
+
+
+def obter_arquivos_sem_dimensoes() -> List[Arquivo]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Arquivo)
+        cursor.execute(OBTER_ARQUIVOS_SEM_DIMENSOES)
+        return cursor.fetchall()
+
+
+def alterar_dimensoes_arquivo(url: str, largura: int, altura: int) -> bool:
+    """Grava as dimensões da imagem; as páginas que a mostram são refeitas"""
+    with escrita_de_conteudo(get_connection()) as conn:
+        cursor = conn.cursor()
+        cursor.execute(ALTERAR_DIMENSOES_ARQUIVO, (largura, altura, url))
+    conteudo_alterado()
+    return cursor.rowcount > 0
+
+
+def excluir_arquivo_sem_referencias(url: str, enviado_antes_de: float) -> bool:
+    """Remove o registro se não houver referências; True se removeu"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXCLUIR_ARQUIVO_SEM_REFERENCIAS, (url, enviado_antes_de))
+        conn.commit()
+        return cursor.rowcount > 0
+
+
+def recontar_referencias(enviado_antes_de: float, tamanho_lote: int = TAMANHO_LOTE,
+                         gravar: bool = True) -> Dict[str, int]:
+    """
+    Conta as referências a cada URL: capa, foto e <img> dos textos ricos
+
+    Percorre integrantes e experimentos em lotes, sem carregar as tabelas.
+    Com `gravar`, corrige `arquivo.referencias` dos enviados antes de
+    `enviado_antes_de`; a leitura e a correção formam uma só transação, e
+    nenhuma gravação concorrente muda a contagem no meio.
+
+    Returns:
+        URL -> número de referências
+    """
+    contagem: Counter = Counter()
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE" if gravar else "BEGIN")
+        try:
+            for lote in ler_em_lotes(conn, OBTER_REFERENCIAS_ARQUIVOS, tamanho_lote):
+                for url, *textos in lote:
+                    # Capa/foto e texto contam separadamente: o trigger da
+                    # capa desconta só a sua parte quando ela muda
+                    contagem.update(set().union(*(urls_de_imagens(t) for t in textos if t)))
+                    if url:
+                        contagem[url] += 1
+            if gravar:
+                conn.execute(CRIAR_TABELA_CONTAGEM_REFERENCIAS)
+                conn.executemany(INSERIR_CONTAGEM_REFERENCIAS, contagem.items())
+                conn.execute(RECONTAR_REFERENCIAS_ARQUIVO, (enviado_antes_de,))
+                conn.execute(EXCLUIR_TABELA_CONTAGEM_REFERENCIAS)
+                conn.commit()
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+    return dict(contagem)
@@ -1,154 +1,258 @@
-from typing import Optional, List
-from data.model.experimento_model import Experimento
+import html
+import re
+from typing import Iterator, Optional, List
+from data.model.experimento_model import Experimento, ExperimentoResumo, ResultadoBusca
+from data.model.importacao_model import ResultadoImportacao
+from data.model.pagina_model import Pagina
 from data.sql.experimento_sql import *
-from util.db_util import get_connection
+from util.cache import CacheLRU, conteudo_alterado, em_cache
+from util.db_util import fabrica_modelo, get_connection, get_connection_exclusiva, ler_em_lotes
+from util.html_util import TAMANHO_RESUMO, derivar_texto
+from util.exportacao import TAMANHO_LOTE
+from util.paginacao import decodificar_cursor, montar_pagina
+from util.versao_conteudo import escrita_de_conteudo
+
+# Palavras da consulta do usuário (descarta aspas, operadores e pontuação do FTS5)
+_PADRAO_TERMO = re.compile(r"\w+", re.UNICODE)
+
+# Caches das leituras públicas, invalidados pelas funções de escrita
+cache_experimento = CacheLRU("experimento", tamanho_maximo=512)        # por id
+cache_listas_experimento = CacheLRU("experimento_listas")              # páginas, contagem, todos
+cache_busca_experimento = CacheLRU("experimento_busca")                # termos pesquisados
+
+
+def _invalidar_caches(id: Optional[int] = None, todos: bool = False) -> None:
+    cache_listas_experimento.limpar()
+    cache_busca_experimento.limpar()
+    if todos:
+        cache_experimento.limpar()
+    elif id is not None:
+        cache_experimento.invalidar(("experimento", id))
+    conteudo_alterado()
+
+
+def montar_consulta_busca(termo: str, colunas: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Converte o texto digitado pelo usuário em uma expressão MATCH do FTS5
+
+    Cada palavra vira um prefixo entre aspas ("bicarb"*), todas obrigatórias.
+    Retorna None se não houver nenhuma palavra pesquisável.
+    """
+    palavras = _PADRAO_TERMO.findall(termo or "")
+    if not palavras:
+        return None
+    expressao = " ".join(f'"{palavra}"*' for palavra in palavras)
+    if colunas:
+        return "{" + " ".join(colunas) + "} : (" + expressao + ")"
+    return expressao
+
+
+def _destacar_trecho(trecho: str) -> str:
+    # snippet() marca os termos com \x02...\x03; escapa o texto e troca por <mark>
+    return html.escape(trecho or "").replace("\x02", "<mark>").replace("\x03", "</mark>")
+
+
+def _linha_resumo(cursor, row) -> ExperimentoResumo:
+    # id, titulo, capa, resumo
+    return ExperimentoResumo(row[0], row[1], row[2], row[3])
+
+
+def _linha_busca(cursor, row) -> ResultadoBusca:
+    # id, titulo, capa, trecho marcado pelo snippet(), relevância
+    return ResultadoBusca(row[0], row[1], row[2], _destacar_trecho(row[3]), row[4])
+
+
+def _parametros(experimento: Experimento) -> tuple:
+    # Colunas de INSERIR_EXPERIMENTO: as do formulário e as derivadas do HTML
+    return (
+        experimento.titulo,
+        experimento.descricao,
+        experimento.materiais,
+        experimento.capa,
+        experimento.video_explicativo,
+        *derivar_texto(experimento.descricao, experimento.materiais),
+    )
 
 
 def inserir_experimento(experimento: Experimento) -> Optional[int]:
-    with get_connection() as conn:
+    parametros = _parametros(experimento)
+    with escrita_de_conteudo(get_connection()) as conn:
         cursor = conn.cursor()
-        cursor.execute(INSERIR_EXPERIMENTO, (
-            experimento.titulo,
-            experimento.descricao,
-            experimento.materiais,
-            experimento.capa,
-            experimento.video_explicativo
-        ))
-        conn.commit()
-        return cursor.lastrowid
+        cursor.execute(INSERIR_EXPERIMENTO, parametros)
+    _invalidar_caches()
+    return cursor.lastrowid
+
+
+def inserir_experimentos(experimentos: List[Experimento], atualizar: bool = False) -> ResultadoImportacao:
+    """
+    Insere vários experimentos em uma única transação
+
+    Títulos que já existem são ignorados ou, com `atualizar=True`, têm o
+    conteúdo substituído pelo do lote. Qualquer erro desfaz o lote inteiro.
+    """
+    if atualizar:
+        # Com títulos repetidos no lote, vale a última ocorrência
+        experimentos = list({e.titulo: e for e in experimentos}.values())
+    parametros = [_parametros(e) for e in experimentos]
+    resultado = ResultadoImportacao()
+    with escrita_de_conteudo(get_connection()) as conn:
+        cursor = conn.cursor()
+        if atualizar:
+            cursor.executemany(ALTERAR_EXPERIMENTO_POR_TITULO, parametros)
+            resultado.atualizados = cursor.rowcount
+        cursor.executemany(INSERIR_EXPERIMENTO_SE_NOVO, parametros)
+        resultado.inseridos = cursor.rowcount
+    _invalidar_caches(todos=resultado.atualizados > 0)
+    resultado.ignorados = len(parametros) - resultado.inseridos - resultado.atualizados
+    return resultado
 
 
 def alterar_experimento(experimento: Experimento) -> bool:
-    with get_connection() as conn:
+    parametros = (*_parametros(experimento), experimento.id)
+    with escrita_de_conteudo(get_connection()) as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            ALTERAR_EXPERIMENTO,
-            (
-                experimento.titulo,
-                experimento.descricao,
-                experimento.materiais,
-                experimento.capa,
-                experimento.video_explicativo,
-                experimento.id
-            )
-        )
-        conn.commit()
-        return cursor.rowcount > 0
+        cursor.execute(ALTERAR_EXPERIMENTO, parametros)
+    _invalidar_caches(experimento.id)
+    return cursor.rowcount > 0
 
 
 def excluir_experimento(id: int) -> bool:
-    with get_connection() as conn:
+    with escrita_de_conteudo(get_connection()) as conn:
         cursor = conn.cursor()
         cursor.execute(EXCLUIR_EXPERIMENTO, (id,))
-        conn.commit()
-        return cursor.rowcount > 0
+    _invalidar_caches(id)
+    return cursor.rowcount > 0
+
+
+def obter_capas_experimentos() -> List[str]:
+    with get_connection() as conn:
+        return [linha[0] for linha in conn.execute(OBTER_CAPAS_EXPERIMENTO)]
+
+
+def substituir_capa(antiga: str, nova: str) -> int:
+    """Troca a capa `antiga` por `nova` em todos os experimentos; retorna quantos mudaram"""
+    with escrita_de_conteudo(get_connection()) as conn:
+        cursor = conn.cursor()
+        cursor.execute(SUBSTITUIR_CAPA_EXPERIMENTO, (nova, antiga))
+    _invalidar_caches(todos=True)
+    return cursor.rowcount
 
 
+@em_cache(cache_experimento, "experimento")
 def obter_experimento_por_id(id: int) -> Optional[Experimento]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Experimento)
         cursor.execute(OBTER_EXPERIMENTO_POR_ID, (id,))
-        row = cursor.fetchone()
-        if row is None:
-            return None
-        return Experimento(
-            id=row["id"],
-            titulo=row["titulo"],
-            descricao=row["descricao"],
-            materiais=row["materiais"],
-            capa=row["capa"],
-            video_explicativo=row["video_explicativo"]
-        )
+        return cursor.fetchone()
 
 
+@em_cache(cache_listas_experimento)
 def obter_todos_experimentos() -> List[Experimento]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Experimento)
         cursor.execute(OBTER_TODOS_EXPERIMENTO)
-        rows = cursor.fetchall()
-        return [
-            Experimento(
-                id=row["id"],
-                titulo=row["titulo"],
-                descricao=row["descricao"],
-                materiais=row["materiais"],
-                capa=row["capa"],
-                video_explicativo=row["video_explicativo"]
-            )
-            for row in rows
-        ]
+        return cursor.fetchall()
+
+
+@em_cache(cache_listas_experimento)
+def contar_experimentos() -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CONTAR_EXPERIMENTOS)
+        return cursor.fetchone()["total"]
+
+
+def exportar_experimentos(colunas: List[str], texto_puro: bool = False,
+                          tamanho_lote: int = TAMANHO_LOTE) -> Iterator[List[tuple]]:
+    """
+    Percorre todos os experimentos em lotes de tuplas, na ordem de `colunas`
+
+    Com `texto_puro`, descricao e materiais saem sem HTML. A conexão fica
+    reservada até o gerador terminar ou ser fechado.
+
+    Raises:
+        ValueError: coluna desconhecida (verificado antes da primeira leitura)
+    """
+    disponiveis = COLUNAS_EXPORTACAO_EXPERIMENTO_TEXTO if texto_puro else COLUNAS_EXPORTACAO_EXPERIMENTO
+    invalidas = [c for c in colunas if c not in disponiveis]
+    if invalidas or not colunas:
+        raise ValueError(f"Colunas inválidas para exportação: {invalidas or colunas}")
+    sql = EXPORTAR_EXPERIMENTOS.format(colunas=", ".join(disponiveis[c] for c in colunas))
+    return _ler_exportacao(sql, tamanho_lote)
+
+
+def _ler_exportacao(sql: str, tamanho_lote: int) -> Iterator[List[tuple]]:
+    with get_connection_exclusiva() as conn:
+        yield from ler_em_lotes(conn, sql, tamanho_lote)
+
+
+@em_cache(cache_listas_experimento)
+def obter_resumos_paginados(limite: int, depois: Optional[str] = None,
+                            antes: Optional[str] = None) -> Pagina[ExperimentoResumo]:
+    chave_depois = decodificar_cursor(depois, 2)
+    chave_antes = decodificar_cursor(antes, 2) if chave_depois is None else None
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = _linha_resumo
+        if chave_depois:
+            cursor.execute(OBTER_PAGINA_RESUMO_EXPERIMENTO_DEPOIS, (*chave_depois, limite + 1))
+        elif chave_antes:
+            cursor.execute(OBTER_PAGINA_RESUMO_EXPERIMENTO_ANTES, (*chave_antes, limite + 1))
+        else:
+            cursor.execute(OBTER_PAGINA_RESUMO_EXPERIMENTO, (limite + 1,))
+        resumos = cursor.fetchall()
+        return montar_pagina(
+            resumos, limite, lambda e: (e.titulo, e.id), contar_experimentos(),
+            para_tras=chave_antes is not None, com_cursor=chave_depois is not None
+        )
 
 
 def obter_experimento_por_titulo(titulo: str) -> Optional[Experimento]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Experimento)
         cursor.execute(OBTER_EXPERIMENTO_POR_TITULO, (titulo,))
-        row = cursor.fetchone()
-        if row is None:
-            return None
-        return Experimento(
-            id=row["id"],
-            titulo=row["titulo"],
-            descricao=row["descricao"],
-            materiais=row["materiais"],
-            capa=row["capa"],
-            video_explicativo=row["video_explicativo"]
-        )
+        return cursor.fetchone()
 
 
-def buscar_experimentos_por_material(material: str) -> List[Experimento]:
+@em_cache(cache_busca_experimento)
+def buscar_experimentos(termo: str, limite: int = 20) -> List[ResultadoBusca]:
+    consulta = montar_consulta_busca(termo)
+    if consulta is None:
+        return []
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, titulo, descricao, materiais, capa, video_explicativo FROM experimento WHERE materiais LIKE ? ORDER BY titulo",
-            (f"%{material}%",)
-        )
-        rows = cursor.fetchall()
-        return [
-            Experimento(
-                id=row["id"],
-                titulo=row["titulo"],
-                descricao=row["descricao"],
-                materiais=row["materiais"],
-                capa=row["capa"],
-                video_explicativo=row["video_explicativo"]
-            )
-            for row in rows
-        ]
+        cursor.row_factory = _linha_busca
+        cursor.execute(BUSCAR_EXPERIMENTOS, (consulta, limite))
+        return cursor.fetchall()
 
 
-def buscar_experimentos_por_descricao(termo: str) -> List[Experimento]:
+def _buscar_experimentos_nas_colunas(termo: str, colunas: List[str]) -> List[Experimento]:
+    consulta = montar_consulta_busca(termo, colunas)
+    if consulta is None:
+        return []
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, titulo, descricao, materiais, capa, video_explicativo FROM experimento WHERE descricao LIKE ? OR titulo LIKE ? ORDER BY titulo",
-            (f"%{termo}%", f"%{termo}%")
-        )
-        rows = cursor.fetchall()
-        return [
-            Experimento(
-                id=row["id"],
-                titulo=row["titulo"],
-                descricao=row["descricao"],
-                materiais=row["materiais"],
-                capa=row["capa"],
-                video_explicativo=row["video_explicativo"]
-            )
-            for row in rows
-        ]
+        cursor.row_factory = fabrica_modelo(Experimento)
+        cursor.execute(BUSCAR_EXPERIMENTOS_ORDEM_TITULO, (consulta,))
+        return cursor.fetchall()
+
+
+def buscar_experimentos_por_material(material: str) -> List[Experimento]:
+    return _buscar_experimentos_nas_colunas(material, ["materiais"])
+
+
+def buscar_experimentos_por_descricao(termo: str) -> List[Experimento]:
+    return _buscar_experimentos_nas_colunas(termo, ["titulo", "descricao"])
 
 
 def titulo_existe(titulo: str, excluir_id: Optional[int] = None) -> bool:
     with get_connection() as conn:
         cursor = conn.cursor()
         if excluir_id:
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM experimento WHERE titulo = ? AND id != ?",
-                (titulo, excluir_id)
-            )
+            cursor.execute(CONTAR_EXPERIMENTO_POR_TITULO_EXCETO_ID, (titulo, excluir_id))
         else:
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM experimento WHERE titulo = ?",
-                (titulo,)
-            )
+            cursor.execute(CONTAR_EXPERIMENTO_POR_TITULO, (titulo,))
         return cursor.fetchone()["count"] > 0
\ No newline at end of file
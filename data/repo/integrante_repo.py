@@ -1,11 +1,25 @@
-from typing import Optional, List
+from typing import Iterator, Optional, List
+from data.model.importacao_model import ResultadoImportacao
 from data.model.integrante_model import Integrante
+from data.model.pagina_model import Pagina
 from data.sql.integrante_sql import *
-from util.db_util import get_connection
+from util.cache import CacheLRU, conteudo_alterado, em_cache
+from util.db_util import fabrica_modelo, get_connection, get_connection_exclusiva, ler_em_lotes
+from util.exportacao import TAMANHO_LOTE
+from util.paginacao import decodificar_cursor, montar_pagina
+from util.versao_conteudo import escrita_de_conteudo
+
+# Cache das listagens públicas, invalidado pelas funções de escrita
+cache_listas_integrante = CacheLRU("integrante_listas")
+
+
+def _invalidar_caches() -> None:
+    cache_listas_integrante.limpar()
+    conteudo_alterado()
 
 
 def inserir_integrante(integrante: Integrante) -> Optional[int]:
-    with get_connection() as conn:
+    with escrita_de_conteudo(get_connection()) as conn:
         cursor = conn.cursor()
         cursor.execute(INSERIR_INTEGRANTE, (
             integrante.nome,
@@ -14,12 +28,39 @@ def inserir_integrante(integrante: Integrante) -> Optional[int]:
             integrante.foto,
             integrante.redes_sociais
         ))
-        conn.commit()
-        return cursor.lastrowid
+    _invalidar_caches()
+    return cursor.lastrowid
+
+
+def inserir_integrantes(integrantes: List[Integrante], atualizar: bool = False) -> ResultadoImportacao:
+    """
+    Insere vários integrantes em uma única transação
+
+    Nomes que já existem são ignorados ou, com `atualizar=True`, têm os
+    dados substituídos pelos do lote. Qualquer erro desfaz o lote inteiro.
+    """
+    if atualizar:
+        # Com nomes repetidos no lote, vale a última ocorrência
+        integrantes = list({i.nome: i for i in integrantes}.values())
+    parametros = [
+        (i.nome, i.turma, i.funcao, i.foto, i.redes_sociais)
+        for i in integrantes
+    ]
+    resultado = ResultadoImportacao()
+    with escrita_de_conteudo(get_connection()) as conn:
+        cursor = conn.cursor()
+        if atualizar:
+            cursor.executemany(ALTERAR_INTEGRANTE_POR_NOME, parametros)
+            resultado.atualizados = cursor.rowcount
+        cursor.executemany(INSERIR_INTEGRANTE_SE_NOVO, parametros)
+        resultado.inseridos = cursor.rowcount
+    _invalidar_caches()
+    resultado.ignorados = len(parametros) - resultado.inseridos - resultado.atualizados
+    return resultado
 
 
 def alterar_integrante(integrante: Integrante) -> bool:
-    with get_connection() as conn:
+    with escrita_de_conteudo(get_connection()) as conn:
         cursor = conn.cursor()
         cursor.execute(
             ALTERAR_INTEGRANTE,
@@ -32,123 +73,128 @@ def alterar_integrante(integrante: Integrante) -> bool:
                 integrante.id
             )
         )
-        conn.commit()
-        return cursor.rowcount > 0
+    _invalidar_caches()
+    return cursor.rowcount > 0
 
 
 def excluir_integrante(id_integrante: int) -> bool:
-    with get_connection() as conn:
+    with escrita_de_conteudo(get_connection()) as conn:
         cursor = conn.cursor()
         cursor.execute(EXCLUIR_INTEGRANTE, (id_integrante,))
-        conn.commit()
-        return cursor.rowcount > 0
+    _invalidar_caches()
+    return cursor.rowcount > 0
+
+
+def obter_fotos_integrantes() -> List[str]:
+    with get_connection() as conn:
+        return [linha[0] for linha in conn.execute(OBTER_FOTOS_INTEGRANTE)]
+
+
+def substituir_foto(antiga: str, nova: str) -> int:
+    """Troca a foto `antiga` por `nova` em todos os integrantes; retorna quantos mudaram"""
+    with escrita_de_conteudo(get_connection()) as conn:
+        cursor = conn.cursor()
+        cursor.execute(SUBSTITUIR_FOTO_INTEGRANTE, (nova, antiga))
+    _invalidar_caches()
+    return cursor.rowcount
 
 
 def obter_integrante_por_id(id_integrante: int) -> Optional[Integrante]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Integrante)
         cursor.execute(OBTER_INTEGRANTE_POR_ID, (id_integrante,))
-        row = cursor.fetchone()
-        if row is None:
-            return None
-        return Integrante(
-            id=row["id_integrante"],
-            nome=row["nome"],
-            turma=row["turma"],
-            funcao=row["funcao"],
-            foto=row["foto"],
-            redes_sociais=row["redes_sociais"]
-        )
+        return cursor.fetchone()
 
 
+@em_cache(cache_listas_integrante)
 def obter_todos_integrantes() -> List[Integrante]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Integrante)
         cursor.execute(OBTER_TODOS_INTEGRANTE)
-        rows = cursor.fetchall()
-        return [
-            Integrante(
-                id=row["id_integrante"],
-                nome=row["nome"],
-                turma=row["turma"],
-                funcao=row["funcao"],
-                foto=row["foto"],
-                redes_sociais=row["redes_sociais"]
-            )
-            for row in rows
-        ]
+        return cursor.fetchall()
+
+
+@em_cache(cache_listas_integrante)
+def obter_integrantes_paginados(limite: int, depois: Optional[str] = None,
+                                antes: Optional[str] = None) -> Pagina[Integrante]:
+    chave_depois = decodificar_cursor(depois, 2)
+    chave_antes = decodificar_cursor(antes, 2) if chave_depois is None else None
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Integrante)
+        if chave_depois:
+            cursor.execute(OBTER_PAGINA_INTEGRANTE_DEPOIS, (*chave_depois, limite + 1))
+        elif chave_antes:
+            cursor.execute(OBTER_PAGINA_INTEGRANTE_ANTES, (*chave_antes, limite + 1))
+        else:
+            cursor.execute(OBTER_PAGINA_INTEGRANTE, (limite + 1,))
+        integrantes = cursor.fetchall()
+        return montar_pagina(
+            integrantes, limite, lambda i: (i.nome, i.id), contar_integrantes(),
+            para_tras=chave_antes is not None, com_cursor=chave_depois is not None
+        )
+
+
+@em_cache(cache_listas_integrante)
+def contar_integrantes() -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CONTAR_INTEGRANTES)
+        return cursor.fetchone()["total"]
+
+
+def exportar_integrantes(colunas: List[str], tamanho_lote: int = TAMANHO_LOTE) -> Iterator[List[tuple]]:
+    """
+    Percorre todos os integrantes em lotes de tuplas, na ordem de `colunas`
+
+    A conexão fica reservada até o gerador terminar ou ser fechado.
+
+    Raises:
+        ValueError: coluna desconhecida (verificado antes da primeira leitura)
+    """
+    invalidas = [c for c in colunas if c not in COLUNAS_EXPORTACAO_INTEGRANTE]
+    if invalidas or not colunas:
+        raise ValueError(f"Colunas inválidas para exportação: {invalidas or colunas}")
+    sql = EXPORTAR_INTEGRANTES.format(colunas=", ".join(COLUNAS_EXPORTACAO_INTEGRANTE[c] for c in colunas))
+    return _ler_exportacao(sql, tamanho_lote)
+
+
+def _ler_exportacao(sql: str, tamanho_lote: int) -> Iterator[List[tuple]]:
+    with get_connection_exclusiva() as conn:
+        yield from ler_em_lotes(conn, sql, tamanho_lote)
 
 
 def obter_integrante_por_nome(nome: str) -> Optional[Integrante]:
     with get_connection() as conn:
         cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Integrante)
         cursor.execute(OBTER_INTEGRANTE_POR_NOME, (nome,))
-        row = cursor.fetchone()
-        if row is None:
-            return None
-        return Integrante(
-            id=row["id_integrante"],
-            nome=row["nome"],
-            turma=row["turma"],
-            funcao=row["funcao"],
-            foto=row["foto"],
-            redes_sociais=row["redes_sociais"]
-        )
+        return cursor.fetchone()
 
 
 def obter_integrantes_por_turma(turma: str) -> List[Integrante]:
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id_integrante, nome, turma, funcao, foto, redes_sociais FROM integrante WHERE turma = ? ORDER BY nome",
-            (turma,)
-        )
-        rows = cursor.fetchall()
-        return [
-            Integrante(
-                id=row["id_integrante"],
-                nome=row["nome"],
-                turma=row["turma"],
-                funcao=row["funcao"],
-                foto=row["foto"],
-                redes_sociais=row["redes_sociais"]
-            )
-            for row in rows
-        ]
+        cursor.row_factory = fabrica_modelo(Integrante)
+        cursor.execute(OBTER_INTEGRANTES_POR_TURMA, (turma,))
+        return cursor.fetchall()
 
 
 def obter_integrantes_por_funcao(funcao: str) -> List[Integrante]:
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id_integrante, nome, turma, funcao, foto, redes_sociais FROM integrante WHERE funcao = ? ORDER BY nome",
-            (funcao,)
-        )
-        rows = cursor.fetchall()
-        return [
-            Integrante(
-                id=row["id_integrante"],
-                nome=row["nome"],
-                turma=row["turma"],
-                funcao=row["funcao"],
-                foto=row["foto"],
-                redes_sociais=row["redes_sociais"]
-            )
-            for row in rows
-        ]
+        cursor.row_factory = fabrica_modelo(Integrante)
+        cursor.execute(OBTER_INTEGRANTES_POR_FUNCAO, (funcao,))
+        return cursor.fetchall()
 
 
 def nome_existe(nome: str, excluir_id: Optional[int] = None) -> bool:
     with get_connection() as conn:
         cursor = conn.cursor()
         if excluir_id:
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM integrante WHERE nome = ? AND id_integrante != ?",
-                (nome, excluir_id)
-            )
+            cursor.execute(CONTAR_INTEGRANTE_POR_NOME_EXCETO_ID, (nome, excluir_id))
         else:
-            cursor.execute(
-                "SELECT COUNT(*) as count FROM integrante WHERE nome = ?",
-                (nome,)
-            )
+            cursor.execute(CONTAR_INTEGRANTE_POR_NOME, (nome,))
         return cursor.fetchone()["count"] > 0
\ No newline at end of file
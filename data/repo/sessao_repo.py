@@ -0,0 +1,38 @@
+from typing import Optional
+from data.model.sessao_model import Sessao
+from data.sql.sessao_sql import *
+from util.db_util import fabrica_modelo, get_connection
+
+
+def obter_sessao(id: str, agora: float) -> Optional[Sessao]:
+    """A sessão, se existir e ainda não tiver expirado"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Sessao)
+        cursor.execute(OBTER_SESSAO, (id, agora))
+        return cursor.fetchone()
+
+
+def gravar_sessao(sessao: Sessao) -> None:
+    """Insere ou substitui a sessão"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(GRAVAR_SESSAO, (sessao.id, sessao.dados, sessao.expira_em))
+        conn.commit()
+
+
+def excluir_sessao(id: str) -> bool:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXCLUIR_SESSAO, (id,))
+        conn.commit()
+        return cursor.rowcount > 0
+
+
+def excluir_sessoes_expiradas(agora: float) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXCLUIR_SESSOES_EXPIRADAS, (agora,))
+        conn.commit()
+        return cursor.rowcount
+
@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional
+from data.model.tarefa_model import Tarefa
+from data.sql.tarefa_sql import *
+from util.db_util import fabrica_modelo, get_connection
+
+
+def enfileirar_tarefa(tarefa: Tarefa) -> Optional[int]:
+    """Insere a tarefa; None se já havia uma pendente com a mesma chave"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ENFILEIRAR_TAREFA, (
+            tarefa.tipo,
+            tarefa.argumentos,
+            tarefa.chave,
+            tarefa.max_tentativas,
+            tarefa.executar_em,
+            tarefa.criada_em
+        ))
+        linha = cursor.fetchone()
+        conn.commit()
+        return linha[0] if linha else None
+
+
+def reservar_proxima_tarefa(agora: float, bloqueada_ate: float) -> Optional[Tarefa]:
+    """Marca a próxima tarefa vencida como em execução e a retorna"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Tarefa)
+        cursor.execute(RESERVAR_PROXIMA_TAREFA, (agora, bloqueada_ate, agora, agora))
+        tarefa = cursor.fetchone()
+        conn.commit()
+        return tarefa
+
+
+def concluir_tarefa(tarefa: Tarefa, concluida_em: float) -> bool:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CONCLUIR_TAREFA, (concluida_em, tarefa.id, tarefa.iniciada_em))
+        conn.commit()
+        return cursor.rowcount > 0
+
+
+def falhar_tarefa(tarefa: Tarefa, erro: str, executar_em: float, agora: float) -> bool:
+    """Agenda nova tentativa em `executar_em`, ou marca como falha se acabaram"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(FALHAR_TAREFA, (executar_em, agora, erro, tarefa.id, tarefa.iniciada_em))
+        conn.commit()
+        return cursor.rowcount > 0
+
+
+def devolver_tarefa(tarefa: Tarefa) -> bool:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(DEVOLVER_TAREFA, (tarefa.id, tarefa.iniciada_em))
+        conn.commit()
+        return cursor.rowcount > 0
+
+
+def reenfileirar_tarefas_falhas(executar_em: float) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(REENFILEIRAR_TAREFAS_FALHAS, (executar_em,))
+        conn.commit()
+        return cursor.rowcount
+
+
+def contar_tarefas_por_estado() -> Dict[str, int]:
+    with get_connection() as conn:
+        return dict(conn.execute(CONTAR_TAREFAS_POR_ESTADO).fetchall())
+
+
+def obter_tarefa_por_id(id: int) -> Optional[Tarefa]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Tarefa)
+        cursor.execute(OBTER_TAREFA_POR_ID, (id,))
+        return cursor.fetchone()
+
+
+def obter_tarefas_recentes(limite: int, estado: Optional[str] = None) -> List[Tarefa]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Tarefa)
+        if estado:
+            cursor.execute(OBTER_TAREFAS_RECENTES_POR_ESTADO, (estado, limite))
+        else:
+            cursor.execute(OBTER_TAREFAS_RECENTES, (limite,))
+        return cursor.fetchall()
+
+
+def excluir_tarefas_encerradas(concluidas_antes_de: float, falhas_antes_de: float) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXCLUIR_TAREFAS_ENCERRADAS, (concluidas_antes_de, falhas_antes_de))
+        conn.commit()
+        return cursor.rowcount
@@ -0,0 +1,17 @@
+from typing import Optional
+from data.model.versao_model import VersaoConteudo
+from data.sql.versao_sql import *
+from util.db_util import fabrica_modelo, get_connection
+
+
+def obter_versao_conteudo() -> Optional[VersaoConteudo]:
+    with get_connection() as conn:
+        return ler_versao_conteudo(conn)
+
+
+def ler_versao_conteudo(conn) -> Optional[VersaoConteudo]:
+    """Versão vista pela transação em andamento em `conn`"""
+    cursor = conn.cursor()
+    cursor.row_factory = fabrica_modelo(VersaoConteudo)
+    cursor.execute(OBTER_VERSAO_CONTEUDO)
+    return cursor.fetchone()
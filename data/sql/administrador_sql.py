@@ -18,6 +18,12 @@ SET email=?, senha=?
 WHERE id=?;
 """
 
+ALTERAR_SENHA_ADMINISTRADOR = """
+UPDATE administrador
+SET senha=?
+WHERE id=?;
+"""
+
 EXCLUIR_ADMINISTRADOR = """
 DELETE FROM administrador
 WHERE id=?;
@@ -35,4 +41,23 @@ SELECT
     id, email, senha 
 FROM administrador
 ORDER BY id;
-"""
\ No newline at end of file
+"""
+
+OBTER_ADMINISTRADOR_POR_EMAIL = """
+SELECT 
+    id, email, senha
+FROM administrador
+WHERE email = ?;
+"""
+
+CONTAR_ADMINISTRADOR_POR_EMAIL = """
+SELECT COUNT(*) as count FROM administrador WHERE email = ?;
+"""
+
+CONTAR_ADMINISTRADOR_POR_EMAIL_EXCETO_ID = """
+SELECT COUNT(*) as count FROM administrador WHERE email = ? AND id != ?;
+"""
+
+CRIAR_INDICE_ADMINISTRADOR_EMAIL = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_administrador_email ON administrador (email);
+"""
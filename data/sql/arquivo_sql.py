@@ -0,0 +1,136 @@
+# Uploads endereçados pelo conteúdo (SHA-256): um arquivo por conteúdo, com
+# contagem de referências mantida por triggers em experimento.capa e
+# integrante.foto (de qualquer processo, inclusive a importação em lote)
+
+from data.sql.versao_sql import INCREMENTAR_VERSAO_CONTEUDO
+
+CRIAR_TABELA_ARQUIVO = """
+CREATE TABLE IF NOT EXISTS arquivo (
+    url          TEXT    PRIMARY KEY,
+    resumo       TEXT    NOT NULL,
+    tamanho      INTEGER NOT NULL,
+    referencias  INTEGER NOT NULL DEFAULT 0,
+    enviado_em   REAL    NOT NULL
+);
+"""
+
+# Dimensões da imagem original (m0007), preenchidas ao gerar as derivadas
+ADICIONAR_DIMENSOES_ARQUIVO = [
+    "ALTER TABLE arquivo ADD COLUMN largura INTEGER NULL;",
+    "ALTER TABLE arquivo ADD COLUMN altura INTEGER NULL;",
+]
+
+# Com as dimensões as páginas passam a ter width/height e srcset: muda a
+# versão do conteúdo para que o HTML em cache (e as ETags) sejam refeitos
+CRIAR_TRIGGER_VERSAO_DIMENSOES = f"""
+CREATE TRIGGER IF NOT EXISTS arquivo_versao_au AFTER UPDATE OF largura, altura ON arquivo BEGIN
+    {INCREMENTAR_VERSAO_CONTEUDO.strip()}
+END;
+"""
+
+# (tabela, coluna) que apontam para a URL de um arquivo
+COLUNAS_COM_ARQUIVO = (("experimento", "capa"), ("integrante", "foto"))
+
+CRIAR_TRIGGERS_REFERENCIAS_ARQUIVO = [
+    trigger
+    for tabela, coluna in COLUNAS_COM_ARQUIVO
+    for trigger in (
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {tabela}_arquivo_ai AFTER INSERT ON {tabela}
+        WHEN NEW.{coluna} IS NOT NULL BEGIN
+            UPDATE arquivo SET referencias = referencias + 1 WHERE url = NEW.{coluna};
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {tabela}_arquivo_au AFTER UPDATE OF {coluna} ON {tabela}
+        WHEN OLD.{coluna} IS NOT NEW.{coluna} BEGIN
+            UPDATE arquivo SET referencias = referencias - 1 WHERE url = OLD.{coluna};
+            UPDATE arquivo SET referencias = referencias + 1 WHERE url = NEW.{coluna};
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {tabela}_arquivo_ad AFTER DELETE ON {tabela}
+        WHEN OLD.{coluna} IS NOT NULL BEGIN
+            UPDATE arquivo SET referencias = referencias - 1 WHERE url = OLD.{coluna};
+        END;
+        """,
+    )
+]
+
+# Reenvio do mesmo conteúdo: soma as referências fixas e renova enviado_em
+REGISTRAR_ARQUIVO = """
+INSERT INTO arquivo (url, resumo, tamanho, referencias, enviado_em)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(url) DO UPDATE SET
+    referencias = referencias + excluded.referencias,
+    enviado_em = excluded.enviado_em;
+"""
+
+OBTER_ARQUIVO_POR_URL = """
+SELECT url, resumo, tamanho, referencias, enviado_em, largura, altura
+FROM arquivo
+WHERE url = ?;
+"""
+
+# Dimensões de várias imagens de uma vez (as de uma página); `marcadores`
+# recebe um "?" por URL
+OBTER_DIMENSOES_ARQUIVOS = """
+SELECT url, largura, altura
+FROM arquivo
+WHERE url IN ({marcadores}) AND largura IS NOT NULL;
+"""
+
+OBTER_ARQUIVOS_SEM_DIMENSOES = """
+SELECT url, resumo, tamanho, referencias, enviado_em, largura, altura
+FROM arquivo
+WHERE largura IS NULL
+ORDER BY url;
+"""
+
+ALTERAR_DIMENSOES_ARQUIVO = """
+UPDATE arquivo
+SET largura=?, altura=?
+WHERE url=?;
+"""
+
+# Só apaga se ninguém mais aponta para o arquivo e ele não foi enviado de
+# novo há pouco (o upload grava a linha antes de o formulário ser salvo)
+EXCLUIR_ARQUIVO_SEM_REFERENCIAS = """
+DELETE FROM arquivo
+WHERE url = ? AND referencias <= 0 AND enviado_em < ?;
+"""
+
+# --- COLETA DE ÓRFÃOS (util/coleta_arquivos.py) ---
+
+# Uma linha por registro que pode citar arquivos: a URL de capa/foto e os
+# textos ricos, de onde saem os <img src>
+OBTER_REFERENCIAS_ARQUIVOS = """
+SELECT foto, NULL, NULL FROM integrante
+UNION ALL
+SELECT capa, descricao, materiais FROM experimento;
+"""
+
+CRIAR_TABELA_CONTAGEM_REFERENCIAS = """
+CREATE TEMP TABLE IF NOT EXISTS contagem_referencias (
+    url    TEXT    PRIMARY KEY,
+    total  INTEGER NOT NULL
+);
+"""
+
+INSERIR_CONTAGEM_REFERENCIAS = """
+INSERT INTO contagem_referencias (url, total) VALUES (?, ?);
+"""
+
+EXCLUIR_TABELA_CONTAGEM_REFERENCIAS = """
+DROP TABLE IF EXISTS temp.contagem_referencias;
+"""
+
+# Os enviados dentro da carência mantêm a contagem (inclusive a referência
+# fixa das imagens do editor cujo texto ainda não foi salvo)
+RECONTAR_REFERENCIAS_ARQUIVO = """
+UPDATE arquivo
+SET referencias = COALESCE(
+    (SELECT total FROM contagem_referencias c WHERE c.url = arquivo.url), 0
+)
+WHERE enviado_em < ?;
+"""
@@ -9,18 +9,56 @@ CREATE TABLE IF NOT EXISTS experimento (
 );
 """
 
+# --- COLUNAS DERIVADAS (m0010) ---
+# Texto puro, resumo, palavras e tempo de leitura, calculados a partir do
+# HTML ao gravar (util.html_util.derivar_texto) para que listagem, busca e
+# exportação não convertam HTML a cada leitura. Toda escrita em descricao
+# e materiais deve gravá-las junto.
+
+ADICIONAR_COLUNAS_DERIVADAS_EXPERIMENTO = [
+    "ALTER TABLE experimento ADD COLUMN descricao_texto TEXT NOT NULL DEFAULT '';",
+    "ALTER TABLE experimento ADD COLUMN materiais_texto TEXT NOT NULL DEFAULT '';",
+    "ALTER TABLE experimento ADD COLUMN resumo TEXT NOT NULL DEFAULT '';",
+    "ALTER TABLE experimento ADD COLUMN palavras INTEGER NOT NULL DEFAULT 0;",
+    "ALTER TABLE experimento ADD COLUMN minutos_leitura INTEGER NOT NULL DEFAULT 0;",
+]
+
+# Parâmetros: titulo, descricao, materiais, capa, video_explicativo,
+# seguidos das colunas derivadas (descricao_texto ... minutos_leitura)
 INSERIR_EXPERIMENTO = """
 INSERT INTO experimento (
-    titulo, descricao, materiais, capa, video_explicativo
-) VALUES (?, ?, ?, ?, ?);
+    titulo, descricao, materiais, capa, video_explicativo,
+    descricao_texto, materiais_texto, resumo, palavras, minutos_leitura
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
 """
 
 ALTERAR_EXPERIMENTO = """
 UPDATE experimento
-SET titulo=?, descricao=?, materiais=?, capa=?, video_explicativo=?
+SET titulo=?, descricao=?, materiais=?, capa=?, video_explicativo=?,
+    descricao_texto=?, materiais_texto=?, resumo=?, palavras=?, minutos_leitura=?
 WHERE id=?;
 """
 
+# --- IMPORTAÇÃO EM LOTE (executemany) ---
+
+# Parâmetros: os mesmos de INSERIR_EXPERIMENTO
+INSERIR_EXPERIMENTO_SE_NOVO = """
+INSERT INTO experimento (
+    titulo, descricao, materiais, capa, video_explicativo,
+    descricao_texto, materiais_texto, resumo, palavras, minutos_leitura
+)
+SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10
+WHERE NOT EXISTS (SELECT 1 FROM experimento WHERE titulo = ?1);
+"""
+
+# Capa e vídeo ausentes no lote mantêm os valores atuais
+ALTERAR_EXPERIMENTO_POR_TITULO = """
+UPDATE experimento
+SET descricao=?2, materiais=?3, capa=COALESCE(?4, capa), video_explicativo=COALESCE(?5, video_explicativo),
+    descricao_texto=?6, materiais_texto=?7, resumo=?8, palavras=?9, minutos_leitura=?10
+WHERE titulo=?1;
+"""
+
 EXCLUIR_EXPERIMENTO = """
 DELETE FROM experimento
 WHERE id=?;
@@ -33,7 +71,10 @@ SELECT
     e.descricao,
     e.materiais,
     e.capa,
-    e.video_explicativo
+    e.video_explicativo,
+    e.resumo,
+    e.palavras,
+    e.minutos_leitura
 FROM experimento e
 WHERE e.id = ?;
 """
@@ -45,7 +86,10 @@ SELECT
     e.descricao,
     e.materiais,
     e.capa,
-    e.video_explicativo
+    e.video_explicativo,
+    e.resumo,
+    e.palavras,
+    e.minutos_leitura
 FROM experimento e
 ORDER BY e.titulo;
 """
@@ -57,8 +101,251 @@ SELECT
     e.descricao,
     e.materiais,
     e.capa,
-    e.video_explicativo
+    e.video_explicativo,
+    e.resumo,
+    e.palavras,
+    e.minutos_leitura
 FROM experimento e
 WHERE e.titulo = ?;
 """
- 
\ No newline at end of file
+ 
+CONTAR_EXPERIMENTO_POR_TITULO = """
+SELECT COUNT(*) as count FROM experimento WHERE titulo = ?;
+"""
+
+CONTAR_EXPERIMENTO_POR_TITULO_EXCETO_ID = """
+SELECT COUNT(*) as count FROM experimento WHERE titulo = ? AND id != ?;
+"""
+
+# --- PAGINAÇÃO (keyset sobre titulo, id) ---
+
+CRIAR_INDICE_EXPERIMENTO_TITULO = """
+CREATE INDEX IF NOT EXISTS idx_experimento_titulo ON experimento (titulo, id);
+"""
+
+CONTAR_EXPERIMENTOS = """
+SELECT COUNT(*) AS total FROM experimento;
+"""
+
+# --- EXPORTAÇÃO (streaming em ordem de id) ---
+
+# Colunas exportáveis: nome no arquivo -> expressão SQL
+COLUNAS_EXPORTACAO_EXPERIMENTO = {
+    "id": "e.id",
+    "titulo": "e.titulo",
+    "descricao": "e.descricao",
+    "materiais": "e.materiais",
+    "capa": "e.capa",
+    "video_explicativo": "e.video_explicativo",
+}
+
+# Mesmas colunas com o HTML do editor convertido em texto puro
+COLUNAS_EXPORTACAO_EXPERIMENTO_TEXTO = {
+    **COLUNAS_EXPORTACAO_EXPERIMENTO,
+    "descricao": "e.descricao_texto",
+    "materiais": "e.materiais_texto",
+}
+
+# {colunas} só recebe expressões das listas acima
+EXPORTAR_EXPERIMENTOS = """
+SELECT {colunas}
+FROM experimento e
+ORDER BY e.id;
+"""
+
+# --- RESUMOS PARA LISTAGEM ---
+# Só id, titulo, capa e o resumo gravado. O índice cobre (titulo, id, capa,
+# resumo), então a listagem não lê as linhas da tabela experimento, onde
+# ficam os HTMLs grandes.
+
+CRIAR_INDICE_EXPERIMENTO_RESUMO = """
+CREATE INDEX IF NOT EXISTS idx_experimento_resumo ON experimento (titulo, id, capa);
+"""
+
+REMOVER_INDICE_EXPERIMENTO_TITULO = """
+DROP INDEX IF EXISTS idx_experimento_titulo;
+"""
+
+# m0010: o resumo passa a ser coluna da tabela e entra no índice
+RECRIAR_INDICE_EXPERIMENTO_RESUMO = [
+    "DROP INDEX IF EXISTS idx_experimento_resumo;",
+    "CREATE INDEX idx_experimento_resumo ON experimento (titulo, id, capa, resumo);",
+]
+
+OBTER_PAGINA_RESUMO_EXPERIMENTO = """
+SELECT 
+    e.id,
+    e.titulo,
+    e.capa,
+    e.resumo
+FROM experimento e
+ORDER BY e.titulo, e.id
+LIMIT ?;
+"""
+
+OBTER_PAGINA_RESUMO_EXPERIMENTO_DEPOIS = """
+SELECT 
+    e.id,
+    e.titulo,
+    e.capa,
+    e.resumo
+FROM experimento e
+WHERE (e.titulo, e.id) > (?, ?)
+ORDER BY e.titulo, e.id
+LIMIT ?;
+"""
+
+OBTER_PAGINA_RESUMO_EXPERIMENTO_ANTES = """
+SELECT 
+    e.id,
+    e.titulo,
+    e.capa,
+    e.resumo
+FROM experimento e
+WHERE (e.titulo, e.id) < (?, ?)
+ORDER BY e.titulo DESC, e.id DESC
+LIMIT ?;
+"""
+
+# --- BUSCA TEXTUAL (FTS5) ---
+# Índice de texto puro (sem tags HTML) de titulo, descricao e materiais.
+# O tokenizer unicode61 com remove_diacritics ignora acentos ("química" = "quimica").
+# Os triggers criados em m0002 usam a função texto_html(), registrada em cada
+# conexão por util.db_util.registrar_funcoes(); desde m0010 os de inserção e
+# alteração copiam o texto puro já gravado nas colunas derivadas.
+
+CRIAR_TABELA_EXPERIMENTO_BUSCA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS experimento_busca USING fts5(
+    titulo,
+    descricao,
+    materiais,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+CRIAR_TRIGGERS_EXPERIMENTO_BUSCA = [
+    """
+    CREATE TRIGGER IF NOT EXISTS experimento_busca_ai AFTER INSERT ON experimento BEGIN
+        INSERT INTO experimento_busca (rowid, titulo, descricao, materiais)
+        VALUES (new.id, new.titulo, texto_html(new.descricao), texto_html(new.materiais));
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS experimento_busca_ad AFTER DELETE ON experimento BEGIN
+        DELETE FROM experimento_busca WHERE rowid = old.id;
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS experimento_busca_au AFTER UPDATE OF titulo, descricao, materiais ON experimento BEGIN
+        UPDATE experimento_busca
+        SET titulo = new.titulo,
+            descricao = texto_html(new.descricao),
+            materiais = texto_html(new.materiais)
+        WHERE rowid = new.id;
+    END;
+    """,
+]
+
+# m0010: mesmos triggers, lendo as colunas derivadas em vez do HTML
+REMOVER_TRIGGERS_EXPERIMENTO_BUSCA_HTML = [
+    "DROP TRIGGER IF EXISTS experimento_busca_ai;",
+    "DROP TRIGGER IF EXISTS experimento_busca_au;",
+]
+
+CRIAR_TRIGGERS_EXPERIMENTO_BUSCA_TEXTO = [
+    """
+    CREATE TRIGGER IF NOT EXISTS experimento_busca_ai AFTER INSERT ON experimento BEGIN
+        INSERT INTO experimento_busca (rowid, titulo, descricao, materiais)
+        VALUES (new.id, new.titulo, new.descricao_texto, new.materiais_texto);
+    END;
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS experimento_busca_au
+    AFTER UPDATE OF titulo, descricao_texto, materiais_texto ON experimento BEGIN
+        UPDATE experimento_busca
+        SET titulo = new.titulo,
+            descricao = new.descricao_texto,
+            materiais = new.materiais_texto
+        WHERE rowid = new.id;
+    END;
+    """,
+]
+
+# Indexa as linhas que ainda não estão no índice (banco já existente)
+POPULAR_EXPERIMENTO_BUSCA = """
+INSERT INTO experimento_busca (rowid, titulo, descricao, materiais)
+SELECT e.id, e.titulo, texto_html(e.descricao), texto_html(e.materiais)
+FROM experimento e
+WHERE e.id NOT IN (SELECT rowid FROM experimento_busca);
+"""
+
+# Pesos do bm25 por coluna: titulo, descricao, materiais
+BUSCAR_EXPERIMENTOS = """
+SELECT
+    e.id,
+    e.titulo,
+    e.capa,
+    snippet(experimento_busca, -1, char(2), char(3), '…', 24) AS trecho,
+    bm25(experimento_busca, 10.0, 1.0, 3.0) AS relevancia
+FROM experimento_busca
+JOIN experimento e ON e.id = experimento_busca.rowid
+WHERE experimento_busca MATCH ?
+ORDER BY relevancia
+LIMIT ?;
+"""
+
+BUSCAR_EXPERIMENTOS_ORDEM_TITULO = """
+SELECT
+    e.id,
+    e.titulo,
+    e.descricao,
+    e.materiais,
+    e.capa,
+    e.video_explicativo,
+    e.resumo,
+    e.palavras,
+    e.minutos_leitura
+FROM experimento_busca
+JOIN experimento e ON e.id = experimento_busca.rowid
+WHERE experimento_busca MATCH ?
+ORDER BY e.titulo;
+"""
+
+# --- SANITIZAÇÃO DO CONTEÚDO JÁ GRAVADO (m0009) ---
+
+OBTER_LOTE_CONTEUDO_EXPERIMENTO = """
+SELECT id, descricao, materiais
+FROM experimento
+WHERE id > ?
+ORDER BY id
+LIMIT ?;
+"""
+
+ALTERAR_CONTEUDO_EXPERIMENTO = """
+UPDATE experimento
+SET descricao=?, materiais=?
+WHERE id=?;
+"""
+
+# --- COLUNAS DERIVADAS DO CONTEÚDO JÁ GRAVADO (m0010) ---
+
+ALTERAR_COLUNAS_DERIVADAS_EXPERIMENTO = """
+UPDATE experimento
+SET descricao_texto=?, materiais_texto=?, resumo=?, palavras=?, minutos_leitura=?
+WHERE id=?;
+"""
+
+# --- UPLOADS ANTIGOS PARA O ARMAZENAMENTO POR CONTEÚDO (python -m util.imagens) ---
+
+OBTER_CAPAS_EXPERIMENTO = """
+SELECT DISTINCT capa
+FROM experimento
+WHERE capa IS NOT NULL;
+"""
+
+SUBSTITUIR_CAPA_EXPERIMENTO = """
+UPDATE experimento
+SET capa=?
+WHERE capa=?;
+"""
@@ -21,6 +21,24 @@ SET nome=?, turma=?, funcao=?, foto=?, redes_sociais=?
 WHERE id_integrante=?;
 """
 
+# --- IMPORTAÇÃO EM LOTE (executemany) ---
+
+# Parâmetros: nome, turma, funcao, foto, redes_sociais
+INSERIR_INTEGRANTE_SE_NOVO = """
+INSERT INTO integrante (
+    nome, turma, funcao, foto, redes_sociais
+)
+SELECT ?1, ?2, ?3, ?4, ?5
+WHERE NOT EXISTS (SELECT 1 FROM integrante WHERE nome = ?1);
+"""
+
+# Foto e redes sociais ausentes no lote mantêm os valores atuais
+ALTERAR_INTEGRANTE_POR_NOME = """
+UPDATE integrante
+SET turma=?2, funcao=?3, foto=COALESCE(?4, foto), redes_sociais=COALESCE(?5, redes_sociais)
+WHERE nome=?1;
+"""
+
 EXCLUIR_INTEGRANTE = """
 DELETE FROM integrante
 WHERE id_integrante=?;
@@ -61,3 +79,129 @@ SELECT
 FROM integrante i
 WHERE i.nome = ?;
 """
+
+OBTER_INTEGRANTES_POR_TURMA = """
+SELECT 
+    i.id_integrante,
+    i.nome,
+    i.turma,
+    i.funcao,
+    i.foto,
+    i.redes_sociais
+FROM integrante i
+WHERE i.turma = ?
+ORDER BY i.nome;
+"""
+
+OBTER_INTEGRANTES_POR_FUNCAO = """
+SELECT 
+    i.id_integrante,
+    i.nome,
+    i.turma,
+    i.funcao,
+    i.foto,
+    i.redes_sociais
+FROM integrante i
+WHERE i.funcao = ?
+ORDER BY i.nome;
+"""
+
+CONTAR_INTEGRANTE_POR_NOME = """
+SELECT COUNT(*) as count FROM integrante WHERE nome = ?;
+"""
+
+CONTAR_INTEGRANTE_POR_NOME_EXCETO_ID = """
+SELECT COUNT(*) as count FROM integrante WHERE nome = ? AND id_integrante != ?;
+"""
+
+CRIAR_INDICE_INTEGRANTE_TURMA = """
+CREATE INDEX IF NOT EXISTS idx_integrante_turma ON integrante (turma, nome);
+"""
+
+CRIAR_INDICE_INTEGRANTE_FUNCAO = """
+CREATE INDEX IF NOT EXISTS idx_integrante_funcao ON integrante (funcao, nome);
+"""
+
+# --- PAGINAÇÃO (keyset sobre nome, id_integrante) ---
+
+CRIAR_INDICE_INTEGRANTE_NOME = """
+CREATE INDEX IF NOT EXISTS idx_integrante_nome ON integrante (nome, id_integrante);
+"""
+
+OBTER_PAGINA_INTEGRANTE = """
+SELECT 
+    i.id_integrante,
+    i.nome,
+    i.turma,
+    i.funcao,
+    i.foto,
+    i.redes_sociais
+FROM integrante i
+ORDER BY i.nome, i.id_integrante
+LIMIT ?;
+"""
+
+OBTER_PAGINA_INTEGRANTE_DEPOIS = """
+SELECT 
+    i.id_integrante,
+    i.nome,
+    i.turma,
+    i.funcao,
+    i.foto,
+    i.redes_sociais
+FROM integrante i
+WHERE (i.nome, i.id_integrante) > (?, ?)
+ORDER BY i.nome, i.id_integrante
+LIMIT ?;
+"""
+
+OBTER_PAGINA_INTEGRANTE_ANTES = """
+SELECT 
+    i.id_integrante,
+    i.nome,
+    i.turma,
+    i.funcao,
+    i.foto,
+    i.redes_sociais
+FROM integrante i
+WHERE (i.nome, i.id_integrante) < (?, ?)
+ORDER BY i.nome DESC, i.id_integrante DESC
+LIMIT ?;
+"""
+
+CONTAR_INTEGRANTES = """
+SELECT COUNT(*) AS total FROM integrante;
+"""
+
+# --- EXPORTAÇÃO (streaming em ordem de id) ---
+
+# Colunas exportáveis: nome no arquivo -> expressão SQL
+COLUNAS_EXPORTACAO_INTEGRANTE = {
+    "id": "i.id_integrante",
+    "nome": "i.nome",
+    "turma": "i.turma",
+    "funcao": "i.funcao",
+    "foto": "i.foto",
+    "redes_sociais": "i.redes_sociais",
+}
+
+# {colunas} só recebe expressões da lista acima
+EXPORTAR_INTEGRANTES = """
+SELECT {colunas}
+FROM integrante i
+ORDER BY i.id_integrante;
+"""
+
+# --- UPLOADS ANTIGOS PARA O ARMAZENAMENTO POR CONTEÚDO (python -m util.imagens) ---
+
+OBTER_FOTOS_INTEGRANTE = """
+SELECT DISTINCT foto
+FROM integrante
+WHERE foto IS NOT NULL;
+"""
+
+SUBSTITUIR_FOTO_INTEGRANTE = """
+UPDATE integrante
+SET foto=?
+WHERE foto=?;
+"""
@@ -0,0 +1,36 @@
+# Sessões guardadas no servidor (util/sessoes.py): o cookie leva só o id.
+# `dados` é o JSON da sessão; `expira_em` em segundos desde 1970 (UTC)
+
+CRIAR_TABELA_SESSAO = """
+CREATE TABLE IF NOT EXISTS sessao (
+    id          TEXT    PRIMARY KEY,
+    dados       TEXT    NOT NULL,
+    expira_em   REAL    NOT NULL
+) WITHOUT ROWID;
+"""
+
+CRIAR_INDICE_SESSAO_EXPIRA_EM = """
+CREATE INDEX IF NOT EXISTS idx_sessao_expira_em ON sessao (expira_em);
+"""
+
+OBTER_SESSAO = """
+SELECT id, dados, expira_em
+FROM sessao
+WHERE id = ? AND expira_em > ?;
+"""
+
+GRAVAR_SESSAO = """
+INSERT INTO sessao (id, dados, expira_em)
+VALUES (?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET dados = excluded.dados, expira_em = excluded.expira_em;
+"""
+
+EXCLUIR_SESSAO = """
+DELETE FROM sessao
+WHERE id = ?;
+"""
+
+EXCLUIR_SESSOES_EXPIRADAS = """
+DELETE FROM sessao
+WHERE expira_em <= ?;
+"""
@@ -0,0 +1,131 @@
+# Fila persistente de tarefas em segundo plano (util/tarefas.py). Os tempos
+# são segundos desde 1970 (UTC), como em arquivo.enviado_em
+
+CRIAR_TABELA_TAREFA = """
+CREATE TABLE IF NOT EXISTS tarefa (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo            TEXT    NOT NULL,
+    argumentos      TEXT    NOT NULL DEFAULT '{}',
+    chave           TEXT    NULL UNIQUE,
+    estado          TEXT    NOT NULL DEFAULT 'pendente'
+                    CHECK (estado IN ('pendente', 'executando', 'concluida', 'falhou')),
+    tentativas      INTEGER NOT NULL DEFAULT 0,
+    max_tentativas  INTEGER NOT NULL DEFAULT 5,
+    executar_em     REAL    NOT NULL,
+    criada_em       REAL    NOT NULL,
+    iniciada_em     REAL    NULL,
+    concluida_em    REAL    NULL,
+    erro            TEXT    NULL,
+    bloqueada_ate   REAL    NULL
+);
+"""
+
+CRIAR_INDICE_TAREFA_ESTADO = """
+CREATE INDEX IF NOT EXISTS idx_tarefa_estado_executar_em ON tarefa (estado, executar_em);
+"""
+
+_COLUNAS = """
+id, tipo, argumentos, chave, estado, tentativas, max_tentativas,
+executar_em, criada_em, iniciada_em, concluida_em, erro
+"""
+
+# Com chave: se já existe uma tarefa pendente com a mesma chave, nada muda
+# (RETURNING não devolve linha). Concluída, falha ou em execução, volta a
+# ficar pendente; a execução em andamento não consegue mais concluí-la
+# (ver CONCLUIR_TAREFA) e ela roda de novo com os argumentos novos
+ENFILEIRAR_TAREFA = """
+INSERT INTO tarefa (tipo, argumentos, chave, max_tentativas, executar_em, criada_em)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(chave) DO UPDATE SET
+    tipo = excluded.tipo,
+    argumentos = excluded.argumentos,
+    estado = 'pendente',
+    tentativas = 0,
+    max_tentativas = excluded.max_tentativas,
+    executar_em = excluded.executar_em,
+    criada_em = excluded.criada_em,
+    iniciada_em = NULL,
+    concluida_em = NULL,
+    erro = NULL,
+    bloqueada_ate = NULL
+WHERE tarefa.estado <> 'pendente'
+RETURNING id;
+"""
+
+# Reserva atômica da próxima tarefa vencida, inclusive as que ficaram
+# "executando" em um processo que morreu (bloqueio expirado). Vários
+# processos podem consumir a mesma fila
+RESERVAR_PROXIMA_TAREFA = f"""
+UPDATE tarefa
+SET estado = 'executando', tentativas = tentativas + 1, iniciada_em = ?, bloqueada_ate = ?
+WHERE id = (
+    SELECT id FROM tarefa
+    WHERE (estado = 'pendente' AND executar_em <= ?)
+       OR (estado = 'executando' AND bloqueada_ate < ?)
+    ORDER BY executar_em, id
+    LIMIT 1
+)
+RETURNING {_COLUNAS};
+"""
+
+# As atualizações de uma execução conferem iniciada_em: se a tarefa foi
+# enfileirada de novo ou reservada por outro, a execução antiga não a altera
+CONCLUIR_TAREFA = """
+UPDATE tarefa
+SET estado = 'concluida', concluida_em = ?, erro = NULL, bloqueada_ate = NULL
+WHERE id = ? AND iniciada_em = ? AND estado = 'executando';
+"""
+
+FALHAR_TAREFA = """
+UPDATE tarefa
+SET estado = CASE WHEN tentativas >= max_tentativas THEN 'falhou' ELSE 'pendente' END,
+    executar_em = ?,
+    concluida_em = CASE WHEN tentativas >= max_tentativas THEN ? END,
+    erro = ?,
+    bloqueada_ate = NULL
+WHERE id = ? AND iniciada_em = ? AND estado = 'executando';
+"""
+
+# Interrompida no encerramento: volta para a fila sem contar a tentativa
+DEVOLVER_TAREFA = """
+UPDATE tarefa
+SET estado = 'pendente', tentativas = tentativas - 1, bloqueada_ate = NULL
+WHERE id = ? AND iniciada_em = ? AND estado = 'executando';
+"""
+
+REENFILEIRAR_TAREFAS_FALHAS = """
+UPDATE tarefa
+SET estado = 'pendente', tentativas = 0, executar_em = ?, concluida_em = NULL
+WHERE estado = 'falhou';
+"""
+
+CONTAR_TAREFAS_POR_ESTADO = """
+SELECT estado, COUNT(*) FROM tarefa GROUP BY estado;
+"""
+
+OBTER_TAREFA_POR_ID = f"""
+SELECT {_COLUNAS}
+FROM tarefa
+WHERE id = ?;
+"""
+
+OBTER_TAREFAS_RECENTES = f"""
+SELECT {_COLUNAS}
+FROM tarefa
+ORDER BY COALESCE(concluida_em, iniciada_em, criada_em) DESC, id DESC
+LIMIT ?;
+"""
+
+OBTER_TAREFAS_RECENTES_POR_ESTADO = f"""
+SELECT {_COLUNAS}
+FROM tarefa
+WHERE estado = ?
+ORDER BY COALESCE(concluida_em, iniciada_em, criada_em) DESC, id DESC
+LIMIT ?;
+"""
+
+EXCLUIR_TAREFAS_ENCERRADAS = """
+DELETE FROM tarefa
+WHERE (estado = 'concluida' AND concluida_em < ?)
+   OR (estado = 'falhou' AND concluida_em < ?);
+"""
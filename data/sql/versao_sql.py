@@ -0,0 +1,38 @@
+# Versão do conteúdo público: uma única linha, incrementada por triggers a
+# cada escrita em experimento ou integrante (de qualquer processo)
+
+CRIAR_TABELA_VERSAO_CONTEUDO = """
+CREATE TABLE IF NOT EXISTS versao_conteudo (
+    id           INTEGER PRIMARY KEY CHECK (id = 1),
+    versao       INTEGER NOT NULL,
+    alterado_em  REAL    NOT NULL
+);
+"""
+
+# alterado_em em segundos desde 1970 (UTC)
+AGORA_UNIX = "((julianday('now') - 2440587.5) * 86400.0)"
+
+INICIALIZAR_VERSAO_CONTEUDO = f"""
+INSERT OR IGNORE INTO versao_conteudo (id, versao, alterado_em)
+VALUES (1, 1, {AGORA_UNIX});
+"""
+
+INCREMENTAR_VERSAO_CONTEUDO = f"""
+UPDATE versao_conteudo SET versao = versao + 1, alterado_em = {AGORA_UNIX} WHERE id = 1;
+"""
+
+CRIAR_TRIGGERS_VERSAO_CONTEUDO = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {tabela}_versao_{sufixo} AFTER {evento} ON {tabela} BEGIN
+        {INCREMENTAR_VERSAO_CONTEUDO.strip()}
+    END;
+    """
+    for tabela in ("experimento", "integrante")
+    for sufixo, evento in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+]
+
+OBTER_VERSAO_CONTEUDO = """
+SELECT versao, alterado_em
+FROM versao_conteudo
+WHERE id = 1;
+"""
@@ -0,0 +1,58 @@
+"""
+Exportação de experimentos e integrantes
+
+Uso:
+    python exportar.py experimentos --formato csv -o experimentos.csv
+    python exportar.py experimentos --formato ndjson --colunas titulo,descricao --texto
+    python exportar.py integrantes --formato json > integrantes.json
+
+Os arquivos CSV/JSON gerados com as colunas padrão podem ser importados de
+volta com `python importar.py`.
+"""
+import argparse
+import sys
+
+from data.repo import experimento_repo, integrante_repo
+from util.db_util import fechar_pool
+from util.exportacao import FORMATOS, COLUNAS, ExportacaoError, formatar, normalizar_colunas
+
+
+def exportar(tipo: str, saida, formato: str = "csv", colunas=None, texto_puro: bool = False) -> None:
+    """Grava a exportação em `saida` (arquivo texto), um lote por vez"""
+    selecionadas = normalizar_colunas(tipo, colunas)
+    if tipo == "experimentos":
+        lotes = experimento_repo.exportar_experimentos(selecionadas, texto_puro)
+    else:
+        lotes = integrante_repo.exportar_integrantes(selecionadas)
+    for parte in formatar(formato, selecionadas, lotes):
+        saida.write(parte)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exportação - IFES Ciência")
+    parser.add_argument("tipo", choices=tuple(COLUNAS))
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--colunas", help="Colunas separadas por vírgula (padrão: todas)")
+    parser.add_argument("--texto", action="store_true",
+                        help="Converte descricao/materiais de HTML para texto puro")
+    parser.add_argument("-o", "--saida", help="Arquivo de saída (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8", newline="") as saida:
+                exportar(args.tipo, saida, args.formato, args.colunas, args.texto)
+            print(f"✅ {args.tipo} exportados para {args.saida}", file=sys.stderr)
+        else:
+            sys.stdout.reconfigure(encoding="utf-8", newline="")
+            exportar(args.tipo, sys.stdout, args.formato, args.colunas, args.texto)
+    except (ExportacaoError, OSError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        fechar_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
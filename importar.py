@@ -0,0 +1,78 @@
+"""
+Importação em lote de experimentos e integrantes
+
+Uso:
+    python importar.py experimentos experimentos.json --imagens fotos/
+    python importar.py integrantes integrantes.csv --imagens fotos/ --atualizar
+
+As colunas/chaves aceitas são os campos dos modelos (titulo, descricao,
+materiais, capa, video_explicativo / nome, turma, funcao, foto,
+redes_sociais). Capa e foto podem ser o nome de um arquivo da pasta de
+imagens, que é copiado para uploads/ (nome = hash do conteúdo), ou uma URL
+já existente.
+"""
+import argparse
+import sys
+import time
+
+from data.repo import experimento_repo, integrante_repo
+from util.db_util import fechar_pool
+from util.importacao import (
+    TIPOS, ImportacaoError, copiar_imagens, formato_do_arquivo,
+    imagens_referenciadas, ler_registros, montar_modelos, substituir_imagens,
+)
+from util.migracoes import aplicar_migracoes
+
+
+def importar(tipo: str, caminho: str, pasta_imagens: str = None, atualizar: bool = False):
+    """
+    Importa o arquivo para o banco em uma única transação
+
+    Returns:
+        ResultadoImportacao com as quantidades inseridas/atualizadas/ignoradas
+    """
+    with open(caminho, "rb") as arquivo:
+        registros = ler_registros(arquivo.read(), formato_do_arquivo(caminho))
+    modelos = montar_modelos(tipo, registros)
+
+    nomes = imagens_referenciadas(modelos, tipo)
+    urls = copiar_imagens(nomes, pasta_imagens) if nomes and pasta_imagens else {}
+    substituir_imagens(modelos, tipo, urls)
+
+    if tipo == "experimentos":
+        return experimento_repo.inserir_experimentos(modelos, atualizar)
+    return integrante_repo.inserir_integrantes(modelos, atualizar)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importação em lote - IFES Ciência")
+    parser.add_argument("tipo", choices=TIPOS)
+    parser.add_argument("arquivo", help="Arquivo .json ou .csv")
+    parser.add_argument("--imagens", help="Pasta com as imagens citadas no arquivo")
+    parser.add_argument("--atualizar", action="store_true",
+                        help="Atualiza registros existentes (mesmo título/nome) em vez de ignorá-los")
+    args = parser.parse_args(argv)
+
+    print(f"📦 Importando {args.tipo} de {args.arquivo}...")
+    inicio = time.perf_counter()
+    try:
+        aplicar_migracoes()
+        resultado = importar(args.tipo, args.arquivo, args.imagens, args.atualizar)
+    except (ImportacaoError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        fechar_pool()
+    duracao = time.perf_counter() - inicio
+
+    print("=" * 40)
+    print(f"✅ Inseridos:   {resultado.inseridos}")
+    print(f"🔄 Atualizados: {resultado.atualizados}")
+    print(f"⏭️  Ignorados:   {resultado.ignorados}")
+    print("=" * 40)
+    print(f"⏱️  {resultado.total} registros em {duracao:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
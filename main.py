@@ -1,103 +1,162 @@
-from typing import Optional
+from typing import List, Optional
 from fastapi import FastAPI, Request, Form, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.sessions import SessionMiddleware
 import os
-import shutil
 import html
-from datetime import datetime
+import time
 
 # Importações dos repositórios e modelos
-from data.repo import administrador_repo, integrante_repo, experimento_repo
+from data.repo import administrador_repo, integrante_repo, experimento_repo, tarefa_repo
 from data.model.integrante_model import Integrante
 from data.model.experimento_model import Experimento
-from util.security import verificar_senha
+from util.security import verificar_e_atualizar_senha
+from util.sanitizador import sanitizar_conteudo_html
+from util.importacao import (
+    TIPOS, ImportacaoError, formato_do_arquivo, imagens_referenciadas,
+    ler_registros, montar_modelos, substituir_imagens,
+)
+from util.armazenamento import (
+    PASTA_CONTEUDO, PASTA_DERIVADAS, PASTA_UPLOADS, URL_CONTEUDO, URL_DERIVADAS, URL_UPLOADS, agendar_liberacao,
+)
+from util.arquivos_estaticos import ArquivosEstaticos
+from util.cache import estatisticas_caches
+from util.cache_paginas import pagina_em_cache
+from util.compressao import LIMIAR_COMPRESSAO, CompressaoMiddleware
+from util.db_util import fechar_pool
+from util.executor import (
+    ExecutorOcupado, executar_banco, executar_cpu, executar_io, executar_senha, encerrar_executores, iterar_banco,
+)
+from util.uploads import FOLGA_FORMULARIO, MB, TIPOS_UPLOAD, LimiteUploadMiddleware, UploadError, receber_upload
+from util.imagens import ImagensDerivadas, agendar_derivadas, dimensoes_das_imagens, imagem_responsiva
+from util.tarefas import estatisticas_tarefas, fila
+from util.tentativas import login_bem_sucedido, reservar_tentativa
+from util.sessoes import (
+    SessaoMiddleware, SessoesSQLite, agendar_limpeza_sessoes, carregar_sessao, criar_armazenamento, renovar_sessao,
+)
+from util.coleta_arquivos import PASTAS_PRIVADAS, agendar_coleta
+from util.exportacao import TIPOS_MIDIA, ExportacaoError, formatar, nome_arquivo, normalizar_colunas
+from util.paginacao import normalizar_limite
+from util.template_util import configurar_cache_templates, precompilar_templates
+from util.recursos_estaticos import (
+    CACHE_CONTROL_IMUTAVEL, PASTA_BUNDLES, URL_ESTATICOS, construir_recursos, links_fontes, url_css,
+)
+from util.migracoes import aplicar_migracoes
 from criar_admin import criar_admin_inicial
 
 app = FastAPI()
-app.add_middleware(SessionMiddleware, secret_key="uma-chave-secreta-bem-forte")
+# A sessão fica no servidor (variável SESSOES: "sqlite" ou "memoria"); o cookie leva só o id.
+# É lida só por quem chama carregar_sessao; as pastas estáticas nem passam pelo middleware
+armazenamento_sessoes = criar_armazenamento()
+app.add_middleware(SessaoMiddleware, armazenamento=armazenamento_sessoes, ignorar=(URL_UPLOADS, URL_ESTATICOS))
+app.add_middleware(CompressaoMiddleware, limiar=LIMIAR_COMPRESSAO)
+# Tamanho máximo do corpo das requisições: a imagem + os campos do formulário
+LIMITE_FORMULARIO_COM_IMAGEM = TIPOS_UPLOAD["imagem"].tamanho_maximo + FOLGA_FORMULARIO
+app.add_middleware(LimiteUploadMiddleware, limites={
+    "/admin/upload_image": LIMITE_FORMULARIO_COM_IMAGEM,
+    "/admin/integrantes": LIMITE_FORMULARIO_COM_IMAGEM,
+    "/admin/experimentos": LIMITE_FORMULARIO_COM_IMAGEM,
+    "/admin/importar": 64 * MB,
+}, padrao=FOLGA_FORMULARIO)
 
 # Diretórios
-uploads_dir = "uploads"
+uploads_dir = PASTA_UPLOADS
 static_dir = "static"
-os.makedirs(uploads_dir, exist_ok=True)
+os.makedirs(PASTA_CONTEUDO, exist_ok=True)
+os.makedirs(PASTA_DERIVADAS, exist_ok=True)
 os.makedirs(static_dir, exist_ok=True)
 
-# Templates com filtros personalizados
-templates = Jinja2Templates(directory="templates")
+# Templates
+templates = configurar_cache_templates(Jinja2Templates(directory="templates"))
 
-# Adiciona filtro personalizado para sanitizar HTML
-def sanitize_html(text):
-    """Sanitiza HTML básico mantendo apenas tags seguras"""
-    if not text:
-        return ""
-    
-    # Lista de tags permitidas para formatação básica
-    allowed_tags = [
-        'p', 'br', 'strong', 'b', 'em', 'i', 'u', 's', 'strike',
-        'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-        'ul', 'ol', 'li',
-        'blockquote',
-        'a', 'span', 'div'
-    ]
-    
-    # Aqui você pode implementar uma sanitização mais robusta usando bibliotecas como bleach
-    # Por agora, retornamos o texto como está (assumindo que vem do editor controlado)
-    return text
-
-# Adiciona o filtro ao Jinja2
-templates.env.filters['sanitize_html'] = sanitize_html
+# URLs com hash dos bundles de CSS, links das fontes e <picture> com srcset
+templates.env.globals.update(url_css=url_css, links_fontes=links_fontes, imagem_responsiva=imagem_responsiva)
 
 # Monta as pastas estáticas
-app.mount("/static", StaticFiles(directory=uploads_dir), name="uploads")
+# Uploads com o hash do conteúdo no nome: a URL nunca muda de conteúdo
+app.mount(URL_CONTEUDO, ArquivosEstaticos(directory=PASTA_CONTEUDO, cache_control=CACHE_CONTROL_IMUTAVEL, resumo_no_nome=True), name="uploads_conteudo")
+# Versões reduzidas das imagens, geradas na primeira requisição se faltarem
+app.mount(URL_DERIVADAS, ImagensDerivadas(directory=PASTA_DERIVADAS, cache_control=CACHE_CONTROL_IMUTAVEL, resumo_no_nome=True), name="uploads_derivadas")
+# Uploads em andamento e arquivos em quarentena não são públicos
+app.mount("/static", ArquivosEstaticos(directory=uploads_dir, ocultar=PASTAS_PRIVADAS), name="uploads")
+# Bundles com hash no nome: nunca mudam, podem ficar em cache para sempre
+os.makedirs(PASTA_BUNDLES, exist_ok=True)
+app.mount("/static_css/dist", ArquivosEstaticos(directory=PASTA_BUNDLES, cache_control=CACHE_CONTROL_IMUTAVEL), name="bundles")
 app.mount("/static_css", StaticFiles(directory=static_dir), name="static_css")
 
 # Funções utilitárias
 def get_flash_messages(request: Request):
     return request.session.pop("flash_messages", [])
 
-def verificar_login_admin(request: Request):
-    if not request.session.get("admin_logado"):
+async def verificar_login_admin(request: Request):
+    sessao = await carregar_sessao(request)
+    if not sessao.get("admin_logado"):
         raise HTTPException(
             status_code=status.HTTP_303_SEE_OTHER,
             detail="Não autorizado",
             headers={"Location": "/login_admin"}
         )
 
-def sanitizar_conteudo_html(conteudo: str) -> str:
+async def salvar_upload(arquivo: UploadFile, fixar: bool = False) -> str:
     """
-    Sanitiza o conteúdo HTML recebido do editor
-    Remove scripts maliciosos e mantém apenas formatação básica
+    Valida e grava a imagem enviada e agenda as versões reduzidas; retorna a URL pública
+
+    Raises:
+        UploadError: formato não reconhecido ou acima do limite
     """
-    if not conteudo:
-        return ""
-    
-    # Remove tags script e style por segurança
-    conteudo = conteudo.replace('<script', '&lt;script').replace('</script>', '&lt;/script&gt;')
-    conteudo = conteudo.replace('<style', '&lt;style').replace('</style>', '&lt;/style&gt;')
-    
-    # Remove atributos on* (onclick, onload, etc.) por segurança
-    import re
-    conteudo = re.sub(r'\s+on\w+\s*=\s*["\'][^"\']*["\']', '', conteudo, flags=re.IGNORECASE)
-    
-    return conteudo
+    url = await receber_upload(arquivo, "imagem", fixar)
+    await agendar_derivadas(url)
+    return url
+
+def flash_upload_invalido(request: Request, erro: UploadError, destino: str) -> RedirectResponse:
+    request.session.setdefault("flash_messages", []).append({"message": str(erro), "type": "danger"})
+    return RedirectResponse(url=destino, status_code=status.HTTP_303_SEE_OTHER)
 
 # --- LOGIN/LOGOUT ADMIN ---
 
 @app.get("/login_admin", response_class=HTMLResponse)
 async def login_admin(request: Request):
+    await carregar_sessao(request)
     context = {
         "request": request,
         "erro": get_flash_messages(request),
     }
-    return templates.TemplateResponse("/admin/login_admin.html", context)
+    return templates.TemplateResponse("admin/login_admin.html", context)
+
+def login_recusado(request: Request, mensagem: str, status_code: int, espera: int) -> HTMLResponse:
+    """Página de login com o erro, sem gravar mensagem na sessão"""
+    return templates.TemplateResponse(
+        "admin/login_admin.html", {"request": request, "erro": mensagem},
+        status_code=status_code, headers={"Retry-After": str(espera)},
+    )
 
 @app.post("/login_admin", response_class=RedirectResponse)
 async def processar_login_admin(request: Request, email: str = Form(...), senha: str = Form(...)):
-    admin = administrador_repo.obter_administrador_por_email(email)
-    if admin and verificar_senha(senha, admin.senha):
+    # O bcrypt roda no pool de processos de senhas; o limite por IP/email
+    # recusa a enxurrada de tentativas antes de chegar lá
+    espera = reservar_tentativa(request.client.host if request.client else "", email)
+    if espera:
+        return login_recusado(
+            request, f"Muitas tentativas de login. Tente novamente em {espera} s.",
+            status.HTTP_429_TOO_MANY_REQUESTS, espera,
+        )
+    admin = await executar_banco(administrador_repo.obter_administrador_por_email, email)
+    senha_correta = False
+    if admin:
+        try:
+            senha_correta, novo_hash = await executar_senha(verificar_e_atualizar_senha, senha, admin.senha)
+        except ExecutorOcupado:
+            return login_recusado(
+                request, "Servidor ocupado. Tente novamente em instantes.",
+                status.HTTP_503_SERVICE_UNAVAILABLE, 5,
+            )
+        if novo_hash:
+            await executar_banco(administrador_repo.alterar_senha_administrador, admin.id, novo_hash)
+    await carregar_sessao(request)
+    if senha_correta:
+        login_bem_sucedido(email)
+        renovar_sessao(request)
         request.session["admin_logado"] = True
         request.session.setdefault("flash_messages", []).append({"message": "Login bem-sucedido!", "type": "success"})
         return RedirectResponse(url="/admin/integrantes", status_code=status.HTTP_303_SEE_OTHER)
@@ -107,6 +166,7 @@ async def processar_login_admin(request: Request, email: str = Form(...), senha:
 
 @app.get("/admin/logout", response_class=RedirectResponse)
 async def logout_admin(request: Request):
+    await carregar_sessao(request)
     request.session.pop("admin_logado", None)
     request.session.setdefault("flash_messages", []).append({"message": "Você saiu da área de administrador.", "type": "info"})
     return RedirectResponse(url="/login_admin", status_code=status.HTTP_303_SEE_OTHER)
@@ -116,36 +176,138 @@ async def logout_admin(request: Request):
 @app.post("/admin/upload_image")
 async def upload_image(request: Request, file: UploadFile = File(...), _=Depends(verificar_login_admin)):
     """Upload de imagens para o editor de texto rico"""
-    # Verifica se é uma imagem
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Apenas arquivos de imagem são permitidos.")
-
-    # Gera nome único para evitar conflitos
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_extension = os.path.splitext(file.filename)[1]
-    unique_filename = f"editor_img_{timestamp}{file_extension}"
-    
-    file_path = os.path.join(uploads_dir, unique_filename)
-    
     try:
-        # Salva o arquivo
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Retorna a URL pública para o editor
-        url = f"/static/{unique_filename}"
+        # O formato é conferido pelo conteúdo, e o nome vem do hash: a mesma
+        # imagem enviada de novo reaproveita o arquivo. Fixada porque as
+        # referências no texto rico não são contadas
+        url = await salvar_upload(file, fixar=True)
         return {"url": url}
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao fazer upload da imagem: {str(e)}")
 
+# --- IMPORTAÇÃO EM LOTE ---
+
+def ler_importacao(tipo: str, conteudo: bytes, formato: str) -> list:
+    """Converte o arquivo enviado nos modelos do tipo (bloqueante, CPU)"""
+    return montar_modelos(tipo, ler_registros(conteudo, formato))
+
+@app.post("/admin/importar/{tipo}")
+async def importar_em_lote(
+    tipo: str,
+    arquivo: UploadFile = File(...),
+    imagens: Optional[List[UploadFile]] = File(None),
+    atualizar: bool = Form(False),
+    _=Depends(verificar_login_admin)
+):
+    """
+    Importa experimentos ou integrantes de um arquivo JSON/CSV
+
+    As imagens citadas em capa/foto são enviadas junto, no campo `imagens`,
+    com o mesmo nome de arquivo usado no JSON/CSV.
+    """
+    if tipo not in TIPOS:
+        raise HTTPException(status_code=404, detail="Tipo de importação inválido.")
+
+    try:
+        formato = formato_do_arquivo(arquivo.filename)
+        conteudo = await arquivo.read()
+        modelos = await executar_cpu(ler_importacao, tipo, conteudo, formato)
+
+        citadas = imagens_referenciadas(modelos, tipo)
+        urls = {}
+        for imagem in imagens or []:
+            if imagem.filename in citadas:
+                urls[imagem.filename] = await salvar_upload(imagem)
+        substituir_imagens(modelos, tipo, urls)
+    except ImportacaoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=f"{imagem.filename}: {e}")
+
+    if tipo == "experimentos":
+        resultado = await executar_banco(experimento_repo.inserir_experimentos, modelos, atualizar)
+    else:
+        resultado = await executar_banco(integrante_repo.inserir_integrantes, modelos, atualizar)
+    return {
+        "inseridos": resultado.inseridos,
+        "atualizados": resultado.atualizados,
+        "ignorados": resultado.ignorados,
+    }
+
+# --- EXPORTAÇÃO ---
+
+@app.get("/admin/exportar/{tipo}")
+async def exportar_em_lote(
+    tipo: str,
+    formato: str = "csv",
+    colunas: Optional[str] = None,
+    texto: bool = False,
+    _=Depends(verificar_login_admin)
+):
+    """
+    Exporta experimentos ou integrantes em CSV, NDJSON ou JSON (streaming)
+
+    `colunas` seleciona e ordena as colunas ("titulo,capa"); `texto=1`
+    converte descricao/materiais de HTML para texto puro.
+    """
+    if tipo not in TIPOS:
+        raise HTTPException(status_code=404, detail="Tipo de exportação inválido.")
+    try:
+        selecionadas = normalizar_colunas(tipo, colunas)
+        if tipo == "experimentos":
+            lotes = experimento_repo.exportar_experimentos(selecionadas, texto)
+        else:
+            lotes = integrante_repo.exportar_integrantes(selecionadas)
+        partes = formatar(formato, selecionadas, lotes)
+    except ExportacaoError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        iterar_banco(partes),
+        media_type=TIPOS_MIDIA[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo(tipo, formato)}"'},
+    )
+
+# --- DIAGNÓSTICO ---
+
+@app.get("/admin/cache")
+async def estatisticas_cache(_=Depends(verificar_login_admin)):
+    """Acertos/falhas dos caches de leitura deste processo"""
+    return JSONResponse(estatisticas_caches(), headers={"Cache-Control": "no-store"})
+
+@app.get("/admin/tarefas")
+async def estatisticas_fila_tarefas(_=Depends(verificar_login_admin)):
+    """Tarefas em segundo plano: contagem por estado, recentes e falhas"""
+    return JSONResponse(await executar_banco(estatisticas_tarefas), headers={"Cache-Control": "no-store"})
+
+@app.post("/admin/tarefas/reenfileirar")
+async def reenfileirar_tarefas(_=Depends(verificar_login_admin)):
+    """Volta as tarefas que esgotaram as tentativas para a fila"""
+    quantidade = await executar_banco(tarefa_repo.reenfileirar_tarefas_falhas, time.time())
+    fila.acordar()
+    return JSONResponse({"reenfileiradas": quantidade}, headers={"Cache-Control": "no-store"})
+
 # --- ADMIN INTEGRANTES ---
 
 @app.get("/admin/integrantes", response_class=HTMLResponse)
-async def listar_integrantes(request: Request, _=Depends(verificar_login_admin)):
-    integrantes = integrante_repo.obter_todos_integrantes()
-    return templates.TemplateResponse("/admin/admin_dashboard.html", {
+async def listar_integrantes(
+    request: Request,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    _=Depends(verificar_login_admin)
+):
+    pagina = await executar_banco(
+        integrante_repo.obter_integrantes_paginados, normalizar_limite(limit, 20), after, before
+    )
+    return templates.TemplateResponse("admin/admin_dashboard.html", {
         "request": request,
-        "integrantes": integrantes,
+        "integrantes": pagina.itens,
+        "dimensoes": await dimensoes_das_imagens(i.foto for i in pagina.itens),
+        "pagina": pagina,
+        "url_base": "/admin/integrantes",
         "flash_messages": get_flash_messages(request)
     })
 
@@ -163,13 +325,13 @@ async def adicionar_integrante(
         request.session.setdefault("flash_messages", []).append({"message": "A foto do integrante é obrigatória.", "type": "danger"})
         return RedirectResponse(url="/admin/integrantes", status_code=status.HTTP_303_SEE_OTHER)
 
-    file_path = os.path.join(uploads_dir, foto_file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(foto_file.file, buffer)
-    foto_url = f"/static/{foto_file.filename}"
+    try:
+        foto_url = await salvar_upload(foto_file)
+    except UploadError as e:
+        return flash_upload_invalido(request, e, "/admin/integrantes")
 
     novo_integrante = Integrante(id=None, nome=nome, turma=turma, funcao=funcao, foto=foto_url, redes_sociais=redes_sociais)
-    integrante_repo.inserir_integrante(novo_integrante)
+    await executar_banco(integrante_repo.inserir_integrante, novo_integrante)
 
     request.session.setdefault("flash_messages", []).append({"message": "Integrante adicionado com sucesso!", "type": "success"})
     return RedirectResponse(url="/admin/integrantes", status_code=status.HTTP_303_SEE_OTHER)
@@ -185,48 +347,73 @@ async def editar_integrante(
     redes_sociais: Optional[str] = Form(None),
     _=Depends(verificar_login_admin)
 ):
-    integrante = integrante_repo.obter_integrante_por_id(id_integrante)
+    integrante = await executar_banco(integrante_repo.obter_integrante_por_id, id_integrante)
     if not integrante:
         request.session.setdefault("flash_messages", []).append({"message": "Integrante não encontrado.", "type": "danger"})
         return RedirectResponse(url="/admin/integrantes", status_code=status.HTTP_303_SEE_OTHER)
 
     foto_url = integrante.foto
     if foto_file and foto_file.filename:
-        file_path = os.path.join(uploads_dir, foto_file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(foto_file.file, buffer)
-        foto_url = f"/static/{foto_file.filename}"
+        try:
+            foto_url = await salvar_upload(foto_file)
+        except UploadError as e:
+            return flash_upload_invalido(request, e, "/admin/integrantes")
 
     integrante_atualizado = Integrante(id=id_integrante, nome=nome, turma=turma, funcao=funcao, foto=foto_url, redes_sociais=redes_sociais)
-    integrante_repo.alterar_integrante(integrante_atualizado)
+    await executar_banco(integrante_repo.alterar_integrante, integrante_atualizado)
+    if integrante.foto and integrante.foto != foto_url:
+        await agendar_liberacao(integrante.foto)
 
     request.session.setdefault("flash_messages", []).append({"message": "Integrante atualizado com sucesso!", "type": "success"})
     return RedirectResponse(url="/admin/integrantes", status_code=status.HTTP_303_SEE_OTHER)
 
 @app.post("/admin/integrantes/excluir/{id_integrante}", response_class=RedirectResponse)
 async def excluir_integrante(request: Request, id_integrante: int, _=Depends(verificar_login_admin)):
-    integrante = integrante_repo.obter_integrante_por_id(id_integrante)
+    integrante = await executar_banco(integrante_repo.obter_integrante_por_id, id_integrante)
+    await executar_banco(integrante_repo.excluir_integrante, id_integrante)
     if integrante and integrante.foto:
-        try:
-            file_name = integrante.foto.split("/")[-1]
-            os.remove(os.path.join(uploads_dir, file_name))
-        except OSError:
-            pass
-    integrante_repo.excluir_integrante(id_integrante)
+        await agendar_liberacao(integrante.foto)
     request.session.setdefault("flash_messages", []).append({"message": "Integrante excluído!", "type": "success"})
     return RedirectResponse(url="/admin/integrantes", status_code=status.HTTP_303_SEE_OTHER)
 
 # --- ADMIN EXPERIMENTOS ---
 
 @app.get("/admin/experimentos", response_class=HTMLResponse)
-async def listar_experimentos(request: Request, _=Depends(verificar_login_admin)):
-    experimentos = experimento_repo.obter_todos_experimentos()
-    return templates.TemplateResponse("/admin/experimentos_dashboard.html", {
+async def listar_experimentos(
+    request: Request,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    _=Depends(verificar_login_admin)
+):
+    # Só o resumo: descrição e materiais completos vêm de /conteudo ao editar
+    pagina = await executar_banco(
+        experimento_repo.obter_resumos_paginados, normalizar_limite(limit, 20), after, before
+    )
+    return templates.TemplateResponse("admin/experimentos_dashboard.html", {
         "request": request,
-        "experimentos": experimentos,
+        "experimentos": pagina.itens,
+        "dimensoes": await dimensoes_das_imagens(e.capa for e in pagina.itens),
+        "pagina": pagina,
+        "url_base": "/admin/experimentos",
         "flash_messages": get_flash_messages(request)
     })
 
+@app.get("/admin/experimentos/{id_experimento}/conteudo")
+async def conteudo_experimento(id_experimento: int, _=Depends(verificar_login_admin)):
+    """Dados completos de um experimento para o modal de edição"""
+    experimento = await executar_banco(experimento_repo.obter_experimento_por_id, id_experimento)
+    if not experimento:
+        raise HTTPException(status_code=404, detail="Experimento não encontrado.")
+    return JSONResponse({
+        "id": experimento.id,
+        "titulo": experimento.titulo,
+        "descricao": experimento.descricao,
+        "materiais": experimento.materiais,
+        "capa": experimento.capa,
+        "video_explicativo": experimento.video_explicativo,
+    }, headers={"Cache-Control": "no-store"})
+
 @app.post("/admin/experimentos", response_class=RedirectResponse)
 async def adicionar_experimento(
     request: Request,
@@ -237,20 +424,21 @@ async def adicionar_experimento(
     video_explicativo: Optional[str] = Form(None),
     _=Depends(verificar_login_admin)
 ):
-    # Sanitiza o conteúdo HTML
-    descricao_sanitizada = sanitizar_conteudo_html(descricao)
-    materiais_sanitizados = sanitizar_conteudo_html(materiais)
-    
     # Valida se o arquivo de capa foi enviado
     if not capa_file or not capa_file.filename:
         request.session.setdefault("flash_messages", []).append({"message": "A capa do experimento é obrigatória.", "type": "danger"})
         return RedirectResponse(url="/admin/experimentos", status_code=status.HTTP_303_SEE_OTHER)
     
     # Salva a capa
-    file_path = os.path.join(uploads_dir, capa_file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(capa_file.file, buffer)
-    capa_url = f"/static/{capa_file.filename}"
+    try:
+        capa_url = await salvar_upload(capa_file)
+    except UploadError as e:
+        return flash_upload_invalido(request, e, "/admin/experimentos")
+
+    # Sanitiza o conteúdo HTML uma vez, aqui, só para pedidos que passaram na
+    # validação; a página mostra o que foi gravado
+    descricao_sanitizada = await executar_cpu(sanitizar_conteudo_html, descricao)
+    materiais_sanitizados = await executar_cpu(sanitizar_conteudo_html, materiais)
 
     # Cria o experimento com conteúdo sanitizado
     novo_experimento = Experimento(
@@ -261,7 +449,7 @@ async def adicionar_experimento(
         capa=capa_url, 
         video_explicativo=video_explicativo
     )
-    experimento_repo.inserir_experimento(novo_experimento)
+    await executar_banco(experimento_repo.inserir_experimento, novo_experimento)
 
     request.session.setdefault("flash_messages", []).append({"message": "Experimento adicionado com sucesso!", "type": "success"})
     return RedirectResponse(url="/admin/experimentos", status_code=status.HTTP_303_SEE_OTHER)
@@ -278,22 +466,23 @@ async def editar_experimento(
     _=Depends(verificar_login_admin)
 ):
     # Busca o experimento existente
-    experimento = experimento_repo.obter_experimento_por_id(id_experimento)
+    experimento = await executar_banco(experimento_repo.obter_experimento_por_id, id_experimento)
     if not experimento:
         request.session.setdefault("flash_messages", []).append({"message": "Experimento não encontrado.", "type": "danger"})
         return RedirectResponse(url="/admin/experimentos", status_code=status.HTTP_303_SEE_OTHER)
     
-    # Sanitiza o conteúdo HTML
-    descricao_sanitizada = sanitizar_conteudo_html(descricao)
-    materiais_sanitizados = sanitizar_conteudo_html(materiais)
-    
     # Atualiza a capa se uma nova foi enviada
     capa_url = experimento.capa
     if capa_file and capa_file.filename:
-        file_path = os.path.join(uploads_dir, capa_file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(capa_file.file, buffer)
-        capa_url = f"/static/{capa_file.filename}"
+        try:
+            capa_url = await salvar_upload(capa_file)
+        except UploadError as e:
+            return flash_upload_invalido(request, e, "/admin/experimentos")
+
+    # Sanitiza o conteúdo HTML uma vez, aqui, só para pedidos que passaram na
+    # validação; a página mostra o que foi gravado
+    descricao_sanitizada = await executar_cpu(sanitizar_conteudo_html, descricao)
+    materiais_sanitizados = await executar_cpu(sanitizar_conteudo_html, materiais)
 
     # Atualiza o experimento
     experimento_atualizado = Experimento(
@@ -304,21 +493,19 @@ async def editar_experimento(
         capa=capa_url, 
         video_explicativo=video_explicativo
     )
-    experimento_repo.alterar_experimento(experimento_atualizado)
+    await executar_banco(experimento_repo.alterar_experimento, experimento_atualizado)
+    if experimento.capa and experimento.capa != capa_url:
+        await agendar_liberacao(experimento.capa)
 
     request.session.setdefault("flash_messages", []).append({"message": "Experimento atualizado com sucesso!", "type": "success"})
     return RedirectResponse(url="/admin/experimentos", status_code=status.HTTP_303_SEE_OTHER)
 
 @app.post("/admin/experimentos/excluir/{id_experimento}", response_class=RedirectResponse)
 async def excluir_experimento(request: Request, id_experimento: int, _=Depends(verificar_login_admin)):
-    experimento = experimento_repo.obter_experimento_por_id(id_experimento)
+    experimento = await executar_banco(experimento_repo.obter_experimento_por_id, id_experimento)
+    await executar_banco(experimento_repo.excluir_experimento, id_experimento)
     if experimento and experimento.capa:
-        try:
-            file_name = experimento.capa.split("/")[-1]
-            os.remove(os.path.join(uploads_dir, file_name))
-        except OSError:
-            pass
-    experimento_repo.excluir_experimento(id_experimento)
+        await agendar_liberacao(experimento.capa)
     request.session.setdefault("flash_messages", []).append({"message": "Experimento excluído!", "type": "success"})
     return RedirectResponse(url="/admin/experimentos", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -330,50 +517,115 @@ async def index_cliente(request: Request):
         "titulo": "Sobre o Projeto IFES Ciência",
         "texto": "O projeto 'IFES Ciência', iniciado em setembro de 2024, visa apresentar experiências científicas curiosas. A equipe produz conteúdo antecipadamente, e cada vídeo leva cerca de 15 dias para ser finalizado. O projeto já ganhou destaque nacional por sua qualidade e dedicação.",
     }
-    return templates.TemplateResponse("/cliente/index.html", {
-        "request": request,
-        "info_projeto": info_projeto,
-        "flash_messages": get_flash_messages(request)
-    })
+
+    async def renderizar():
+        return templates.TemplateResponse("cliente/index.html", {
+            "request": request,
+            "info_projeto": info_projeto,
+            "flash_messages": get_flash_messages(request)
+        })
+
+    return await pagina_em_cache(request, None, renderizar)
 
 @app.get("/cliente/sobre_nos", response_class=HTMLResponse)
-async def sobre_nos_cliente(request: Request):
-    integrantes = integrante_repo.obter_todos_integrantes()
-    return templates.TemplateResponse("/cliente/sobre_nos.html", {
-        "request": request,
-        "integrantes": integrantes,
-        "flash_messages": get_flash_messages(request)
-    })
+async def sobre_nos_cliente(
+    request: Request,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    async def renderizar():
+        pagina = await executar_banco(
+            integrante_repo.obter_integrantes_paginados, normalizar_limite(limit, 24), after, before
+        )
+        return templates.TemplateResponse("cliente/sobre_nos.html", {
+            "request": request,
+            "integrantes": pagina.itens,
+            "dimensoes": await dimensoes_das_imagens(i.foto for i in pagina.itens),
+            "pagina": pagina,
+            "url_base": "/cliente/sobre_nos",
+            "flash_messages": get_flash_messages(request)
+        })
+
+    return await pagina_em_cache(request, {"after": after, "before": before, "limit": limit}, renderizar)
 
 @app.get("/cliente/experimentos", response_class=HTMLResponse)
-async def experimentos_cliente(request: Request):
-    experimentos = experimento_repo.obter_todos_experimentos()
-    return templates.TemplateResponse("/cliente/experimentos.html", {
-        "request": request,
-        "experimentos": experimentos,
-        "flash_messages": get_flash_messages(request)
-    })
+async def experimentos_cliente(
+    request: Request,
+    q: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    termo = (q or "").strip()
+
+    async def renderizar():
+        if termo:
+            # Modo busca: resultados ordenados por relevância (bm25) com trechos destacados
+            resultados = await executar_banco(experimento_repo.buscar_experimentos, termo)
+            return templates.TemplateResponse("cliente/experimentos.html", {
+                "request": request,
+                "termo": termo,
+                "resultados": resultados,
+                "dimensoes": await dimensoes_das_imagens(r.capa for r in resultados),
+                "flash_messages": get_flash_messages(request)
+            })
+
+        pagina = await executar_banco(
+            experimento_repo.obter_resumos_paginados, normalizar_limite(limit), after, before
+        )
+        return templates.TemplateResponse("cliente/experimentos.html", {
+            "request": request,
+            "experimentos": pagina.itens,
+            "dimensoes": await dimensoes_das_imagens(e.capa for e in pagina.itens),
+            "pagina": pagina,
+            "url_base": "/cliente/experimentos",
+            "flash_messages": get_flash_messages(request)
+        })
+
+    if termo:
+        parametros = {"q": termo}
+    else:
+        parametros = {"after": after, "before": before, "limit": limit}
+    return await pagina_em_cache(request, parametros, renderizar)
 
 @app.get("/cliente/experimentos/{id_experimento}", response_class=HTMLResponse)
 async def detalhes_experimento(request: Request, id_experimento: int):
-    experimento = experimento_repo.obter_experimento_por_id(id_experimento)
-    if not experimento:
-        request.session.setdefault("flash_messages", []).append({
-            "message": "Experimento não encontrado.",
-            "type": "danger"
+    async def renderizar():
+        experimento = await executar_banco(experimento_repo.obter_experimento_por_id, id_experimento)
+        if not experimento:
+            request.session.setdefault("flash_messages", []).append({
+                "message": "Experimento não encontrado.",
+                "type": "danger"
+            })
+            return RedirectResponse(url="/cliente/experimentos", status_code=status.HTTP_303_SEE_OTHER)
+
+        return templates.TemplateResponse("cliente/detalhes_experimento.html", {
+            "request": request,
+            "experimento": experimento,
+            "dimensoes": await dimensoes_das_imagens([experimento.capa]),
+            "flash_messages": get_flash_messages(request)
         })
-        return RedirectResponse(url="/cliente/experimentos", status_code=status.HTTP_303_SEE_OTHER)
-    
-    return templates.TemplateResponse("/cliente/detalhes_experimento.html", {
-        "request": request,
-        "experimento": experimento,
-        "flash_messages": get_flash_messages(request)
-    })
+
+    return await pagina_em_cache(request, None, renderizar)
 
 # --- Startup ---
 @app.on_event("startup")
 async def startup_event():
-    criar_admin_inicial()
+    await executar_banco(aplicar_migracoes)
+    await executar_banco(criar_admin_inicial)
+    await executar_io(construir_recursos)
+    await executar_cpu(precompilar_templates, templates)
+    fila.iniciar()
+    await agendar_coleta()
+    if isinstance(armazenamento_sessoes, SessoesSQLite):
+        await agendar_limpeza_sessoes()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await fila.encerrar()
+    encerrar_executores()
+    fechar_pool()
 
 if __name__ == "__main__":
     import uvicorn
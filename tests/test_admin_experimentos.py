@@ -0,0 +1,108 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from data.model.experimento_model import Experimento
+from data.repo import experimento_repo
+from util import db_util, tentativas
+from util.cache import limpar_caches
+from util.tentativas import BaldeDeFichas
+
+DESCRICAO = "<p>Misture o <strong>bicarbonato</strong> com vinagre.</p>" + "<p>" + "espuma " * 200 + "</p>"
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    """App completa sobre um banco temporário (o startup aplica as migrações e cria o admin)"""
+    monkeypatch.setattr(db_util, "_pool", db_util.PoolConexoes(str(tmp_path / "dados.db")))
+    monkeypatch.setattr(tentativas, "tentativas_por_ip", BaldeDeFichas("ip", 5, 10.0))
+    monkeypatch.setattr(tentativas, "tentativas_por_email", BaldeDeFichas("email", 5, 10.0))
+    limpar_caches()
+    with TestClient(main.app) as cliente:
+        yield cliente
+    limpar_caches()
+
+
+@pytest.fixture
+def admin(cliente):
+    resposta = cliente.post(
+        "/login_admin", data={"email": "admin@ifes.com", "senha": "admin123"}, follow_redirects=False
+    )
+    assert resposta.status_code == 303
+    return cliente
+
+
+@pytest.fixture
+def id_experimento(cliente):
+    return experimento_repo.inserir_experimento(
+        Experimento(id=None, titulo="Vulcão", descricao=DESCRICAO, materiais="<ul><li>Vinagre</li></ul>")
+    )
+
+
+class TestConteudoExperimento:
+
+    def test_conteudo_completo(self, admin, id_experimento):
+        resposta = admin.get(f"/admin/experimentos/{id_experimento}/conteudo")
+
+        assert resposta.status_code == 200
+        assert resposta.headers["cache-control"] == "no-store"
+        assert resposta.json() == {
+            "id": id_experimento,
+            "titulo": "Vulcão",
+            "descricao": DESCRICAO,
+            "materiais": "<ul><li>Vinagre</li></ul>",
+            "capa": None,
+            "video_explicativo": None,
+        }
+
+    def test_experimento_inexistente(self, admin):
+        assert admin.get("/admin/experimentos/9999/conteudo").status_code == 404
+
+    def test_exige_login(self, cliente, id_experimento):
+        resposta = cliente.get(f"/admin/experimentos/{id_experimento}/conteudo", follow_redirects=False)
+
+        assert resposta.status_code == 303
+        assert resposta.headers["location"] == "/login_admin"
+
+
+class TestAdicionarExperimento:
+
+    def test_capa_invalida_nao_sanitiza(self, admin, monkeypatch):
+        sanitizados = []
+        monkeypatch.setattr(main, "sanitizar_conteudo_html", lambda conteudo: sanitizados.append(conteudo) or conteudo)
+
+        resposta = admin.post(
+            "/admin/experimentos",
+            data={"titulo": "Vulcão", "descricao": DESCRICAO, "materiais": "<ul><li>Vinagre</li></ul>"},
+            files={"capa_file": ("capa.png", b"nao e uma imagem", "image/png")},
+            follow_redirects=False,
+        )
+
+        assert resposta.status_code == 303
+        assert sanitizados == []
+        assert experimento_repo.obter_resumos_paginados(10).itens == []
+
+
+class TestDashboardExperimentos:
+
+    def test_lista_so_o_resumo(self, admin, id_experimento):
+        resposta = admin.get("/admin/experimentos")
+
+        assert resposta.status_code == 200
+        assert "Vulcão" in resposta.text
+        assert "Misture o bicarbonato com vinagre." in resposta.text
+        # O texto completo fica para /conteudo, ao abrir o modal de edição
+        assert "espuma " * 200 not in resposta.text
+        assert "<strong>bicarbonato</strong>" not in resposta.text
+        assert resposta.text.count('id="modalEditarExperimento"') == 1
+        assert f'data-id="{id_experimento}"' in resposta.text
+
+    def test_exige_login(self, cliente):
+        resposta = cliente.get("/admin/experimentos", follow_redirects=False)
+
+        assert resposta.status_code == 303
+        assert resposta.headers["location"] == "/login_admin"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -5,7 +5,8 @@ import os
 from unittest.mock import patch
 from data.model.administrador_model import Administrador
 from data.repo.administrador_repo import *
-from data.sql.administrador_sql import CRIAR_TABELA_ADMINISTRADOR
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
 
 
 class TestDatabase:
@@ -19,6 +20,7 @@ class TestDatabase:
         if self.connection is None:
             self.connection = sqlite3.connect(self.db_path)
             self.connection.row_factory = sqlite3.Row
+            registrar_funcoes(self.connection)
         return self.connection
     
     def close(self):
@@ -28,10 +30,7 @@ class TestDatabase:
         os.unlink(self.db_path)
     
     def setup_tables(self):
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(CRIAR_TABELA_ADMINISTRADOR)
-            conn.commit()
+        aplicar_migracoes(self.get_connection())
 
 
 @pytest.fixture
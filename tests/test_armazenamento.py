@@ -0,0 +1,169 @@
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from data.model.experimento_model import Experimento
+from data.model.integrante_model import Integrante
+from data.repo import arquivo_repo, experimento_repo, integrante_repo
+from util import armazenamento
+from util.armazenamento import (
+    URL_CONTEUDO, eh_url_de_conteudo, extensao_segura, liberar_arquivo, salvar_arquivo,
+)
+from util.arquivos_estaticos import ArquivosEstaticos
+from util.cache import limpar_caches
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
+from util.recursos_estaticos import CACHE_CONTROL_IMUTAVEL
+
+IMAGEM = b"\x89PNG\r\n\x1a\n" + b"pixels" * 100
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    """uploads/ temporário e banco com as migrações aplicadas"""
+    monkeypatch.setattr(armazenamento, "PASTA_UPLOADS", str(tmp_path))
+    monkeypatch.setattr(armazenamento, "PASTA_CONTEUDO", str(tmp_path / "c"))
+    monkeypatch.setattr(armazenamento, "PASTA_TEMPORARIA", str(tmp_path / "tmp"))
+
+    db_fd, db_path = tempfile.mkstemp()
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    limpar_caches()
+    with patch.object(arquivo_repo, "get_connection", lambda: conn), \
+         patch.object(experimento_repo, "get_connection", lambda: conn), \
+         patch.object(integrante_repo, "get_connection", lambda: conn):
+        yield tmp_path
+    limpar_caches()
+    conn.close()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+def salvar(conteudo=IMAGEM, nome="foto.PNG", fixar=False):
+    return salvar_arquivo(io.BytesIO(conteudo), nome, fixar)
+
+
+def referencias(url):
+    return arquivo_repo.obter_arquivo_por_url(url).referencias
+
+
+def experimento(capa):
+    return Experimento(id=None, titulo="Vulcão", descricao="<p>lava</p>", materiais="vinagre", capa=capa)
+
+
+class TestSalvarArquivo:
+
+    def test_nome_e_o_hash_do_conteudo(self, uploads):
+        url = salvar()
+        resumo = hashlib.sha256(IMAGEM).hexdigest()
+
+        assert url == f"{URL_CONTEUDO}/{resumo[:2]}/{resumo}.png"
+        assert eh_url_de_conteudo(url)
+        assert (uploads / "c" / resumo[:2] / f"{resumo}.png").read_bytes() == IMAGEM
+        assert os.listdir(uploads / "tmp") == []
+        registro = arquivo_repo.obter_arquivo_por_url(url)
+        assert (registro.resumo, registro.tamanho, registro.referencias) == (resumo, len(IMAGEM), 0)
+
+    def test_conteudo_repetido_ocupa_um_arquivo(self, uploads):
+        assert salvar(nome="a.png") == salvar(nome="b.png")
+        assert len(os.listdir(next((uploads / "c").iterdir()))) == 1
+
+    def test_mesmo_nome_nao_sobrescreve(self, uploads):
+        assert salvar(b"um", "foto.png") != salvar(b"dois", "foto.png")
+
+    @pytest.mark.parametrize("nome, extensao", [
+        ("foto.JPG", ".jpg"), ("sem_extensao", ""), ("x.p h p", ""), (None, ""),
+    ])
+    def test_extensao_segura(self, nome, extensao):
+        assert extensao_segura(nome) == extensao
+
+    def test_erro_na_leitura_apaga_o_temporario(self, uploads):
+        class Quebrado(io.BytesIO):
+            def read(self, *args):
+                raise OSError("conexão caiu")
+
+        with pytest.raises(OSError):
+            salvar_arquivo(Quebrado(), "foto.png")
+        assert os.listdir(uploads / "tmp") == []
+
+
+class TestReferencias:
+
+    def test_triggers_contam_capa_e_foto(self, uploads):
+        url = salvar()
+        id_exp = experimento_repo.inserir_experimento(experimento(url))
+        integrante_repo.inserir_integrante(Integrante(id=None, nome="Ana", turma="3A", funcao="Dev", foto=url))
+        assert referencias(url) == 2
+
+        outra = salvar(b"outra")
+        experimento_repo.alterar_experimento(Experimento(
+            id=id_exp, titulo="Vulcão", descricao="<p>lava</p>", materiais="vinagre", capa=outra
+        ))
+        assert (referencias(url), referencias(outra)) == (1, 1)
+
+        experimento_repo.excluir_experimento(id_exp)
+        assert referencias(outra) == 0
+
+    def test_fixar_reserva_referencia(self, uploads):
+        url = salvar(fixar=True)
+        assert referencias(url) == 1
+
+    def test_liberar_apaga_sem_referencias(self, uploads, monkeypatch):
+        monkeypatch.setattr(armazenamento, "CARENCIA", -1.0)
+        url = salvar()
+        id_exp = experimento_repo.inserir_experimento(experimento(url))
+
+        assert not liberar_arquivo(url)       # ainda usado pelo experimento
+        experimento_repo.excluir_experimento(id_exp)
+        assert liberar_arquivo(url)
+
+        assert arquivo_repo.obter_arquivo_por_url(url) is None
+        assert not os.path.exists(armazenamento.caminho_do_arquivo(url))
+
+    def test_liberar_respeita_a_carencia(self, uploads):
+        # Reenviado há pouco: o formulário que vai usá-lo pode não ter sido salvo
+        url = salvar()
+
+        assert not liberar_arquivo(url)
+        assert os.path.exists(armazenamento.caminho_do_arquivo(url))
+
+    def test_upload_antigo_fica_para_a_coleta(self, uploads):
+        # Sem contagem de referências: outra linha pode citar o mesmo nome
+        (uploads / "rosto.jpg").write_bytes(b"antigo")
+        integrante_repo.inserir_integrante(Integrante(id=None, nome="Ana", turma="1", funcao="x",
+                                                      foto="/static/rosto.jpg", redes_sociais=""))
+
+        assert not liberar_arquivo("/static/rosto.jpg")
+        assert (uploads / "rosto.jpg").exists()
+
+
+class TestServirConteudo:
+
+    def test_servido_como_imutavel_com_etag_do_nome(self, uploads):
+        url = salvar()
+        app = FastAPI()
+        app.mount(URL_CONTEUDO, ArquivosEstaticos(
+            directory=str(uploads / "c"), cache_control=CACHE_CONTROL_IMUTAVEL, resumo_no_nome=True
+        ))
+
+        with TestClient(app) as cliente:
+            resposta = cliente.get(url)
+            revalidacao = cliente.get(url, headers={"If-None-Match": resposta.headers["etag"]})
+
+        assert resposta.status_code == 200
+        assert resposta.content == IMAGEM
+        assert resposta.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert resposta.headers["etag"] == f'"{hashlib.sha256(IMAGEM).hexdigest()}"'
+        assert revalidacao.status_code == 304
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
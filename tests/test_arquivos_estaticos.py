@@ -0,0 +1,87 @@
+import hashlib
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from util.arquivos_estaticos import ArquivosEstaticos, cache_etags
+from util.validacao_http import etag_corresponde, nao_modificado
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    (tmp_path / "capa.jpg").write_bytes(b"imagem")
+    return tmp_path
+
+
+@pytest.fixture
+def cliente(pasta):
+    app = FastAPI()
+    app.mount("/static", ArquivosEstaticos(directory=str(pasta)), name="uploads")
+    cache_etags.limpar()
+    with TestClient(app) as cliente:
+        yield cliente
+    cache_etags.limpar()
+
+
+class TestArquivosEstaticos:
+
+    def test_etag_forte_do_conteudo(self, cliente):
+        resposta = cliente.get("/static/capa.jpg")
+
+        assert resposta.content == b"imagem"
+        assert resposta.headers["etag"] == '"%s"' % hashlib.sha256(b"imagem").hexdigest()
+        assert resposta.headers["cache-control"] == "public, max-age=300"
+
+    def test_if_none_match_responde_304(self, cliente):
+        etag = cliente.get("/static/capa.jpg").headers["etag"]
+
+        resposta = cliente.get("/static/capa.jpg", headers={"If-None-Match": etag})
+
+        assert resposta.status_code == 304
+        assert resposta.content == b""
+        assert resposta.headers["etag"] == etag
+        assert resposta.headers["cache-control"] == "public, max-age=300"
+
+    def test_arquivo_sobrescrito_muda_a_etag(self, cliente, pasta):
+        etag = cliente.get("/static/capa.jpg").headers["etag"]
+        (pasta / "capa.jpg").write_bytes(b"outra imagem")
+
+        resposta = cliente.get("/static/capa.jpg", headers={"If-None-Match": etag})
+
+        assert resposta.status_code == 200
+        assert resposta.content == b"outra imagem"
+
+    def test_arquivo_inexistente(self, cliente):
+        assert cliente.get("/static/nada.jpg").status_code == 404
+
+    @pytest.mark.parametrize("caminho", ["tmp/envio.upload", "./tmp/envio.upload", "c/../tmp/envio.upload", "atalho/envio.upload"])
+    def test_pasta_oculta_responde_404(self, pasta, caminho):
+        (pasta / "tmp").mkdir()
+        (pasta / "tmp" / "envio.upload").write_bytes(b"pela metade")
+        (pasta / "c").mkdir()
+        (pasta / "atalho").symlink_to(pasta / "tmp")
+        app = FastAPI()
+        app.mount("/static", ArquivosEstaticos(directory=str(pasta), ocultar=("tmp",)), name="uploads")
+
+        with TestClient(app) as cliente:
+            assert cliente.get(f"/static/{caminho}").status_code == 404
+            assert cliente.get("/static/capa.jpg").status_code == 200
+
+
+class TestValidacaoHttp:
+
+    @pytest.mark.parametrize("if_none_match, esperado", [
+        ('"a"', True),
+        ('W/"a"', True),
+        ('"b", "a"', True),
+        ("*", True),
+        ('"b"', False),
+    ])
+    def test_etag_corresponde(self, if_none_match, esperado):
+        assert etag_corresponde(if_none_match, '"a"') is esperado
+
+    def test_data_invalida_nao_e_304(self):
+        assert not nao_modificado({"if-modified-since": "ontem"}, None, 0.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+import pytest
+from util.cache import CacheLRU, em_cache, estatisticas_caches, limpar_caches
+
+
+class TestCacheLRU:
+
+    def test_acerto_e_falha(self):
+        cache = CacheLRU("teste")
+        assert cache.obter("a") is None
+        cache.guardar("a", 1)
+        assert cache.obter("a") == 1
+        assert (cache.acertos, cache.falhas) == (1, 1)
+
+    def test_descarta_menos_usado(self):
+        cache = CacheLRU("teste", tamanho_maximo=2)
+        cache.guardar("a", 1)
+        cache.guardar("b", 2)
+        cache.obter("a")
+        cache.guardar("c", 3)
+
+        assert cache.obter("b") is None
+        assert cache.obter("a") == 1
+        assert cache.obter("c") == 3
+        assert cache.descartes == 1
+
+    def test_expira_pelo_ttl(self, monkeypatch):
+        agora = [1000.0]
+        monkeypatch.setattr("util.cache.time.monotonic", lambda: agora[0])
+        cache = CacheLRU("teste", ttl=10)
+        cache.guardar("a", 1)
+
+        agora[0] += 9
+        assert cache.obter("a") == 1
+        agora[0] += 2
+        assert cache.obter("a") is None
+        assert len(cache) == 0
+
+    def test_nao_guarda_leitura_anterior_a_invalidacao(self):
+        cache = CacheLRU("teste")
+        geracao = cache.geracao
+        cache.invalidar("a")  # uma escrita terminou enquanto a leitura acontecia
+
+        cache.guardar("a", "antigo", geracao)
+
+        assert cache.obter("a") is None
+
+    def test_em_cache(self):
+        cache = CacheLRU("teste")
+        chamadas = []
+
+        @em_cache(cache)
+        def dobro(x, fator=2):
+            chamadas.append(x)
+            return x * fator
+
+        assert dobro(2) == 4
+        assert dobro(2) == 4
+        assert dobro(2, fator=3) == 6
+        assert chamadas == [2, 2]
+
+        cache.limpar()
+        assert dobro(2) == 4
+        assert chamadas == [2, 2, 2]
+
+    def test_em_cache_guarda_none(self):
+        cache = CacheLRU("teste")
+        chamadas = []
+
+        @em_cache(cache, "item")
+        def obter(id):
+            chamadas.append(id)
+            return None
+
+        assert obter(1) is None
+        assert obter(1) is None
+        assert chamadas == [1]
+        cache.invalidar(("item", 1))
+        obter(1)
+        assert chamadas == [1, 1]
+
+    def test_limpar_e_estatisticas(self):
+        cache = CacheLRU("teste_estatisticas")
+        cache.guardar("a", 1)
+        cache.obter("a")
+
+        assert any(e["nome"] == "teste_estatisticas" and e["taxa_acerto"] == 1.0 for e in estatisticas_caches())
+        limpar_caches()
+        assert len(cache) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
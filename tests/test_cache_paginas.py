@@ -0,0 +1,198 @@
+import gzip
+import sqlite3
+import pytest
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.testclient import TestClient
+from starlette.middleware.sessions import SessionMiddleware
+from data.model.versao_model import VersaoConteudo
+from data.sql.versao_sql import CRIAR_TABELA_VERSAO_CONTEUDO, INCREMENTAR_VERSAO_CONTEUDO, INICIALIZAR_VERSAO_CONTEUDO
+from data.repo import versao_repo
+from util import cache_paginas as modulo_cache_paginas, versao_conteudo
+from util.cache import conteudo_alterado
+from util.cache_paginas import cache_paginas, pagina_em_cache
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    """App mínima com sessão e uma página cacheada que conta renderizações"""
+    app = FastAPI()
+    app.add_middleware(SessionMiddleware, secret_key="teste")
+    app.state.renderizacoes = 0
+    app.state.versao = VersaoConteudo(1, 1_700_000_000.0)
+    monkeypatch.setattr(versao_repo, "obter_versao_conteudo", lambda: app.state.versao)
+    monkeypatch.setattr(modulo_cache_paginas, "TEMPLATES_ALTERADOS_EM", 0.0)
+    versao_conteudo.redefinir()
+
+    @app.get("/pagina")
+    async def pagina(request: Request, p: Optional[int] = None):
+        async def renderizar():
+            app.state.renderizacoes += 1
+            mensagens = request.session.pop("flash_messages", [])
+            return HTMLResponse(f"<p>p={p} r={app.state.renderizacoes} flash={len(mensagens)}</p>")
+        return await pagina_em_cache(request, {"p": p}, renderizar)
+
+    @app.get("/grande")
+    async def grande(request: Request):
+        async def renderizar():
+            app.state.renderizacoes += 1
+            return HTMLResponse("<p>" + "experimento " * 500 + "</p>")
+        return await pagina_em_cache(request, None, renderizar)
+
+    @app.get("/redireciona")
+    async def redireciona(request: Request):
+        async def renderizar():
+            app.state.renderizacoes += 1
+            return RedirectResponse("/pagina", status_code=303)
+        return await pagina_em_cache(request, None, renderizar)
+
+    @app.get("/flash")
+    async def flash(request: Request):
+        request.session.setdefault("flash_messages", []).append({"message": "ok", "type": "success"})
+        return {}
+
+    cache_paginas.limpar()
+    with TestClient(app) as cliente:
+        yield cliente
+    cache_paginas.limpar()
+    versao_conteudo.redefinir()
+
+
+class TestCachePaginas:
+
+    def test_segunda_requisicao_vem_do_cache(self, cliente):
+        primeira = cliente.get("/pagina?p=1")
+        segunda = cliente.get("/pagina?p=1")
+
+        assert segunda.text == primeira.text == "<p>p=1 r=1 flash=0</p>"
+        assert segunda.headers["content-type"] == "text/html; charset=utf-8"
+        assert cliente.app.state.renderizacoes == 1
+
+    def test_parametros_fazem_parte_da_chave(self, cliente):
+        cliente.get("/pagina?p=1")
+        cliente.get("/pagina?p=2")
+        cliente.get("/pagina?p=1&utm=qualquer")
+
+        assert cliente.app.state.renderizacoes == 2
+
+    def test_mensagens_flash_ignoram_o_cache(self, cliente):
+        cliente.get("/pagina")
+        cliente.get("/flash")
+
+        assert cliente.get("/pagina").text == "<p>p=None r=2 flash=1</p>"
+        # Mensagem consumida: volta a usar o cache (que não guardou a página com flash)
+        assert cliente.get("/pagina").text == "<p>p=None r=1 flash=0</p>"
+
+    def test_escrita_invalida(self, cliente):
+        cliente.get("/pagina")
+        conteudo_alterado()
+        cliente.get("/pagina")
+
+        assert cliente.app.state.renderizacoes == 2
+
+    def test_redirecionamento_nao_e_guardado(self, cliente):
+        cliente.get("/redireciona", follow_redirects=False)
+        cliente.get("/redireciona", follow_redirects=False)
+
+        assert cliente.app.state.renderizacoes == 2
+
+    def test_forma_comprimida_guardada_junto(self, cliente):
+        primeira = cliente.get("/grande", headers={"Accept-Encoding": "gzip"})
+        pagina = cache_paginas.obter(("/grande", ()))
+
+        assert primeira.headers["content-encoding"] == "gzip"
+        assert primeira.headers["vary"] == "Accept-Encoding"
+        assert set(pagina.comprimidos) == {"gzip"}
+        assert gzip.decompress(pagina.comprimidos["gzip"]) == pagina.corpo
+
+        sem_compressao = cliente.get("/grande", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in sem_compressao.headers
+        assert sem_compressao.content == pagina.corpo
+        assert cliente.app.state.renderizacoes == 1
+
+
+class TestRequisicoesCondicionais:
+
+    def test_pagina_tem_validadores(self, cliente):
+        resposta = cliente.get("/pagina")
+
+        assert resposta.headers["etag"].startswith('W/"1-')
+        assert resposta.headers["last-modified"] == "Tue, 14 Nov 2023 22:13:20 GMT"
+        assert resposta.headers["cache-control"] == "no-cache"
+        # Vindo do cache, os mesmos validadores
+        assert cliente.get("/pagina").headers["etag"] == resposta.headers["etag"]
+
+    def test_if_none_match_responde_304_sem_renderizar(self, cliente):
+        etag = cliente.get("/pagina").headers["etag"]
+        cache_paginas.limpar()
+
+        resposta = cliente.get("/pagina", headers={"If-None-Match": etag})
+
+        assert resposta.status_code == 304
+        assert resposta.content == b""
+        assert resposta.headers["etag"] == etag
+        assert cliente.app.state.renderizacoes == 1
+
+    def test_etag_muda_por_pagina(self, cliente):
+        etag = cliente.get("/pagina?p=1").headers["etag"]
+
+        assert cliente.get("/pagina?p=2", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_if_modified_since(self, cliente):
+        ultima = cliente.get("/pagina").headers["last-modified"]
+
+        assert cliente.get("/pagina", headers={"If-Modified-Since": ultima}).status_code == 304
+        assert cliente.get("/pagina", headers={
+            "If-Modified-Since": "Mon, 13 Nov 2023 00:00:00 GMT"
+        }).status_code == 200
+
+    def test_if_none_match_tem_precedencia(self, cliente):
+        ultima = cliente.get("/pagina").headers["last-modified"]
+
+        resposta = cliente.get("/pagina", headers={"If-None-Match": 'W/"outra"', "If-Modified-Since": ultima})
+
+        assert resposta.status_code == 200
+
+    def test_escrita_muda_a_etag(self, cliente):
+        etag = cliente.get("/pagina").headers["etag"]
+        # Escrita deste processo: a versão gravada é adotada, sem reler
+        banco = sqlite3.connect(":memory:")
+        banco.execute(CRIAR_TABELA_VERSAO_CONTEUDO)
+        banco.execute(INICIALIZAR_VERSAO_CONTEUDO)
+        banco.commit()
+        with versao_conteudo.escrita_de_conteudo(banco):
+            banco.execute(INCREMENTAR_VERSAO_CONTEUDO)
+        conteudo_alterado()
+
+        resposta = cliente.get("/pagina", headers={"If-None-Match": etag})
+
+        assert resposta.status_code == 200
+        assert resposta.headers["etag"] != etag
+        assert cliente.app.state.renderizacoes == 2
+
+    def test_versao_nova_de_outro_processo_esvazia_o_cache(self, cliente):
+        cliente.get("/pagina")
+        # Gravação feita por outro processo: nenhum conteudo_alterado() aqui
+        cliente.app.state.versao = VersaoConteudo(2, 1_700_000_100.0)
+        versao_conteudo.marcar_desatualizada()
+
+        assert cliente.get("/pagina").text == "<p>p=None r=2 flash=0</p>"
+
+    def test_pagina_com_flash_nao_tem_validadores(self, cliente):
+        etag = cliente.get("/pagina").headers["etag"]
+        cliente.get("/flash")
+
+        resposta = cliente.get("/pagina", headers={"If-None-Match": etag})
+
+        assert resposta.status_code == 200
+        assert "etag" not in resposta.headers
+
+    def test_redirecionamento_nao_tem_validadores(self, cliente):
+        resposta = cliente.get("/redireciona", follow_redirects=False)
+
+        assert "etag" not in resposta.headers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
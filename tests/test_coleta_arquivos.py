@@ -0,0 +1,163 @@
+import io
+import os
+import sqlite3
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from data.repo import arquivo_repo
+from util import armazenamento, coleta_arquivos
+from util.armazenamento import caminho_do_arquivo, resumo_da_url, salvar_arquivo
+from util.coleta_arquivos import coletar_arquivos
+from util.db_util import registrar_funcoes
+from util.html_util import urls_de_imagens
+from util.migracoes import aplicar_migracoes
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    """uploads/ temporário e banco com as migrações aplicadas"""
+    pastas = {
+        "PASTA_UPLOADS": tmp_path,
+        "PASTA_CONTEUDO": tmp_path / "c",
+        "PASTA_DERIVADAS": tmp_path / "d",
+        "PASTA_TEMPORARIA": tmp_path / "tmp",
+    }
+    for nome, pasta in pastas.items():
+        monkeypatch.setattr(armazenamento, nome, str(pasta))
+        monkeypatch.setattr(coleta_arquivos, nome, str(pasta))
+    monkeypatch.setattr(coleta_arquivos, "PASTA_QUARENTENA", str(tmp_path / "quarentena"))
+
+    db_fd, db_path = tempfile.mkstemp()
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    with patch.object(arquivo_repo, "get_connection", lambda: conn):
+        yield conn
+    conn.close()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+def salvar(conteudo: bytes, fixar: bool = False) -> str:
+    return salvar_arquivo(io.BytesIO(conteudo), "x.jpg", fixar)
+
+
+def experimento(conn, capa=None, descricao="", materiais=""):
+    conn.execute(
+        "INSERT INTO experimento (titulo, descricao, materiais, capa) VALUES (?, ?, ?, ?)",
+        (f"exp {time.monotonic()}", descricao, materiais, capa),
+    )
+    conn.commit()
+
+
+def referencias(url):
+    return arquivo_repo.obter_arquivo_por_url(url).referencias
+
+
+def na_quarentena(tmp, url):
+    return os.path.exists(os.path.join(tmp, "quarentena", *url[len("/static/"):].split("/")))
+
+
+class TestUrlsDeImagens:
+
+    def test_src_do_editor(self):
+        html = (
+            '<p><IMG alt="a" src="/static/c/ab/x.jpg"></p>'
+            "<img src='https://site.ifes/static/OIP%20(1).webp?v=2'>"
+            '<img data-src="/nao.jpg" src=/static/a&amp;b.png>'
+            '<img src="data:image/png;base64,AAAA">'
+        )
+
+        assert urls_de_imagens(html) == {"/static/c/ab/x.jpg", "/static/OIP (1).webp", "/static/a&b.png"}
+        assert urls_de_imagens("<p>sem imagens</p>") == set()
+
+
+class TestColetarArquivos:
+
+    def test_orfaos_vao_para_a_quarentena(self, uploads, tmp_path):
+        capa = salvar(b"capa")
+        no_texto = salvar(b"texto", fixar=True)
+        orfao = salvar(b"orfao" * 100)
+        experimento(uploads, capa=capa, materiais=f'<p><img src="{no_texto}"></p>')
+        derivada = tmp_path / "d" / resumo_da_url(orfao)[:2] / f"{resumo_da_url(orfao)}-160.webp"
+        derivada.parent.mkdir(parents=True)
+        derivada.write_bytes(b"d" * 10)
+
+        resultado = coletar_arquivos(carencia=0, tamanho_lote=1)
+
+        assert (resultado.examinados, resultado.orfaos, resultado.em_quarentena) == (3, 1, 1)
+        assert resultado.bytes_em_quarentena == 500
+        assert resultado.bytes_liberados == 10   # a versão reduzida
+        assert os.path.exists(caminho_do_arquivo(capa))
+        assert os.path.exists(caminho_do_arquivo(no_texto))
+        assert not os.path.exists(caminho_do_arquivo(orfao))
+        assert na_quarentena(tmp_path, orfao)
+        assert not derivada.exists()
+
+    def test_carencia_protege_envio_recente(self, uploads, tmp_path):
+        url = salvar(b"formulario ainda nao salvo")
+
+        assert coletar_arquivos(carencia=3600).orfaos == 0
+        assert os.path.exists(caminho_do_arquivo(url))
+
+    def test_uploads_antigos_pela_data_do_arquivo(self, uploads, tmp_path):
+        (tmp_path / "editor_img_1.png").write_bytes(b"x" * 7)
+        (tmp_path / "rosto.jpg").write_bytes(b"y")
+        experimento(uploads, descricao='<img src="/static/rosto.jpg">')
+        antigo = time.time() - 7200
+        for nome in ("editor_img_1.png", "rosto.jpg"):
+            os.utime(tmp_path / nome, (antigo, antigo))
+
+        resultado = coletar_arquivos(carencia=3600, quarentena=False)
+
+        assert (resultado.orfaos, resultado.apagados, resultado.bytes_liberados) == (1, 1, 7)
+        assert not (tmp_path / "editor_img_1.png").exists()
+        assert (tmp_path / "rosto.jpg").exists()
+
+    def test_recontagem_inclui_imagens_do_editor(self, uploads, monkeypatch):
+        monkeypatch.setattr(armazenamento, "CARENCIA", -1)
+        imagem = salvar(b"editor", fixar=True)
+        experimento(uploads, capa=imagem, descricao=f'<img src="{imagem}"><img src="{imagem}">')
+        assert referencias(imagem) == 2   # fixa + trigger da capa
+
+        coletar_arquivos(carencia=0)
+
+        # Capa e texto contam separadamente: trocar a capa não a libera
+        assert referencias(imagem) == 2
+        uploads.execute("UPDATE experimento SET capa = NULL")
+        uploads.commit()
+        assert referencias(imagem) == 1
+        assert not armazenamento.liberar_arquivo(imagem)
+
+    def test_restaura_e_apaga_da_quarentena(self, uploads, tmp_path, monkeypatch):
+        volta = salvar(b"volta")
+        some = salvar(b"some" * 5)
+        coletar_arquivos(carencia=0)
+        assert na_quarentena(tmp_path, volta) and na_quarentena(tmp_path, some)
+
+        experimento(uploads, capa=volta)   # backup do banco restaurado, por exemplo
+        monkeypatch.setattr(coleta_arquivos, "PRAZO_QUARENTENA", -1)
+        resultado = coletar_arquivos(carencia=0)
+
+        assert resultado.restaurados == 1
+        assert os.path.exists(caminho_do_arquivo(volta))
+        assert not na_quarentena(tmp_path, some)
+        assert resultado.bytes_liberados == 20
+        assert arquivo_repo.obter_arquivo_por_url(some) is None
+
+    def test_simular_nao_altera_nada(self, uploads, tmp_path):
+        url = salvar(b"orfao", fixar=True)
+
+        resultado = coletar_arquivos(carencia=0, simular=True)
+
+        assert resultado.orfaos == 1
+        assert os.path.exists(caminho_do_arquivo(url))
+        assert referencias(url) == 1
+        assert not (tmp_path / "quarentena").exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,186 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.staticfiles import StaticFiles
+from util import compressao
+from util.compressao import (
+    CompressaoMiddleware, cache_comprimidos, comprimir, enfraquecer_etag, escolher_codificacao,
+)
+
+HTML = "<p>" + "experimento " * 500 + "</p>"
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    (tmp_path / "estilo.css").write_text("body { color: red; }\n" * 200)
+    (tmp_path / "foto.jpg").write_bytes(b"\xff\xd8" + b"0" * 5000)
+    return tmp_path
+
+
+@pytest.fixture
+def cliente(pasta):
+    app = FastAPI()
+    app.add_middleware(CompressaoMiddleware, limiar=1024)
+
+    @app.get("/grande")
+    async def grande():
+        return HTMLResponse(HTML)
+
+    @app.get("/criada")
+    async def criada():
+        return HTMLResponse(HTML, status_code=201)
+
+    @app.get("/pequena")
+    async def pequena():
+        return HTMLResponse("<p>oi</p>")
+
+    @app.get("/codificada")
+    async def codificada():
+        return Response(gzip.compress(HTML.encode()), media_type="text/html",
+                        headers={"Content-Encoding": "gzip"})
+
+    @app.get("/streaming")
+    async def streaming():
+        async def linhas():
+            for i in range(2000):
+                yield f"{i};experimento\n"
+        return StreamingResponse(linhas(), media_type="text/csv")
+
+    app.mount("/static", StaticFiles(directory=str(pasta)))
+    cache_comprimidos.limpar()
+    with TestClient(app) as cliente:
+        yield cliente
+    cache_comprimidos.limpar()
+
+
+def obter(cliente, rota, codificacao="gzip", **cabecalhos):
+    return cliente.get(rota, headers={"Accept-Encoding": codificacao, **cabecalhos})
+
+
+class TestEscolherCodificacao:
+
+    @pytest.mark.parametrize("accept_encoding, esperado", [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate", "gzip"),
+        ("gzip;q=0", None),
+        ("*", compressao.CODIFICACOES[0]),
+        ("GZIP;q=0.5", "gzip"),
+    ])
+    def test_negociacao(self, accept_encoding, esperado):
+        assert escolher_codificacao(accept_encoding) == esperado
+
+    @pytest.mark.skipif(compressao.brotli is None, reason="brotli não instalado")
+    def test_prefere_brotli(self):
+        assert escolher_codificacao("gzip, br") == "br"
+        assert escolher_codificacao("gzip, br;q=0.5") == "gzip"
+
+    def test_sem_brotli_usa_gzip(self, monkeypatch):
+        monkeypatch.setattr(compressao, "CODIFICACOES", ("gzip",))
+        assert escolher_codificacao("br, gzip") == "gzip"
+        assert escolher_codificacao("br") is None
+
+    def test_gzip_deterministico(self):
+        assert comprimir(b"abc" * 100, "gzip") == comprimir(b"abc" * 100, "gzip")
+
+    def test_enfraquecer_etag(self):
+        assert enfraquecer_etag('"abc"') == 'W/"abc"'
+        assert enfraquecer_etag('W/"abc"') == 'W/"abc"'
+        assert enfraquecer_etag(None) is None
+
+
+class TestCompressaoMiddleware:
+
+    def test_comprime_html_grande(self, cliente):
+        resposta = obter(cliente, "/grande")
+
+        assert resposta.headers["content-encoding"] == "gzip"
+        assert resposta.headers["vary"] == "Accept-Encoding"
+        assert int(resposta.headers["content-length"]) < len(HTML) // 10
+        assert resposta.text == HTML
+
+    def test_abaixo_do_limiar(self, cliente):
+        resposta = obter(cliente, "/pequena")
+
+        assert "content-encoding" not in resposta.headers
+        assert resposta.text == "<p>oi</p>"
+
+    def test_cliente_sem_accept_encoding(self, cliente):
+        resposta = obter(cliente, "/grande", codificacao="identity")
+
+        assert "content-encoding" not in resposta.headers
+        assert resposta.headers["vary"] == "Accept-Encoding"
+
+    def test_resposta_ja_codificada_passa_direto(self, cliente):
+        resposta = obter(cliente, "/codificada")
+
+        assert resposta.text == HTML
+
+    def test_streaming(self, cliente):
+        resposta = obter(cliente, "/streaming")
+
+        assert resposta.headers["content-encoding"] == "gzip"
+        assert "content-length" not in resposta.headers
+        assert resposta.text.splitlines()[-1] == "1999;experimento"
+
+    def test_imagem_nao_e_comprimida(self, cliente):
+        resposta = obter(cliente, "/static/foto.jpg")
+
+        assert "content-encoding" not in resposta.headers
+        assert len(resposta.content) == 5002
+
+    def test_estatico_comprimido_fica_em_cache(self, cliente, monkeypatch):
+        primeira = obter(cliente, "/static/estilo.css")
+        assert primeira.headers["content-encoding"] == "gzip"
+        assert primeira.headers["etag"].startswith('W/"')
+        assert len(cache_comprimidos) == 1
+
+        monkeypatch.setattr(compressao, "comprimir", None)  # não pode recomprimir
+        segunda = obter(cliente, "/static/estilo.css")
+
+        assert segunda.text == primeira.text == "body { color: red; }\n" * 200
+
+    def test_range_nao_e_comprimido_nem_guardado(self, cliente):
+        parcial = obter(cliente, "/static/estilo.css", Range="bytes=0-2000")
+
+        assert parcial.status_code == 206
+        assert "content-encoding" not in parcial.headers
+        assert len(parcial.content) == 2001
+        assert len(cache_comprimidos) == 0
+
+        completa = obter(cliente, "/static/estilo.css")
+        assert completa.headers["content-encoding"] == "gzip"
+        assert completa.text == "body { color: red; }\n" * 200
+
+    def test_so_status_200_e_comprimido(self, cliente):
+        resposta = obter(cliente, "/criada")
+
+        assert resposta.status_code == 201
+        assert "content-encoding" not in resposta.headers
+        assert resposta.text == HTML
+
+    def test_etag_fraca_ainda_revalida(self, cliente):
+        etag = obter(cliente, "/static/estilo.css").headers["etag"]
+
+        assert obter(cliente, "/static/estilo.css", **{"If-None-Match": etag}).status_code == 304
+
+    def test_corpo_grande_comprime_fora_do_loop(self, cliente, monkeypatch):
+        chamadas = []
+
+        async def executar_cpu(funcao, *args):
+            chamadas.append(funcao)
+            return funcao(*args)
+
+        monkeypatch.setattr(compressao, "LIMIAR_THREAD", 1024)
+        monkeypatch.setattr(compressao, "executar_cpu", executar_cpu)
+
+        assert obter(cliente, "/grande").text == HTML
+        assert chamadas == [comprimir]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,158 @@
+import pytest
+import sqlite3
+import tempfile
+import threading
+import os
+from dataclasses import dataclass
+from util.db_util import PoolConexoes, PoolEsgotadoError, fabrica_modelo
+
+
+@dataclass(slots=True)
+class Ponto:
+    x: int
+    y: int
+
+
+@pytest.fixture
+def pool():
+    """Fixture para criar um pool sobre um banco temporário"""
+    db_fd, db_path = tempfile.mkstemp()
+    pool = PoolConexoes(db_path, tamanho=2, timeout=0.1)
+    yield pool
+    pool.fechar()
+    os.close(db_fd)
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + sufixo):
+            os.unlink(db_path + sufixo)
+
+
+class TestPoolConexoes:
+
+    def test_conexao_configurada(self, pool):
+        with pool.conexao() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+            assert conn.row_factory is sqlite3.Row
+
+    def test_conexao_reaproveitada(self, pool):
+        with pool.conexao() as conn1:
+            pass
+        with pool.conexao() as conn2:
+            pass
+        assert conn1 is conn2
+        assert pool.abertas == 1
+
+    def test_chamadas_aninhadas_usam_mesma_conexao(self, pool):
+        with pool.conexao() as externa:
+            externa.execute("CREATE TEMP TABLE t (x)")
+            with pool.conexao() as interna:
+                # Tabelas temporárias são por conexão
+                assert interna.execute("SELECT COUNT(*) FROM temp.t").fetchone()[0] == 0
+        assert pool.abertas == 1
+
+    def test_commit_aninhado_fica_para_o_bloco_externo(self, pool):
+        with pool.conexao() as conn:
+            conn.execute("CREATE TABLE t (x)")
+
+        with pytest.raises(RuntimeError):
+            with pool.conexao() as externa:
+                externa.execute("INSERT INTO t VALUES (1)")
+                with pool.conexao() as interna:
+                    interna.execute("INSERT INTO t VALUES (2)")
+                    interna.commit()
+                raise RuntimeError("falha depois da função aninhada")
+
+        with pool.conexao() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    def test_erro_aninhado_desfaz_so_o_bloco(self, pool):
+        with pool.conexao() as conn:
+            conn.execute("CREATE TABLE t (x)")
+
+        with pool.conexao() as externa:
+            externa.execute("INSERT INTO t VALUES (1)")
+            with pytest.raises(ValueError):
+                with pool.conexao() as interna:
+                    interna.execute("INSERT INTO t VALUES (2)")
+                    raise ValueError
+            with pool.conexao() as interna:
+                interna.execute("INSERT INTO t VALUES (3)")
+                interna.rollback()
+
+        with pool.conexao() as conn:
+            assert [x for (x,) in conn.execute("SELECT x FROM t")] == [1]
+
+    def test_limite_do_pool(self, pool):
+        conn1 = pool.obter()
+        conn2 = pool.obter()
+        with pytest.raises(PoolEsgotadoError):
+            pool.obter()
+        pool.devolver(conn1)
+        pool.devolver(conn2)
+
+    def test_threads_diferentes_recebem_conexoes_diferentes(self, pool):
+        conexoes = []
+        barreira = threading.Barrier(2)
+
+        def trabalho():
+            with pool.conexao() as conn:
+                conexoes.append(conn)
+                barreira.wait()
+
+        threads = [threading.Thread(target=trabalho) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert conexoes[0] is not conexoes[1]
+
+    def test_rollback_em_excecao(self, pool):
+        with pool.conexao() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+        with pytest.raises(ValueError):
+            with pool.conexao() as conn:
+                conn.execute("INSERT INTO t VALUES (1)")
+                raise ValueError()
+        with pool.conexao() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+    def test_conexao_quebrada_descartada(self, pool, monkeypatch):
+        monkeypatch.setattr("util.db_util.INTERVALO_VERIFICACAO", 0)
+        conn = pool.obter()
+        pool.devolver(conn)
+        conn.close()
+        with pool.conexao() as nova:
+            assert nova is not conn
+            assert nova.execute("SELECT 1").fetchone()[0] == 1
+
+
+class TestFabricaModelo:
+
+    def test_monta_modelo_pela_posicao(self, pool):
+        with pool.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = fabrica_modelo(Ponto)
+            cursor.execute("SELECT 1 AS a, 2 AS b UNION ALL SELECT 3, 4")
+            assert cursor.fetchall() == [Ponto(1, 2), Ponto(3, 4)]
+
+    def test_fetchone_sem_linha_retorna_none(self, pool):
+        with pool.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = fabrica_modelo(Ponto)
+            cursor.execute("SELECT 1, 2 WHERE 0")
+            assert cursor.fetchone() is None
+
+    def test_fabrica_reaproveitada(self):
+        assert fabrica_modelo(Ponto) is fabrica_modelo(Ponto)
+
+    def test_nao_altera_row_factory_da_conexao(self, pool):
+        with pool.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = fabrica_modelo(Ponto)
+            cursor.execute("SELECT 1, 2").fetchall()
+            assert conn.execute("SELECT 1 AS total").fetchone()["total"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
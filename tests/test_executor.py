@@ -0,0 +1,198 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from concurrent.futures import BrokenExecutor
+
+import pytest
+
+from util import executor as modulo_executor
+from util.executor import ExecutorLimitado, ExecutorOcupado, executar_senha, iterar_banco
+
+
+@pytest.fixture
+def executor():
+    executor = ExecutorLimitado("teste", 4, vagas=2)
+    yield executor
+    executor.encerrar()
+
+
+class FuncaoBloqueada:
+    """Função que fica presa até `evento.set()`, contando quantas rodam ao mesmo tempo"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.lock = threading.Lock()
+        self.rodando = 0
+        self.maximo = 0
+
+    def __call__(self, valor):
+        with self.lock:
+            self.rodando += 1
+            self.maximo = max(self.maximo, self.rodando)
+        self.evento.wait(5)
+        with self.lock:
+            self.rodando -= 1
+        return valor
+
+
+class TestExecutorLimitado:
+
+    def test_roda_fora_do_event_loop(self, executor):
+        async def cenario():
+            return await executor.executar(lambda: threading.current_thread().name)
+
+        assert asyncio.run(cenario()).startswith("teste")
+
+    def test_excecao_chega_a_quem_aguarda_e_devolve_a_vaga(self, executor):
+        def falhar(mensagem):
+            raise KeyError(mensagem)
+
+        async def cenario():
+            for _ in range(executor.vagas + 1):
+                with pytest.raises(KeyError, match="sem registro"):
+                    await executor.executar(falhar, "sem registro")
+            return await executor.executar(sum, (1, 2))
+
+        assert asyncio.run(cenario()) == 3
+
+    def test_vagas_limitam_as_tarefas_no_executor(self, executor):
+        bloqueada = FuncaoBloqueada()
+
+        async def cenario():
+            tarefas = [asyncio.create_task(executor.executar(bloqueada, n)) for n in range(6)]
+            await asyncio.sleep(0.1)
+            # 4 threads, mas só 2 vagas: as outras esperam no loop
+            rodando = bloqueada.rodando
+            bloqueada.evento.set()
+            return rodando, await asyncio.gather(*tarefas)
+
+        rodando, resultados = asyncio.run(cenario())
+
+        assert rodando == 2
+        assert bloqueada.maximo == 2
+        assert resultados == list(range(6))
+
+    def test_sem_vaga_no_prazo_nao_gasta_vaga(self):
+        executor = ExecutorLimitado("teste", 1, vagas=1, espera=0.05)
+        bloqueada = FuncaoBloqueada()
+
+        async def cenario():
+            ocupando = asyncio.create_task(executor.executar(bloqueada, "primeira"))
+            await asyncio.sleep(0.01)
+            for _ in range(3):
+                with pytest.raises(ExecutorOcupado):
+                    await executor.executar(bloqueada, "recusada")
+            bloqueada.evento.set()
+            return await ocupando, await executor.executar(bloqueada, "depois")
+
+        try:
+            assert asyncio.run(cenario()) == ("primeira", "depois")
+        finally:
+            executor.encerrar()
+
+    def test_criacao_preguicosa_e_novo_loop_depois_de_encerrar(self, executor):
+        assert executor._executor is None and executor._vagas is None
+
+        assert asyncio.run(executor.executar(pow, 2, 3)) == 8
+        assert executor._executor is not None
+        executor.encerrar()
+        assert executor._executor is None and executor._vagas is None
+
+        # Outro event loop (como o de um novo TestClient) recebe outro semáforo
+        assert asyncio.run(executor.executar(pow, 2, 4)) == 16
+
+    def test_processo_que_morre_e_substituido(self):
+        executor = ExecutorLimitado("teste_processos", 1, processos=True)
+
+        async def cenario():
+            with pytest.raises(BrokenExecutor):
+                await executor.executar(os._exit, 1)
+            return await executor.executar(pow, 2, 5)
+
+        try:
+            assert asyncio.run(cenario()) == 32
+        finally:
+            executor.encerrar()
+
+
+class TestExecutarSenha:
+
+    def test_ocupado(self, monkeypatch):
+        # Threads no lugar dos processos, com os mesmos limites
+        senhas = ExecutorLimitado("senhas", 1, vagas=1, espera=0.05)
+        monkeypatch.setattr(modulo_executor, "executor_senhas", senhas)
+        bloqueada = FuncaoBloqueada()
+
+        async def cenario():
+            ocupando = asyncio.create_task(executar_senha(bloqueada, True))
+            await asyncio.sleep(0.01)
+            with pytest.raises(ExecutorOcupado):
+                await executar_senha(bloqueada, False)
+            bloqueada.evento.set()
+            return await ocupando
+
+        try:
+            assert asyncio.run(cenario()) is True
+        finally:
+            senhas.encerrar()
+
+
+class TestIterarBanco:
+
+    @pytest.fixture(autouse=True)
+    def banco(self, monkeypatch):
+        banco = ExecutorLimitado("banco_teste", 2)
+        monkeypatch.setattr(modulo_executor, "executor_banco", banco)
+        yield banco
+        banco.encerrar()
+
+    def test_itens_lidos_no_executor(self):
+        threads = []
+
+        def gerador():
+            for n in range(3):
+                threads.append(threading.current_thread().name)
+                yield n
+
+        async def cenario():
+            return [item async for item in iterar_banco(gerador())]
+
+        assert asyncio.run(cenario()) == [0, 1, 2]
+        assert all(nome.startswith("banco_teste") for nome in threads)
+
+    def test_gerador_fechado_ao_parar_antes_do_fim(self):
+        fechado = threading.Event()
+
+        def gerador():
+            try:
+                yield from range(100)
+            finally:
+                fechado.set()
+
+        async def cenario():
+            iterador = iterar_banco(gerador())
+            recebidos = [await iterador.__anext__() for _ in range(2)]
+            await iterador.aclose()
+            return recebidos
+
+        assert asyncio.run(cenario()) == [0, 1]
+        assert fechado.is_set()
+
+    def test_excecao_do_gerador_chega_a_quem_itera(self):
+        def gerador():
+            yield 1
+            raise sqlite3.OperationalError("database is locked")
+
+        async def cenario():
+            recebidos = []
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                async for item in iterar_banco(gerador()):
+                    recebidos.append(item)
+            return recebidos
+
+        assert asyncio.run(cenario()) == [1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
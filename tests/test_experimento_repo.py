@@ -1,3 +1,5 @@
+import base64
+import json
 import pytest
 import sqlite3
 import tempfile
@@ -5,7 +7,10 @@ import os
 from unittest.mock import patch
 from data.model.experimento_model import Experimento
 from data.repo.experimento_repo import *
-from data.sql.experimento_sql import CRIAR_TABELA_EXPERIMENTO
+from util import versao_conteudo
+from util.cache import limpar_caches
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
 
 
 class TestDatabase:
@@ -19,6 +24,7 @@ class TestDatabase:
         if self.connection is None:
             self.connection = sqlite3.connect(self.db_path)
             self.connection.row_factory = sqlite3.Row
+            registrar_funcoes(self.connection)
         return self.connection
     
     def close(self):
@@ -28,10 +34,7 @@ class TestDatabase:
         os.unlink(self.db_path)
     
     def setup_tables(self):
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(CRIAR_TABELA_EXPERIMENTO)
-            conn.commit()
+        aplicar_migracoes(self.get_connection())
 
 
 @pytest.fixture
@@ -39,14 +42,26 @@ def test_db():
     """Fixture para criar banco de dados de teste"""
     db = TestDatabase()
     db.setup_tables()
+    limpar_caches()
     
     # Mock da função get_connection
-    with patch('data.repo.experimento_repo.get_connection', db.get_connection):
+    with patch('data.repo.experimento_repo.get_connection', db.get_connection), \
+         patch('data.repo.experimento_repo.get_connection_exclusiva', db.get_connection):
         yield db
     
+    limpar_caches()
     db.close()
 
 
+@pytest.fixture
+def versao(test_db):
+    """Versão do conteúdo lida do banco de teste"""
+    versao_conteudo.redefinir()
+    with patch('data.repo.versao_repo.get_connection', test_db.get_connection):
+        yield
+    versao_conteudo.redefinir()
+
+
 class TestExperimentoRepo:
     
     def test_inserir_experimento(self, test_db):
@@ -101,6 +116,27 @@ class TestExperimentoRepo:
         assert exp_verificado.titulo == "Vulcão Atualizado"
         assert exp_verificado.descricao == "Descrição atualizada"
         assert exp_verificado.capa == "nova_capa.jpg"
+        assert exp_verificado.resumo == "Descrição atualizada"
+        assert exp_verificado.palavras == 4
+
+    def test_colunas_derivadas(self, test_db):
+        descricao = "<p>Misture <strong>bicarbonato</strong> e vinagre.</p>" + "<p>" + "lava " * 400 + "</p>"
+        exp_id = inserir_experimento(Experimento(
+            id=0, titulo="Vulcão", descricao=descricao, materiais="<ul><li>Garrafa</li><li>Funil</li></ul>",
+            resumo="ignorado", palavras=1
+        ))
+
+        vulcao = obter_experimento_por_id(exp_id)
+        assert vulcao.resumo.startswith("Misture bicarbonato e vinagre. lava")
+        assert vulcao.palavras == 4 + 400 + 2
+        assert vulcao.minutos_leitura == 3
+        conn = test_db.get_connection()
+        assert conn.execute(
+            "SELECT materiais_texto FROM experimento WHERE id = ?", (exp_id,)
+        ).fetchone()[0] == "Garrafa Funil"
+
+        alterar_experimento(Experimento(id=exp_id, titulo="Vulcão", descricao="", materiais=""))
+        assert (obter_experimento_por_id(exp_id).resumo, obter_experimento_por_id(exp_id).minutos_leitura) == ("", 0)
     
     def test_excluir_experimento(self, test_db):
         # Inserir primeiro
@@ -115,6 +151,58 @@ class TestExperimentoRepo:
         exp_verificado = obter_experimento_por_id(exp_id)
         assert exp_verificado is None
     
+    def test_inserir_experimentos(self, test_db):
+        experimentos = [
+            Experimento(id=None, titulo=f"Experimento {i}", descricao="<p>Desc</p>", materiais="Mat")
+            for i in range(50)
+        ]
+
+        resultado = inserir_experimentos(experimentos)
+
+        assert (resultado.inseridos, resultado.atualizados, resultado.ignorados) == (50, 0, 0)
+        assert contar_experimentos() == 50
+        assert [e.id for e in buscar_experimentos("Desc", limite=100)]  # FTS acompanhou o lote
+
+    def test_inserir_experimentos_ignora_existentes(self, test_db):
+        inserir_experimento(Experimento(id=None, titulo="Vulcão", descricao="Original", materiais="Mat"))
+
+        resultado = inserir_experimentos([
+            Experimento(id=None, titulo="Vulcão", descricao="Nova", materiais="Mat"),
+            Experimento(id=None, titulo="Bateria", descricao="Desc", materiais="Mat"),
+            Experimento(id=None, titulo="Bateria", descricao="Repetida", materiais="Mat"),
+        ])
+
+        assert (resultado.inseridos, resultado.atualizados, resultado.ignorados) == (1, 0, 2)
+        assert obter_experimento_por_titulo("Vulcão").descricao == "Original"
+        assert obter_experimento_por_titulo("Bateria").descricao == "Desc"
+
+    def test_inserir_experimentos_atualizando(self, test_db):
+        inserir_experimento(Experimento(
+            id=None, titulo="Vulcão", descricao="Original", materiais="Mat", capa="/static/capa.jpg"
+        ))
+
+        resultado = inserir_experimentos([
+            Experimento(id=None, titulo="Vulcão", descricao="Primeira", materiais="Mat"),
+            Experimento(id=None, titulo="Vulcão", descricao="Última", materiais="Mat2"),
+            Experimento(id=None, titulo="Bateria", descricao="Desc", materiais="Mat"),
+        ], atualizar=True)
+
+        assert (resultado.inseridos, resultado.atualizados, resultado.ignorados) == (1, 1, 0)
+        vulcao = obter_experimento_por_titulo("Vulcão")
+        assert vulcao.descricao == "Última"
+        assert vulcao.materiais == "Mat2"
+        assert vulcao.capa == "/static/capa.jpg"  # capa ausente no lote é mantida
+        assert vulcao.resumo == "Última"
+
+    def test_inserir_experimentos_desfaz_lote_com_erro(self, test_db):
+        with pytest.raises(sqlite3.IntegrityError):
+            inserir_experimentos([
+                Experimento(id=None, titulo="Vulcão", descricao="Desc", materiais="Mat"),
+                Experimento(id=None, titulo="Bateria", descricao=None, materiais="Mat"),
+            ])
+
+        assert contar_experimentos() == 0
+
     def test_obter_todos_experimentos(self, test_db):
         # Inserir alguns experimentos
         exp1 = Experimento(id=0, titulo="Vulcão", descricao="Desc1", materiais="Mat1")
@@ -131,6 +219,95 @@ class TestExperimentoRepo:
         assert result[0].titulo == "Bateria"
         assert result[1].titulo == "Vulcão"
     
+    def test_obter_resumos_paginados_navegacao(self, test_db):
+        for titulo in ["E", "A", "C", "B", "D"]:
+            inserir_experimento(Experimento(id=0, titulo=titulo, descricao="Desc", materiais="Mat"))
+        
+        # Primeira página
+        pagina1 = obter_resumos_paginados(2)
+        assert [e.titulo for e in pagina1.itens] == ["A", "B"]
+        assert pagina1.total == 5
+        assert pagina1.anterior is None
+        assert pagina1.proximo is not None
+        
+        # Avança até a última página
+        pagina2 = obter_resumos_paginados(2, depois=pagina1.proximo)
+        assert [e.titulo for e in pagina2.itens] == ["C", "D"]
+        pagina3 = obter_resumos_paginados(2, depois=pagina2.proximo)
+        assert [e.titulo for e in pagina3.itens] == ["E"]
+        assert pagina3.proximo is None
+        
+        # Volta a partir da última página
+        voltou = obter_resumos_paginados(2, antes=pagina3.anterior)
+        assert [e.titulo for e in voltou.itens] == ["C", "D"]
+        inicio = obter_resumos_paginados(2, antes=voltou.anterior)
+        assert [e.titulo for e in inicio.itens] == ["A", "B"]
+        assert inicio.anterior is None
+    
+    def test_obter_resumos_paginados_titulos_repetidos(self, test_db):
+        for _ in range(3):
+            inserir_experimento(Experimento(id=0, titulo="Mesmo", descricao="Desc", materiais="Mat"))
+        
+        pagina1 = obter_resumos_paginados(2)
+        pagina2 = obter_resumos_paginados(2, depois=pagina1.proximo)
+        
+        ids = [e.id for e in pagina1.itens + pagina2.itens]
+        assert len(set(ids)) == 3
+    
+    def test_obter_resumos_paginados_cursor_invalido(self, test_db):
+        inserir_experimento(Experimento(id=0, titulo="A", descricao="Desc", materiais="Mat"))
+        
+        pagina = obter_resumos_paginados(10, depois="nao-e-um-cursor")
+        
+        assert [e.titulo for e in pagina.itens] == ["A"]
+    
+    @pytest.mark.parametrize("chave", [[[1], 2], ["A", {"id": 1}], ["A", True], ["A", None], "A"])
+    def test_obter_resumos_paginados_cursor_com_tipos_invalidos(self, test_db, chave):
+        inserir_experimento(Experimento(id=0, titulo="A", descricao="Desc", materiais="Mat"))
+        cursor = base64.urlsafe_b64encode(json.dumps(chave).encode()).decode()
+
+        pagina = obter_resumos_paginados(10, depois=cursor)
+
+        assert [e.titulo for e in pagina.itens] == ["A"]
+
+    def test_exportar_experimentos(self, test_db):
+        inserir_experimentos([
+            Experimento(id=None, titulo=f"Experimento {i}", descricao=f"<p>Desc <b>{i}</b></p>", materiais="Mat")
+            for i in range(5)
+        ])
+
+        lotes = list(exportar_experimentos(["titulo", "descricao"], tamanho_lote=2))
+
+        assert [len(lote) for lote in lotes] == [2, 2, 1]
+        assert lotes[0][0] == ("Experimento 0", "<p>Desc <b>0</b></p>")
+
+    def test_exportar_experimentos_texto_puro(self, test_db):
+        inserir_experimento(Experimento(id=None, titulo="Vulcão", descricao="<p>Lava &amp; fumaça</p>", materiais="<ul><li>água</li></ul>"))
+
+        lotes = list(exportar_experimentos(["descricao", "materiais"], texto_puro=True))
+
+        assert lotes == [[("Lava & fumaça", "água")]]
+
+    def test_exportar_experimentos_coluna_invalida(self, test_db):
+        with pytest.raises(ValueError):
+            exportar_experimentos(["titulo", "senha"])
+
+    def test_obter_resumos_paginados(self, test_db):
+        descricao = "<p>Misture <strong>bicarbonato</strong> e vinagre.</p>" + "<p>" + "lava " * 100 + "</p>"
+        inserir_experimento(Experimento(id=0, titulo="Vulcão", descricao=descricao, materiais="Mat", capa="/static/v.jpg"))
+        inserir_experimento(Experimento(id=0, titulo="Bateria", descricao="<p>Curta</p>", materiais="Mat"))
+        
+        pagina = obter_resumos_paginados(10)
+        
+        assert [r.titulo for r in pagina.itens] == ["Bateria", "Vulcão"]
+        assert pagina.itens[0].resumo == "Curta"
+        vulcao = pagina.itens[1]
+        assert vulcao.capa == "/static/v.jpg"
+        assert vulcao.resumo.startswith("Misture bicarbonato e vinagre. lava")
+        assert vulcao.resumo.endswith("…")
+        assert len(vulcao.resumo) <= TAMANHO_RESUMO + 1
+        assert not hasattr(vulcao, "descricao")
+    
     def test_obter_experimento_por_titulo(self, test_db):
         # Inserir primeiro
         experimento = Experimento(id=0, titulo="Vulcão", descricao="Desc", materiais="Mat")
@@ -179,6 +356,106 @@ class TestExperimentoRepo:
         assert len(result2) == 1
         assert result2[0].titulo == "Química Divertida"
     
+    def test_buscar_experimentos_por_material_ignora_html(self, test_db):
+        exp = Experimento(id=0, titulo="Vulcão", descricao="<p>Desc</p>",
+                          materiais='<ul><li><strong>bicarbonato</strong></li></ul>')
+        inserir_experimento(exp)
+        
+        # Nomes de tags e atributos não são indexados
+        assert len(buscar_experimentos_por_material("bicarbonato")) == 1
+        assert buscar_experimentos_por_material("strong") == []
+    
+    def test_buscar_experimentos_ranking(self, test_db):
+        exp1 = Experimento(id=0, titulo="Bateria de limão", descricao="<p>Energia com frutas</p>", materiais="limão")
+        exp2 = Experimento(id=0, titulo="Suco colorido", descricao="<p>Use um limão e repolho roxo</p>", materiais="repolho")
+        inserir_experimento(exp1)
+        inserir_experimento(exp2)
+        
+        # Sem acento também encontra; o título pesa mais que a descrição
+        result = buscar_experimentos("limao")
+        
+        assert [r.titulo for r in result] == ["Bateria de limão", "Suco colorido"]
+        assert "<mark>limão</mark>" in result[1].trecho
+    
+    def test_buscar_experimentos_escapa_trecho(self, test_db):
+        exp = Experimento(id=0, titulo="Teste", descricao="<p>1 &lt; 2 vinagre</p>", materiais="Mat")
+        inserir_experimento(exp)
+        
+        result = buscar_experimentos("vinagre")
+        
+        assert result[0].trecho == "1 &lt; 2 <mark>vinagre</mark>"
+    
+    def test_buscar_experimentos_acompanha_alteracao_e_exclusao(self, test_db):
+        exp_id = inserir_experimento(Experimento(id=0, titulo="Vulcão", descricao="Desc", materiais="Mat"))
+        alterar_experimento(Experimento(id=exp_id, titulo="Foguete", descricao="Desc", materiais="Mat"))
+        
+        assert buscar_experimentos("vulcao") == []
+        assert len(buscar_experimentos("foguete")) == 1
+        
+        excluir_experimento(exp_id)
+        assert buscar_experimentos("foguete") == []
+    
+    def test_buscar_experimentos_termo_vazio(self, test_db):
+        assert buscar_experimentos('" * ( )') == []
+    
+    def test_leituras_em_cache(self, test_db):
+        exp_id = inserir_experimento(Experimento(id=None, titulo="Vulcão", descricao="Desc", materiais="Mat"))
+        obter_experimento_por_id(exp_id)
+        obter_resumos_paginados(12)
+
+        with patch('data.repo.experimento_repo.get_connection', side_effect=AssertionError("consultou o banco")):
+            assert obter_experimento_por_id(exp_id).titulo == "Vulcão"
+            assert obter_resumos_paginados(12).total == 1
+
+    def test_escritas_invalidam_cache(self, test_db):
+        exp_id = inserir_experimento(Experimento(id=None, titulo="Vulcão", descricao="Desc", materiais="Mat"))
+        outro_id = inserir_experimento(Experimento(id=None, titulo="Bateria", descricao="Desc", materiais="Mat"))
+        assert obter_resumos_paginados(12).total == 2
+        assert obter_experimento_por_id(outro_id).titulo == "Bateria"
+        assert [r.id for r in buscar_experimentos("Vulcão")] == [exp_id]
+
+        alterar_experimento(Experimento(id=exp_id, titulo="Vulcão 2", descricao="Desc", materiais="Mat"))
+        assert obter_experimento_por_id(exp_id).titulo == "Vulcão 2"
+        assert obter_resumos_paginados(12).itens[1].titulo == "Vulcão 2"
+        assert buscar_experimentos("Vulcão")[0].titulo == "Vulcão 2"
+        # Os outros experimentos continuam em cache
+        assert ("experimento", outro_id) in cache_experimento._entradas
+
+        excluir_experimento(exp_id)
+        assert obter_experimento_por_id(exp_id) is None
+        assert obter_resumos_paginados(12).total == 1
+
+        inserir_experimentos([Experimento(id=None, titulo="Bateria", descricao="Nova", materiais="Mat")], atualizar=True)
+        assert obter_experimento_por_id(outro_id).descricao == "Nova"
+
+    def test_escrita_local_nao_esvazia_os_caches(self, test_db, versao):
+        exp_id = inserir_experimento(Experimento(id=None, titulo="Vulcão", descricao="Desc", materiais="Mat"))
+        outro_id = inserir_experimento(Experimento(id=None, titulo="Bateria", descricao="Desc", materiais="Mat"))
+        versao_conteudo.verificar_versao()
+        obter_experimento_por_id(outro_id)
+
+        alterar_experimento(Experimento(id=exp_id, titulo="Vulcão 2", descricao="Desc", materiais="Mat"))
+        # A versão gravada por este processo é adotada sem reler o banco
+        assert not versao_conteudo._precisa_verificar()
+        versao_conteudo.verificar_versao()
+
+        assert ("experimento", outro_id) in cache_experimento._entradas
+
+    def test_escrita_de_outro_processo_esvazia_os_caches(self, test_db, versao):
+        exp_id = inserir_experimento(Experimento(id=None, titulo="Vulcão", descricao="Desc", materiais="Mat"))
+        outro_id = inserir_experimento(Experimento(id=None, titulo="Bateria", descricao="Desc", materiais="Mat"))
+        versao_conteudo.verificar_versao()
+        obter_experimento_por_id(outro_id)
+
+        # Outro processo grava direto no banco, sem passar por este repositório
+        conn = test_db.get_connection()
+        conn.execute("UPDATE experimento SET titulo = 'Bateria 2' WHERE id = ?", (outro_id,))
+        conn.commit()
+        alterar_experimento(Experimento(id=exp_id, titulo="Vulcão 2", descricao="Desc", materiais="Mat"))
+        versao_conteudo.verificar_versao()
+
+        assert obter_experimento_por_id(outro_id).titulo == "Bateria 2"
+
     def test_titulo_existe(self, test_db):
         # Inserir primeiro
         experimento = Experimento(id=0, titulo="Vulcão", descricao="Desc", materiais="Mat")
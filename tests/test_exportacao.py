@@ -0,0 +1,75 @@
+import pytest
+import asyncio
+import csv
+import io
+import json
+from util.executor import encerrar_executores, iterar_banco
+from util.exportacao import *
+
+LOTES = [[(1, "Vulcão", "a,b")], [(2, 'Aspas "duplas"', None)]]
+
+
+class TestExportacao:
+
+    def test_normalizar_colunas(self):
+        assert normalizar_colunas("integrantes") == ["id", "nome", "turma", "funcao", "foto", "redes_sociais"]
+        assert normalizar_colunas("experimentos", " titulo, capa,titulo") == ["titulo", "capa"]
+        with pytest.raises(ExportacaoError, match="senha"):
+            normalizar_colunas("experimentos", "titulo,senha")
+        with pytest.raises(ExportacaoError):
+            normalizar_colunas("administradores")
+
+    def test_gerar_csv(self):
+        partes = list(gerar_csv(["id", "titulo", "materiais"], iter(LOTES)))
+
+        assert len(partes) == 2
+        texto = "".join(partes)
+        assert texto.startswith("\ufeff")
+        linhas = list(csv.reader(io.StringIO(texto.lstrip("\ufeff"))))
+        assert linhas == [["id", "titulo", "materiais"], ["1", "Vulcão", "a,b"], ["2", 'Aspas "duplas"', ""]]
+
+    def test_gerar_csv_vazio(self):
+        assert "".join(gerar_csv(["id"], iter([]))) == "\ufeffid\r\n"
+
+    def test_gerar_ndjson(self):
+        texto = "".join(gerar_ndjson(["id", "titulo", "materiais"], iter(LOTES)))
+        objetos = [json.loads(linha) for linha in texto.splitlines()]
+        assert objetos[0] == {"id": 1, "titulo": "Vulcão", "materiais": "a,b"}
+        assert objetos[1]["materiais"] is None
+
+    def test_gerar_json(self):
+        texto = "".join(gerar_json(["id", "titulo", "materiais"], iter(LOTES)))
+        assert json.loads(texto)[1] == {"id": 2, "titulo": 'Aspas "duplas"', "materiais": None}
+        assert json.loads("".join(gerar_json(["id"], iter([])))) == []
+
+    def test_formatar_formato_invalido(self):
+        with pytest.raises(ExportacaoError):
+            formatar("xml", ["id"], iter([]))
+
+    def test_iterar_banco_fecha_gerador(self):
+        fechado = []
+
+        def gerador():
+            try:
+                for i in range(10):
+                    yield i
+            finally:
+                fechado.append(True)
+
+        async def consumir():
+            itens = []
+            async for item in iterar_banco(gerador()):
+                itens.append(item)
+                if item == 2:
+                    break
+            return itens
+
+        try:
+            assert asyncio.run(consumir()) == [0, 1, 2]
+        finally:
+            encerrar_executores()
+        assert fechado == [True]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
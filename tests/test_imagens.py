@@ -0,0 +1,239 @@
+import asyncio
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from data.repo import arquivo_repo, experimento_repo, integrante_repo, tarefa_repo, versao_repo
+from util import armazenamento, imagens
+from util.armazenamento import URL_DERIVADAS, eh_url_de_conteudo, resumo_da_url, salvar_arquivo
+from util.cache import limpar_caches
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
+from util.recursos_estaticos import CACHE_CONTROL_IMUTAVEL
+
+Image = pytest.importorskip("PIL.Image")
+pytestmark = pytest.mark.skipif(not imagens.FORMATOS, reason="Pillow sem suporte a WebP/AVIF")
+
+
+def jpeg(largura=800, altura=600) -> bytes:
+    saida = io.BytesIO()
+    Image.new("RGB", (largura, altura), (46, 125, 50)).save(saida, format="JPEG")
+    return saida.getvalue()
+
+
+async def no_mesmo_processo(funcao, *args, **kwargs):
+    return funcao(*args, **kwargs)
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    """uploads/ temporário, banco com as migrações e geração sem pool de processos"""
+    for modulo in (armazenamento, imagens):
+        monkeypatch.setattr(modulo, "PASTA_CONTEUDO", str(tmp_path / "c"))
+        monkeypatch.setattr(modulo, "PASTA_DERIVADAS", str(tmp_path / "d"))
+    monkeypatch.setattr(armazenamento, "PASTA_UPLOADS", str(tmp_path))
+    monkeypatch.setattr(armazenamento, "PASTA_TEMPORARIA", str(tmp_path / "tmp"))
+    monkeypatch.setattr(imagens, "executar_em_processo", no_mesmo_processo)
+
+    db_fd, db_path = tempfile.mkstemp()
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    limpar_caches()
+    with patch.object(arquivo_repo, "get_connection", lambda: conn):
+        yield tmp_path
+    limpar_caches()
+    conn.close()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+def salvar(conteudo=None, nome="capa.jpg"):
+    return salvar_arquivo(io.BytesIO(conteudo or jpeg()), nome)
+
+
+def derivada(uploads, url, largura, formato):
+    return uploads / "d" / imagens.nome_derivada(resumo_da_url(url), largura, formato)
+
+
+class TestGerarDerivadas:
+
+    def test_gera_larguras_menores_que_o_original(self, uploads):
+        url = salvar()
+
+        assert asyncio.run(imagens.processar_imagem(url)) == (800, 600)
+
+        for formato in imagens.FORMATOS:
+            for largura in (160, 320, 640):
+                with Image.open(derivada(uploads, url, largura, formato)) as gerada:
+                    assert gerada.size == (largura, round(600 * largura / 800))
+            assert not derivada(uploads, url, 1280, formato).exists()   # não amplia
+        assert arquivo_repo.obter_arquivo_por_url(url).largura == 800
+
+    def test_orientacao_exif(self, uploads):
+        imagem = Image.new("RGB", (800, 600))
+        exif = imagem.getexif()
+        exif[0x0112] = 6   # girada 90°
+        saida = io.BytesIO()
+        imagem.save(saida, format="JPEG", exif=exif)
+
+        assert asyncio.run(imagens.processar_imagem(salvar(saida.getvalue()))) == (600, 800)
+
+    def test_ignora_o_que_nao_e_imagem_derivavel(self, uploads):
+        assert not imagens.derivavel(salvar(b"GIF89a", "anim.gif"))
+        assert not imagens.derivavel("/static/rosto.jpg")
+
+    def test_pool_de_processos(self, uploads, monkeypatch):
+        from util.executor import encerrar_executores, executar_em_processo
+        monkeypatch.setattr(imagens, "executar_em_processo", executar_em_processo)
+        url = salvar()
+
+        async def processar():
+            try:
+                return await imagens.processar_imagem(url, larguras=(160,))
+            finally:
+                encerrar_executores()
+
+        assert asyncio.run(processar()) == (800, 600)
+        assert derivada(uploads, url, 160, imagens.FORMATOS[0]).exists()
+
+
+class TestMigrarUploadsAntigos:
+
+    @pytest.fixture
+    def banco(self, uploads, monkeypatch):
+        conn = arquivo_repo.get_connection()
+        for repo in (experimento_repo, integrante_repo, tarefa_repo, versao_repo):
+            monkeypatch.setattr(repo, "get_connection", lambda: conn)
+        return conn
+
+    def test_move_para_o_armazenamento_por_conteudo(self, uploads, banco):
+        (uploads / "OIP (1).jpg").write_bytes(jpeg())
+        banco.execute("INSERT INTO experimento (titulo, descricao, materiais, capa) VALUES ('a', '', '', '/static/OIP (1).jpg')")
+        banco.execute("INSERT INTO integrante (nome, turma, funcao, foto) VALUES ('b', '1', 'x', '/static/OIP (1).jpg')")
+        banco.execute("INSERT INTO integrante (nome, turma, funcao, foto) VALUES ('c', '1', 'x', '/static/sumiu.jpg')")
+        banco.commit()
+
+        assert imagens.migrar_uploads_antigos() == 1
+
+        capa, = banco.execute("SELECT capa FROM experimento").fetchone()
+        fotos = [f for f, in banco.execute("SELECT foto FROM integrante ORDER BY nome")]
+        assert eh_url_de_conteudo(capa) and capa.endswith(".jpg")
+        assert fotos == [capa, "/static/sumiu.jpg"]
+        assert arquivo_repo.obter_arquivo_por_url(capa).referencias == 2
+        assert (uploads / "c" / capa[len("/static/c/"):]).read_bytes() == jpeg()
+        # O antigo fica para a coleta de órfãos
+        assert (uploads / "OIP (1).jpg").exists()
+        tipo, argumentos = banco.execute("SELECT tipo, argumentos FROM tarefa").fetchone()
+        assert (tipo, json.loads(argumentos)) == ("processar_imagem", {"url": capa})
+
+    def test_nao_mexe_no_que_ja_esta_migrado(self, uploads, banco):
+        url = salvar()
+        banco.execute("INSERT INTO experimento (titulo, descricao, materiais, capa) VALUES ('a', '', '', ?)", (url,))
+        banco.execute("INSERT INTO experimento (titulo, descricao, materiais, capa) VALUES ('b', '', '', 'https://exemplo.org/a.jpg')")
+        banco.commit()
+
+        assert imagens.migrar_uploads_antigos() == 0
+        assert [c for c, in banco.execute("SELECT capa FROM experimento ORDER BY titulo")] == [url, "https://exemplo.org/a.jpg"]
+
+
+class TestImagensDerivadas:
+
+    def app(self, uploads):
+        (uploads / "d").mkdir(exist_ok=True)
+        app = FastAPI()
+        app.mount(URL_DERIVADAS, imagens.ImagensDerivadas(
+            directory=str(uploads / "d"), cache_control=CACHE_CONTROL_IMUTAVEL, resumo_no_nome=True,
+        ))
+        return app
+
+    def test_gera_na_primeira_requisicao(self, uploads):
+        url = salvar()
+        formato = imagens.FORMATOS[-1]
+        caminho = f"{URL_DERIVADAS}/{imagens.nome_derivada(resumo_da_url(url), 320, formato)}"
+
+        with TestClient(self.app(uploads)) as cliente:
+            resposta = cliente.get(caminho)
+
+        assert resposta.status_code == 200
+        assert resposta.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert derivada(uploads, url, 320, formato).exists()
+        assert not derivada(uploads, url, 640, formato).exists()   # só a pedida
+
+    @pytest.mark.parametrize("nome", ["{r}-333.webp", "{r}-320.gif", "{r}.webp", "00/{r}-320.webp"])
+    def test_caminho_invalido_404(self, uploads, nome):
+        resumo = resumo_da_url(salvar())
+        caminho = nome.format(r=resumo)
+        if "/" not in caminho:
+            caminho = f"{resumo[:2]}/{caminho}"
+
+        with TestClient(self.app(uploads)) as cliente:
+            assert cliente.get(f"{URL_DERIVADAS}/{caminho}").status_code == 404
+
+
+class TestImagemResponsiva:
+
+    def test_picture_com_srcset(self, uploads):
+        url = salvar()
+        asyncio.run(imagens.processar_imagem(url))
+
+        dimensoes = asyncio.run(imagens.dimensoes_das_imagens([url]))
+        html = imagens.imagem_responsiva(url, "Vulcão <1>", "50vw", classe="capa", dimensoes=dimensoes)
+
+        assert html.startswith("<picture><source type=")
+        assert html.count("<source") == len(imagens.FORMATOS)
+        assert f"{URL_DERIVADAS}/{resumo_da_url(url)[:2]}/{resumo_da_url(url)}-640." in html
+        assert 'sizes="50vw"' in html
+        assert f'<img src="{url}" alt="Vulcão &lt;1&gt;" class="capa" width="800" height="600" loading="lazy"' in html
+
+    def test_largura_fixa_mantem_proporcao(self, uploads):
+        url = salvar()
+        asyncio.run(imagens.processar_imagem(url))
+
+        dimensoes = asyncio.run(imagens.dimensoes_das_imagens([url]))
+        assert 'width="60" height="45"' in imagens.imagem_responsiva(url, "x", "60px", largura=60, dimensoes=dimensoes)
+
+    def test_sem_dimensoes_so_o_original(self, uploads):
+        url = salvar()   # versões ainda não geradas
+
+        html = imagens.imagem_responsiva(url, "x", dimensoes=asyncio.run(imagens.dimensoes_das_imagens([url])))
+
+        assert html == f'<img src="{url}" alt="x" loading="lazy" decoding="async">'
+        assert imagens.imagem_responsiva(None) == ""
+
+    def test_dimensoes_em_uma_consulta(self, uploads, monkeypatch):
+        urls = [salvar(jpeg(800, 600), "a.jpg"), salvar(jpeg(400, 300), "b.jpg")]
+        for url in urls:
+            asyncio.run(imagens.processar_imagem(url))
+        pendente = salvar(jpeg(200, 100), "c.jpg")
+        limpar_caches()
+        consultas = []
+        original = arquivo_repo.obter_dimensoes_arquivos
+        monkeypatch.setattr(arquivo_repo, "obter_dimensoes_arquivos", lambda u: consultas.append(u) or original(u))
+
+        todas = [*urls, pendente, urls[0], "/static/img/logo.png", None]
+        dimensoes = asyncio.run(imagens.dimensoes_das_imagens(todas))
+
+        assert dimensoes == {urls[0]: (800, 600), urls[1]: (400, 300)}
+        assert consultas == [[*urls, pendente]]
+        # As conhecidas ficam no cache; só a pendente é consultada de novo
+        asyncio.run(imagens.dimensoes_das_imagens(todas))
+        assert consultas[1] == [pendente]
+
+    def test_helper_nao_consulta_o_banco(self, uploads, monkeypatch):
+        url = salvar()
+        asyncio.run(imagens.processar_imagem(url))
+        monkeypatch.setattr(arquivo_repo, "get_connection", lambda: pytest.fail("consulta no template"))
+
+        assert 'width="' not in imagens.imagem_responsiva(url, "x")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
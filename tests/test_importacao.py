@@ -0,0 +1,83 @@
+import pytest
+import os
+import tempfile
+from unittest.mock import patch
+from data.model.experimento_model import Experimento
+from util.importacao import *
+
+
+class TestImportacao:
+
+    def test_formato_do_arquivo(self):
+        assert formato_do_arquivo("dados.JSON") == "json"
+        assert formato_do_arquivo("dados.csv") == "csv"
+        with pytest.raises(ImportacaoError):
+            formato_do_arquivo("dados.xlsx")
+
+    def test_ler_registros_json(self):
+        registros = ler_registros('[{"titulo": "Vulcão"}]'.encode("utf-8"), "json")
+        assert registros == [{"titulo": "Vulcão"}]
+
+    def test_ler_registros_json_invalido(self):
+        with pytest.raises(ImportacaoError):
+            ler_registros("{", "json")
+        with pytest.raises(ImportacaoError):
+            ler_registros('{"titulo": "Vulcão"}', "json")
+
+    def test_ler_registros_csv_com_bom(self):
+        conteudo = "\ufeffnome,turma,funcao\nJoão,3A,Dev\n".encode("utf-8")
+        assert ler_registros(conteudo, "csv") == [{"nome": "João", "turma": "3A", "funcao": "Dev"}]
+
+    def test_montar_modelos_valida_obrigatorios(self):
+        with pytest.raises(ImportacaoError, match="Registro 2: .*materiais"):
+            montar_modelos("experimentos", [
+                {"titulo": "Vulcão", "descricao": "Desc", "materiais": "Mat"},
+                {"titulo": "Bateria", "descricao": "Desc", "materiais": "  "},
+            ])
+
+    def test_montar_experimentos_sanitiza_html(self):
+        experimentos = montar_experimentos([
+            {"titulo": " Vulcão ", "descricao": "<p onclick=\"x()\">Desc</p>", "materiais": "<script>x</script>"}
+        ])
+        assert experimentos[0].titulo == "Vulcão"
+        assert experimentos[0].descricao == "<p>Desc</p>"
+        assert "<script" not in experimentos[0].materiais
+        assert experimentos[0].capa is None
+
+    def test_substituir_imagens(self):
+        experimentos = [
+            Experimento(id=None, titulo="A", descricao="D", materiais="M", capa="a.jpg"),
+            Experimento(id=None, titulo="B", descricao="D", materiais="M", capa="/static/b.jpg"),
+        ]
+        assert imagens_referenciadas(experimentos, "experimentos") == {"a.jpg"}
+
+        substituir_imagens(experimentos, "experimentos", {"a.jpg": "/static/a.jpg"})
+
+        assert [e.capa for e in experimentos] == ["/static/a.jpg", "/static/b.jpg"]
+
+    def test_substituir_imagens_ausentes(self):
+        experimentos = [Experimento(id=None, titulo="A", descricao="D", materiais="M", capa="a.jpg")]
+        with pytest.raises(ImportacaoError, match="a.jpg"):
+            substituir_imagens(experimentos, "experimentos", {})
+
+    def test_nome_seguro(self):
+        assert nome_seguro("foto.jpg") == "foto.jpg"
+        for nome in ("../foto.jpg", "pasta/foto.jpg", "..\\foto.jpg", ""):
+            with pytest.raises(ImportacaoError):
+                nome_seguro(nome)
+
+    def test_copiar_imagens(self):
+        with tempfile.TemporaryDirectory() as origem, \
+             patch("util.importacao.gravar_upload", return_value="/static/c/ab/ab12.jpg") as salvar:
+            with open(os.path.join(origem, "a.jpg"), "wb") as f:
+                f.write(b"imagem")
+
+            urls = copiar_imagens({"a.jpg", "faltando.jpg"}, origem)
+
+            assert urls == {"a.jpg": "/static/c/ab/ab12.jpg"}
+            arquivo, tipo = salvar.call_args.args
+            assert arquivo.name == os.path.join(origem, "a.jpg") and tipo.nome == "imagem"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
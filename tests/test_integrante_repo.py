@@ -5,7 +5,9 @@ import os
 from unittest.mock import patch
 from data.model.integrante_model import Integrante
 from data.repo.integrante_repo import *
-from data.sql.integrante_sql import CRIAR_TABELA_INTEGRANTE
+from util.cache import limpar_caches
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
 
 
 class TestDatabase:
@@ -19,6 +21,7 @@ class TestDatabase:
         if self.connection is None:
             self.connection = sqlite3.connect(self.db_path)
             self.connection.row_factory = sqlite3.Row
+            registrar_funcoes(self.connection)
         return self.connection
     
     def close(self):
@@ -28,10 +31,7 @@ class TestDatabase:
         os.unlink(self.db_path)
     
     def setup_tables(self):
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(CRIAR_TABELA_INTEGRANTE)
-            conn.commit()
+        aplicar_migracoes(self.get_connection())
 
 
 @pytest.fixture
@@ -39,11 +39,14 @@ def test_db():
     """Fixture para criar banco de dados de teste"""
     db = TestDatabase()
     db.setup_tables()
+    limpar_caches()
     
     # Mock da função get_connection
-    with patch('data.repo.integrante_repo.get_connection', db.get_connection):
+    with patch('data.repo.integrante_repo.get_connection', db.get_connection), \
+         patch('data.repo.integrante_repo.get_connection_exclusiva', db.get_connection):
         yield db
     
+    limpar_caches()
     db.close()
 
 
@@ -114,6 +117,24 @@ class TestIntegranteRepo:
         integrante_verificado = obter_integrante_por_id(integrante_id)
         assert integrante_verificado is None
     
+    def test_inserir_integrantes(self, test_db):
+        inserir_integrante(Integrante(id=None, nome="João", turma="3A", funcao="Dev", foto="/static/joao.jpg"))
+
+        resultado = inserir_integrantes([
+            Integrante(id=None, nome="João", turma="3B", funcao="Editor"),
+            Integrante(id=None, nome="Maria", turma="2A", funcao="Apresentadora"),
+        ])
+        assert (resultado.inseridos, resultado.atualizados, resultado.ignorados) == (1, 0, 1)
+        assert obter_integrante_por_nome("João").turma == "3A"
+
+        resultado = inserir_integrantes([
+            Integrante(id=None, nome="João", turma="3B", funcao="Editor"),
+        ], atualizar=True)
+        assert (resultado.inseridos, resultado.atualizados, resultado.ignorados) == (0, 1, 0)
+        joao = obter_integrante_por_nome("João")
+        assert (joao.turma, joao.funcao, joao.foto) == ("3B", "Editor", "/static/joao.jpg")
+        assert contar_integrantes() == 2
+
     def test_obter_todos_integrantes(self, test_db):
         # Inserir alguns integrantes
         integrante1 = Integrante(id=0, nome="Ana", turma="3A", funcao="Dev")
@@ -130,6 +151,44 @@ class TestIntegranteRepo:
         assert result[0].nome == "Ana"
         assert result[1].nome == "Bruno"
     
+    def test_obter_integrantes_paginados(self, test_db):
+        for nome in ["Carla", "Ana", "Bruno"]:
+            inserir_integrante(Integrante(id=0, nome=nome, turma="3A", funcao="Dev"))
+        
+        pagina1 = obter_integrantes_paginados(2)
+        assert [i.nome for i in pagina1.itens] == ["Ana", "Bruno"]
+        assert pagina1.total == 3
+        
+        pagina2 = obter_integrantes_paginados(2, depois=pagina1.proximo)
+        assert [i.nome for i in pagina2.itens] == ["Carla"]
+        assert pagina2.proximo is None
+        
+        voltou = obter_integrantes_paginados(2, antes=pagina2.anterior)
+        assert [i.nome for i in voltou.itens] == ["Ana", "Bruno"]
+        assert voltou.anterior is None
+    
+    def test_exportar_integrantes(self, test_db):
+        id_joao = inserir_integrante(Integrante(id=None, nome="João", turma="3A", funcao="Dev"))
+        inserir_integrante(Integrante(id=None, nome="Maria", turma="2A", funcao="Editora"))
+
+        lotes = list(exportar_integrantes(["id", "nome"], tamanho_lote=1))
+
+        assert lotes == [[(id_joao, "João")], [(id_joao + 1, "Maria")]]
+
+    def test_escritas_invalidam_cache(self, test_db):
+        id_joao = inserir_integrante(Integrante(id=None, nome="João", turma="3A", funcao="Dev"))
+        assert contar_integrantes() == 1
+        assert obter_integrantes_paginados(24).itens[0].turma == "3A"
+
+        alterar_integrante(Integrante(id=id_joao, nome="João", turma="3B", funcao="Dev"))
+        assert obter_integrantes_paginados(24).itens[0].turma == "3B"
+
+        inserir_integrantes([Integrante(id=None, nome="Maria", turma="2A", funcao="Editora")])
+        assert contar_integrantes() == 2
+
+        excluir_integrante(id_joao)
+        assert [i.nome for i in obter_todos_integrantes()] == ["Maria"]
+
     def test_obter_integrante_por_nome(self, test_db):
         # Inserir primeiro
         integrante = Integrante(id=0, nome="João Silva", turma="3A", funcao="Dev")
@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import bcrypt
+import pytest
+
+from util import tentativas
+from util.executor import ExecutorLimitado, ExecutorOcupado
+from util.security import ROUNDS_BCRYPT, criar_hash_senha, verificar_e_atualizar_senha
+from util.tentativas import BaldeDeFichas, login_bem_sucedido, reservar_tentativa
+
+
+@pytest.fixture
+def limites(monkeypatch):
+    """Baldes novos e pequenos para IP e email"""
+    monkeypatch.setattr(tentativas, "tentativas_por_ip", BaldeDeFichas("ip", 5, 10.0))
+    monkeypatch.setattr(tentativas, "tentativas_por_email", BaldeDeFichas("email", 3, 10.0))
+
+
+class TestBaldeDeFichas:
+
+    def test_rajada_e_reposicao(self):
+        balde = BaldeDeFichas("teste", capacidade=2, intervalo=10.0)
+
+        balde.consumir("a", agora=0)
+        balde.consumir("a", agora=0)
+        assert balde.espera("a", agora=0) == 10.0
+        assert balde.espera("a", agora=4) == pytest.approx(6.0)
+        assert balde.espera("a", agora=10) == 0
+        assert balde.espera("b", agora=0) == 0   # chaves independentes
+
+    def test_nao_passa_da_capacidade(self):
+        balde = BaldeDeFichas("teste", capacidade=2, intervalo=1.0)
+        balde.consumir("a", agora=0)
+
+        assert balde.fichas("a", agora=1000) == 2
+
+    def test_quantidade_de_chaves_limitada(self):
+        balde = BaldeDeFichas("teste", capacidade=2, intervalo=60.0, maximo_chaves=3)
+        for n in range(10):
+            balde.consumir(n, agora=n)
+
+        assert len(balde) == 3
+        # Baldes que já encheram não ficam guardados
+        balde.consumir("x", agora=10_000)
+        assert len(balde) == 1
+
+
+class TestReservarTentativa:
+
+    def test_limite_por_email(self, limites):
+        assert [reservar_tentativa("1.1.1.1", "Admin@ifes.com ") for _ in range(4)] == [0, 0, 0, 10]
+        # Outro IP, mesmo email: continua recusado
+        assert reservar_tentativa("2.2.2.2", "admin@ifes.com") == 10
+        assert reservar_tentativa("2.2.2.2", "outro@ifes.com") == 0
+
+    def test_limite_por_ip(self, limites):
+        resultados = [reservar_tentativa("1.1.1.1", f"{n}@ifes.com") for n in range(6)]
+
+        assert resultados == [0, 0, 0, 0, 0, 10]
+
+    def test_recusada_nao_gasta_fichas(self, limites):
+        for _ in range(3):
+            reservar_tentativa("1.1.1.1", "admin@ifes.com")
+        for _ in range(5):
+            reservar_tentativa("1.1.1.1", "admin@ifes.com")
+
+        # Só as 3 aceitas gastaram fichas do IP
+        assert tentativas.tentativas_por_ip.fichas("1.1.1.1") == pytest.approx(2, abs=0.01)
+
+    def test_login_correto_devolve_fichas_do_email(self, limites):
+        for _ in range(3):
+            reservar_tentativa("1.1.1.1", "admin@ifes.com")
+
+        login_bem_sucedido("ADMIN@ifes.com")
+
+        assert reservar_tentativa("1.1.1.1", "admin@ifes.com") == 0
+
+
+class TestSenhas:
+
+    def test_verifica_sem_refazer_hash_atual(self):
+        senha_hash = criar_hash_senha("admin123")
+
+        assert verificar_e_atualizar_senha("admin123", senha_hash) == (True, None)
+        assert verificar_e_atualizar_senha("errada", senha_hash) == (False, None)
+
+    def test_refaz_hash_com_custo_menor(self):
+        antigo = bcrypt.hashpw(b"admin123", bcrypt.gensalt(4)).decode()
+
+        correta, novo_hash = verificar_e_atualizar_senha("admin123", antigo)
+
+        assert correta
+        assert novo_hash.startswith(f"$2b${ROUNDS_BCRYPT}$")
+        assert verificar_e_atualizar_senha("admin123", novo_hash) == (True, None)
+
+    def test_hash_invalido(self):
+        assert verificar_e_atualizar_senha("admin123", "texto puro") == (False, None)
+
+
+class TestExecutorComEspera:
+
+    def test_sem_vaga_no_prazo(self):
+        executor = ExecutorLimitado("teste", 1, vagas=1, espera=0.05)
+
+        async def cenario():
+            ocupando = asyncio.create_task(executor.executar(time.sleep, 0.3))
+            await asyncio.sleep(0.01)
+            with pytest.raises(ExecutorOcupado):
+                await executor.executar(time.sleep, 0)
+            await ocupando
+            # A vaga volta depois que a primeira termina
+            return await executor.executar(sum, (1, 2))
+
+        try:
+            assert asyncio.run(cenario()) == 3
+        finally:
+            executor.encerrar()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,220 @@
+import pytest
+import sqlite3
+import tempfile
+import os
+from data.sql.administrador_sql import *
+from data.sql.experimento_sql import *
+from data.sql.integrante_sql import *
+from data.sql.versao_sql import *
+from data.sql.arquivo_sql import *
+import dataclasses
+from data.model.administrador_model import Administrador
+from data.model.experimento_model import Experimento, ExperimentoResumo, ResultadoBusca
+from data.model.integrante_model import Integrante
+from data.model.versao_model import VersaoConteudo
+from data.model.arquivo_model import Arquivo
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes, listar_migracoes, obter_versao_atual, MigracaoError
+
+
+@pytest.fixture
+def conn():
+    """Fixture para criar uma conexão com banco temporário vazio"""
+    db_fd, db_path = tempfile.mkstemp()
+    conn = sqlite3.connect(db_path)
+    registrar_funcoes(conn)
+    yield conn
+    conn.close()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+# Experimento gravado antes das colunas derivadas (m0010)
+INSERIR_EXPERIMENTO_ANTIGO = "INSERT INTO experimento (titulo, descricao, materiais) VALUES (?, ?, ?)"
+
+
+def plano(conn, sql, params):
+    """Retorna o EXPLAIN QUERY PLAN como um texto único"""
+    linhas = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return " | ".join(linha[3] for linha in linhas)
+
+
+class TestMigracoes:
+
+    def test_aplicar_migracoes(self, conn):
+        aplicadas = aplicar_migracoes(conn)
+        
+        assert aplicadas == [m.versao for m in listar_migracoes()]
+        assert obter_versao_atual(conn) == aplicadas[-1]
+        tabelas = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert {"administrador", "integrante", "experimento", "experimento_busca", "schema_version"} <= tabelas
+    
+    def test_aplicar_migracoes_idempotente(self, conn):
+        aplicar_migracoes(conn)
+        assert aplicar_migracoes(conn) == []
+    
+    def test_migra_banco_existente(self, conn):
+        # Banco criado antes das migrações, com dados
+        conn.execute(CRIAR_TABELA_EXPERIMENTO)
+        conn.execute(INSERIR_EXPERIMENTO_ANTIGO, ("Vulcão", "<p>lava</p>", "bicarbonato"))
+        conn.commit()
+        
+        aplicar_migracoes(conn)
+        
+        # O índice de busca é populado com as linhas existentes
+        assert conn.execute(
+            "SELECT COUNT(*) FROM experimento_busca WHERE experimento_busca MATCH 'lava'"
+        ).fetchone()[0] == 1
+    
+    def test_conteudo_existente_e_sanitizado(self, conn):
+        conn.execute(CRIAR_TABELA_EXPERIMENTO)
+        conn.execute(INSERIR_EXPERIMENTO_ANTIGO, ("Vulcão", '<p onclick="x()">lava</p><iframe src="x"></iframe>',
+                                                  "<ul><li>água</li></ul>"))
+        conn.commit()
+
+        aplicar_migracoes(conn)
+
+        assert conn.execute("SELECT descricao, materiais FROM experimento").fetchone() == (
+            "<p>lava</p>", "<ul><li>água</li></ul>"
+        )
+
+    def test_sanitizacao_usa_as_regras_congeladas(self, conn, monkeypatch):
+        # Mudar a lista de permissões atual não muda o que a migração faz
+        from util import sanitizador
+        monkeypatch.setitem(sanitizador.TAGS_PERMITIDAS, "marquee", frozenset())
+        antigo = "<p>lava</p><marquee>quente</marquee>"
+        assert sanitizador.sanitizar_conteudo_html(antigo) == antigo
+        conn.execute(CRIAR_TABELA_EXPERIMENTO)
+        conn.execute(INSERIR_EXPERIMENTO_ANTIGO, ("Vulcão", antigo, ""))
+        conn.commit()
+
+        aplicar_migracoes(conn)
+
+        assert conn.execute("SELECT descricao FROM experimento").fetchone() == ("<p>lava</p>quente",)
+
+    def test_colunas_derivadas_preenchidas(self, conn):
+        conn.execute(CRIAR_TABELA_EXPERIMENTO)
+        conn.execute(INSERIR_EXPERIMENTO_ANTIGO, ("Vulcão", "<p>Lava &amp; <b>fumaça</b></p>", "<ul><li>água</li></ul>"))
+        conn.commit()
+
+        aplicar_migracoes(conn)
+
+        assert conn.execute(
+            "SELECT descricao_texto, materiais_texto, resumo, palavras, minutos_leitura FROM experimento"
+        ).fetchone() == ("Lava & fumaça", "água", "Lava & fumaça", 3, 1)
+        # Os triggers de busca passam a copiar as colunas derivadas
+        conn.execute("UPDATE experimento SET descricao_texto = 'magma'")
+        assert conn.execute(
+            "SELECT COUNT(*) FROM experimento_busca WHERE experimento_busca MATCH 'magma'"
+        ).fetchone()[0] == 1
+
+    def test_email_administrador_unico(self, conn):
+        aplicar_migracoes(conn)
+        conn.execute(INSERIR_ADMINISTRADOR, ("admin@test.com", "123"))
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(INSERIR_ADMINISTRADOR, ("admin@test.com", "456"))
+    
+    def test_falha_nao_registra_versao(self, conn):
+        conn.execute(CRIAR_TABELA_ADMINISTRADOR)
+        conn.execute(INSERIR_ADMINISTRADOR, ("admin@test.com", "123"))
+        conn.execute(INSERIR_ADMINISTRADOR, ("admin@test.com", "456"))
+        conn.commit()
+        
+        with pytest.raises(MigracaoError):
+            aplicar_migracoes(conn)
+        
+        assert obter_versao_atual(conn) == 2
+        indices = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert "idx_experimento_resumo" not in indices
+
+    def test_escritas_incrementam_versao_do_conteudo(self, conn):
+        aplicar_migracoes(conn)
+        versao = lambda: conn.execute(OBTER_VERSAO_CONTEUDO).fetchone()[0]
+        assert versao() == 1
+
+        conn.execute(INSERIR_EXPERIMENTO, ("Vulcão", "<p>lava</p>", "bicarbonato", None, None,
+                                           "lava", "bicarbonato", "lava", 2, 1))
+        conn.execute(INSERIR_INTEGRANTE, ("Ana", "3A", "Monitora", None, None))
+        assert versao() == 3
+
+        conn.execute("UPDATE experimento SET capa = 'x.jpg'")
+        conn.execute("DELETE FROM integrante")
+        assert versao() == 5
+        # Administradores não fazem parte do conteúdo público
+        conn.execute(INSERIR_ADMINISTRADOR, ("admin@test.com", "123"))
+        assert versao() == 5
+        # Dimensões novas mudam o HTML (width/height, srcset); o upload em si não
+        conn.execute(REGISTRAR_ARQUIVO, ("/static/c/ab/ab.jpg", "ab", 10, 0, 0.0))
+        assert versao() == 5
+        conn.execute(ALTERAR_DIMENSOES_ARQUIVO, (800, 600, "/static/c/ab/ab.jpg"))
+        assert versao() == 6
+
+
+class TestPlanosDeConsulta:
+    """Garante que as consultas frequentes usam índice em vez de varrer a tabela"""
+
+    @pytest.mark.parametrize("sql, params, indice", [
+        (OBTER_ADMINISTRADOR_POR_EMAIL, ("a@b.com",), "idx_administrador_email"),
+        (CONTAR_ADMINISTRADOR_POR_EMAIL, ("a@b.com",), "idx_administrador_email"),
+        (CONTAR_ADMINISTRADOR_POR_EMAIL_EXCETO_ID, ("a@b.com", 1), "idx_administrador_email"),
+        (OBTER_EXPERIMENTO_POR_TITULO, ("Vulcão",), "idx_experimento_resumo"),
+        (CONTAR_EXPERIMENTO_POR_TITULO, ("Vulcão",), "idx_experimento_resumo"),
+        (CONTAR_EXPERIMENTO_POR_TITULO_EXCETO_ID, ("Vulcão", 1), "idx_experimento_resumo"),
+        (OBTER_PAGINA_RESUMO_EXPERIMENTO, (10,), "COVERING INDEX idx_experimento_resumo"),
+        (OBTER_PAGINA_RESUMO_EXPERIMENTO_DEPOIS, ("Vulcão", 1, 10), "COVERING INDEX idx_experimento_resumo"),
+        (OBTER_INTEGRANTE_POR_NOME, ("Ana",), "idx_integrante_nome"),
+        (CONTAR_INTEGRANTE_POR_NOME, ("Ana",), "idx_integrante_nome"),
+        (CONTAR_INTEGRANTE_POR_NOME_EXCETO_ID, ("Ana", 1), "idx_integrante_nome"),
+        (OBTER_INTEGRANTES_POR_TURMA, ("3A",), "idx_integrante_turma"),
+        (OBTER_INTEGRANTES_POR_FUNCAO, ("Dev",), "idx_integrante_funcao"),
+        (OBTER_PAGINA_INTEGRANTE_DEPOIS, ("Ana", 1, 10), "idx_integrante_nome"),
+    ])
+    def test_consulta_usa_indice(self, conn, sql, params, indice):
+        aplicar_migracoes(conn)
+        
+        resultado = plano(conn, sql, params)
+        
+        assert indice in resultado
+        assert "TEMP B-TREE" not in resultado  # ORDER BY resolvido pelo índice
+
+
+# Colunas cujo nome difere do campo correspondente no modelo
+ALIASES_COLUNAS = {"id_integrante": "id"}
+
+
+class TestColunasDosModelos:
+    """Os SELECTs mapeados posicionalmente devem seguir a ordem dos campos"""
+
+    @pytest.mark.parametrize("nome_sql, modelo", [
+        ("OBTER_POR_ID_ADMINISTRADOR", Administrador),
+        ("OBTER_TODOS_ADMINISTRADOR", Administrador),
+        ("OBTER_ADMINISTRADOR_POR_EMAIL", Administrador),
+        ("OBTER_EXPERIMENTO_POR_ID", Experimento),
+        ("OBTER_EXPERIMENTO_POR_TITULO", Experimento),
+        ("OBTER_TODOS_EXPERIMENTO", Experimento),
+        ("BUSCAR_EXPERIMENTOS_ORDEM_TITULO", Experimento),
+        ("OBTER_PAGINA_RESUMO_EXPERIMENTO", ExperimentoResumo),
+        ("OBTER_PAGINA_RESUMO_EXPERIMENTO_DEPOIS", ExperimentoResumo),
+        ("OBTER_PAGINA_RESUMO_EXPERIMENTO_ANTES", ExperimentoResumo),
+        ("BUSCAR_EXPERIMENTOS", ResultadoBusca),
+        ("OBTER_INTEGRANTE_POR_ID", Integrante),
+        ("OBTER_INTEGRANTE_POR_NOME", Integrante),
+        ("OBTER_TODOS_INTEGRANTE", Integrante),
+        ("OBTER_INTEGRANTES_POR_TURMA", Integrante),
+        ("OBTER_INTEGRANTES_POR_FUNCAO", Integrante),
+        ("OBTER_PAGINA_INTEGRANTE", Integrante),
+        ("OBTER_PAGINA_INTEGRANTE_DEPOIS", Integrante),
+        ("OBTER_PAGINA_INTEGRANTE_ANTES", Integrante),
+        ("OBTER_VERSAO_CONTEUDO", VersaoConteudo),
+        ("OBTER_ARQUIVO_POR_URL", Arquivo),
+    ])
+    def test_ordem_das_colunas(self, conn, nome_sql, modelo):
+        aplicar_migracoes(conn)
+        sql = globals()[nome_sql]
+        cursor = conn.execute(sql, (1,) * sql.count("?"))
+        colunas = [ALIASES_COLUNAS.get(d[0], d[0]) for d in cursor.description]
+        assert colunas == [campo.name for campo in dataclasses.fields(modelo)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,114 @@
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from util import recursos_estaticos
+from util.arquivos_estaticos import ArquivosEstaticos
+from util.recursos_estaticos import (
+    CACHE_CONTROL_IMUTAVEL, construir_recursos, links_fontes, minificar_css, url_css,
+)
+
+
+@pytest.fixture
+def estaticos(tmp_path, monkeypatch):
+    """static/ temporário com um bundle principal e um de página"""
+    (tmp_path / "css" / "paginas").mkdir(parents=True)
+    (tmp_path / "css" / "ifes.css").write_text(":root {\n  --verde: #2E7D32;\n}\n")
+    (tmp_path / "css" / "paginas" / "index.css").write_text("/* hero */\n.hero {\n  color: var(--verde);\n}\n")
+    monkeypatch.setattr(recursos_estaticos, "PASTA_ESTATICOS", str(tmp_path))
+    monkeypatch.setattr(recursos_estaticos, "PASTA_BUNDLES", str(tmp_path / "dist"))
+    monkeypatch.setattr(recursos_estaticos, "BUNDLES", {
+        "ifes": ["css/ifes.css"],
+        "index": ["css/paginas/index.css"],
+    })
+    monkeypatch.setattr(recursos_estaticos, "_manifesto", {})
+    monkeypatch.setattr(recursos_estaticos, "_fontes", [])
+    return tmp_path
+
+
+def ler_bundle(estaticos, url):
+    return (estaticos / "dist" / url.rsplit("/", 1)[1]).read_text()
+
+
+class TestMinificarCss:
+
+    @pytest.mark.parametrize("css, esperado", [
+        ("a {\n  color: red;\n  margin: 0 auto;\n}", "a{color:red;margin:0 auto}"),
+        ("/* comentário */ .a > .b , .c { top: 0 }", ".a>.b,.c{top:0}"),
+        (".a { width: calc(100% - 2rem); }", ".a{width:calc(100% - 2rem)}"),
+        (".a::after { content: ' ; { } '; }", ".a::after{content:' ; { } '}"),
+        ("@media (max-width: 768px) { .a { top: 0; } }", "@media (max-width:768px){.a{top:0}}"),
+        ("nav :hover { top: 0 }", "nav :hover{top:0}"),
+    ])
+    def test_minificar(self, css, esperado):
+        assert minificar_css(css) == esperado
+
+
+class TestConstruirRecursos:
+
+    def test_nome_com_hash_do_conteudo(self, estaticos):
+        manifesto = construir_recursos()
+
+        assert set(manifesto) == {"ifes", "index"}
+        assert manifesto["index"].startswith("/static_css/dist/index.")
+        assert ler_bundle(estaticos, manifesto["index"]) == ".hero{color:var(--verde)}"
+        assert url_css("index") == manifesto["index"]
+
+    def test_conteudo_novo_muda_a_url(self, estaticos):
+        antes = construir_recursos()["index"]
+        (estaticos / "css" / "paginas" / "index.css").write_text(".hero { color: red; }")
+
+        depois = construir_recursos()["index"]
+
+        assert depois != antes
+        # O bundle antigo continua lá para quem ainda tem o HTML anterior
+        assert os.path.exists(estaticos / "dist" / antes.rsplit("/", 1)[1])
+
+    def test_sem_minificar(self, estaticos):
+        manifesto = construir_recursos(minificar=False)
+
+        assert "/* hero */" in ler_bundle(estaticos, manifesto["index"])
+
+    def test_url_css_constroi_sob_demanda(self, estaticos):
+        assert url_css("ifes").startswith("/static_css/dist/ifes.")
+
+    def test_sem_fontes_locais_usa_google_fonts(self, estaticos):
+        links = links_fontes()
+
+        assert 'rel="preconnect"' in links
+        assert "fonts.googleapis.com/css2" in links
+        assert "@font-face" not in ler_bundle(estaticos, url_css("ifes"))
+
+    def test_fontes_locais_com_preload(self, estaticos):
+        (estaticos / "fonts").mkdir()
+        (estaticos / "fonts" / "inter-latin.woff2").write_bytes(b"wOF2 inter")
+        construir_recursos()
+
+        links = links_fontes()
+        css = ler_bundle(estaticos, url_css("ifes"))
+
+        assert links.count('rel="preload"') == 1
+        assert 'as="font" type="font/woff2" crossorigin' in links
+        assert "fonts.googleapis.com" not in links
+        assert "@font-face{font-family:'Inter'" in css
+        assert "font-display:swap" in css
+        url_fonte = links.split('href="')[1].split('"')[0]
+        assert url_fonte.startswith("/static_css/dist/inter-latin.") and url_fonte in css
+
+    def test_bundles_servidos_como_imutaveis(self, estaticos):
+        url = construir_recursos()["ifes"]
+        app = FastAPI()
+        app.mount("/static_css/dist", ArquivosEstaticos(
+            directory=str(estaticos / "dist"), cache_control=CACHE_CONTROL_IMUTAVEL
+        ))
+
+        with TestClient(app) as cliente:
+            resposta = cliente.get(url)
+
+        assert resposta.status_code == 200
+        assert resposta.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert resposta.text == ":root{--verde:#2E7D32}"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,84 @@
+import dataclasses
+
+import pytest
+
+from util.sanitizador import REGRAS, sanitizar_conteudo_html
+
+
+class TestSanitizarConteudoHtml:
+
+    def test_html_do_editor_passa_intacto(self):
+        html = (
+            '<h2>Vulcão</h2><p class="ql-align-center">Misture <strong>vinagre</strong> e '
+            '<span style="color: rgb(230, 0, 0);">bicarbonato</span>&nbsp;&amp; observe.</p>'
+            '<ol><li class="ql-indent-1">um</li></ol><blockquote>nota</blockquote>'
+            '<p><a href="https://ifes.edu.br/" rel="noopener noreferrer" target="_blank">link</a>'
+            '<img src="/static/c/ab/ab.jpg" alt="foto"></p>'
+        )
+
+        assert sanitizar_conteudo_html(html) == html
+
+    @pytest.mark.parametrize("entrada, esperado", [
+        ('<p onclick="x()" onmouseover=y>Desc</p>', "<p>Desc</p>"),
+        ("<script>alert(1)</script><p>ok</p>", "<p>ok</p>"),
+        ("<SCRIPT >alert(1)</script >ok", "ok"),
+        ('<iframe src="https://x"></iframe><svg><script>1</script></svg>fim', "fim"),
+        ("<form><input name=x>texto</form>", "texto"),
+        ("<!-- comentário --><!DOCTYPE html>a", "a"),
+        ("<scr<script>ipt>alert(1)</script>", "ipt&gt;alert(1)"),
+    ])
+    def test_tags_fora_da_lista(self, entrada, esperado):
+        assert sanitizar_conteudo_html(entrada) == esperado
+
+    @pytest.mark.parametrize("entrada, esperado", [
+        ('<a href="javascript:alert(1)">x</a>', "<a>x</a>"),
+        ('<a href="java\tscript:alert(1)">x</a>', "<a>x</a>"),
+        ('<a href="&#106;avascript:alert(1)">x</a>', "<a>x</a>"),
+        ('<a href="/cliente/experimentos?a=1&amp;b=2">x</a>', '<a href="/cliente/experimentos?a=1&amp;b=2">x</a>'),
+        ('<a href="#" target="_top">x</a>', '<a href="#">x</a>'),
+        ('<img/src="/static/OIP (1).webp" onerror=alert(1)>', '<img src="/static/OIP (1).webp">'),
+        ('<img src="data:image/png;base64,iVBORw0=">', '<img src="data:image/png;base64,iVBORw0=">'),
+        ('<img src="data:text/html;base64,PHNjcmlwdD4=">', "<img>"),
+        ('<p style="color: red; background-image: url(x); position: fixed">a</p>', '<p style="color: red;">a</p>'),
+        ('<p class="ql-size-large destaque" title="x">a</p>', '<p class="ql-size-large">a</p>'),
+        ('<p title=\'"><script>\'>a</p>', "<p>a</p>"),
+        ('<img src=x alt=\'"><script>\'>', '<img src="x" alt="&quot;&gt;&lt;script&gt;">'),
+    ])
+    def test_atributos(self, entrada, esperado):
+        assert sanitizar_conteudo_html(entrada) == esperado
+
+    @pytest.mark.parametrize("url", [
+        "//evil.example/x", "\\\\evil.example\\x", "/\\evil.example", " //evil.example", "//ifes.edu.br@evil.example/",
+    ])
+    def test_url_sem_esquema_para_outro_host(self, url):
+        assert sanitizar_conteudo_html(f'<a href="{url}">x</a><img src="{url}">') == "<a>x</a><img>"
+
+    def test_url_sem_esquema_para_host_permitido(self):
+        regras = dataclasses.replace(REGRAS, hosts=frozenset({"ifes.edu.br"}))
+        html = '<a href="//IFES.edu.br/campus">x</a>'
+
+        assert sanitizar_conteudo_html(html, regras) == html
+        assert sanitizar_conteudo_html('<a href="/campus">x</a>', regras) == '<a href="/campus">x</a>'
+
+    @pytest.mark.parametrize("entrada, esperado", [
+        ("a < b & c > d", "a &lt; b &amp; c &gt; d"),
+        ("&lt;p&gt; &eacute; &#233;", "&lt;p&gt; &eacute; &#233;"),
+        ("<ul><li>um<li>dois</ul>", "<ul><li>um</li><li>dois</li></ul>"),
+        ("<p><strong>negrito</p>", "<p><strong>negrito</strong></p>"),
+        ("<div><em>aberta", "<div><em>aberta</em></div>"),
+        ("</p></div>solto", "solto"),
+        ("texto puro", "texto puro"),
+        ("", ""),
+    ])
+    def test_texto_e_estrutura(self, entrada, esperado):
+        assert sanitizar_conteudo_html(entrada) == esperado
+
+    def test_idempotente(self):
+        html = '<p style="color: #fff">a &amp; <b>b</b><img src=/x.png width=10 height="20px"></p>'
+        uma_vez = sanitizar_conteudo_html(html)
+
+        assert sanitizar_conteudo_html(uma_vez) == uma_vez
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,302 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from data.model.sessao_model import Sessao
+from data.repo import sessao_repo
+from util import sessoes
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
+from util.sessoes import (
+    SessaoMiddleware, SessoesEmMemoria, SessoesSQLite, carregar_sessao, criar_armazenamento, renovar_sessao,
+)
+
+
+class ArmazenamentoContado(SessoesEmMemoria):
+    """Sessões em memória que contam as leituras"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.leituras = 0
+
+    async def carregar(self, id):
+        self.leituras += 1
+        return await super().carregar(id)
+
+
+def ler(armazenamento, id):
+    return asyncio.run(armazenamento.carregar(id))
+
+
+def criar_app(armazenamento, duracao=sessoes.DURACAO_SESSAO):
+    app = FastAPI()
+    app.add_middleware(SessaoMiddleware, armazenamento=armazenamento, duracao=duracao, ignorar=("/estaticos",))
+
+    @app.get("/publica")
+    async def publica():
+        return {}
+
+    @app.get("/estaticos/estilo.css")
+    async def estilo(request: Request):
+        return {"sessao": "session" in request.scope}
+
+    @app.get("/sem_carregar")
+    async def sem_carregar(request: Request):
+        request.session.get("admin_logado")
+        return {}
+
+    @app.get("/ler")
+    async def ler(request: Request):
+        sessao = await carregar_sessao(request)
+        return {"admin": bool(sessao.get("admin_logado"))}
+
+    @app.get("/login")
+    async def login(request: Request):
+        await carregar_sessao(request)
+        renovar_sessao(request)
+        request.session["admin_logado"] = True
+        return {}
+
+    @app.get("/flash")
+    async def flash(request: Request):
+        sessao = await carregar_sessao(request)
+        sessao.setdefault("flash_messages", []).append({"message": "ok", "type": "success"})
+        return {}
+
+    @app.get("/mensagens")
+    async def mensagens(request: Request):
+        sessao = await carregar_sessao(request)
+        return {"mensagens": sessao.pop("flash_messages", [])}
+
+    @app.get("/sair")
+    async def sair(request: Request):
+        sessao = await carregar_sessao(request)
+        sessao.clear()
+        return {}
+
+    return app
+
+
+@pytest.fixture
+def memoria():
+    return ArmazenamentoContado()
+
+
+@pytest.fixture
+def cliente(memoria):
+    with TestClient(criar_app(memoria)) as cliente:
+        yield cliente
+
+
+class TestSessaoMiddleware:
+
+    def test_sem_acesso_nao_consulta_nem_grava(self, cliente, memoria):
+        resposta = cliente.get("/publica")
+
+        assert "set-cookie" not in resposta.headers
+        assert memoria.leituras == 0
+        assert len(memoria) == 0
+
+    def test_sem_cookie_nao_consulta_o_armazenamento(self, cliente, memoria):
+        resposta = cliente.get("/ler")
+
+        assert resposta.json() == {"admin": False}
+        assert "set-cookie" not in resposta.headers
+        assert memoria.leituras == 0
+
+    def test_rota_que_nao_usa_a_sessao_nao_consulta(self, cliente, memoria):
+        cliente.get("/login")
+        leituras = memoria.leituras
+
+        resposta = cliente.get("/publica")
+
+        assert memoria.leituras == leituras
+        assert "set-cookie" not in resposta.headers
+
+    def test_pasta_ignorada_nem_tem_sessao(self, cliente, memoria):
+        cliente.get("/login")
+        leituras = memoria.leituras
+
+        assert cliente.get("/estaticos/estilo.css").json() == {"sessao": False}
+        assert memoria.leituras == leituras
+
+    def test_uso_sem_carregar_e_erro(self, cliente):
+        cliente.get("/login")
+
+        with pytest.raises(RuntimeError, match="carregar_sessao"):
+            cliente.get("/sem_carregar")
+
+    def test_cookie_leva_so_o_id(self, cliente, memoria):
+        cliente.get("/login")
+        id = cliente.cookies["session"]
+
+        assert len(id) == 43
+        assert "admin" not in id
+        assert ler(memoria, id).dados == '{"admin_logado":true}'
+
+    def test_leitura_nao_reenvia_cookie(self, cliente):
+        cliente.get("/login")
+
+        resposta = cliente.get("/ler")
+
+        assert resposta.json() == {"admin": True}
+        assert "set-cookie" not in resposta.headers
+
+    def test_mensagens_flash(self, cliente):
+        cliente.get("/flash")
+        cliente.get("/flash")
+
+        assert len(cliente.get("/mensagens").json()["mensagens"]) == 2
+        assert cliente.get("/mensagens").json()["mensagens"] == []
+
+    def test_sessao_esvaziada_e_apagada(self, cliente, memoria):
+        cliente.get("/login")
+
+        resposta = cliente.get("/sair")
+
+        assert "expires=Thu, 01 Jan 1970" in resposta.headers["set-cookie"]
+        assert len(memoria) == 0
+
+    def test_cookie_invalido_vira_sessao_nova(self, cliente, memoria):
+        # Cookie assinado do SessionMiddleware antigo
+        cliente.cookies.set("session", "eyJhZG1pbl9sb2dhZG8iOiB0cnVlfQ==.ZmFrZQ.assinatura")
+        assert cliente.get("/ler").json() == {"admin": False}
+        assert memoria.leituras == 0
+
+        # Id bem formado, mas que o servidor não conhece, não é reaproveitado
+        desconhecido = "A" * 43
+        cliente.cookies.set("session", desconhecido)
+        resposta = cliente.get("/flash")
+
+        assert resposta.cookies["session"] != desconhecido
+
+    def test_login_troca_o_id(self, cliente, memoria):
+        cliente.get("/flash")
+        anterior = cliente.cookies["session"]
+
+        cliente.get("/login")
+
+        assert cliente.cookies["session"] != anterior
+        assert ler(memoria, anterior) is None
+        assert len(cliente.get("/mensagens").json()["mensagens"]) == 1
+
+    def test_renova_validade_depois_da_metade(self, memoria):
+        with TestClient(criar_app(memoria, duracao=100)) as cliente:
+            cliente.get("/login")
+            id = cliente.cookies["session"]
+            sessao = ler(memoria, id)
+            memoria._sessoes[id] = Sessao(id, sessao.dados, time.time() + 40)
+
+            resposta = cliente.get("/ler")
+
+        assert "Max-Age=100" in resposta.headers["set-cookie"]
+        assert ler(memoria, id).expira_em > time.time() + 90
+
+
+class TestSessoesEmMemoria:
+
+    def test_expiracao(self):
+        memoria = SessoesEmMemoria()
+        memoria._sessoes["a"] = Sessao("a", "{}", time.time() - 1)
+
+        assert ler(memoria, "a") is None
+        assert len(memoria) == 0
+
+    def test_lru(self):
+        memoria = SessoesEmMemoria(tamanho_maximo=2)
+
+        async def gravar(id):
+            await memoria.gravar(Sessao(id, "{}", time.time() + 60))
+
+        asyncio.run(gravar("a"))
+        asyncio.run(gravar("b"))
+        ler(memoria, "a")
+        asyncio.run(gravar("c"))
+
+        assert ler(memoria, "b") is None
+        assert ler(memoria, "a") is not None
+
+    def test_armazenamento_incompleto(self):
+        class SoLeitura(sessoes.ArmazenamentoSessoes):
+            async def carregar(self, id):
+                return None
+
+        with pytest.raises(TypeError):
+            SoLeitura()
+
+    def test_tipo_desconhecido(self):
+        with pytest.raises(ValueError):
+            criar_armazenamento("redis")
+
+
+@pytest.fixture
+def banco():
+    """Banco temporário com as migrações"""
+    db_fd, db_path = tempfile.mkstemp()
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    with patch.object(sessao_repo, "get_connection", lambda: conn):
+        yield conn
+    conn.close()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+class TestSessoesSQLite:
+
+    def test_compartilhada_entre_armazenamentos(self, banco):
+        # Dois "workers", cada um com seu middleware, sobre a mesma tabela
+        with TestClient(criar_app(SessoesSQLite())) as primeiro:
+            primeiro.get("/login")
+            primeiro.get("/flash")
+            id = primeiro.cookies["session"]
+        with TestClient(criar_app(SessoesSQLite())) as segundo:
+            segundo.cookies.set("session", id)
+
+            assert segundo.get("/ler").json() == {"admin": True}
+            assert len(segundo.get("/mensagens").json()["mensagens"]) == 1
+            segundo.get("/sair")
+
+        assert banco.execute("SELECT COUNT(*) FROM sessao").fetchone()[0] == 0
+
+    def test_leitura_pelo_executor_de_banco(self, banco, monkeypatch):
+        chamadas = []
+
+        async def executar_banco(funcao, *args):
+            chamadas.append(funcao)
+            return funcao(*args)
+
+        monkeypatch.setattr(sessoes, "executar_banco", executar_banco)
+        with TestClient(criar_app(SessoesSQLite())) as cliente:
+            cliente.get("/login")
+            cliente.get("/ler")
+
+        assert sessao_repo.obter_sessao in chamadas
+
+    def test_expirada_nao_e_lida_e_e_limpa(self, banco):
+        agora = time.time()
+        sessao_repo.gravar_sessao(Sessao("velha", '{"a":1}', agora - 1))
+        sessao_repo.gravar_sessao(Sessao("nova", '{"a":1}', agora + 60))
+
+        assert sessao_repo.obter_sessao("velha", agora) is None
+        assert sessao_repo.obter_sessao("nova", agora).dados == '{"a":1}'
+
+        with patch.object(sessoes, "enfileirar") as enfileirar:
+            sessoes.tarefa_limpar_sessoes()
+
+        assert [linha[0] for linha in banco.execute("SELECT id FROM sessao")] == ["nova"]
+        enfileirar.assert_called_once_with(
+            "limpar_sessoes", chave=sessoes.CHAVE_LIMPEZA_SESSOES, atraso=sessoes.INTERVALO_LIMPEZA_SESSOES,
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,200 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from data.repo import tarefa_repo
+from util import tarefas
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
+from util.tarefas import FilaTarefas, agendar, enfileirar
+
+
+@pytest.fixture
+def fila(monkeypatch):
+    """Banco temporário com as migrações, tratadores de teste e uma fila nova"""
+    db_fd, db_path = tempfile.mkstemp()
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    monkeypatch.setattr(tarefas, "TRATADORES", {})
+    nova = FilaTarefas(trabalhadores=2, intervalo=0.05)
+    monkeypatch.setattr(tarefas, "fila", nova)
+    with patch.object(tarefa_repo, "get_connection", lambda: conn):
+        yield nova
+    conn.close()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+def registrar(tipo):
+    chamadas = []
+
+    @tarefas.tarefa(tipo)
+    def tratador(**argumentos):
+        chamadas.append(argumentos)
+
+    return chamadas
+
+
+def estado(id_tarefa):
+    return tarefa_repo.obter_tarefa_por_id(id_tarefa)
+
+
+class TestEnfileirar:
+
+    def test_executa_sincrona_e_assincrona(self, fila):
+        sincronas = registrar("sincrona")
+        assincronas = []
+
+        @tarefas.tarefa("assincrona")
+        async def tratador(valor):
+            assincronas.append(valor)
+
+        a = enfileirar("sincrona", {"url": "/static/x.jpg"})
+        b = enfileirar("assincrona", {"valor": 3})
+
+        assert asyncio.run(fila.processar_pendentes()) == 2
+        assert sincronas == [{"url": "/static/x.jpg"}]
+        assert assincronas == [3]
+        assert estado(a).estado == estado(b).estado == "concluida"
+
+    def test_tipo_nao_registrado(self, fila):
+        with pytest.raises(ValueError):
+            enfileirar("desconhecido")
+
+    def test_atraso(self, fila):
+        registrar("x")
+        id_tarefa = enfileirar("x", atraso=60)
+
+        assert asyncio.run(fila.processar_pendentes()) == 0
+        assert estado(id_tarefa).estado == "pendente"
+
+
+class TestChave:
+
+    def test_pendente_nao_duplica(self, fila):
+        chamadas = registrar("liberar")
+
+        primeira = enfileirar("liberar", {"n": 1}, chave="liberar:a")
+        assert enfileirar("liberar", {"n": 2}, chave="liberar:a") is None
+        asyncio.run(fila.processar_pendentes())
+
+        assert chamadas == [{"n": 1}]
+        # Concluída: a mesma chave volta a valer, reaproveitando a linha
+        assert enfileirar("liberar", {"n": 3}, chave="liberar:a") == primeira
+
+    def test_em_execucao_roda_de_novo(self, fila):
+        chamadas = []
+
+        @tarefas.tarefa("lenta")
+        def tratador(n):
+            if n == 1:
+                # Agendada de novo enquanto executa
+                assert enfileirar("lenta", {"n": 2}, chave="k") is not None
+            chamadas.append(n)
+
+        id_tarefa = enfileirar("lenta", {"n": 1}, chave="k")
+        asyncio.run(fila.processar_pendentes())
+
+        assert chamadas == [1, 2]
+        assert estado(id_tarefa).estado == "concluida"
+
+
+class TestFalhas:
+
+    def test_nova_tentativa_com_espera_e_depois_falha(self, fila, monkeypatch):
+        monkeypatch.setattr(tarefas, "ESPERA_INICIAL", 0.0)
+
+        @tarefas.tarefa("quebrada")
+        def tratador():
+            raise OSError("disco cheio")
+
+        id_tarefa = enfileirar("quebrada", max_tentativas=3)
+        assert asyncio.run(fila.processar_pendentes()) == 3
+
+        tarefa = estado(id_tarefa)
+        assert tarefa.estado == "falhou"
+        assert tarefa.tentativas == 3
+        assert tarefa.erro == "OSError: disco cheio"
+        assert tarefas.estatisticas_tarefas()["estados"]["falhou"] == 1
+
+        assert tarefa_repo.reenfileirar_tarefas_falhas(time.time()) == 1
+        assert estado(id_tarefa).estado == "pendente"
+
+    def test_espera_exponencial(self):
+        assert [tarefas.espera_para(n) for n in (1, 2, 3)] == [5.0, 10.0, 20.0]
+        assert tarefas.espera_para(50) == tarefas.ESPERA_MAXIMA
+
+    def test_espera_antes_da_nova_tentativa(self, fila):
+        @tarefas.tarefa("quebrada")
+        def tratador():
+            raise OSError("x")
+
+        id_tarefa = enfileirar("quebrada")
+        assert asyncio.run(fila.processar_pendentes()) == 1
+
+        tarefa = estado(id_tarefa)
+        assert tarefa.estado == "pendente"
+        assert tarefa.executar_em > time.time() + 4
+
+    def test_bloqueio_expirado_e_retomado(self, fila):
+        registrar("x")
+        id_tarefa = enfileirar("x")
+        # Reservada por um processo que morreu
+        agora = time.time()
+        tarefa_repo.reservar_proxima_tarefa(agora, agora - 1)
+
+        assert asyncio.run(fila.processar_pendentes()) == 1
+        assert estado(id_tarefa).tentativas == 2
+
+
+class TestTrabalhadores:
+
+    def test_agendar_acorda_e_encerrar_drena(self, fila):
+        chamadas = registrar("x")
+
+        async def cenario():
+            fila.intervalo = 30   # só o aviso de agendar acorda os trabalhadores
+            fila.iniciar()
+            await asyncio.sleep(0.05)
+            await agendar("x", {"n": 1})
+            for _ in range(200):
+                if chamadas:
+                    break
+                await asyncio.sleep(0.01)
+            executadas_antes = len(chamadas)
+            for n in range(2, 6):
+                enfileirar("x", {"n": n})
+            await fila.encerrar(prazo=5)
+            return executadas_antes
+
+        assert asyncio.run(cenario()) == 1
+        assert sorted(c["n"] for c in chamadas) == [1, 2, 3, 4, 5]
+        assert not fila.ativa
+
+    def test_encerrar_devolve_interrompida(self, fila):
+        @tarefas.tarefa("eterna")
+        async def tratador():
+            await asyncio.sleep(60)
+
+        id_tarefa = enfileirar("eterna")
+
+        async def cenario():
+            fila.iniciar()
+            await asyncio.sleep(0.05)
+            await fila.encerrar(prazo=0.05)
+
+        asyncio.run(cenario())
+
+        tarefa = estado(id_tarefa)
+        assert tarefa.estado == "pendente"
+        assert tarefa.tentativas == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
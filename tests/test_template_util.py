@@ -0,0 +1,59 @@
+import os
+import pytest
+from fastapi.templating import Jinja2Templates
+from util.template_util import configurar_cache_templates, precompilar_templates
+
+
+@pytest.fixture
+def pasta_templates(tmp_path):
+    pasta = tmp_path / "templates"
+    (pasta / "cliente").mkdir(parents=True)
+    (pasta / "base.html").write_text("<main>{% block corpo %}{% endblock %}</main>")
+    (pasta / "cliente" / "pagina.html").write_text(
+        '{% extends "base.html" %}{% block corpo %}Olá, {{ nome }}{% endblock %}'
+    )
+    (pasta / "leia-me.txt").write_text("não é template")
+    return pasta
+
+
+def criar(pasta_templates, pasta_cache, producao=False):
+    return configurar_cache_templates(
+        Jinja2Templates(directory=str(pasta_templates)), str(pasta_cache), producao
+    )
+
+
+class TestTemplateUtil:
+
+    def test_precompilar_carrega_todos_os_templates(self, pasta_templates, tmp_path):
+        templates = criar(pasta_templates, tmp_path / "cache")
+
+        assert precompilar_templates(templates) == 2
+        assert len(os.listdir(tmp_path / "cache")) == 2
+        assert templates.get_template("cliente/pagina.html").render(nome="Ana") == "<main>Olá, Ana</main>"
+
+    def test_novo_worker_usa_o_bytecode_em_disco(self, pasta_templates, tmp_path, monkeypatch):
+        precompilar_templates(criar(pasta_templates, tmp_path / "cache"))
+        templates = criar(pasta_templates, tmp_path / "cache")
+
+        def compilar(*args, **kwargs):
+            raise AssertionError("não deveria compilar")
+
+        monkeypatch.setattr(templates.env, "compile", compilar)
+        assert precompilar_templates(templates) == 2
+
+    def test_template_alterado_e_recompilado(self, pasta_templates, tmp_path):
+        precompilar_templates(criar(pasta_templates, tmp_path / "cache"))
+        (pasta_templates / "cliente" / "pagina.html").write_text(
+            '{% extends "base.html" %}{% block corpo %}Oi, {{ nome }}{% endblock %}'
+        )
+        templates = criar(pasta_templates, tmp_path / "cache")
+
+        assert templates.get_template("cliente/pagina.html").render(nome="Ana") == "<main>Oi, Ana</main>"
+
+    def test_auto_reload_desligado_em_producao(self, pasta_templates, tmp_path):
+        assert criar(pasta_templates, tmp_path / "cache").env.auto_reload
+        assert not criar(pasta_templates, tmp_path / "cache", producao=True).env.auto_reload
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
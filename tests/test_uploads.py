@@ -0,0 +1,159 @@
+import io
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+from data.repo import arquivo_repo
+from util import armazenamento, uploads
+from util.db_util import registrar_funcoes
+from util.migracoes import aplicar_migracoes
+from util.uploads import (
+    MB, LimiteUploadMiddleware, TipoUpload, UploadError, detectar_formato, gravar_upload, receber_upload,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200
+TIPO = TipoUpload("imagem", 1024, ("jpg", "png"))
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    """uploads/ temporário e banco com as migrações aplicadas"""
+    monkeypatch.setattr(armazenamento, "PASTA_UPLOADS", str(tmp_path))
+    monkeypatch.setattr(armazenamento, "PASTA_CONTEUDO", str(tmp_path / "c"))
+    monkeypatch.setattr(armazenamento, "PASTA_TEMPORARIA", str(tmp_path / "tmp"))
+    db_fd, db_path = tempfile.mkstemp()
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    registrar_funcoes(conn)
+    aplicar_migracoes(conn)
+    with patch.object(arquivo_repo, "get_connection", lambda: conn):
+        yield tmp_path
+    conn.close()
+    os.close(db_fd)
+    os.unlink(db_path)
+
+
+class TestDetectarFormato:
+
+    @pytest.mark.parametrize("cabecalho, formato", [
+        (b"\xff\xd8\xff\xe0\x00\x10JFIF", "jpg"),
+        (PNG[:16], "png"),
+        (b"GIF89a\x01\x00", "gif"),
+        (b"RIFF\x24\x00\x00\x00WEBPVP8 ", "webp"),
+        (b"\x00\x00\x00\x1cftypavif", "avif"),
+        (b"<svg xmlns=", None),
+        (b"<?php echo 1;", None),
+        (b"", None),
+    ])
+    def test_formatos(self, cabecalho, formato):
+        assert detectar_formato(cabecalho) == formato
+
+
+class TestGravarUpload:
+
+    def test_extensao_do_conteudo(self, pasta):
+        url = gravar_upload(io.BytesIO(PNG), TIPO)
+
+        assert url.endswith(".png")
+        with open(armazenamento.caminho_do_arquivo(url), "rb") as gravado:
+            assert gravado.read() == PNG
+
+    def test_formato_nao_permitido(self, pasta):
+        with pytest.raises(UploadError) as erro:
+            gravar_upload(io.BytesIO(b"GIF89a" + b"\x00" * 10), TIPO)
+
+        assert erro.value.status == 415
+
+    def test_acima_do_limite_nao_grava(self, pasta):
+        with pytest.raises(UploadError) as erro:
+            gravar_upload(io.BytesIO(PNG + b"\x00" * 1024), TIPO)
+
+        assert erro.value.status == 413
+        assert os.listdir(pasta / "tmp") == []
+        assert not (pasta / "c").exists()
+
+
+def app_upload(limites, padrao=None):
+    app = FastAPI()
+    app.add_middleware(LimiteUploadMiddleware, limites=limites, padrao=padrao)
+
+    @app.post("/upload")
+    async def upload(arquivo: UploadFile = File(...)):
+        try:
+            return {"url": await receber_upload(arquivo, "imagem")}
+        except UploadError as e:
+            raise HTTPException(status_code=e.status, detail=str(e))
+
+    return app
+
+
+class TestReceberUpload:
+
+    def test_upload_valido(self, pasta):
+        with TestClient(app_upload({"/upload": MB})) as cliente:
+            resposta = cliente.post("/upload", files={"arquivo": ("foto.exe", PNG, "application/octet-stream")})
+
+        assert resposta.status_code == 200
+        assert resposta.json()["url"].endswith(".png")
+
+    def test_content_type_do_cliente_nao_vale(self, pasta):
+        with TestClient(app_upload({"/upload": MB})) as cliente:
+            resposta = cliente.post("/upload", files={"arquivo": ("foto.png", b"<script>", "image/png")})
+
+        assert resposta.status_code == 415
+
+    def test_limite_do_tipo(self, pasta, monkeypatch):
+        monkeypatch.setitem(uploads.TIPOS_UPLOAD, "imagem", TIPO)
+        with TestClient(app_upload({"/upload": MB})) as cliente:
+            resposta = cliente.post("/upload", files={"arquivo": ("foto.png", PNG * 10, "image/png")})
+
+        assert resposta.status_code == 413
+
+
+class TestLimiteUploadMiddleware:
+
+    def test_content_length_recusado_sem_ler_o_corpo(self):
+        chamado = []
+
+        async def app(scope, receive, send):
+            chamado.append(scope["path"])
+
+        cliente = TestClient(LimiteUploadMiddleware(app, {"/admin/experimentos": 100}))
+        resposta = cliente.post("/admin/experimentos/editar/1", content=b"x" * 101)
+
+        assert resposta.status_code == 413
+        assert chamado == []
+
+    def test_corpo_sem_content_length(self, pasta):
+        def pedacos():
+            for _ in range(4):
+                yield b"x" * 600
+
+        with TestClient(app_upload({"/upload": 1000})) as cliente:
+            resposta = cliente.post("/upload", content=pedacos(),
+                                    headers={"Content-Type": "multipart/form-data; boundary=x"})
+
+        assert resposta.status_code == 413
+
+    def test_prefixo_mais_longo_e_padrao(self):
+        middleware = LimiteUploadMiddleware(None, {"/admin": 10, "/admin/importar": 99}, padrao=5)
+
+        assert middleware.limite_da_rota("/admin/importar/experimentos") == 99
+        assert middleware.limite_da_rota("/admin/integrantes") == 10
+        assert middleware.limite_da_rota("/administrador") == 5
+        assert middleware.limite_da_rota("/login_admin") == 5
+
+    def test_get_nao_e_limitado(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        assert TestClient(LimiteUploadMiddleware(app, {}, padrao=0)).get("/").status_code == 200
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
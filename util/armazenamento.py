@@ -0,0 +1,165 @@
+"""
+Armazenamento dos uploads endereçado pelo conteúdo
+
+Cada arquivo enviado é gravado em uploads/c/<aa>/<sha256><extensão>, onde
+<aa> são os dois primeiros caracteres do resumo. O SHA-256 é calculado
+enquanto o upload é copiado para um temporário, que depois é renomeado
+(atômico) para o nome definitivo. Assim:
+- o mesmo conteúdo enviado duas vezes ocupa um só arquivo
+- a URL nunca aponta para outro conteúdo, e pode ser servida com
+  `Cache-Control: immutable` (um ano)
+- enviar uma imagem com o nome de outra não sobrescreve nada
+
+A tabela `arquivo` conta quantas linhas de experimento (capa) e integrante
+(foto) apontam para cada URL; triggers mantêm a contagem. Imagens do editor
+de texto rico não são contadas por trigger: são enviadas com `fixar=True`,
+que reserva uma referência, e só saem pela coleta de órfãos.
+
+Versões reduzidas das imagens (util/imagens.py) ficam em
+uploads/d/<aa>/<sha256>-<largura>.<formato> e saem junto com o original.
+
+    url = salvar_arquivo(upload.file, upload.filename)
+    ...
+    liberar_arquivo(url_antiga)   # depois de gravar a linha que deixou de usá-la
+
+Nas rotas a liberação vai para a fila de tarefas (util/tarefas.py):
+    await agendar_liberacao(url_antiga)
+"""
+import glob
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import BinaryIO, Optional
+
+from data.model.arquivo_model import Arquivo
+from data.repo import arquivo_repo
+from util.tarefas import agendar, tarefa
+
+PASTA_UPLOADS = "uploads"
+PASTA_CONTEUDO = os.path.join(PASTA_UPLOADS, "c")
+PASTA_DERIVADAS = os.path.join(PASTA_UPLOADS, "d")
+PASTA_TEMPORARIA = os.path.join(PASTA_UPLOADS, "tmp")
+URL_UPLOADS = "/static"
+URL_CONTEUDO = URL_UPLOADS + "/c"
+URL_DERIVADAS = URL_UPLOADS + "/d"
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# Um arquivo reenviado há menos que isso não é apagado ao perder a última
+# referência: o formulário que vai usá-lo pode ainda não ter sido salvo
+CARENCIA = 600.0   # segundos
+
+_PADRAO_EXTENSAO = re.compile(r"^\.[a-z0-9]{1,10}$")
+_PADRAO_URL_CONTEUDO = re.compile(
+    re.escape(URL_CONTEUDO) + r"/([0-9a-f]{2})/(\1[0-9a-f]{62})(\.[a-z0-9]{1,10})?$"
+)
+
+
+def extensao_segura(nome_arquivo: str) -> str:
+    """Extensão em minúsculas (".jpg"), ou "" se ausente ou estranha"""
+    extensao = os.path.splitext(nome_arquivo or "")[1].lower()
+    return extensao if _PADRAO_EXTENSAO.match(extensao) else ""
+
+
+def caminho_relativo(resumo: str, extensao: str) -> str:
+    """<aa>/<resumo><extensão>, relativo a PASTA_CONTEUDO e URL_CONTEUDO"""
+    return f"{resumo[:2]}/{resumo}{extensao}"
+
+
+def eh_url_de_conteudo(url: str) -> bool:
+    """True para URLs geradas por `salvar_arquivo`"""
+    return bool(url) and _PADRAO_URL_CONTEUDO.match(url) is not None
+
+
+def resumo_da_url(url: str) -> str:
+    """SHA-256 de uma URL gerada por `salvar_arquivo`"""
+    return _PADRAO_URL_CONTEUDO.match(url).group(2)
+
+
+def caminho_do_arquivo(url: str) -> str:
+    """Caminho em disco de uma URL pública de upload (/static/...)"""
+    if eh_url_de_conteudo(url):
+        return os.path.join(PASTA_CONTEUDO, *url[len(URL_CONTEUDO) + 1:].split("/"))
+    return os.path.join(PASTA_UPLOADS, os.path.basename(url))
+
+
+def salvar_arquivo(origem: BinaryIO, nome_arquivo: str, fixar: bool = False) -> str:
+    """
+    Grava o conteúdo de `origem` sob o seu SHA-256 e retorna a URL pública (bloqueante)
+
+    Args:
+        origem: arquivo aberto em modo binário (UploadFile.file, open(..., "rb"))
+        nome_arquivo: nome original, usado só para a extensão
+        fixar: reserva uma referência (imagens do editor de texto rico)
+    """
+    os.makedirs(PASTA_TEMPORARIA, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=PASTA_TEMPORARIA, suffix=".upload")
+    try:
+        resumo = hashlib.sha256()
+        tamanho = 0
+        with os.fdopen(descritor, "wb") as saida:
+            while bloco := origem.read(TAMANHO_BLOCO):
+                resumo.update(bloco)
+                saida.write(bloco)
+                tamanho += len(bloco)
+
+        relativo = caminho_relativo(resumo.hexdigest(), extensao_segura(nome_arquivo))
+        url = f"{URL_CONTEUDO}/{relativo}"
+        # Registra antes de publicar: a carência protege o arquivo de um
+        # `liberar_arquivo` concorrente enquanto o formulário é salvo
+        arquivo_repo.registrar_arquivo(Arquivo(
+            url=url, resumo=resumo.hexdigest(), tamanho=tamanho,
+            referencias=1 if fixar else 0, enviado_em=time.time(),
+        ))
+
+        destino = os.path.join(PASTA_CONTEUDO, *relativo.split("/"))
+        if os.path.exists(destino):
+            os.unlink(temporario)   # conteúdo repetido: o arquivo já está lá
+        else:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            os.chmod(temporario, 0o644)
+            os.replace(temporario, destino)
+        return url
+    except BaseException:
+        if os.path.exists(temporario):
+            os.unlink(temporario)
+        raise
+
+
+@tarefa("liberar_arquivo")
+def liberar_arquivo(url: str) -> bool:
+    """
+    Apaga o arquivo se nenhuma linha aponta mais para ele (bloqueante)
+
+    Chamar depois de gravar a alteração/exclusão que deixou de usar a URL.
+    Uploads antigos, com nome do cliente, não têm contagem e podem ser
+    citados por várias linhas (o envio com o mesmo nome sobrescrevia o
+    arquivo): ficam para a coleta de órfãos (util/coleta_arquivos.py), que
+    confere todas as referências antes de mover qualquer coisa.
+
+    Returns:
+        True se o arquivo foi apagado
+    """
+    if not eh_url_de_conteudo(url):
+        return False
+    if not arquivo_repo.excluir_arquivo_sem_referencias(url, time.time() - CARENCIA):
+        return False
+    try:
+        os.remove(caminho_do_arquivo(url))
+    except OSError:
+        return False
+    resumo = resumo_da_url(url)
+    for derivada in glob.glob(os.path.join(PASTA_DERIVADAS, resumo[:2], f"{resumo}-*")):
+        try:
+            os.remove(derivada)
+        except OSError:
+            pass
+    return True
+
+
+async def agendar_liberacao(url: Optional[str]) -> None:
+    """Põe `liberar_arquivo` na fila de tarefas; a rota não espera o disco"""
+    if eh_url_de_conteudo(url):
+        await agendar("liberar_arquivo", {"url": url}, chave=f"liberar:{url}")
@@ -0,0 +1,93 @@
+"""
+StaticFiles com ETag forte (hash do conteúdo) e Cache-Control
+
+O StaticFiles do Starlette gera a ETag a partir de mtime e tamanho, que
+mudam a cada cópia ou deploy mesmo com o arquivo idêntico. Aqui a ETag é o
+SHA-256 do conteúdo, calculado na thread que já faz o `stat` do arquivo
+(fora do event loop) e guardado em cache por caminho + mtime + tamanho.
+Com `resumo_no_nome=True` (arquivos gravados sob o próprio SHA-256, como os
+de util/armazenamento.py) a ETag vem do nome e o arquivo não é lido.
+As subpastas em `ocultar` (uploads em andamento, quarentena da coleta)
+respondem 404 mesmo estando dentro de `directory`.
+
+    app.mount("/static", ArquivosEstaticos(directory="uploads", ocultar=("tmp",)), name="uploads")
+"""
+import hashlib
+import os
+import stat
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from util.cache import CacheLRU
+from util.validacao_http import formatar_etag, nao_modificado
+
+# Os uploads podem ser sobrescritos com o mesmo nome: validade curta e
+# revalidação barata (304) depois dela
+CACHE_CONTROL_UPLOADS = "public, max-age=300"
+
+TAMANHO_BLOCO = 1024 * 1024
+
+cache_etags = CacheLRU("etag_arquivos", tamanho_maximo=4096, ttl=3600.0)
+
+
+def _chave(caminho: str, info: os.stat_result) -> tuple:
+    return (caminho, info.st_mtime_ns, info.st_size)
+
+
+def resumo_arquivo(caminho: str) -> str:
+    """SHA-256 do conteúdo do arquivo (bloqueante)"""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        while bloco := arquivo.read(TAMANHO_BLOCO):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+class ArquivosEstaticos(StaticFiles):
+
+    def __init__(self, *args, cache_control: str = CACHE_CONTROL_UPLOADS,
+                 resumo_no_nome: bool = False, ocultar: Tuple[str, ...] = (), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+        self.resumo_no_nome = resumo_no_nome
+        self.ocultas = [
+            os.path.realpath(os.path.join(pasta, nome)) for pasta in self.all_directories for nome in ocultar
+        ]
+
+    def _oculto(self, caminho: str) -> bool:
+        # Compara o caminho já resolvido: "./tmp", "a/../tmp" e links caem aqui
+        return any(os.path.commonpath([caminho, oculta]) == oculta for oculta in self.ocultas)
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        # Roda em thread (anyio.to_thread): bom lugar para ler o arquivo
+        caminho, info = super().lookup_path(path)
+        if info is not None and self._oculto(os.path.realpath(caminho)):
+            return "", None
+        if info is not None and stat.S_ISREG(info.st_mode) and not self.resumo_no_nome:
+            chave = _chave(caminho, info)
+            if cache_etags.obter(chave) is None:
+                try:
+                    cache_etags.guardar(chave, resumo_arquivo(caminho))
+                except OSError:
+                    pass
+        return caminho, info
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> Response:
+        resposta = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        resposta.headers["cache-control"] = self.cache_control
+        if self.resumo_no_nome:
+            resumo = os.path.splitext(os.path.basename(full_path))[0]
+        else:
+            resumo = cache_etags.obter(_chave(str(full_path), stat_result))
+        if resumo is not None:
+            resposta.headers["etag"] = formatar_etag(resumo)
+        if status_code == 200 and nao_modificado(
+            Headers(scope=scope), resposta.headers["etag"], stat_result.st_mtime
+        ):
+            return NotModifiedResponse(resposta.headers)
+        return resposta
@@ -0,0 +1,178 @@
+"""
+Cache em memória (LRU com TTL) para leituras dos repositórios
+
+As páginas públicas leem sempre o mesmo conteúdo, que só muda quando um
+administrador grava algo. As funções de leitura são decoradas com
+`em_cache(cache)` e as de escrita invalidam as entradas afetadas:
+
+    cache_listas = CacheLRU("experimento_listas", tamanho_maximo=256)
+
+    @em_cache(cache_listas)
+    def obter_resumos_paginados(limite, depois=None, antes=None): ...
+
+    def inserir_experimento(...):
+        ...
+        cache_listas.limpar()
+
+Toda escrita também chama `conteudo_alterado()`, que avisa quem depende
+do conteúdo como um todo (por exemplo, o cache de páginas renderizadas).
+
+O cache é por processo: gravações feitas por outro processo (outro worker
+do uvicorn, `python importar.py`) são percebidas pela versão do conteúdo
+(util/versao_conteudo.py), consultada pelas páginas públicas; o TTL ainda
+limita quanto tempo uma leitura pode ficar desatualizada.
+Os valores são compartilhados entre as requisições e não devem ser
+alterados por quem os recebe.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+TAMANHO_PADRAO = 256
+TTL_PADRAO = 300.0   # segundos
+
+_AUSENTE = object()
+
+
+class CacheLRU:
+    """
+    Dicionário limitado por quantidade de entradas e por tempo de vida
+
+    - Ao passar de `tamanho_maximo`, descarta a entrada usada há mais tempo
+    - Entradas mais velhas que `ttl` segundos contam como falha
+    - Contadores de acertos, falhas e descartes para diagnóstico
+    - Thread-safe (usado pelas threads do executor de banco)
+    """
+
+    def __init__(self, nome: str, tamanho_maximo: int = TAMANHO_PADRAO, ttl: float = TTL_PADRAO):
+        self.nome = nome
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._entradas: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        _caches.append(self)
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    @property
+    def geracao(self) -> int:
+        """Muda a cada invalidação; usado para não guardar leituras antigas"""
+        return self._geracao
+
+    def obter(self, chave: Hashable, padrao: Any = None) -> Any:
+        """Valor em cache para a chave, ou `padrao` se ausente/expirado"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                expira_em, valor = entrada
+                if expira_em > time.monotonic():
+                    self._entradas.move_to_end(chave)
+                    self.acertos += 1
+                    return valor
+                del self._entradas[chave]
+            self.falhas += 1
+            return padrao
+
+    def guardar(self, chave: Hashable, valor: Any, geracao: int = None) -> None:
+        """
+        Guarda o valor, descartando a entrada menos usada se necessário
+
+        Se `geracao` for informada e houve invalidação desde então, o valor
+        (lido antes da gravação) é ignorado.
+        """
+        with self._lock:
+            if geracao is not None and geracao != self._geracao:
+                return
+            self._entradas[chave] = (time.monotonic() + self.ttl, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self.descartes += 1
+
+    def invalidar(self, chave: Hashable) -> None:
+        """Remove uma entrada"""
+        with self._lock:
+            self._geracao += 1
+            self._entradas.pop(chave, None)
+
+    def limpar(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._geracao += 1
+            self._entradas.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        total = self.acertos + self.falhas
+        return {
+            "nome": self.nome,
+            "entradas": len(self._entradas),
+            "tamanho_maximo": self.tamanho_maximo,
+            "ttl": self.ttl,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "descartes": self.descartes,
+            "taxa_acerto": round(self.acertos / total, 3) if total else None,
+        }
+
+
+_caches: List[CacheLRU] = []
+
+
+def em_cache(cache: CacheLRU, prefixo: Hashable = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorador read-through: a chave é (prefixo ou nome da função, argumentos)
+
+    Use `prefixo` quando a escrita precisar invalidar a entrada de uma
+    chamada específica (por exemplo, ("experimento", id)).
+    """
+    def decorador(funcao: Callable[..., T]) -> Callable[..., T]:
+        nome = prefixo if prefixo is not None else funcao.__name__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            chave = (nome, *args, *sorted(kwargs.items())) if kwargs else (nome, *args)
+            valor = cache.obter(chave, _AUSENTE)
+            if valor is _AUSENTE:
+                geracao = cache.geracao
+                valor = funcao(*args, **kwargs)
+                cache.guardar(chave, valor, geracao)
+            return valor
+
+        envoltorio.cache = cache
+        return envoltorio
+    return decorador
+
+
+_ouvintes: List[Callable[[], None]] = []
+
+
+def ao_alterar_conteudo(funcao: Callable[[], None]) -> Callable[[], None]:
+    """Registra `funcao` para ser chamada após qualquer escrita de conteúdo"""
+    _ouvintes.append(funcao)
+    return funcao
+
+
+def conteudo_alterado() -> None:
+    """Chamada pelos repositórios depois de cada escrita confirmada"""
+    for funcao in _ouvintes:
+        funcao()
+
+
+def limpar_caches() -> None:
+    """Esvazia todos os caches (testes e manutenção)"""
+    for cache in _caches:
+        cache.limpar()
+
+
+def estatisticas_caches() -> List[Dict[str, Any]]:
+    """Contadores de todos os caches criados no processo"""
+    return [cache.estatisticas() for cache in _caches]
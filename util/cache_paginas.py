@@ -0,0 +1,177 @@
+"""
+Cache das páginas públicas já renderizadas
+
+O HTML das páginas públicas só depende dos dados e de haver ou não
+mensagens flash na sessão. A primeira requisição renderiza o template e
+guarda os bytes; as seguintes devolvem esses bytes sem consultar o banco
+nem o Jinja. Qualquer escrita nos repositórios (conteudo_alterado) esvazia
+o cache.
+
+Todas as páginas levam ETag e Last-Modified derivados da versão do
+conteúdo (util.versao_conteudo) e da assinatura dos templates. Uma
+requisição com If-None-Match/If-Modified-Since ainda válidos recebe 304
+sem renderizar nem consultar o banco.
+
+As formas comprimidas (gzip/br) do HTML ficam junto dos bytes originais
+na mesma entrada do cache: cada página é comprimida uma vez por
+codificação, não a cada requisição.
+
+    @app.get("/cliente/sobre_nos")
+    async def sobre_nos_cliente(request: Request, after: Optional[str] = None, ...):
+        return await pagina_em_cache(request, {"after": after, ...}, renderizar)
+"""
+import hashlib
+import os
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from data.model.versao_model import VersaoConteudo
+from util.cache import CacheLRU, ao_alterar_conteudo
+from util.compressao import LIMIAR_COMPRESSAO, comprimir_async, escolher_codificacao
+from util.sessoes import carregar_sessao
+from util.validacao_http import formatar_data_http, formatar_etag, nao_modificado
+from util.versao_conteudo import obter_versao
+
+# Desligue para comparar (benchmarks) ou depurar templates
+HABILITADO = True
+VALIDADORES_HABILITADOS = True
+
+TIPO_HTML = "text/html; charset=utf-8"
+
+# O navegador guarda a página, mas revalida a cada visita (304 se nada mudou)
+CACHE_CONTROL_PAGINAS = "no-cache"
+
+# O HTML depende dos templates e das URLs com hash do CSS (static/css)
+PASTAS_ASSINATURA = ("templates", "static/css", "static/fonts")
+
+
+
+@dataclass(slots=True)
+class PaginaRenderizada:
+    corpo: bytes
+    comprimidos: Dict[str, bytes] = field(default_factory=dict)   # codificação -> corpo
+
+
+cache_paginas = CacheLRU("paginas", tamanho_maximo=512)
+ao_alterar_conteudo(cache_paginas.limpar)
+
+
+def tem_mensagens_flash(request: Request) -> bool:
+    """True se get_flash_messages devolveria algo (sem consumir as mensagens)"""
+    return bool(request.session.get("flash_messages"))
+
+
+def assinatura_templates(pastas: Tuple[str, ...] = PASTAS_ASSINATURA) -> Tuple[str, float]:
+    """
+    Resumo (nome, tamanho, mtime) dos templates e do CSS e o mtime mais recente
+
+    Entra na ETag para que um deploy com templates ou estilos novos não
+    responda 304 com o HTML antigo. É igual em todos os workers do mesmo
+    deploy.
+    """
+    resumo = hashlib.sha1()
+    mais_recente = 0.0
+    caminhos = (caminho for pasta in pastas for caminho in os.walk(pasta))
+    for raiz, _, arquivos in sorted(caminhos):
+        for nome in sorted(arquivos):
+            info = os.stat(os.path.join(raiz, nome))
+            resumo.update(f"{raiz}/{nome}:{info.st_size}:{info.st_mtime_ns};".encode())
+            mais_recente = max(mais_recente, info.st_mtime)
+    return resumo.hexdigest()[:8], mais_recente
+
+
+ASSINATURA_TEMPLATES, TEMPLATES_ALTERADOS_EM = assinatura_templates()
+
+
+def chave_pagina(request: Request, parametros: Optional[Dict[str, Any]] = None) -> tuple:
+    """
+    Rota + parâmetros que a rota de fato usa
+
+    Só os parâmetros declarados entram na chave: query strings arbitrárias
+    (?utm=...) não criam entradas novas.
+    """
+    itens = tuple(sorted((k, v) for k, v in (parametros or {}).items() if v is not None))
+    return (request.url.path, itens)
+
+
+def validadores(chave: tuple, versao: Optional[VersaoConteudo]) -> Tuple[Dict[str, str], Optional[float]]:
+    """
+    Cabeçalhos de validação da página e o instante da última modificação
+
+    A ETag é fraca: identifica o conteúdo, não os bytes (vale para o corpo
+    comprimido ou não).
+    """
+    if versao is None:
+        return {}, None
+    pagina = zlib.crc32(repr(chave).encode())
+    ultima_modificacao = max(versao.alterado_em, TEMPLATES_ALTERADOS_EM)
+    return {
+        "ETag": formatar_etag(f"{versao.versao}-{ASSINATURA_TEMPLATES}-{pagina:08x}", fraca=True),
+        "Last-Modified": formatar_data_http(ultima_modificacao),
+        "Cache-Control": CACHE_CONTROL_PAGINAS,
+    }, ultima_modificacao
+
+
+async def pagina_em_cache(request: Request, parametros: Optional[Dict[str, Any]],
+                          renderizar: Callable[[], Awaitable[Response]]) -> Response:
+    """
+    Responde 304, devolve a página em cache ou renderiza e guarda
+
+    Só respostas 200 em HTML são guardadas e recebem validadores;
+    redirecionamentos e páginas com mensagens flash passam direto.
+    """
+    await carregar_sessao(request)
+    if tem_mensagens_flash(request):
+        return await renderizar()
+
+    chave = chave_pagina(request, parametros)
+    cabecalhos, ultima_modificacao = {}, None
+    if VALIDADORES_HABILITADOS:
+        # Lida antes do cache: uma versão nova (de outro processo) esvazia os caches
+        cabecalhos, ultima_modificacao = validadores(chave, await obter_versao())
+        if cabecalhos and nao_modificado(request.headers, cabecalhos["ETag"], ultima_modificacao):
+            return Response(status_code=304, headers=cabecalhos)
+
+    if not HABILITADO:
+        return _com_validadores(await renderizar(), cabecalhos)
+
+    pagina = cache_paginas.obter(chave)
+    if pagina is not None:
+        return await _responder(request, pagina, cabecalhos)
+
+    geracao = cache_paginas.geracao
+    resposta = await renderizar()
+    if not _eh_pagina(resposta):
+        return resposta
+    pagina = PaginaRenderizada(bytes(resposta.body))
+    cache_paginas.guardar(chave, pagina, geracao)
+    return await _responder(request, pagina, cabecalhos)
+
+
+async def _responder(request: Request, pagina: PaginaRenderizada, cabecalhos: Dict[str, str]) -> Response:
+    """Resposta com o corpo na melhor codificação aceita pelo cliente"""
+    cabecalhos = {**cabecalhos, "Vary": "Accept-Encoding"}
+    codificacao = escolher_codificacao(request.headers.get("accept-encoding"))
+    if codificacao is None or len(pagina.corpo) < LIMIAR_COMPRESSAO:
+        return Response(pagina.corpo, media_type=TIPO_HTML, headers=cabecalhos)
+
+    corpo = pagina.comprimidos.get(codificacao)
+    if corpo is None:
+        corpo = await comprimir_async(pagina.corpo, codificacao)
+        pagina.comprimidos[codificacao] = corpo
+    cabecalhos["Content-Encoding"] = codificacao
+    return Response(corpo, media_type=TIPO_HTML, headers=cabecalhos)
+
+
+def _eh_pagina(resposta: Response) -> bool:
+    return resposta.status_code == 200 and resposta.media_type == "text/html"
+
+
+def _com_validadores(resposta: Response, cabecalhos: Dict[str, str]) -> Response:
+    if cabecalhos and _eh_pagina(resposta):
+        resposta.headers.update(cabecalhos)
+    return resposta
@@ -0,0 +1,242 @@
+"""
+Coleta de uploads órfãos
+
+`liberar_arquivo` apaga a capa/foto antiga quando a rota sabe que ela
+saiu, mas não cobre tudo: imagens do editor tiradas do texto rico, uploads
+de formulários que nunca foram salvos e os arquivos antigos (nome do
+cliente), que não têm contagem de referências e só saem por aqui. A coleta compara o que está em
+disco com o que o banco cita:
+
+1. percorre integrantes e experimentos em lotes, juntando as URLs de
+   capa/foto e os <img src> de descrição/materiais, e corrige
+   `arquivo.referencias` com essa contagem (`recontar_referencias`)
+2. percorre uploads/ e uploads/c/: o que não é citado e tem mais que
+   `CARENCIA_COLETA` (pelo último envio, ou pela data do arquivo) vai para
+   uploads/quarentena/, no mesmo caminho relativo
+3. apaga as versões reduzidas (uploads/d/) dos originais que saíram e os
+   temporários abandonados em uploads/tmp/
+4. na quarentena: devolve o que voltou a ser citado (restauração de backup
+   do banco, por exemplo) e apaga o que está lá há mais de `PRAZO_QUARENTENA`
+
+Roda como tarefa em segundo plano (util/tarefas.py) uma vez por
+`INTERVALO_COLETA`, agendada no startup, ou pela linha de comando:
+
+    python -m util.coleta_arquivos            # move órfãos para a quarentena
+    python -m util.coleta_arquivos --simular  # só relata
+    python -m util.coleta_arquivos --sem-quarentena --carencia 48
+"""
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+from data.repo import arquivo_repo
+from util.armazenamento import (
+    PASTA_CONTEUDO, PASTA_DERIVADAS, PASTA_TEMPORARIA, PASTA_UPLOADS, URL_CONTEUDO, URL_UPLOADS,
+    eh_url_de_conteudo, resumo_da_url,
+)
+from util.exportacao import TAMANHO_LOTE
+from util.tarefas import agendar, enfileirar, tarefa
+
+logger = logging.getLogger(__name__)
+
+PASTA_QUARENTENA = os.path.join(PASTA_UPLOADS, "quarentena")
+# Subpastas de PASTA_UPLOADS que o mount público /static não serve
+PASTAS_PRIVADAS = tuple(os.path.relpath(pasta, PASTA_UPLOADS) for pasta in (PASTA_TEMPORARIA, PASTA_QUARENTENA))
+
+CARENCIA_COLETA = 24 * 3600.0         # segundos desde o envio antes de ser órfão
+PRAZO_QUARENTENA = 7 * 24 * 3600.0    # segundos na quarentena antes de apagar
+INTERVALO_COLETA = 24 * 3600.0
+ATRASO_INICIAL = 600.0                # primeira coleta depois do startup
+
+CHAVE_COLETA = "coletar_arquivos"
+
+
+@dataclass(slots=True)
+class ResultadoColeta:
+    referenciadas: int = 0        # URLs citadas pelo banco
+    examinados: int = 0           # originais em disco
+    orfaos: int = 0
+    em_quarentena: int = 0        # movidos nesta coleta
+    bytes_em_quarentena: int = 0
+    restaurados: int = 0
+    apagados: int = 0             # originais, versões reduzidas e temporários
+    bytes_liberados: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.examinados} arquivo(s) examinado(s), {self.orfaos} órfão(s); "
+            f"{self.em_quarentena} para a quarentena ({_formatar_bytes(self.bytes_em_quarentena)}), "
+            f"{self.apagados} apagado(s) ({_formatar_bytes(self.bytes_liberados)} liberados), "
+            f"{self.restaurados} restaurado(s)"
+        )
+
+
+def _formatar_bytes(quantidade: int) -> str:
+    for unidade in ("B", "KB", "MB"):
+        if quantidade < 1024:
+            return f"{quantidade:.0f} {unidade}" if unidade == "B" else f"{quantidade:.1f} {unidade}"
+        quantidade /= 1024
+    return f"{quantidade:.1f} GB"
+
+
+def _arquivos(pasta: str) -> Iterator[os.DirEntry]:
+    """Arquivos (não pastas nem ocultos) de `pasta`, sem listar tudo de uma vez"""
+    try:
+        with os.scandir(pasta) as entradas:
+            for entrada in entradas:
+                if entrada.is_file(follow_symlinks=False) and not entrada.name.startswith("."):
+                    yield entrada
+    except FileNotFoundError:
+        return
+
+
+def _subpastas(pasta: str) -> Iterator[os.DirEntry]:
+    try:
+        with os.scandir(pasta) as entradas:
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    yield entrada
+    except FileNotFoundError:
+        return
+
+
+def _originais(base: str) -> Iterator[Tuple[str, os.DirEntry]]:
+    """(URL pública, arquivo) dos uploads em `base` (uploads/ ou a quarentena)"""
+    for entrada in _arquivos(base):
+        yield f"{URL_UPLOADS}/{entrada.name}", entrada
+    for pasta in _subpastas(os.path.join(base, os.path.relpath(PASTA_CONTEUDO, PASTA_UPLOADS))):
+        for entrada in _arquivos(pasta.path):
+            url = f"{URL_CONTEUDO}/{pasta.name}/{entrada.name}"
+            if eh_url_de_conteudo(url):
+                yield url, entrada
+
+
+def _relativo(url: str) -> str:
+    """Caminho de `url` relativo a uploads/ (e à quarentena)"""
+    return os.path.join(*url[len(URL_UPLOADS) + 1:].split("/"))
+
+
+def _enviado_em(url: str, entrada: os.DirEntry) -> float:
+    arquivo = arquivo_repo.obter_arquivo_por_url(url) if eh_url_de_conteudo(url) else None
+    if arquivo is not None:
+        return arquivo.enviado_em
+    return entrada.stat().st_mtime
+
+
+def _mover(origem: str, destino: str) -> None:
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    os.replace(origem, destino)
+    # A idade na quarentena conta a partir de agora
+    os.utime(destino)
+
+
+def _apagar(entrada: os.DirEntry, resultado: ResultadoColeta) -> None:
+    try:
+        tamanho = entrada.stat().st_size
+        os.remove(entrada.path)
+    except OSError:
+        return
+    resultado.apagados += 1
+    resultado.bytes_liberados += tamanho
+
+
+def coletar_arquivos(carencia: float = CARENCIA_COLETA, quarentena: bool = True, simular: bool = False,
+                     tamanho_lote: int = TAMANHO_LOTE) -> ResultadoColeta:
+    """
+    Move para a quarentena (ou apaga) os uploads que o banco não cita (bloqueante)
+
+    Args:
+        carencia: segundos desde o envio em que um arquivo não citado é mantido
+        quarentena: False apaga os órfãos direto
+        simular: só conta; nada é movido, apagado nem recontado
+        tamanho_lote: linhas lidas do banco por vez
+    """
+    agora = time.time()
+    limite = agora - carencia
+    resultado = ResultadoColeta()
+    citadas = arquivo_repo.recontar_referencias(limite, tamanho_lote, gravar=not simular)
+    resultado.referenciadas = len(citadas)
+
+    # Originais: o que não é citado nem recente sai
+    mantidos = set()
+    for url, entrada in _originais(PASTA_UPLOADS):
+        resultado.examinados += 1
+        if url in citadas or _enviado_em(url, entrada) >= limite:
+            if eh_url_de_conteudo(url):
+                mantidos.add(resumo_da_url(url))
+            continue
+        resultado.orfaos += 1
+        if simular:
+            resultado.bytes_em_quarentena += entrada.stat().st_size
+        elif quarentena:
+            tamanho = entrada.stat().st_size
+            _mover(entrada.path, os.path.join(PASTA_QUARENTENA, _relativo(url)))
+            resultado.em_quarentena += 1
+            resultado.bytes_em_quarentena += tamanho
+        else:
+            _apagar(entrada, resultado)
+            if eh_url_de_conteudo(url):
+                arquivo_repo.excluir_arquivo_sem_referencias(url, agora)
+
+    if simular:
+        return resultado
+
+    # Versões reduzidas de originais que saíram (refeitas sob demanda se voltarem)
+    for pasta in _subpastas(PASTA_DERIVADAS):
+        for entrada in _arquivos(pasta.path):
+            if entrada.name.split("-", 1)[0] not in mantidos and entrada.stat().st_mtime < limite:
+                _apagar(entrada, resultado)
+
+    for entrada in _arquivos(PASTA_TEMPORARIA):
+        if entrada.stat().st_mtime < limite:
+            _apagar(entrada, resultado)
+
+    # Quarentena: restaura o que voltou a ser citado, apaga o vencido
+    for url, entrada in _originais(PASTA_QUARENTENA):
+        destino = os.path.join(PASTA_UPLOADS, _relativo(url))
+        if url in citadas:
+            if not os.path.exists(destino):
+                _mover(entrada.path, destino)
+                resultado.restaurados += 1
+            else:
+                _apagar(entrada, resultado)   # já foi enviado de novo
+        elif entrada.stat().st_mtime < agora - PRAZO_QUARENTENA:
+            _apagar(entrada, resultado)
+            if eh_url_de_conteudo(url) and not os.path.exists(destino):
+                arquivo_repo.excluir_arquivo_sem_referencias(url, agora)
+
+    return resultado
+
+
+@tarefa("coletar_arquivos")
+def tarefa_coleta() -> None:
+    """Coleta e agenda a próxima (se falhar, valem as novas tentativas da fila)"""
+    logger.info("Coleta de uploads órfãos: %s", coletar_arquivos())
+    # Em execução, a mesma chave volta para a fila com o novo horário
+    enfileirar("coletar_arquivos", chave=CHAVE_COLETA, atraso=INTERVALO_COLETA)
+
+
+async def agendar_coleta(atraso: float = ATRASO_INICIAL) -> Optional[int]:
+    """Agenda a coleta periódica, se ainda não houver uma na fila (startup)"""
+    return await agendar("coletar_arquivos", chave=CHAVE_COLETA, atraso=atraso)
+
+
+if __name__ == "__main__":
+    import argparse
+    from util.migracoes import aplicar_migracoes
+
+    parser = argparse.ArgumentParser(description="Coleta de uploads que o banco não cita")
+    parser.add_argument("--simular", action="store_true", help="só relata, sem mover nem apagar")
+    parser.add_argument("--sem-quarentena", action="store_true", help="apaga os órfãos direto")
+    parser.add_argument("--carencia", type=float, default=CARENCIA_COLETA / 3600,
+                        help="horas desde o envio antes de um arquivo ser órfão (padrão: %(default)s)")
+    argumentos = parser.parse_args()
+
+    aplicar_migracoes()
+    resultado = coletar_arquivos(
+        carencia=argumentos.carencia * 3600, quarentena=not argumentos.sem_quarentena,
+        simular=argumentos.simular,
+    )
+    print(f"🧹 {'(simulação) ' if argumentos.simular else ''}{resultado}")
@@ -0,0 +1,286 @@
+"""
+Compressão das respostas (gzip e, se o pacote `brotli` estiver instalado, br)
+
+A codificação é negociada pelo Accept-Encoding da requisição. Corpos
+menores que `LIMIAR_COMPRESSAO` saem como estão; a partir de
+`LIMIAR_THREAD` a compressão roda no executor de CPU, fora do event loop.
+
+Dois pontos usam este módulo:
+- `CompressaoMiddleware`, registrado em main.py, comprime qualquer resposta
+  de tipo textual e guarda a forma comprimida de arquivos estáticos (ETag
+  forte) em `cache_comprimidos`, para não recomprimir a cada requisição
+- `pagina_em_cache` (util/cache_paginas.py) guarda as formas comprimidas
+  junto do HTML em cache e já responde com Content-Encoding
+
+    app.add_middleware(CompressaoMiddleware, limiar=LIMIAR_COMPRESSAO)
+"""
+import gzip
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from util.cache import CacheLRU
+from util.executor import executar_cpu
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+LIMIAR_COMPRESSAO = 1024            # bytes; abaixo disso não compensa
+LIMIAR_THREAD = 64 * 1024           # bytes; acima disso comprime fora do loop
+TAMANHO_MAXIMO_CACHE = 1024 * 1024  # arquivos estáticos maiores não são guardados
+
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5
+
+TIPOS_COMPRESSIVEIS = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Preferência quando o cliente aceita mais de uma com o mesmo peso
+CODIFICACOES = ("br", "gzip") if brotli is not None else ("gzip",)
+
+cache_comprimidos = CacheLRU("comprimidos", tamanho_maximo=256, ttl=3600.0)
+
+
+def escolher_codificacao(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Melhor codificação suportada pelo cliente, ou None para o corpo original
+
+    Respeita os pesos (q=0 recusa a codificação) e o curinga "*".
+    """
+    if not accept_encoding:
+        return None
+    pesos: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.strip().partition(";")
+        peso = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        pesos[nome.strip().lower()] = peso
+
+    melhor, melhor_peso = None, 0.0
+    for codificacao in CODIFICACOES:
+        peso = pesos.get(codificacao, pesos.get("*", 0.0))
+        if peso > melhor_peso:
+            melhor, melhor_peso = codificacao, peso
+    return melhor
+
+
+def tipo_compressivel(tipo: Optional[str]) -> bool:
+    """True para tipos textuais (HTML, CSS, JS, JSON, CSV...)"""
+    return bool(tipo) and tipo.lower().startswith(TIPOS_COMPRESSIVEIS)
+
+
+def comprimir(corpo: bytes, codificacao: str) -> bytes:
+    """Comprime o corpo inteiro (bloqueante; gzip com mtime fixo para ser determinístico)"""
+    if codificacao == "br":
+        return brotli.compress(corpo, quality=QUALIDADE_BROTLI)
+    if codificacao == "gzip":
+        return gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0)
+    raise ValueError(f"Codificação não suportada: {codificacao}")
+
+
+async def comprimir_async(corpo: bytes, codificacao: str) -> bytes:
+    """Como `comprimir`, no executor de CPU quando o corpo é grande"""
+    if len(corpo) >= LIMIAR_THREAD:
+        return await executar_cpu(comprimir, corpo, codificacao)
+    return comprimir(corpo, codificacao)
+
+
+class CompressorIncremental:
+    """Compressão em pedaços para respostas em streaming"""
+
+    def __init__(self, codificacao: str):
+        if codificacao == "br":
+            self._compressor = brotli.Compressor(quality=QUALIDADE_BROTLI)
+            self._comprimir = self._compressor.process
+            self._finalizar = self._compressor.finish
+        else:
+            # wbits 16+: cabeçalho e rodapé gzip
+            self._compressor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._comprimir = self._compressor.compress
+            self._finalizar = self._compressor.flush
+
+    async def comprimir(self, pedaco: bytes) -> bytes:
+        if len(pedaco) >= LIMIAR_THREAD:
+            return await executar_cpu(self._comprimir, pedaco)
+        return self._comprimir(pedaco)
+
+    def finalizar(self) -> bytes:
+        return self._finalizar()
+
+
+def enfraquecer_etag(etag: Optional[str]) -> Optional[str]:
+    """
+    ETag forte -> fraca para o corpo comprimido
+
+    Os bytes mudaram, mas o conteúdo é o mesmo: com W/ a comparação fraca do
+    If-None-Match continua casando com a ETag do arquivo original.
+    """
+    if etag is None or etag.startswith("W/"):
+        return etag
+    return "W/" + etag
+
+
+def cabecalhos_comprimidos(cabecalhos: MutableHeaders, codificacao: str,
+                           tamanho: Optional[int]) -> None:
+    """Ajusta Content-Encoding, Content-Length e ETag da resposta comprimida"""
+    cabecalhos["content-encoding"] = codificacao
+    if tamanho is None:
+        del cabecalhos["content-length"]
+    else:
+        cabecalhos["content-length"] = str(tamanho)
+    if "etag" in cabecalhos:
+        cabecalhos["etag"] = enfraquecer_etag(cabecalhos["etag"])
+
+
+class CompressaoMiddleware:
+    """
+    Middleware ASGI de compressão
+
+    - Respostas já codificadas (páginas em cache) passam direto
+    - Só status 200 é comprimido; requisições com Range passam direto
+    - Corpo inteiro (Response comum): comprime de uma vez
+    - Streaming (exportações, arquivos grandes): comprime pedaço a pedaço
+    - Arquivo estático com ETag forte e tamanho conhecido: a forma
+      comprimida fica em `cache_comprimidos` (chave rota + ETag)
+    """
+
+    def __init__(self, app: ASGIApp, limiar: int = LIMIAR_COMPRESSAO):
+        self.app = app
+        self.limiar = limiar
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cabecalhos = Headers(scope=scope)
+        if "range" in cabecalhos:
+            # Partes de um arquivo saem como estão: comprimir um 206 e
+            # guardá-lo com a chave do arquivo inteiro trocaria o corpo
+            await self.app(scope, receive, send)
+            return
+        codificacao = escolher_codificacao(cabecalhos.get("accept-encoding"))
+        resposta = _RespostaComprimida(send, codificacao, self.limiar, scope["path"])
+        await self.app(scope, receive, resposta.enviar)
+
+
+class _RespostaComprimida:
+    """Estado de uma resposta passando pelo CompressaoMiddleware"""
+
+    def __init__(self, send: Send, codificacao: Optional[str], limiar: int, rota: str):
+        self.send = send
+        self.codificacao = codificacao
+        self.limiar = limiar
+        self.rota = rota
+        self.inicio: Optional[Message] = None
+        self.modo: Optional[str] = None   # direto, ignorar, acumular, streaming
+        self.chave_cache: Optional[Tuple] = None
+        self.pedacos: List[bytes] = []
+        self.compressor: Optional[CompressorIncremental] = None
+
+    async def enviar(self, mensagem: Message) -> None:
+        if mensagem["type"] == "http.response.start":
+            self.inicio = mensagem
+            return
+        if mensagem["type"] != "http.response.body":
+            await self.send(mensagem)
+            return
+
+        if self.modo is None:
+            await self._decidir(mensagem)
+        elif self.modo == "direto":
+            await self.send(mensagem)
+        elif self.modo == "acumular":
+            await self._acumular(mensagem)
+        elif self.modo == "streaming":
+            await self._comprimir_pedaco(mensagem)
+        # "ignorar": corpo já enviado a partir do cache
+
+    async def _decidir(self, mensagem: Message) -> None:
+        cabecalhos = MutableHeaders(scope=self.inicio)
+        corpo = mensagem.get("body", b"")
+        mais = mensagem.get("more_body", False)
+        status = self.inicio["status"]
+
+        compressivel = (
+            status == 200
+            and "content-encoding" not in cabecalhos
+            and "content-range" not in cabecalhos
+            and tipo_compressivel(cabecalhos.get("content-type"))
+        )
+        if compressivel:
+            cabecalhos.add_vary_header("Accept-Encoding")
+        tamanho = cabecalhos.get("content-length")
+        tamanho = int(tamanho) if tamanho and tamanho.isdigit() else None
+        pequeno = (len(corpo) if not mais else tamanho or self.limiar) < self.limiar
+        if not compressivel or self.codificacao is None or pequeno:
+            await self._direto(mensagem)
+            return
+
+        etag = cabecalhos.get("etag")
+        if etag and not etag.startswith("W/") and tamanho is not None and tamanho <= TAMANHO_MAXIMO_CACHE:
+            self.chave_cache = (self.rota, etag, self.codificacao)
+            comprimido = cache_comprimidos.obter(self.chave_cache)
+            if comprimido is not None:
+                self.modo = "ignorar"
+                await self._enviar_comprimido(cabecalhos, comprimido)
+                return
+
+        if not mais:
+            comprimido = await comprimir_async(corpo, self.codificacao)
+            self._guardar(comprimido)
+            await self._enviar_comprimido(cabecalhos, comprimido)
+        elif self.chave_cache is not None:
+            self.modo = "acumular"
+            await self._acumular(mensagem)
+        else:
+            self.modo = "streaming"
+            self.compressor = CompressorIncremental(self.codificacao)
+            cabecalhos_comprimidos(cabecalhos, self.codificacao, None)
+            await self.send(self.inicio)
+            await self._comprimir_pedaco(mensagem)
+
+    async def _direto(self, mensagem: Message) -> None:
+        self.modo = "direto"
+        await self.send(self.inicio)
+        await self.send(mensagem)
+
+    async def _enviar_comprimido(self, cabecalhos: MutableHeaders, comprimido: bytes) -> None:
+        cabecalhos_comprimidos(cabecalhos, self.codificacao, len(comprimido))
+        await self.send(self.inicio)
+        await self.send({"type": "http.response.body", "body": comprimido})
+
+    def _guardar(self, comprimido: bytes) -> None:
+        if self.chave_cache is not None:
+            cache_comprimidos.guardar(self.chave_cache, comprimido)
+
+    async def _acumular(self, mensagem: Message) -> None:
+        self.pedacos.append(mensagem.get("body", b""))
+        if mensagem.get("more_body", False):
+            return
+        comprimido = await comprimir_async(b"".join(self.pedacos), self.codificacao)
+        self.pedacos = []
+        self._guardar(comprimido)
+        await self._enviar_comprimido(MutableHeaders(scope=self.inicio), comprimido)
+
+    async def _comprimir_pedaco(self, mensagem: Message) -> None:
+        mais = mensagem.get("more_body", False)
+        saida = await self.compressor.comprimir(mensagem.get("body", b""))
+        if not mais:
+            saida += self.compressor.finalizar()
+        if saida or not mais:
+            await self.send({"type": "http.response.body", "body": saida, "more_body": mais})
@@ -1,11 +1,345 @@
+"""
+Pool de conexões SQLite compartilhado pelos repositórios
+
+Cada conexão é aberta e configurada uma única vez (WAL, synchronous=NORMAL,
+mmap, cache de páginas, busy_timeout e cache de statements preparados) e
+depois reaproveitada entre as chamadas dos repositórios.
+"""
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
+from util.html_util import html_para_texto
 
-def get_connection():
-    conn = None
+# Caminho do banco usado pela aplicação
+DB_PATH = "dados.db"
+
+# Configurações do pool
+TAMANHO_POOL = 8
+TIMEOUT_CHECKOUT = 10.0          # segundos aguardando uma conexão livre
+INTERVALO_VERIFICACAO = 30.0     # segundos ociosa antes de refazer o health check
+STATEMENTS_EM_CACHE = 256        # cache de statements preparados por conexão
+
+# PRAGMAs aplicados uma vez na criação de cada conexão
+PRAGMAS_CONEXAO = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",   # 256 MB
+    "PRAGMA cache_size=-16000",     # ~16 MB
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PoolEsgotadoError(sqlite3.OperationalError):
+    """Nenhuma conexão ficou livre dentro do tempo limite"""
+
+
+def registrar_funcoes(conn: sqlite3.Connection) -> None:
+    """
+    Registra as funções SQL da aplicação na conexão
+
+    - texto_html(html): texto puro do HTML do editor (usada pelos triggers
+      do índice de busca de experimentos)
+    """
+    conn.create_function("texto_html", 1, html_para_texto, deterministic=True)
+
+
+_fabricas: Dict[type, Callable[[sqlite3.Cursor, tuple], Any]] = {}
+
+
+def fabrica_modelo(classe: type) -> Callable[[sqlite3.Cursor, tuple], Any]:
+    """
+    Row factory que monta instâncias de `classe` direto da tupla do cursor
+
+    As colunas do SELECT devem vir na mesma ordem dos campos do modelo;
+    cada linha vira uma chamada `classe(*row)`, sem sqlite3.Row intermediário
+    nem buscas por nome de coluna.
+
+    Exemplo de uso:
+        cursor = conn.cursor()
+        cursor.row_factory = fabrica_modelo(Experimento)
+        cursor.execute(OBTER_EXPERIMENTO_POR_ID, (id,))
+        experimento = cursor.fetchone()
+    """
+    fabrica = _fabricas.get(classe)
+    if fabrica is None:
+        def fabrica(cursor: sqlite3.Cursor, row: tuple, _classe=classe):
+            return _classe(*row)
+        _fabricas[classe] = fabrica
+    return fabrica
+
+
+def ler_em_lotes(conn: sqlite3.Connection, sql: str, tamanho_lote: int,
+                 parametros: tuple = ()) -> Iterator[List[tuple]]:
+    """
+    Executa `sql` e entrega o resultado em listas de até `tamanho_lote` tuplas
+
+    Usa fetchmany: só um lote fica em memória por vez, qualquer que seja o
+    tamanho da tabela.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, parametros)
     try:
-        conn = sqlite3.connect("dados.db")
-        conn.row_factory = sqlite3.Row
-    except sqlite3.Error as e:
-        print(e)
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                return
+            yield linhas
+    finally:
+        cursor.close()
+
+
+def criar_conexao(caminho: str = DB_PATH) -> sqlite3.Connection:
+    """
+    Abre e configura uma nova conexão SQLite
+
+    Args:
+        caminho: Caminho do arquivo do banco
+
+    Returns:
+        Conexão configurada com sqlite3.Row como row_factory
+    """
+    conn = sqlite3.connect(
+        caminho,
+        check_same_thread=False,
+        cached_statements=STATEMENTS_EM_CACHE,
+    )
+    conn.row_factory = sqlite3.Row
+    registrar_funcoes(conn)
+    for pragma in PRAGMAS_CONEXAO:
+        conn.execute(pragma)
     return conn
+
+
+class _ConexaoAninhada:
+    """
+    A conexão da thread como vista por um bloco aninhado de `PoolConexoes.conexao`
+
+    `commit()` fica para o bloco mais externo e `rollback()` volta ao
+    SAVEPOINT do bloco; o resto é repassado à conexão.
+    """
+
+    __slots__ = ("_conn", "_savepoint")
+
+    def __init__(self, conn: sqlite3.Connection, savepoint: str):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_savepoint", savepoint)
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        self._conn.execute(f"ROLLBACK TO {self._savepoint}")
+
+    def __getattr__(self, nome: str) -> Any:
+        return getattr(self._conn, nome)
+
+    def __setattr__(self, nome: str, valor: Any) -> None:
+        setattr(self._conn, nome, valor)
+
+
+class PoolConexoes:
+    """
+    Pool limitado de conexões SQLite
+
+    - No máximo `tamanho` conexões abertas ao mesmo tempo
+    - Conexões criadas sob demanda e reaproveitadas
+    - Health check (SELECT 1) em conexões ociosas há muito tempo
+    - Checkout por thread: chamadas aninhadas na mesma thread reutilizam
+      a conexão já obtida em vez de consumir outra do pool (ver `conexao`)
+    """
+
+    def __init__(self, caminho: str = DB_PATH, tamanho: int = TAMANHO_POOL,
+                 timeout: float = TIMEOUT_CHECKOUT):
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self._livres: "queue.LifoQueue[tuple[sqlite3.Connection, float]]" = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._abertas = 0
+
+    @property
+    def abertas(self) -> int:
+        """Quantidade de conexões abertas (livres ou em uso)"""
+        return self._abertas
+
+    def _conexao_saudavel(self, conn: sqlite3.Connection, ociosa_desde: float) -> bool:
+        if time.monotonic() - ociosa_desde < INTERVALO_VERIFICACAO:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _descartar(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._abertas -= 1
+
+    def obter(self) -> sqlite3.Connection:
+        """
+        Retira uma conexão do pool, criando uma nova se houver vaga
+
+        Raises:
+            PoolEsgotadoError: se nenhuma conexão ficar livre a tempo
+        """
+        if not self._vagas.acquire(timeout=self.timeout):
+            raise PoolEsgotadoError(
+                f"Nenhuma conexão livre após {self.timeout}s (pool de {self.tamanho})"
+            )
+        try:
+            while True:
+                try:
+                    conn, ociosa_desde = self._livres.get_nowait()
+                except queue.Empty:
+                    break
+                if self._conexao_saudavel(conn, ociosa_desde):
+                    return conn
+                self._descartar(conn)
+
+            conn = criar_conexao(self.caminho)
+            with self._lock:
+                self._abertas += 1
+            return conn
+        except BaseException:
+            self._vagas.release()
+            raise
+
+    def devolver(self, conn: sqlite3.Connection) -> None:
+        """Devolve uma conexão ao pool, desfazendo transação pendente"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._livres.put((conn, time.monotonic()))
+        except sqlite3.Error:
+            self._descartar(conn)
+        finally:
+            self._vagas.release()
+
+    @contextmanager
+    def conexao(self):
+        """
+        Context manager da conexão da thread atual
+
+        Faz commit ao sair sem erro e rollback em caso de exceção, como o
+        context manager de sqlite3.Connection. Só devolve ao pool quando o
+        bloco mais externo da thread termina.
+
+        Um bloco aninhado (uma função de repositório chamada dentro de outro
+        bloco na mesma thread) roda em um SAVEPOINT da transação externa e
+        recebe a conexão embrulhada: o `conn.commit()` dele não confirma
+        nada, quem confirma é o bloco mais externo, e uma exceção nele
+        desfaz só o que ele fez. Assim o tudo-ou-nada de quem abriu o bloco
+        externo vale também para o que as funções chamadas gravaram.
+        """
+        atual = getattr(self._local, "conn", None)
+        if atual is not None:
+            savepoint = f"aninhado_{self._local.profundidade}"
+            if not atual.in_transaction:
+                atual.execute("BEGIN")
+            atual.execute(f"SAVEPOINT {savepoint}")
+            self._local.profundidade += 1
+            try:
+                yield _ConexaoAninhada(atual, savepoint)
+            except BaseException:
+                if atual.in_transaction:
+                    atual.execute(f"ROLLBACK TO {savepoint}")
+                    atual.execute(f"RELEASE {savepoint}")
+                raise
+            else:
+                if atual.in_transaction:
+                    atual.execute(f"RELEASE {savepoint}")
+            finally:
+                self._local.profundidade -= 1
+            return
+
+        conn = self.obter()
+        self._local.conn = conn
+        self._local.profundidade = 1
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.conn = None
+            self._local.profundidade = 0
+            self.devolver(conn)
+
+    @contextmanager
+    def conexao_exclusiva(self):
+        """
+        Conexão fora do controle por thread
+
+        Para consumidores que podem ser retomados em outra thread (por
+        exemplo, geradores consumidos por uma StreamingResponse).
+        """
+        conn = self.obter()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.devolver(conn)
+
+    def fechar(self) -> None:
+        """Fecha todas as conexões livres do pool"""
+        while True:
+            try:
+                conn, _ = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+
+
+_pool: Optional[PoolConexoes] = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool() -> PoolConexoes:
+    """Retorna o pool global, criando-o na primeira chamada"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes()
+    return _pool
+
+
+def fechar_pool() -> None:
+    """Fecha o pool global (usado no shutdown da aplicação)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.fechar()
+            _pool = None
+
+
+def get_connection():
+    """
+    Obtém uma conexão do pool para uso com `with`
+
+    Exemplo de uso:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(...)
+    """
+    return obter_pool().conexao()
+
+
+def get_connection_exclusiva():
+    """
+    Obtém uma conexão do pool fora do controle por thread
+
+    Para geradores (exportações em streaming) que são retomados em threads
+    diferentes a cada lote.
+    """
+    return obter_pool().conexao_exclusiva()
@@ -0,0 +1,217 @@
+"""
+Executores limitados para tirar trabalho bloqueante do event loop
+
+As rotas do FastAPI são `async def`; qualquer chamada síncrona ao SQLite,
+ao disco ou a funções pesadas de CPU (bcrypt) feita diretamente nelas trava
+todas as outras requisições do worker. Este módulo oferece três executores
+de threads com tamanho fixo e uma API única para aguardar o resultado:
+
+    integrantes = await executar_banco(integrante_repo.obter_todos_integrantes)
+    await executar_io(shutil.copyfileobj, origem, destino)
+    texto = await executar_cpu(sanitizar_conteudo_html, descricao)
+
+Trabalho de CPU longo em Python puro (que segura o GIL, como redimensionar
+imagens) vai para um pool de processos; a função e os argumentos precisam
+ser serializáveis (funções de módulo, tipos simples):
+
+    dimensoes = await executar_em_processo(gerar_derivadas, caminho, resumo)
+
+O hash de senha (bcrypt) tem um pool de processos só dele, com no máximo
+`TRABALHADORES_SENHAS` verificações ao mesmo tempo; quem espera mais que
+`ESPERA_SENHAS` por uma vaga recebe `ExecutorOcupado`, em vez de uma
+enxurrada de logins formar uma fila sem fim:
+
+    ok, novo_hash = await executar_senha(verificar_e_atualizar_senha, senha, hash)
+"""
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from util.db_util import TAMANHO_POOL
+
+T = TypeVar("T")
+
+# Um worker por conexão do pool: nenhuma thread fica esperando conexão
+TRABALHADORES_BANCO = TAMANHO_POOL
+TRABALHADORES_IO = 4
+TRABALHADORES_CPU = 2
+TRABALHADORES_PROCESSOS = 2
+TRABALHADORES_SENHAS = 2
+
+# Segundos que um login espera por uma vaga no pool de senhas
+ESPERA_SENHAS = 3.0
+
+# Quantas tarefas podem aguardar na fila de cada executor por worker;
+# acima disso a corrotina espera no loop em vez de empilhar trabalho
+FATOR_FILA = 4
+
+
+class ExecutorOcupado(Exception):
+    """Nenhuma vaga no executor dentro do tempo de espera"""
+
+
+class ExecutorLimitado:
+    """
+    ThreadPoolExecutor (ou ProcessPoolExecutor) com fila limitada e criação preguiçosa
+
+    Args:
+        nome: Prefixo das threads (aparece em logs e profilers)
+        trabalhadores: Número máximo de threads/processos
+        processos: Usa processos em vez de threads
+        vagas: Tarefas aceitas ao mesmo tempo, executando ou na fila do
+            executor (padrão: `trabalhadores * FATOR_FILA`)
+        espera: Segundos aguardando vaga antes de `ExecutorOcupado`
+            (None espera o quanto for preciso)
+    """
+
+    def __init__(self, nome: str, trabalhadores: int, processos: bool = False,
+                 vagas: Optional[int] = None, espera: Optional[float] = None):
+        self.nome = nome
+        self.trabalhadores = trabalhadores
+        self.processos = processos
+        self.vagas = vagas or trabalhadores * FATOR_FILA
+        self.espera = espera
+        self._executor: Optional[Executor] = None
+        self._vagas: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+    def _obter_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._criar_executor()
+        return self._executor
+
+    def _criar_executor(self) -> Executor:
+        if self.processos:
+            # spawn: o processo filho não herda as threads nem as conexões
+            # SQLite do pai (fork com threads ativas pode travar)
+            return ProcessPoolExecutor(
+                max_workers=self.trabalhadores,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix=self.nome)
+
+    def _obter_vagas(self) -> asyncio.Semaphore:
+        if self._vagas is None:
+            self._vagas = asyncio.Semaphore(self.vagas)
+        return self._vagas
+
+    async def _reservar_vaga(self, vagas: asyncio.Semaphore) -> None:
+        if self.espera is None:
+            await vagas.acquire()
+            return
+        try:
+            await asyncio.wait_for(vagas.acquire(), self.espera)
+        except asyncio.TimeoutError:
+            raise ExecutorOcupado(f"Executor {self.nome} sem vaga em {self.espera:g} s") from None
+
+    async def executar(self, funcao: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Executa `funcao(*args, **kwargs)` em uma thread (ou processo) do executor
+
+        Raises:
+            ExecutorOcupado: com `espera`, se nenhuma vaga abrir a tempo
+        """
+        loop = asyncio.get_running_loop()
+        chamada = functools.partial(funcao, *args, **kwargs)
+        vagas = self._obter_vagas()
+        await self._reservar_vaga(vagas)
+        try:
+            executor = self._obter_executor()
+            try:
+                return await loop.run_in_executor(executor, chamada)
+            except BrokenExecutor:
+                # Um processo filho morreu: o pool não aceita mais tarefas.
+                # Descarta-o para que a próxima chamada crie outro
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                executor.shutdown(wait=False)
+                raise
+        finally:
+            vagas.release()
+
+    def encerrar(self, aguardar: bool = True) -> None:
+        """Encerra as threads (ou processos) do executor"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=aguardar)
+                self._executor = None
+            self._vagas = None
+
+
+executor_banco = ExecutorLimitado("banco", TRABALHADORES_BANCO)
+executor_io = ExecutorLimitado("io", TRABALHADORES_IO)
+executor_cpu = ExecutorLimitado("cpu", TRABALHADORES_CPU)
+executor_processos = ExecutorLimitado("processos", TRABALHADORES_PROCESSOS, processos=True)
+# Sem fila além dos processos: a espera por vaga é que tem prazo
+executor_senhas = ExecutorLimitado(
+    "senhas", TRABALHADORES_SENHAS, processos=True, vagas=TRABALHADORES_SENHAS, espera=ESPERA_SENHAS
+)
+
+
+async def executar_banco(funcao: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa uma função de repositório fora do event loop"""
+    return await executor_banco.executar(funcao, *args, **kwargs)
+
+
+async def executar_io(funcao: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa operações de arquivo (cópia, remoção) fora do event loop"""
+    return await executor_io.executar(funcao, *args, **kwargs)
+
+
+async def executar_cpu(funcao: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa trabalho pesado de CPU (sanitização de HTML) fora do event loop"""
+    return await executor_cpu.executar(funcao, *args, **kwargs)
+
+
+async def executar_em_processo(funcao: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Executa trabalho longo de CPU (imagens) em outro processo"""
+    return await executor_processos.executar(funcao, *args, **kwargs)
+
+
+async def executar_senha(funcao: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Executa hash ou verificação de senha no pool de processos de senhas
+
+    Raises:
+        ExecutorOcupado: todas as vagas ocupadas por mais de `ESPERA_SENHAS`
+    """
+    return await executor_senhas.executar(funcao, *args, **kwargs)
+
+
+_FIM = object()
+
+
+async def iterar_banco(gerador: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Consome um gerador síncrono (que lê do banco) no executor de banco
+
+    Cada item é produzido em uma thread do executor; o gerador é fechado
+    ao fim da iteração ou quando o cliente desconecta. Use com
+    StreamingResponse no lugar de passar o gerador direto.
+    """
+    try:
+        while True:
+            item = await executor_banco.executar(next, gerador, _FIM)
+            if item is _FIM:
+                break
+            yield item
+    finally:
+        try:
+            gerador.close()
+        except ValueError:
+            # Cancelado enquanto um lote ainda era lido: o gerador é
+            # finalizado (e a conexão devolvida) quando a thread terminar
+            pass
+
+
+def encerrar_executores() -> None:
+    """Encerra todos os executores (usado no shutdown da aplicação)"""
+    for executor in (executor_banco, executor_io, executor_cpu, executor_processos, executor_senhas):
+        executor.encerrar()
+
@@ -0,0 +1,119 @@
+"""
+Exportação de experimentos e integrantes em CSV, NDJSON ou JSON
+
+Os formatadores recebem os lotes de tuplas produzidos pelos repositórios
+(exportar_experimentos / exportar_integrantes) e devolvem o arquivo em
+pedaços de texto, um por lote, prontos para uma StreamingResponse ou para
+gravar em disco. Nenhum deles acumula a tabela inteira em memória.
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator, List, Sequence, Union
+
+from data.sql.experimento_sql import COLUNAS_EXPORTACAO_EXPERIMENTO
+from data.sql.integrante_sql import COLUNAS_EXPORTACAO_INTEGRANTE
+
+# Linhas lidas do banco por fetchmany
+TAMANHO_LOTE = 500
+
+FORMATOS = ("csv", "ndjson", "json")
+
+TIPOS_MIDIA = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+# Colunas disponíveis por tipo, na ordem padrão do arquivo
+COLUNAS = {
+    "experimentos": tuple(COLUNAS_EXPORTACAO_EXPERIMENTO),
+    "integrantes": tuple(COLUNAS_EXPORTACAO_INTEGRANTE),
+}
+
+
+class ExportacaoError(ValueError):
+    """Parâmetros de exportação inválidos"""
+
+
+def normalizar_colunas(tipo: str, colunas: Union[str, Sequence[str], None] = None) -> List[str]:
+    """
+    Valida a seleção de colunas ("titulo,capa" ou lista); vazia = todas
+
+    Raises:
+        ExportacaoError: tipo ou coluna desconhecidos
+    """
+    if tipo not in COLUNAS:
+        raise ExportacaoError(f"Tipo de exportação inválido: {tipo}")
+    if isinstance(colunas, str):
+        colunas = colunas.split(",")
+    selecionadas = [c.strip() for c in colunas or [] if c.strip()]
+    if not selecionadas:
+        return list(COLUNAS[tipo])
+    invalidas = [c for c in selecionadas if c not in COLUNAS[tipo]]
+    if invalidas:
+        raise ExportacaoError(
+            f"Coluna(s) inválida(s): {', '.join(invalidas)} "
+            f"(disponíveis: {', '.join(COLUNAS[tipo])})"
+        )
+    return list(dict.fromkeys(selecionadas))
+
+
+def gerar_csv(colunas: List[str], lotes: Iterable[List[tuple]]) -> Iterator[str]:
+    """CSV com cabeçalho; começa com BOM para o Excel abrir em UTF-8"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write("\ufeff")
+    escritor.writerow(colunas)
+    for lote in lotes:
+        escritor.writerows(lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gerar_ndjson(colunas: List[str], lotes: Iterable[List[tuple]]) -> Iterator[str]:
+    """Um objeto JSON por linha"""
+    for lote in lotes:
+        yield "".join(
+            json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + "\n"
+            for linha in lote
+        )
+
+
+def gerar_json(colunas: List[str], lotes: Iterable[List[tuple]]) -> Iterator[str]:
+    """Lista JSON de objetos, escrita aos pedaços"""
+    separador = "[\n"
+    for lote in lotes:
+        partes = []
+        for linha in lote:
+            partes.append(separador)
+            partes.append(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False))
+            separador = ",\n"
+        yield "".join(partes)
+    yield "[]\n" if separador == "[\n" else "\n]\n"
+
+
+_GERADORES = {
+    "csv": gerar_csv,
+    "ndjson": gerar_ndjson,
+    "json": gerar_json,
+}
+
+
+def formatar(formato: str, colunas: List[str], lotes: Iterable[List[tuple]]) -> Iterator[str]:
+    """
+    Formata os lotes no formato pedido
+
+    Raises:
+        ExportacaoError: formato desconhecido
+    """
+    if formato not in _GERADORES:
+        raise ExportacaoError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+    return _GERADORES[formato](colunas, lotes)
+
+
+def nome_arquivo(tipo: str, formato: str) -> str:
+    return f"{tipo}.{formato}"
@@ -0,0 +1,151 @@
+"""
+Conversão do HTML do editor de texto rico para texto puro
+"""
+import html
+import math
+import re
+from html.parser import HTMLParser
+from typing import List, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+# src de <img>, entre aspas ou não
+_PADRAO_SRC_IMAGEM = re.compile(
+    r"""<img\b[^>]*?\ssrc\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE
+)
+
+# Tamanho do resumo gravado para os cards da listagem
+TAMANHO_RESUMO = 160
+
+# Velocidade de leitura usada na estimativa do tempo de leitura
+PALAVRAS_POR_MINUTO = 200
+
+_PADRAO_PALAVRA = re.compile(r"\w+", re.UNICODE)
+
+# Tags que separam blocos de texto (viram espaço no texto puro)
+TAGS_BLOCO = frozenset({
+    "p", "br", "div", "li", "ul", "ol", "blockquote", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "pre", "hr",
+})
+
+# Tags cujo conteúdo nunca é texto visível
+TAGS_IGNORADAS = frozenset({"script", "style"})
+
+
+class _ExtratorTexto(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.partes: List[str] = []
+        self._ignorando = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in TAGS_IGNORADAS:
+            self._ignorando += 1
+        elif tag in TAGS_BLOCO:
+            self.partes.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in TAGS_IGNORADAS:
+            self._ignorando = max(0, self._ignorando - 1)
+        elif tag in TAGS_BLOCO:
+            self.partes.append(" ")
+
+    def handle_data(self, data):
+        if not self._ignorando:
+            self.partes.append(data)
+
+
+def html_para_texto(conteudo: str) -> str:
+    """
+    Extrai o texto visível de um trecho HTML
+
+    Remove tags e atributos, decodifica entidades (&amp;, &nbsp;...) e
+    normaliza espaços em branco.
+
+    Args:
+        conteudo: HTML gerado pelo editor
+
+    Returns:
+        Texto puro em uma única linha
+    """
+    if not conteudo:
+        return ""
+    if "<" not in conteudo and "&" not in conteudo:
+        return " ".join(conteudo.split())
+    extrator = _ExtratorTexto()
+    extrator.feed(conteudo)
+    extrator.close()
+    return " ".join("".join(extrator.partes).split())
+
+
+def urls_de_imagens(conteudo: str) -> Set[str]:
+    """
+    Caminhos das imagens (<img src>) citadas em um trecho HTML
+
+    Entidades e %XX são decodificados e URLs absolutas viram só o caminho
+    ("https://site/static/a.jpg" -> "/static/a.jpg"), para comparar com as
+    URLs gravadas em capa/foto.
+    """
+    if not conteudo or "<img" not in conteudo.lower():
+        return set()
+    urls = set()
+    for encontrado in _PADRAO_SRC_IMAGEM.finditer(conteudo):
+        src = html.unescape(next(g for g in encontrado.groups() if g is not None)).strip()
+        if src and not src.startswith("data:"):
+            urls.add(unquote(urlsplit(src).path))
+    return urls
+
+
+def resumir_texto(texto: str, tamanho: int = 160) -> str:
+    """
+    Corta o texto em até `tamanho` caracteres sem quebrar palavras
+
+    Args:
+        texto: Texto puro
+        tamanho: Tamanho máximo do resumo (sem contar as reticências)
+
+    Returns:
+        O texto inteiro, se couber, ou o trecho inicial seguido de "…"
+    """
+    texto = " ".join((texto or "").split())
+    if len(texto) <= tamanho:
+        return texto
+    corte = texto.rfind(" ", 0, tamanho + 1)
+    if corte <= 0:
+        corte = tamanho
+    return texto[:corte].rstrip(" ,.;:") + "…"
+
+
+def contar_palavras(texto: str) -> int:
+    """Quantidade de palavras (sequências de letras e dígitos) do texto puro"""
+    return sum(1 for _ in _PADRAO_PALAVRA.finditer(texto or ""))
+
+
+def minutos_de_leitura(palavras: int) -> int:
+    """Tempo estimado de leitura, arredondado para cima (0 para texto vazio)"""
+    return math.ceil(palavras / PALAVRAS_POR_MINUTO) if palavras > 0 else 0
+
+
+def derivar_texto(descricao: str, materiais: str) -> Tuple[str, str, str, int, int]:
+    """
+    Colunas derivadas do HTML de um experimento, calculadas ao gravar
+
+    Args:
+        descricao: HTML da descrição
+        materiais: HTML dos materiais
+
+    Returns:
+        (descricao_texto, materiais_texto, resumo, palavras, minutos_leitura):
+        texto puro de cada campo, o início da descrição com até
+        `TAMANHO_RESUMO` caracteres e a contagem de palavras e o tempo de
+        leitura dos dois campos juntos
+    """
+    descricao_texto = html_para_texto(descricao)
+    materiais_texto = html_para_texto(materiais)
+    palavras = contar_palavras(descricao_texto) + contar_palavras(materiais_texto)
+    return (
+        descricao_texto,
+        materiais_texto,
+        resumir_texto(descricao_texto, TAMANHO_RESUMO),
+        palavras,
+        minutos_de_leitura(palavras),
+    )
@@ -0,0 +1,348 @@
+"""
+Versões reduzidas das imagens enviadas (AVIF/WebP) e <picture> com srcset
+
+As capas e fotos são mostradas em 60 px no admin, em cards de ~350 px e no
+máximo com ~1000 px na página do experimento, mas o original pode ter
+vários megabytes. Para cada imagem endereçada pelo conteúdo
+(util/armazenamento.py) são geradas versões com as larguras de `LARGURAS`
+nos formatos de `FORMATOS` que o Pillow instalado suporta:
+
+    uploads/d/<aa>/<sha256>-<largura>.<formato>  ->  /static/d/...
+
+O nome depende só do conteúdo, da largura e do formato, então as versões
+são servidas como `immutable`. A geração roda no pool de processos
+(`executar_em_processo`): logo depois do upload, pela fila de tarefas
+(`agendar_derivadas`, util/tarefas.py), ou sob demanda na primeira requisição de uma versão
+que ainda não existe (`ImagensDerivadas`), ficando em disco daí em diante.
+
+A rota busca as dimensões das imagens da página de uma vez e as passa ao
+template:
+    dimensoes = await dimensoes_das_imagens(e.capa for e in experimentos)
+    {{ imagem_responsiva(experimento.capa, experimento.titulo, "(max-width: 768px) 100vw, 350px", classe="experiment-image", dimensoes=dimensoes) }}
+
+O Pillow é opcional: sem ele as páginas usam só o original, com
+loading="lazy". Uploads antigos (nome do cliente) também.
+
+Uso pela linha de comando (gera as versões das imagens já enviadas):
+    python -m util.imagens
+
+Antes disso a linha de comando passa os uploads antigos (uploads/<nome do
+cliente>) citados em capa/foto para o armazenamento por conteúdo
+(`migrar_uploads_antigos`), para que também tenham versões reduzidas.
+"""
+import asyncio
+import glob
+import logging
+import os
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+from markupsafe import Markup, escape
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.types import Scope
+
+from data.repo import arquivo_repo, experimento_repo, integrante_repo
+from util.armazenamento import (
+    PASTA_CONTEUDO, PASTA_DERIVADAS, URL_DERIVADAS, URL_UPLOADS, caminho_do_arquivo, eh_url_de_conteudo,
+    resumo_da_url, salvar_arquivo,
+)
+from util.arquivos_estaticos import ArquivosEstaticos
+from util.cache import CacheLRU
+from util.executor import executar_banco, executar_em_processo, executar_io
+from util.tarefas import agendar, enfileirar, tarefa
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # dependência opcional
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+LARGURAS = (160, 320, 640, 1280)   # 160 cobre a miniatura de 60 px em telas 2x
+EXTENSOES_DERIVAVEIS = (".jpg", ".jpeg", ".png", ".webp")   # GIF perderia a animação
+QUALIDADE = {"avif": 50, "webp": 75}
+TIPOS_MIDIA = {"avif": "image/avif", "webp": "image/webp"}
+
+
+def _formatos_suportados() -> Tuple[str, ...]:
+    if Image is None:
+        return ()
+    return tuple(f for f in ("avif", "webp") if features.check(f))
+
+
+# Ordem de preferência nos <source> (o navegador usa o primeiro que aceita)
+FORMATOS = _formatos_suportados()
+
+_PADRAO_DERIVADA = re.compile(r"^([0-9a-f]{2})/(\1[0-9a-f]{62})-(\d+)\.([a-z]+)$")
+
+# URL -> (largura, altura); o conteúdo de uma URL nunca muda
+cache_dimensoes = CacheLRU("dimensoes_imagens", tamanho_maximo=4096, ttl=86400.0)
+
+_em_andamento: Dict[str, asyncio.Future] = {}
+
+
+def derivavel(url: Optional[str]) -> bool:
+    """True se a URL é de uma imagem endereçada pelo conteúdo e há formatos para gerar"""
+    return (
+        bool(FORMATOS) and eh_url_de_conteudo(url)
+        and os.path.splitext(url)[1] in EXTENSOES_DERIVAVEIS
+    )
+
+
+def nome_derivada(resumo: str, largura: int, formato: str) -> str:
+    """<aa>/<resumo>-<largura>.<formato>, relativo a PASTA_DERIVADAS e URL_DERIVADAS"""
+    return f"{resumo[:2]}/{resumo}-{largura}.{formato}"
+
+
+def larguras_para(largura_original: int) -> Tuple[int, ...]:
+    """Larguras de LARGURAS menores que o original (não amplia)"""
+    return tuple(l for l in LARGURAS if l < largura_original)
+
+
+def gerar_derivadas(origem: str, pasta_destino: str, resumo: str,
+                    larguras: Iterable[int] = LARGURAS,
+                    formatos: Iterable[str] = FORMATOS) -> Tuple[int, int]:
+    """
+    Gera as versões que ainda não existem (bloqueante, roda no pool de processos)
+
+    A orientação EXIF é aplicada antes de redimensionar; larguras maiores ou
+    iguais à do original são puladas. Os caminhos vêm por parâmetro porque
+    o processo filho não vê as configurações do processo principal.
+
+    Returns:
+        (largura, altura) do original, já na orientação de exibição
+    """
+    with Image.open(origem) as aberta:
+        imagem = ImageOps.exif_transpose(aberta)
+        largura, altura = imagem.size
+        pendentes = [
+            (l, f, os.path.join(pasta_destino, *nome_derivada(resumo, l, f).split("/")))
+            for l in larguras if l < largura
+            for f in formatos
+        ]
+        pendentes = [p for p in pendentes if not os.path.exists(p[2])]
+        if not pendentes:
+            return largura, altura
+
+        if imagem.mode not in ("RGB", "RGBA"):
+            imagem = imagem.convert("RGBA" if "transparency" in imagem.info or "A" in imagem.mode else "RGB")
+        os.makedirs(os.path.dirname(pendentes[0][2]), exist_ok=True)
+        reduzidas = {}
+        for l, formato, destino in pendentes:
+            if l not in reduzidas:
+                reduzidas[l] = imagem.resize((l, max(1, round(altura * l / largura))), Image.LANCZOS)
+            temporario = f"{destino}.{os.getpid()}.tmp"
+            reduzidas[l].save(temporario, format=formato.upper(), quality=QUALIDADE[formato])
+            os.replace(temporario, destino)
+    return largura, altura
+
+
+@tarefa("processar_imagem")
+async def processar_imagem(url: str, larguras: Iterable[int] = LARGURAS,
+                           formatos: Iterable[str] = FORMATOS) -> Optional[Tuple[int, int]]:
+    """Gera as versões de `url` fora do processo e grava as dimensões do original"""
+    if not derivavel(url) or not await executar_io(os.path.exists, caminho_do_arquivo(url)):
+        return None   # o original pode ter sido apagado antes de a tarefa rodar
+    dimensoes = await executar_em_processo(
+        gerar_derivadas, caminho_do_arquivo(url), PASTA_DERIVADAS, resumo_da_url(url),
+        tuple(larguras), tuple(formatos),
+    )
+    await executar_banco(arquivo_repo.alterar_dimensoes_arquivo, url, *dimensoes)
+    cache_dimensoes.guardar(url, dimensoes)
+    return dimensoes
+
+
+async def agendar_derivadas(url: Optional[str]) -> None:
+    """Põe `processar_imagem` na fila de tarefas (logo depois do upload)"""
+    if derivavel(url):
+        # Não é urgente: se falhar, as versões são geradas na primeira requisição
+        await agendar("processar_imagem", {"url": url}, chave=f"imagem:{url}", max_tentativas=3)
+
+
+def _original(resumo: str) -> Optional[str]:
+    for caminho in glob.glob(os.path.join(PASTA_CONTEUDO, resumo[:2], resumo + ".*")):
+        if os.path.splitext(caminho)[1] in EXTENSOES_DERIVAVEIS:
+            return caminho
+    return None
+
+
+async def gerar_sob_demanda(caminho: str) -> bool:
+    """
+    Gera a versão pedida em `caminho` (<aa>/<resumo>-<largura>.<formato>)
+
+    Requisições simultâneas da mesma versão esperam uma única geração.
+
+    Returns:
+        False se o caminho não corresponde a uma versão válida
+    """
+    encontrado = _PADRAO_DERIVADA.match(caminho)
+    if not encontrado or int(encontrado.group(3)) not in LARGURAS or encontrado.group(4) not in FORMATOS:
+        return False
+    if caminho in _em_andamento:
+        return await asyncio.shield(_em_andamento[caminho])
+
+    futuro = asyncio.get_running_loop().create_future()
+    _em_andamento[caminho] = futuro
+    try:
+        origem = await executar_io(_original, encontrado.group(2))
+        gerada = origem is not None
+        if gerada:
+            largura = int(encontrado.group(3))
+            await executar_em_processo(
+                gerar_derivadas, origem, PASTA_DERIVADAS, encontrado.group(2), (largura,), (encontrado.group(4),)
+            )
+        futuro.set_result(gerada)
+        return gerada
+    except BaseException as e:
+        futuro.set_exception(e)
+        futuro.exception()   # marca como lida se ninguém mais esperava
+        raise
+    finally:
+        del _em_andamento[caminho]
+
+
+class ImagensDerivadas(ArquivosEstaticos):
+    """Serve uploads/d e gera na hora a versão que ainda não existe"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404 or not await gerar_sob_demanda(path.replace(os.sep, "/")):
+                raise
+        return await super().get_response(path, scope)
+
+
+async def dimensoes_das_imagens(urls: Iterable[Optional[str]]) -> Dict[str, Tuple[int, int]]:
+    """
+    (largura, altura) das imagens de uma página, para `imagem_responsiva`
+
+    As que não estão em `cache_dimensoes` vêm em uma só consulta, pelo
+    executor de banco. As que ainda estão sendo processadas ficam de fora
+    (e não vão para o cache).
+    """
+    dimensoes: Dict[str, Tuple[int, int]] = {}
+    faltando = []
+    for url in dict.fromkeys(u for u in urls if eh_url_de_conteudo(u)):
+        valor = cache_dimensoes.obter(url)
+        if valor is None:
+            faltando.append(url)
+        else:
+            dimensoes[url] = valor
+    if faltando:
+        encontradas = await executar_banco(arquivo_repo.obter_dimensoes_arquivos, faltando)
+        for url, valor in encontradas.items():
+            cache_dimensoes.guardar(url, valor)
+        dimensoes.update(encontradas)
+    return dimensoes
+
+
+def srcset(url: str, formato: str, largura_original: int) -> str:
+    """srcset com as versões de `formato` menores que o original"""
+    resumo = resumo_da_url(url)
+    return ", ".join(
+        f"{URL_DERIVADAS}/{nome_derivada(resumo, l, formato)} {l}w"
+        for l in larguras_para(largura_original)
+    )
+
+
+def imagem_responsiva(url: Optional[str], alt: str = "", sizes: str = "100vw",
+                      classe: str = None, carregamento: str = "lazy",
+                      largura: int = None,
+                      dimensoes: Optional[Dict[str, Tuple[int, int]]] = None) -> Markup:
+    """
+    <picture> com um <source> por formato e o original no <img> (helper dos templates)
+
+    Com as dimensões conhecidas, o <img> recebe width/height (o navegador
+    reserva o espaço antes de baixar); `largura` fixa a largura exibida
+    (miniaturas sem CSS próprio) e a altura acompanha a proporção.
+    `carregamento="eager"` para a imagem principal da página, que aparece
+    sem rolar.
+
+    `dimensoes` vem da rota (`dimensoes_das_imagens`); o helper não
+    consulta o banco, e uma URL fora dele mostra só o original.
+    """
+    if not url:
+        return Markup("")
+    atributos = [f'src="{escape(url)}"', f'alt="{escape(alt or "")}"']
+    if classe:
+        atributos.append(f'class="{escape(classe)}"')
+    tamanho = dimensoes.get(url) if dimensoes else None
+    if tamanho is not None:
+        exibida = largura or tamanho[0]
+        atributos.append(f'width="{exibida}" height="{max(1, round(tamanho[1] * exibida / tamanho[0]))}"')
+    elif largura:
+        atributos.append(f'width="{largura}"')
+    atributos.append(f'loading="{escape(carregamento)}" decoding="async"')
+    img = f"<img {' '.join(atributos)}>"
+
+    if tamanho is None or not derivavel(url) or not larguras_para(tamanho[0]):
+        return Markup(img)
+    fontes = "".join(
+        f'<source type="{TIPOS_MIDIA[formato]}" srcset="{escape(srcset(url, formato, tamanho[0]))}" '
+        f'sizes="{escape(sizes)}">'
+        for formato in FORMATOS
+    )
+    return Markup(f"<picture>{fontes}{img}</picture>")
+
+
+def eh_upload_antigo(url: Optional[str]) -> bool:
+    """True para URLs de uploads gravados com o nome do cliente (/static/<nome>)"""
+    return bool(url) and url.startswith(URL_UPLOADS + "/") and "/" not in url[len(URL_UPLOADS) + 1:]
+
+
+def migrar_uploads_antigos() -> int:
+    """
+    Passa os uploads antigos citados em capa/foto para o armazenamento por conteúdo (bloqueante)
+
+    Cada arquivo é copiado com `salvar_arquivo`, as linhas que o citam passam
+    para a URL nova (os triggers contam as referências) e as versões reduzidas
+    vão para a fila de tarefas. O original fica onde está: sem citações, sai
+    pela coleta de órfãos (util/coleta_arquivos.py), que também protege os
+    ainda citados em <img> dos textos ricos.
+
+    Returns:
+        Número de arquivos migrados
+    """
+    antigas = {
+        url for url in experimento_repo.obter_capas_experimentos() + integrante_repo.obter_fotos_integrantes()
+        if eh_upload_antigo(url)
+    }
+    migrados = 0
+    for antiga in sorted(antigas):
+        caminho = caminho_do_arquivo(antiga)
+        try:
+            with open(caminho, "rb") as arquivo:
+                nova = salvar_arquivo(arquivo, os.path.basename(caminho))
+        except FileNotFoundError:
+            logger.warning("Upload antigo não encontrado: %s", caminho)
+            continue
+        experimento_repo.substituir_capa(antiga, nova)
+        integrante_repo.substituir_foto(antiga, nova)
+        if derivavel(nova):
+            enfileirar("processar_imagem", {"url": nova}, chave=f"imagem:{nova}", max_tentativas=3)
+        migrados += 1
+    return migrados
+
+
+async def _processar_pendentes() -> int:
+    arquivos = await executar_banco(arquivo_repo.obter_arquivos_sem_dimensoes)
+    urls = [a.url for a in arquivos if derivavel(a.url)]
+    await asyncio.gather(*(processar_imagem(url) for url in urls))
+    return len(urls)
+
+
+if __name__ == "__main__":
+    from util.executor import encerrar_executores
+    from util.migracoes import aplicar_migracoes
+
+    aplicar_migracoes()
+    print(f"📦 {migrar_uploads_antigos()} upload(s) antigo(s) passado(s) para {PASTA_CONTEUDO}/")
+    if not FORMATOS:
+        print("⚠️  Pillow não instalado (ou sem suporte a WebP/AVIF): nenhuma versão reduzida gerada")
+    else:
+        try:
+            print(f"🖼️  {asyncio.run(_processar_pendentes())} imagem(ns) processada(s) ({', '.join(FORMATOS)})")
+        finally:
+            encerrar_executores()
@@ -0,0 +1,208 @@
+"""
+Leitura e validação de arquivos de importação em lote
+
+Usado pelo script `importar.py` e pela rota POST /admin/importar/{tipo}.
+Os registros vêm de um arquivo JSON (lista de objetos) ou CSV (com
+cabeçalho); as imagens (capa/foto) são referenciadas pelo nome do arquivo
+e gravadas em uploads/ sob o hash do conteúdo, com as mesmas validações
+dos uploads pelo navegador (util/uploads.py).
+
+Exemplo (JSON de experimentos):
+    [{"titulo": "Vulcão", "descricao": "<p>...</p>", "materiais": "<ul>...</ul>",
+      "capa": "vulcao.jpg", "video_explicativo": null}]
+"""
+import csv
+import io
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from data.model.experimento_model import Experimento
+from data.model.integrante_model import Integrante
+from util.uploads import TIPOS_UPLOAD, UploadError, gravar_upload
+from util.sanitizador import sanitizar_conteudo_html
+
+FORMATOS = ("json", "csv")
+TIPOS = ("experimentos", "integrantes")
+
+# Campos obrigatórios (o primeiro identifica o registro no upsert) e
+# campo que guarda a imagem de cada tipo
+CAMPOS_OBRIGATORIOS = {
+    "experimentos": ("titulo", "descricao", "materiais"),
+    "integrantes": ("nome", "turma", "funcao"),
+}
+CAMPO_IMAGEM = {
+    "experimentos": "capa",
+    "integrantes": "foto",
+}
+
+
+class ImportacaoError(ValueError):
+    """Arquivo de importação inválido"""
+
+
+def formato_do_arquivo(nome_arquivo: str) -> str:
+    """Deduz o formato (json/csv) pela extensão do arquivo"""
+    formato = os.path.splitext(nome_arquivo or "")[1].lower().lstrip(".")
+    if formato not in FORMATOS:
+        raise ImportacaoError(f"Formato não suportado: '{nome_arquivo}' (use .json ou .csv)")
+    return formato
+
+
+def ler_registros(conteudo: Union[str, bytes], formato: str) -> List[dict]:
+    """
+    Converte o conteúdo do arquivo em uma lista de dicionários
+
+    Raises:
+        ImportacaoError: se o conteúdo não puder ser lido no formato indicado
+    """
+    if isinstance(conteudo, bytes):
+        try:
+            conteudo = conteudo.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ImportacaoError("O arquivo deve estar em UTF-8")
+
+    if formato == "json":
+        try:
+            registros = json.loads(conteudo)
+        except json.JSONDecodeError as e:
+            raise ImportacaoError(f"JSON inválido: {e}")
+        if not isinstance(registros, list) or not all(isinstance(r, dict) for r in registros):
+            raise ImportacaoError("O JSON deve ser uma lista de objetos")
+        return registros
+
+    if formato == "csv":
+        leitor = csv.DictReader(io.StringIO(conteudo.lstrip("\ufeff")))
+        return [dict(linha) for linha in leitor]
+
+    raise ImportacaoError(f"Formato não suportado: {formato}")
+
+
+def _texto(valor) -> Optional[str]:
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def _validar(registros: List[dict], tipo: str) -> None:
+    obrigatorios = CAMPOS_OBRIGATORIOS[tipo]
+    for numero, registro in enumerate(registros, start=1):
+        faltando = [campo for campo in obrigatorios if not _texto(registro.get(campo))]
+        if faltando:
+            raise ImportacaoError(f"Registro {numero}: campo(s) obrigatório(s) ausente(s): {', '.join(faltando)}")
+
+
+def montar_experimentos(registros: List[dict]) -> List[Experimento]:
+    """Valida os registros e cria os experimentos (com HTML sanitizado)"""
+    _validar(registros, "experimentos")
+    return [
+        Experimento(
+            None,
+            _texto(r["titulo"]),
+            sanitizar_conteudo_html(str(r["descricao"])),
+            sanitizar_conteudo_html(str(r["materiais"])),
+            _texto(r.get("capa")),
+            _texto(r.get("video_explicativo")),
+        )
+        for r in registros
+    ]
+
+
+def montar_integrantes(registros: List[dict]) -> List[Integrante]:
+    """Valida os registros e cria os integrantes"""
+    _validar(registros, "integrantes")
+    return [
+        Integrante(
+            None,
+            _texto(r["nome"]),
+            _texto(r["turma"]),
+            _texto(r["funcao"]),
+            _texto(r.get("foto")),
+            _texto(r.get("redes_sociais")),
+        )
+        for r in registros
+    ]
+
+
+def _eh_url(valor: str) -> bool:
+    return valor.startswith(("/", "http://", "https://"))
+
+
+def montar_modelos(tipo: str, registros: List[dict]) -> list:
+    """
+    Valida os registros e cria os modelos do tipo indicado
+
+    Raises:
+        ImportacaoError: tipo desconhecido ou registro sem campo obrigatório
+    """
+    if tipo == "experimentos":
+        return montar_experimentos(registros)
+    if tipo == "integrantes":
+        return montar_integrantes(registros)
+    raise ImportacaoError(f"Tipo de importação inválido: {tipo}")
+
+
+def imagens_referenciadas(modelos: Iterable, tipo: str) -> Set[str]:
+    """Nomes de arquivo de imagem citados nos modelos (URLs são ignoradas)"""
+    campo = CAMPO_IMAGEM[tipo]
+    nomes = set()
+    for modelo in modelos:
+        valor = getattr(modelo, campo)
+        if valor and not _eh_url(valor):
+            nomes.add(valor)
+    return nomes
+
+
+def nome_seguro(nome: str) -> str:
+    """
+    Nome de arquivo sem diretórios
+
+    Raises:
+        ImportacaoError: se o nome tentar apontar para fora da pasta
+    """
+    base = os.path.basename((nome or "").replace("\\", "/"))
+    if not base or base in (".", "..") or base != nome:
+        raise ImportacaoError(f"Nome de imagem inválido: '{nome}'")
+    return base
+
+
+def substituir_imagens(modelos: List, tipo: str, urls: Dict[str, str]) -> None:
+    """
+    Troca os nomes de arquivo pelas URLs públicas das imagens copiadas
+
+    Raises:
+        ImportacaoError: se alguma imagem citada não foi enviada
+    """
+    campo = CAMPO_IMAGEM[tipo]
+    faltando = imagens_referenciadas(modelos, tipo) - set(urls)
+    if faltando:
+        raise ImportacaoError(f"Imagem(ns) não encontrada(s): {', '.join(sorted(faltando))}")
+    for modelo in modelos:
+        valor = getattr(modelo, campo)
+        if valor and not _eh_url(valor):
+            setattr(modelo, campo, urls[valor])
+
+
+def copiar_imagens(nomes: Iterable[str], pasta_origem: str) -> Dict[str, str]:
+    """
+    Copia as imagens de uma pasta local para o armazenamento de uploads (bloqueante)
+
+    Returns:
+        Dicionário nome do arquivo -> URL pública; imagens ausentes na
+        pasta de origem ficam de fora
+
+    Raises:
+        ImportacaoError: se alguma imagem tiver formato não aceito ou for grande demais
+    """
+    urls = {}
+    for nome in nomes:
+        base = nome_seguro(nome)
+        origem = os.path.join(pasta_origem, base)
+        if os.path.isfile(origem):
+            try:
+                with open(origem, "rb") as arquivo:
+                    urls[nome] = gravar_upload(arquivo, TIPOS_UPLOAD["imagem"])
+            except UploadError as e:
+                raise ImportacaoError(f"Imagem '{base}': {e}")
+    return urls
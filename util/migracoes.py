@@ -0,0 +1,136 @@
+"""
+Executor de migrações versionadas do banco de dados
+
+As migrações ficam em data/migracoes/, uma por arquivo, nomeadas
+`m<versão>_<descrição>.py` (por exemplo m0003_indices.py). Cada módulo
+define:
+
+    DESCRICAO = "texto curto"
+
+    def aplicar(conn: sqlite3.Connection) -> None:
+        conn.execute(...)
+
+As versões aplicadas ficam registradas na tabela schema_version. Cada
+migração roda em sua própria transação (BEGIN IMMEDIATE), então uma falha
+não deixa o esquema pela metade e dois processos iniciando juntos não
+aplicam a mesma migração duas vezes.
+
+Uso pela linha de comando:
+    python -m util.migracoes
+"""
+import importlib
+import os
+import pkgutil
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from util.db_util import get_connection
+
+PACOTE_MIGRACOES = "data.migracoes"
+DIRETORIO_MIGRACOES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "migracoes"
+)
+
+_PADRAO_NOME = re.compile(r"^m(\d+)_\w+$")
+
+CRIAR_TABELA_SCHEMA_VERSION = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    versao      INTEGER PRIMARY KEY,
+    descricao   TEXT    NOT NULL,
+    aplicada_em TEXT    NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+@dataclass
+class Migracao:
+    versao: int
+    nome: str
+    descricao: str
+    aplicar: Callable[[sqlite3.Connection], None]
+
+
+class MigracaoError(Exception):
+    """Falha ao aplicar uma migração"""
+
+
+def listar_migracoes() -> List[Migracao]:
+    """Carrega as migrações de data/migracoes/ em ordem de versão"""
+    migracoes = []
+    for modulo in pkgutil.iter_modules([DIRETORIO_MIGRACOES]):
+        encontrado = _PADRAO_NOME.match(modulo.name)
+        if not encontrado:
+            continue
+        mod = importlib.import_module(f"{PACOTE_MIGRACOES}.{modulo.name}")
+        migracoes.append(Migracao(
+            versao=int(encontrado.group(1)),
+            nome=modulo.name,
+            descricao=getattr(mod, "DESCRICAO", modulo.name),
+            aplicar=mod.aplicar,
+        ))
+    migracoes.sort(key=lambda m: m.versao)
+    versoes = [m.versao for m in migracoes]
+    if len(versoes) != len(set(versoes)):
+        raise MigracaoError(f"Versões de migração duplicadas: {versoes}")
+    return migracoes
+
+
+def obter_versao_atual(conn: sqlite3.Connection) -> int:
+    """Maior versão aplicada (0 se nenhuma)"""
+    conn.execute(CRIAR_TABELA_SCHEMA_VERSION)
+    return conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version").fetchone()[0]
+
+
+def _aplicar_migracao(conn: sqlite3.Connection, migracao: Migracao) -> bool:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Outro processo pode ter aplicado enquanto esperávamos o lock
+        if conn.execute("SELECT 1 FROM schema_version WHERE versao = ?", (migracao.versao,)).fetchone():
+            conn.rollback()
+            return False
+        migracao.aplicar(conn)
+        conn.execute(
+            "INSERT INTO schema_version (versao, descricao) VALUES (?, ?)",
+            (migracao.versao, migracao.descricao)
+        )
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        raise MigracaoError(f"Erro na migração {migracao.nome}: {e}") from e
+
+
+def aplicar_migracoes(conn: Optional[sqlite3.Connection] = None) -> List[int]:
+    """
+    Aplica as migrações pendentes
+
+    Args:
+        conn: Conexão a migrar. Se None, usa uma conexão do pool da aplicação.
+
+    Returns:
+        Versões aplicadas nesta chamada
+    """
+    if conn is None:
+        with get_connection() as conn_pool:
+            return aplicar_migracoes(conn_pool)
+
+    conn.execute(CRIAR_TABELA_SCHEMA_VERSION)
+    conn.commit()
+    atual = obter_versao_atual(conn)
+    aplicadas = []
+    for migracao in listar_migracoes():
+        if migracao.versao <= atual:
+            continue
+        if _aplicar_migracao(conn, migracao):
+            aplicadas.append(migracao.versao)
+    return aplicadas
+
+
+if __name__ == "__main__":
+    versoes = aplicar_migracoes()
+    if versoes:
+        print(f"✅ Migrações aplicadas: {', '.join(map(str, versoes))}")
+    else:
+        print("ℹ️  Banco já está na versão mais recente")
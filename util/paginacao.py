@@ -0,0 +1,88 @@
+"""
+Paginação por cursor (keyset) para as listagens
+
+Em vez de OFFSET, cada página continua a partir da chave de ordenação do
+último item exibido (por exemplo, (titulo, id)). Com um índice sobre essas
+colunas o custo de qualquer página é o mesmo, seja a primeira ou a milésima.
+
+O cursor enviado na URL é a chave codificada em base64 (url-safe).
+"""
+import base64
+import binascii
+import json
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from data.model.pagina_model import Pagina
+
+T = TypeVar("T")
+
+LIMITE_PADRAO = 12
+LIMITE_MAXIMO = 100
+
+
+def normalizar_limite(limite: Optional[int], padrao: int = LIMITE_PADRAO) -> int:
+    """Garante um limite entre 1 e LIMITE_MAXIMO"""
+    if not limite:
+        return padrao
+    return max(1, min(int(limite), LIMITE_MAXIMO))
+
+
+def codificar_cursor(chave: Sequence[Any]) -> str:
+    """Codifica a chave de ordenação de um item como cursor opaco"""
+    dados = json.dumps(list(chave), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(dados).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: Optional[str], tamanho: int) -> Optional[tuple]:
+    """
+    Decodifica um cursor recebido na URL
+
+    Returns:
+        Tupla com `tamanho` valores (texto ou número), ou None se o cursor
+        for vazio ou inválido (nesse caso a listagem recomeça da primeira
+        página)
+    """
+    if not cursor:
+        return None
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        return None
+    # Os valores vão direto para a consulta: só o que o SQLite aceita como
+    # parâmetro (bool é int no Python, mas nenhuma chave é booleana)
+    if not all(isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in valores):
+        return None
+    return tuple(valores)
+
+
+def montar_pagina(linhas: List[T], limite: int, chave: Callable[[T], Sequence[Any]],
+                  total: int, para_tras: bool = False, com_cursor: bool = False) -> Pagina[T]:
+    """
+    Monta a página a partir de até `limite + 1` linhas buscadas no banco
+
+    Args:
+        linhas: Itens na ordem em que vieram da consulta (decrescente se para_tras)
+        limite: Tamanho da página
+        chave: Função que retorna a chave de ordenação de um item
+        total: Total de itens da listagem
+        para_tras: True se a consulta buscou a página anterior (?before=)
+        com_cursor: True se a consulta partiu de um cursor (não é a primeira página)
+    """
+    tem_mais = len(linhas) > limite
+    itens = linhas[:limite]
+    if para_tras:
+        itens.reverse()
+    if not itens:
+        return Pagina(itens=[], limite=limite, total=total)
+
+    primeiro = codificar_cursor(chave(itens[0]))
+    ultimo = codificar_cursor(chave(itens[-1]))
+    if para_tras:
+        return Pagina(itens=itens, limite=limite, total=total,
+                      proximo=ultimo, anterior=primeiro if tem_mais else None)
+    return Pagina(itens=itens, limite=limite, total=total,
+                  proximo=ultimo if tem_mais else None,
+                  anterior=primeiro if com_cursor else None)
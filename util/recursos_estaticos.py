@@ -0,0 +1,186 @@
+"""
+CSS das páginas públicas em bundles com hash no nome
+
+Os estilos ficam em static/css (ifes.css, comum a todas as páginas, e
+paginas/<pagina>.css). Na inicialização cada bundle é concatenado,
+opcionalmente minificado e gravado em static/dist/<nome>.<hash>.css. Como
+o nome muda junto com o conteúdo, os arquivos são servidos com
+`Cache-Control: immutable` e o navegador baixa o CSS uma vez por versão
+do site, não a cada página.
+
+Fontes: se os arquivos .woff2 de FONTES estiverem em static/fonts, também
+ganham nome com hash, o @font-face entra no bundle principal e as páginas
+recebem <link rel="preload">. Sem os arquivos, as páginas usam o Google
+Fonts por <link> (com preconnect), em vez do @import que bloqueava o CSS.
+
+Nos templates:
+    {{ links_fontes() }}
+    <link href="{{ url_css('ifes') }}" rel="stylesheet">
+
+Uso pela linha de comando (gera os bundles antes do deploy):
+    python -m util.recursos_estaticos
+"""
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List
+
+from markupsafe import Markup, escape
+
+PASTA_ESTATICOS = "static"
+PASTA_BUNDLES = os.path.join(PASTA_ESTATICOS, "dist")
+URL_ESTATICOS = "/static_css"
+URL_BUNDLES = URL_ESTATICOS + "/dist"
+
+CACHE_CONTROL_IMUTAVEL = "public, max-age=31536000, immutable"
+
+MINIFICAR = True
+
+# Bundle -> arquivos de origem (relativos a static/), na ordem da cascata
+BUNDLE_PRINCIPAL = "ifes"
+BUNDLES = {
+    BUNDLE_PRINCIPAL: ["css/ifes.css"],
+    "index": ["css/paginas/index.css"],
+    "experimentos": ["css/paginas/experimentos.css"],
+    "detalhes_experimento": ["css/paginas/detalhes_experimento.css"],
+    "sobre_nos": ["css/paginas/sobre_nos.css"],
+}
+
+
+@dataclass(slots=True)
+class Fonte:
+    familia: str
+    pesos: str       # "300 800" para fontes variáveis
+    arquivo: str     # relativo a static/
+
+
+FONTES = [
+    Fonte("Inter", "300 800", "fonts/inter-latin.woff2"),
+    Fonte("Roboto Slab", "400 700", "fonts/roboto-slab-latin.woff2"),
+]
+
+URL_GOOGLE_FONTS = (
+    "https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800"
+    "&family=Roboto+Slab:wght@400;500;600;700&display=swap"
+)
+
+_lock = threading.Lock()
+_manifesto: Dict[str, str] = {}      # bundle -> URL com hash
+_fontes: List[str] = []              # URLs com hash das fontes locais
+
+
+_PADRAO_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+_PADRAO_COMENTARIO = re.compile(r"/\*.*?\*/", re.S)
+_PADRAO_ESPACOS = re.compile(r"\s+")
+_PADRAO_SEPARADORES = re.compile(r"\s*([{};,>])\s*")
+_PADRAO_DOIS_PONTOS = re.compile(r":\s+")
+
+
+def minificar_css(css: str) -> str:
+    """
+    Minificação conservadora: comentários, espaços e o último `;` de cada bloco
+
+    O conteúdo de strings ('...' e "...") é mantido, e não mexe em espaços
+    antes de `:` (seletores como `a :hover`) nem ao redor de `+`/`-` (calc()).
+    """
+    css = _PADRAO_COMENTARIO.sub("", css)
+    partes = _PADRAO_STRING.split(css)
+    for i in range(0, len(partes), 2):   # índices pares: fora de strings
+        parte = _PADRAO_ESPACOS.sub(" ", partes[i])
+        parte = _PADRAO_SEPARADORES.sub(r"\1", parte)
+        partes[i] = _PADRAO_DOIS_PONTOS.sub(":", parte)
+    return "".join(partes).replace(";}", "}").strip()
+
+
+def _publicar(conteudo: bytes, nome: str, extensao: str) -> str:
+    """Grava em static/dist/<nome>.<hash>.<extensao> (atômico) e devolve a URL"""
+    resumo = hashlib.sha256(conteudo).hexdigest()[:12]
+    arquivo = f"{nome}.{resumo}.{extensao}"
+    destino = os.path.join(PASTA_BUNDLES, arquivo)
+    if not os.path.exists(destino):
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as saida:
+            saida.write(conteudo)
+        os.replace(temporario, destino)
+    return f"{URL_BUNDLES}/{arquivo}"
+
+
+def _ler(relativo: str) -> bytes:
+    with open(os.path.join(PASTA_ESTATICOS, relativo), "rb") as origem:
+        return origem.read()
+
+
+def _css_fontes(fontes: List[Fonte], urls: List[str]) -> str:
+    return "".join(
+        f"@font-face {{\n  font-family: '{fonte.familia}';\n  font-style: normal;\n"
+        f"  font-weight: {fonte.pesos};\n  font-display: swap;\n"
+        f"  src: url('{url}') format('woff2');\n}}\n\n"
+        for fonte, url in zip(fontes, urls)
+    )
+
+
+def construir_recursos(minificar: bool = MINIFICAR) -> Dict[str, str]:
+    """
+    Gera os bundles (e as fontes locais) em static/dist (bloqueante)
+
+    Vários workers podem rodar ao mesmo tempo: o nome depende só do
+    conteúdo e a gravação é atômica.
+
+    Returns:
+        Manifesto bundle -> URL com hash
+    """
+    os.makedirs(PASTA_BUNDLES, exist_ok=True)
+    locais = [f for f in FONTES if os.path.isfile(os.path.join(PASTA_ESTATICOS, f.arquivo))]
+    urls_fontes = [
+        _publicar(_ler(f.arquivo), os.path.splitext(os.path.basename(f.arquivo))[0], "woff2")
+        for f in locais
+    ]
+
+    manifesto = {}
+    for nome, arquivos in BUNDLES.items():
+        css = "\n".join(_ler(arquivo).decode("utf-8") for arquivo in arquivos)
+        if nome == BUNDLE_PRINCIPAL:
+            css = _css_fontes(locais, urls_fontes) + css
+        if minificar:
+            css = minificar_css(css)
+        manifesto[nome] = _publicar(css.encode("utf-8"), nome, "css")
+
+    with _lock:
+        _manifesto.clear()
+        _manifesto.update(manifesto)
+        _fontes[:] = urls_fontes
+    return manifesto
+
+
+def _garantir_construido() -> None:
+    # Normalmente já feito no startup; construir duas vezes é inofensivo
+    if not _manifesto:
+        construir_recursos()
+
+
+def url_css(nome: str) -> str:
+    """URL com hash do bundle (helper dos templates)"""
+    _garantir_construido()
+    return _manifesto[nome]
+
+
+def links_fontes() -> Markup:
+    """<link>s das fontes: preload das locais ou Google Fonts (helper dos templates)"""
+    _garantir_construido()
+    if _fontes:
+        return Markup("\n".join(
+            f'<link rel="preload" href="{escape(url)}" as="font" type="font/woff2" crossorigin>'
+            for url in _fontes
+        ))
+    return Markup(
+        '<link rel="preconnect" href="https://fonts.googleapis.com">\n'
+        '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+        f'<link href="{escape(URL_GOOGLE_FONTS)}" rel="stylesheet">'
+    )
+
+
+if __name__ == "__main__":
+    for nome, url in construir_recursos().items():
+        print(f"📦 {nome}: {url}")
@@ -0,0 +1,261 @@
+"""
+Sanitização do HTML do editor de texto rico por lista de permissões
+
+Descrição e materiais chegam do editor (Quill) como HTML e são mostrados
+com `|safe` na página do experimento. A sanitização roda uma única vez, ao
+gravar (rotas de admin e importação em lote); o banco guarda o HTML já
+limpo e a página não reprocessa nada.
+
+O HTML é percorrido uma vez, por um tokenizador com expressões compiladas
+no carregamento do módulo:
+- tags fora de `TAGS_PERMITIDAS` são removidas, mantendo o texto de dentro;
+  as de `TAGS_DESCARTADAS` (script, style, iframe...) saem com o conteúdo
+- só ficam os atributos permitidos para a tag; URLs só com esquemas
+  seguros, e "//host/..." só para `HOSTS_PERMITIDOS`; `style` só com cor, fundo e alinhamento; `class` só as do Quill
+- comentários, doctype e instruções de processamento são removidos
+- texto solto é escapado (`<` vira `&lt;`), entidades válidas são mantidas
+- tags fechadas fora de ordem são corrigidas e as abertas são fechadas
+  no fim, para o conteúdo não quebrar o layout da página
+
+O que é permitido (tags, atributos, esquemas de URL, estilos) fica em uma
+`RegrasHtml`; `REGRAS` são as atuais. Quem precisa de um resultado que não
+mude com a lista (a migração m0009) passa as próprias regras:
+
+    descricao = sanitizar_conteudo_html(descricao)   # antes de gravar
+    sanitizar_conteudo_html(html_antigo, regras_congeladas)
+"""
+import functools
+import html
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Pattern
+
+# Tag -> atributos permitidos (além de class e style, válidos em todas)
+TAGS_PERMITIDAS: Dict[str, FrozenSet[str]] = {
+    **{tag: frozenset() for tag in (
+        "p", "br", "strong", "b", "em", "i", "u", "s", "strike", "sub", "sup",
+        "h1", "h2", "h3", "h4", "h5", "h6",
+        "ul", "ol", "li", "blockquote", "pre", "code", "hr", "span", "div",
+    )},
+    "a": frozenset({"href", "title", "target", "rel"}),
+    "img": frozenset({"src", "alt", "title", "width", "height"}),
+}
+ATRIBUTOS_GLOBAIS = frozenset({"class", "style"})
+
+TAGS_VAZIAS = frozenset({"br", "hr", "img"})
+
+# <li> e <p> sem fechamento terminam quando outro igual começa
+TAGS_FECHAMENTO_OPCIONAL = frozenset({"li", "p"})
+
+# Removidas junto com todo o conteúdo até o fechamento
+TAGS_DESCARTADAS = frozenset({
+    "script", "style", "iframe", "object", "embed", "template", "noscript",
+    "textarea", "title", "svg", "math", "xmp", "noembed", "noframes",
+})
+
+# Links em nova aba não dão à página aberta acesso a esta (window.opener)
+REL_LINK = "noopener noreferrer"
+
+ESQUEMAS_LINK = frozenset({"http", "https", "mailto", "tel"})
+ESQUEMAS_IMAGEM = frozenset({"http", "https"})
+
+# Hosts aceitos em URLs sem esquema ("//host/..."); as demais apontariam
+# para outro site parecendo um caminho relativo
+HOSTS_PERMITIDOS: FrozenSet[str] = frozenset()
+
+# Propriedade CSS -> valores aceitos
+ESTILOS_PERMITIDOS = {
+    "color": re.compile(r"^(?:#[0-9a-f]{3,8}|rgba?\(\s*[\d.,%\s]+\)|[a-z]{3,20})$"),
+    "background-color": re.compile(r"^(?:#[0-9a-f]{3,8}|rgba?\(\s*[\d.,%\s]+\)|[a-z]{3,20})$"),
+    "text-align": re.compile(r"^(?:left|right|center|justify)$"),
+}
+
+_TOKEN = re.compile(
+    r"""
+    <!--.*?(?:-->|\Z)                                   # comentário
+    | <[!?][^>]*(?:>|\Z)                                # doctype, CDATA, <?...?>
+    | </\s*(?P<fim>[a-zA-Z][a-zA-Z0-9]*)[^>]*(?:>|\Z)   # tag de fechamento
+    | <(?P<tag>[a-zA-Z][a-zA-Z0-9]*)                    # tag de abertura
+      (?P<atributos>(?:[^>"']|"[^"]*"|'[^']*')*)
+      (?:>|\Z)
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+_ATRIBUTO = re.compile(
+    r"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?"""
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RegrasHtml:
+    """Lista de permissões usada por `sanitizar_conteudo_html`"""
+    tags: Dict[str, FrozenSet[str]]          # tag -> atributos além dos globais
+    atributos_globais: FrozenSet[str]
+    tags_descartadas: FrozenSet[str]         # saem com o conteúdo
+    esquemas_link: FrozenSet[str]
+    esquemas_imagem: FrozenSet[str]
+    estilos: Dict[str, Pattern]              # propriedade CSS -> valores aceitos
+    hosts: FrozenSet[str] = frozenset()      # aceitos em "//host/..."
+
+
+REGRAS = RegrasHtml(
+    tags=TAGS_PERMITIDAS,
+    atributos_globais=ATRIBUTOS_GLOBAIS,
+    tags_descartadas=TAGS_DESCARTADAS,
+    esquemas_link=ESQUEMAS_LINK,
+    esquemas_imagem=ESQUEMAS_IMAGEM,
+    estilos=ESTILOS_PERMITIDOS,
+    hosts=HOSTS_PERMITIDOS,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _fechamento_descartada(tag: str) -> Pattern:
+    return re.compile(rf"</\s*{tag}\b[^>]*>", re.IGNORECASE)
+
+# No texto: <, > e & que não inicia uma entidade
+_ESCAPAR_TEXTO = re.compile(r"[<>]|&(?!(?:#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6}|[a-zA-Z][a-zA-Z0-9]{1,31});)")
+_ESCAPES = {"<": "&lt;", ">": "&gt;", "&": "&amp;"}
+
+_ESQUEMA = re.compile(r"^([a-z][a-z0-9+.-]*):")
+_CONTROLE = re.compile(r"[\x00-\x1f\x7f]+")
+_DATA_IMAGEM = re.compile(r"^data:image/(?:png|jpeg|gif|webp);base64,[a-z0-9+/=]*$", re.IGNORECASE)
+_CLASSE_QUILL = re.compile(r"^ql-[a-z0-9-]{1,40}$")
+_NUMERO = re.compile(r"^\d{1,5}$")
+# "//host" e "\\host" (o navegador lê a barra invertida como barra)
+_SEM_ESQUEMA = re.compile(r"^[/\\]{2}([^/\\?#]*)")
+
+
+def _escapar_texto(texto: str) -> str:
+    return _ESCAPAR_TEXTO.sub(lambda m: _ESCAPES[m.group()[0]], texto)
+
+
+def _url_segura(valor: str, esquemas: FrozenSet[str], hosts: FrozenSet[str],
+                imagem: bool = False) -> Optional[str]:
+    # Os navegadores ignoram caracteres de controle na URL ("java\tscript:")
+    url = _CONTROLE.sub("", valor).strip()
+    sem_esquema = _SEM_ESQUEMA.match(url)
+    if sem_esquema is not None:
+        return url if sem_esquema.group(1).lower() in hosts else None
+    esquema = _ESQUEMA.match(url[:32].lower())
+    if esquema is None or esquema.group(1) in esquemas:
+        return url   # relativa (/static/..., #ancora) ou esquema permitido
+    if imagem and _DATA_IMAGEM.match(url):
+        return url   # imagem colada no editor
+    return None
+
+
+def _estilo_seguro(valor: str, estilos: Dict[str, Pattern]) -> Optional[str]:
+    declaracoes = []
+    for declaracao in valor.split(";"):
+        propriedade, _, conteudo = declaracao.partition(":")
+        propriedade = propriedade.strip().lower()
+        conteudo = conteudo.strip().lower()
+        padrao = estilos.get(propriedade)
+        if padrao is not None and padrao.match(conteudo):
+            declaracoes.append(f"{propriedade}: {conteudo};")
+    return " ".join(declaracoes) or None
+
+
+def _valor_seguro(nome: str, valor: str, regras: RegrasHtml) -> Optional[str]:
+    if nome == "href":
+        return _url_segura(valor, regras.esquemas_link, regras.hosts)
+    if nome == "src":
+        return _url_segura(valor, regras.esquemas_imagem, regras.hosts, imagem=True)
+    if nome == "style":
+        return _estilo_seguro(valor, regras.estilos)
+    if nome == "class":
+        return " ".join(c for c in valor.split() if _CLASSE_QUILL.match(c)) or None
+    if nome == "target":
+        return "_blank" if valor == "_blank" else None
+    if nome == "rel":
+        return REL_LINK
+    if nome in ("width", "height"):
+        return valor if _NUMERO.match(valor) else None
+    return valor
+
+
+def _atributos(tag: str, texto: str, regras: RegrasHtml) -> str:
+    permitidos = regras.tags[tag]
+    globais = regras.atributos_globais
+    saida = []
+    vistos = set()
+    gravados = set()
+    for encontrado in _ATRIBUTO.finditer(texto):
+        nome = encontrado.group(1).lower()
+        if nome in vistos or (nome not in permitidos and nome not in globais):
+            continue
+        vistos.add(nome)
+        bruto = next((g for g in encontrado.groups()[1:] if g is not None), "")
+        valor = _valor_seguro(nome, html.unescape(bruto), regras)
+        if valor is not None:
+            gravados.add(nome)
+            saida.append(f' {nome}="{html.escape(valor, quote=True)}"')
+    if "target" in gravados and "rel" not in gravados:
+        saida.append(f' rel="{REL_LINK}"')
+    return "".join(saida)
+
+
+def sanitizar_conteudo_html(conteudo: str, regras: RegrasHtml = REGRAS) -> str:
+    """
+    Mantém só as tags e atributos permitidos do HTML do editor
+
+    Args:
+        conteudo: HTML recebido do formulário ou da importação
+        regras: Lista de permissões (as atuais, por padrão)
+
+    Returns:
+        HTML seguro para mostrar com `|safe`
+    """
+    if not conteudo:
+        return ""
+    if "<" not in conteudo and "&" not in conteudo and ">" not in conteudo:
+        return conteudo
+
+    saida: List[str] = []
+    abertas: List[str] = []
+    # Tag original -> tag limpa: o editor repete as mesmas tags muitas vezes
+    aberturas: Dict[str, str] = {}
+    posicao = 0
+    tamanho = len(conteudo)
+    while posicao < tamanho:
+        encontrado = _TOKEN.search(conteudo, posicao)
+        if encontrado is None:
+            saida.append(_escapar_texto(conteudo[posicao:]))
+            break
+        if encontrado.start() > posicao:
+            saida.append(_escapar_texto(conteudo[posicao:encontrado.start()]))
+        posicao = encontrado.end()
+
+        tag = encontrado.group("tag")
+        if tag is not None:
+            tag = tag.lower()
+            if tag in regras.tags_descartadas:
+                fechamento = _fechamento_descartada(tag).search(conteudo, posicao)
+                posicao = fechamento.end() if fechamento else tamanho
+            elif tag in regras.tags:
+                if tag in TAGS_FECHAMENTO_OPCIONAL and abertas and abertas[-1] == tag:
+                    saida.append(f"</{abertas.pop()}>")
+                original = encontrado.group()
+                abertura = aberturas.get(original)
+                if abertura is None:
+                    abertura = aberturas[original] = f"<{tag}{_atributos(tag, encontrado.group('atributos'), regras)}>"
+                saida.append(abertura)
+                if tag not in TAGS_VAZIAS:
+                    abertas.append(tag)
+            continue
+
+        fim = encontrado.group("fim")
+        if fim is not None:
+            fim = fim.lower()
+            if fim in abertas:
+                # Fecha também as que ficaram abertas dentro dela
+                while True:
+                    aberta = abertas.pop()
+                    saida.append(f"</{aberta}>")
+                    if aberta == fim:
+                        break
+        # Comentários, doctype e fechamentos soltos são descartados
+
+    saida.extend(f"</{tag}>" for tag in reversed(abertas))
+    return "".join(saida)
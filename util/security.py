@@ -4,10 +4,17 @@ Módulo de segurança para gerenciar senhas e tokens
 import secrets
 import string
 from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from passlib.context import CryptContext
 
+# Custo do bcrypt (2^n iterações); hashes com custo menor são refeitos no login
+ROUNDS_BCRYPT = 12
+
 # Contexto para hash de senhas usando bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__default_rounds=ROUNDS_BCRYPT, bcrypt__min_rounds=ROUNDS_BCRYPT,
+)
 
 
 def criar_hash_senha(senha: str) -> str:
@@ -40,6 +47,26 @@ def verificar_senha(senha_plana: str, senha_hash: str) -> bool:
         return False
 
 
+def verificar_e_atualizar_senha(senha_plana: str, senha_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica a senha e, se o hash estiver desatualizado, calcula um novo
+
+    Feita para rodar no pool de processos de senhas
+    (`util.executor.executar_senha`): só recebe e devolve tipos simples.
+
+    Args:
+        senha_plana: Senha em texto plano
+        senha_hash: Hash da senha armazenado no banco
+
+    Returns:
+        (senha correta, novo hash para gravar ou None se o atual serve)
+    """
+    try:
+        return pwd_context.verify_and_update(senha_plana, senha_hash)
+    except (ValueError, TypeError):
+        return False, None
+
+
 def gerar_token_redefinicao(tamanho: int = 32) -> str:
     """
     Gera um token aleatório seguro para redefinição de senha
@@ -0,0 +1,321 @@
+"""
+Sessões guardadas no servidor; o cookie leva só um id aleatório
+
+Com o SessionMiddleware do Starlette a sessão inteira (login, lista de
+mensagens flash) ia assinada dentro do cookie, em toda requisição e em toda
+resposta. Aqui o cookie tem só o id (43 caracteres) e os dados ficam em um
+armazenamento:
+
+- `SessoesEmMemoria`: LRU com expiração, por processo (um worker só, testes)
+- `SessoesSQLite`: tabela `sessao` (m0011), compartilhada entre workers e
+  preservada em um reinício; as expiradas são apagadas por uma tarefa
+  periódica (util/tarefas.py)
+
+A escolha é pela variável de ambiente SESSOES ("sqlite", o padrão, ou
+"memoria"):
+
+    app.add_middleware(SessaoMiddleware, armazenamento=criar_armazenamento())
+
+`request.session` continua um dicionário, lido do armazenamento só no
+primeiro uso: rotas e dependências que usam a sessão aguardam antes
+
+    sessao = await carregar_sessao(request)   # no SQLite, pelo executor de banco
+
+Requisições que nunca chamam `carregar_sessao` (arquivos estáticos, bundles
+de CSS, exportações...) não consultam o armazenamento nem reenviam o
+cookie; as pastas montadas em `ignorar` nem passam pelo middleware. Sem
+cookie, o armazenamento também não é consultado. Na resposta, a sessão só é gravada (e o cookie reenviado) se os
+dados mudaram, se o id foi trocado por `renovar_sessao` ou se passou da
+metade da validade; sessão esvaziada é apagada junto com o cookie. A
+comparação é pelo JSON, então alterações em listas guardadas na sessão
+(`setdefault("flash_messages", []).append(...)`) também contam.
+"""
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from data.model.sessao_model import Sessao
+from data.repo import sessao_repo
+from util.executor import executar_banco
+from util.tarefas import agendar, enfileirar, tarefa
+
+logger = logging.getLogger(__name__)
+
+TIPO_ARMAZENAMENTO = os.environ.get("SESSOES", "sqlite").lower()
+
+NOME_COOKIE = "session"
+DURACAO_SESSAO = 14 * 24 * 3600     # segundos; o mesmo padrão do Starlette
+MAXIMO_SESSOES_MEMORIA = 10_000
+
+INTERVALO_LIMPEZA_SESSOES = 6 * 3600.0
+CHAVE_LIMPEZA_SESSOES = "limpar_sessoes"
+
+# Formato de secrets.token_urlsafe(32); outros valores nem são consultados
+_ID_VALIDO = re.compile(r"^[A-Za-z0-9_-]{43}$")
+
+
+def novo_id() -> str:
+    return secrets.token_urlsafe(32)
+
+
+class ArmazenamentoSessoes(ABC):
+    """
+    Onde os dados das sessões ficam
+
+    Os três métodos são aguardados pelo middleware: `carregar` antes da
+    rota, `gravar` e `excluir` antes de a resposta começar.
+    """
+
+    @abstractmethod
+    async def carregar(self, id: str) -> Optional[Sessao]:
+        """A sessão com este id, ou None se não existir ou tiver expirado"""
+
+    @abstractmethod
+    async def gravar(self, sessao: Sessao) -> None:
+        """Insere ou substitui a sessão"""
+
+    @abstractmethod
+    async def excluir(self, id: str) -> None:
+        """Apaga a sessão, se existir"""
+
+
+class SessoesEmMemoria(ArmazenamentoSessoes):
+    """
+    Sessões em um dicionário LRU do processo
+
+    Ao passar de `tamanho_maximo`, sai a sessão usada há mais tempo; as
+    expiradas saem quando são lidas. Thread-safe.
+    """
+
+    def __init__(self, tamanho_maximo: int = MAXIMO_SESSOES_MEMORIA):
+        self.tamanho_maximo = tamanho_maximo
+        self._sessoes: "OrderedDict[str, Sessao]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def carregar(self, id: str) -> Optional[Sessao]:
+        with self._lock:
+            sessao = self._sessoes.get(id)
+            if sessao is None:
+                return None
+            if sessao.expira_em <= time.time():
+                del self._sessoes[id]
+                return None
+            self._sessoes.move_to_end(id)
+            return sessao
+
+    async def gravar(self, sessao: Sessao) -> None:
+        with self._lock:
+            self._sessoes[sessao.id] = sessao
+            self._sessoes.move_to_end(sessao.id)
+            while len(self._sessoes) > self.tamanho_maximo:
+                self._sessoes.popitem(last=False)
+
+    async def excluir(self, id: str) -> None:
+        with self._lock:
+            self._sessoes.pop(id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessoes)
+
+
+class SessoesSQLite(ArmazenamentoSessoes):
+    """
+    Sessões na tabela `sessao`, vistas por todos os workers
+
+    Leitura e gravações vão para o executor de banco; a leitura é uma
+    consulta pela chave primária.
+    """
+
+    async def carregar(self, id: str) -> Optional[Sessao]:
+        return await executar_banco(sessao_repo.obter_sessao, id, time.time())
+
+    async def gravar(self, sessao: Sessao) -> None:
+        await executar_banco(sessao_repo.gravar_sessao, sessao)
+
+    async def excluir(self, id: str) -> None:
+        await executar_banco(sessao_repo.excluir_sessao, id)
+
+
+def criar_armazenamento(tipo: str = TIPO_ARMAZENAMENTO) -> ArmazenamentoSessoes:
+    """
+    Raises:
+        ValueError: tipo diferente de "sqlite" e "memoria"
+    """
+    if tipo == "sqlite":
+        return SessoesSQLite()
+    if tipo == "memoria":
+        return SessoesEmMemoria()
+    raise ValueError(f"Armazenamento de sessões desconhecido: {tipo!r}")
+
+
+class SessaoArmazenada(MutableMapping):
+    """Dicionário da sessão; usá-lo antes de `carregar_sessao` é um erro"""
+
+    def __init__(self, id: Optional[str], armazenamento: ArmazenamentoSessoes):
+        self.id = id
+        self.armazenamento = armazenamento
+        self.carregada = id is None   # sem id não há o que ler
+        self.gravado = "{}"           # JSON como está no armazenamento
+        self.expira_em = 0.0
+        self.trocar_id = False
+        self._dados: Dict[str, Any] = {}
+
+    @property
+    def dados(self) -> Dict[str, Any]:
+        if not self.carregada:
+            raise RuntimeError("Sessão usada antes de `await carregar_sessao(request)`")
+        return self._dados
+
+    async def carregar(self) -> None:
+        if self.carregada:
+            return
+        sessao = await self.armazenamento.carregar(self.id)
+        self.carregada = True
+        dados = None
+        if sessao is not None:
+            try:
+                dados = json.loads(sessao.dados)
+            except ValueError:
+                logger.warning("Sessão com JSON inválido descartada")
+        if isinstance(dados, dict):
+            self._dados, self.gravado, self.expira_em = dados, sessao.dados, sessao.expira_em
+        else:
+            # Id desconhecido ou expirado: a próxima gravação cria outro,
+            # nunca reaproveita o que veio do cliente
+            self.id = None
+
+    def serializar(self) -> str:
+        return json.dumps(self.dados, separators=(",", ":"), ensure_ascii=False)
+
+    def renovar(self) -> None:
+        """Grava com um id novo na resposta e apaga o antigo"""
+        self.trocar_id = True
+
+    def __getitem__(self, chave: str) -> Any:
+        return self.dados[chave]
+
+    def __setitem__(self, chave: str, valor: Any) -> None:
+        self.dados[chave] = valor
+
+    def __delitem__(self, chave: str) -> None:
+        del self.dados[chave]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.dados)
+
+    def __len__(self) -> int:
+        return len(self.dados)
+
+    def get(self, chave: str, padrao: Any = None) -> Any:
+        return self.dados.get(chave, padrao)
+
+    def __repr__(self) -> str:
+        return f"SessaoArmazenada({self._dados})"
+
+
+async def carregar_sessao(request: HTTPConnection) -> MutableMapping:
+    """`request.session`, lida do armazenamento na primeira chamada da requisição"""
+    sessao = request.session
+    if isinstance(sessao, SessaoArmazenada):
+        await sessao.carregar()
+    return sessao
+
+
+def renovar_sessao(request: HTTPConnection) -> None:
+    """Troca o id da sessão na resposta (ao logar, contra fixação de sessão)"""
+    sessao = request.session
+    if isinstance(sessao, SessaoArmazenada):
+        sessao.renovar()
+
+
+class SessaoMiddleware:
+    """
+    Coloca em `scope["session"]` a sessão do id do cookie e a grava na resposta
+
+    Args:
+        app: Aplicação ASGI
+        armazenamento: Onde as sessões ficam (`criar_armazenamento`)
+        nome_cookie: Nome do cookie com o id
+        duracao: Segundos de validade, renovados enquanto a sessão é usada
+        same_site: Atributo SameSite do cookie
+        https_only: Marca o cookie como Secure
+        ignorar: Prefixos de rota servidos sem sessão (pastas estáticas montadas)
+    """
+
+    def __init__(self, app: ASGIApp, armazenamento: ArmazenamentoSessoes, nome_cookie: str = NOME_COOKIE,
+                 duracao: int = DURACAO_SESSAO, same_site: str = "lax", https_only: bool = False,
+                 ignorar: Tuple[str, ...] = ()):
+        self.app = app
+        self.armazenamento = armazenamento
+        self.ignorar = tuple(prefixo.rstrip("/") + "/" for prefixo in ignorar)
+        self.nome_cookie = nome_cookie
+        self.duracao = duracao
+        self.atributos = f"; path=/; httponly; samesite={same_site}" + ("; secure" if https_only else "")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or scope["path"].startswith(self.ignorar):
+            await self.app(scope, receive, send)
+            return
+
+        id = HTTPConnection(scope).cookies.get(self.nome_cookie)
+        sessao = SessaoArmazenada(id if id and _ID_VALIDO.match(id) else None, self.armazenamento)
+        scope["session"] = sessao
+        if scope["type"] == "websocket":
+            await self.app(scope, receive, send)
+            return
+
+        async def enviar(mensagem: Message) -> None:
+            if mensagem["type"] == "http.response.start":
+                cookie = await self.salvar(sessao)
+                if cookie is not None:
+                    MutableHeaders(scope=mensagem).append("Set-Cookie", cookie)
+            await send(mensagem)
+
+        await self.app(scope, receive, enviar)
+
+    async def salvar(self, sessao: SessaoArmazenada) -> Optional[str]:
+        """Grava a sessão se for preciso e devolve o Set-Cookie (None: nada muda)"""
+        if not sessao.carregada:
+            return None   # a rota nem olhou a sessão
+        dados = sessao.serializar()
+        if dados == "{}":
+            if sessao.id is None:
+                return None
+            await self.armazenamento.excluir(sessao.id)
+            return f"{self.nome_cookie}=null; expires=Thu, 01 Jan 1970 00:00:00 GMT{self.atributos}"
+
+        agora = time.time()
+        if dados == sessao.gravado and not sessao.trocar_id and sessao.expira_em - agora > self.duracao / 2:
+            return None
+        if sessao.trocar_id and sessao.id is not None:
+            await self.armazenamento.excluir(sessao.id)
+        if sessao.trocar_id or sessao.id is None:
+            sessao.id = novo_id()
+        await self.armazenamento.gravar(Sessao(sessao.id, dados, agora + self.duracao))
+        return f"{self.nome_cookie}={sessao.id}; Max-Age={self.duracao}{self.atributos}"
+
+
+@tarefa("limpar_sessoes")
+def tarefa_limpar_sessoes() -> None:
+    """Apaga as sessões expiradas da tabela e agenda a próxima limpeza"""
+    excluidas = sessao_repo.excluir_sessoes_expiradas(time.time())
+    if excluidas:
+        logger.info("%d sessão(ões) expirada(s) apagada(s)", excluidas)
+    enfileirar("limpar_sessoes", chave=CHAVE_LIMPEZA_SESSOES, atraso=INTERVALO_LIMPEZA_SESSOES)
+
+
+async def agendar_limpeza_sessoes(atraso: float = INTERVALO_LIMPEZA_SESSOES) -> Optional[int]:
+    """Agenda a limpeza periódica, se ainda não houver uma na fila (startup)"""
+    return await agendar("limpar_sessoes", chave=CHAVE_LIMPEZA_SESSOES, atraso=atraso)
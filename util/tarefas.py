@@ -0,0 +1,258 @@
+"""
+Fila persistente de tarefas em segundo plano
+
+Trabalho que não precisa terminar antes da resposta (apagar o arquivo
+antigo, gerar as versões reduzidas de uma imagem...) é gravado na tabela
+`tarefa` e executado por trabalhadores no event loop da aplicação. A rota
+só espera o INSERT; a tarefa sobrevive a um reinício e é retomada no
+próximo startup.
+
+Os tratadores são funções de módulo registradas por tipo. Recebem os
+argumentos nomeados gravados em JSON; funções `async` rodam no event loop,
+as síncronas no executor de I/O:
+
+    @tarefa("liberar_arquivo")
+    def liberar_arquivo(url: str) -> bool: ...
+
+    await agendar("liberar_arquivo", {"url": url}, chave=f"liberar:{url}")
+
+- chave: idempotência. Enquanto houver uma tarefa pendente com a mesma
+  chave, agendar de novo não cria outra; se ela já está executando, volta
+  para a fila e roda mais uma vez depois
+- falhas: nova tentativa com espera exponencial (`ESPERA_INICIAL` dobrando
+  até `ESPERA_MAXIMA`); após `max_tentativas` fica como "falhou" e aparece
+  em /admin/tarefas, de onde pode ser reenfileirada
+- cada tarefa reservada fica bloqueada por `BLOQUEIO`; se o processo morrer
+  no meio, outro trabalhador (de qualquer processo) a retoma depois disso.
+  Por isso os tratadores devem poder rodar mais de uma vez
+- no shutdown, `fila.encerrar()` termina as tarefas já vencidas dentro de um
+  prazo; as interrompidas voltam para a fila
+
+Uso pela linha de comando (executa as tarefas vencidas e sai):
+    python -m util.tarefas
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from data.model.tarefa_model import Tarefa
+from data.repo import tarefa_repo
+from util.executor import executar_banco, executar_io
+
+logger = logging.getLogger(__name__)
+
+TRABALHADORES = 2
+INTERVALO = 1.0          # segundos entre consultas à fila quando ociosa
+BLOQUEIO = 300.0         # segundos até uma tarefa "executando" ser retomada
+MAX_TENTATIVAS = 5
+ESPERA_INICIAL = 5.0     # segundos antes da 2ª tentativa
+ESPERA_MAXIMA = 3600.0
+PRAZO_ENCERRAMENTO = 10.0
+
+# Concluídas somem depois de um dia; falhas ficam uma semana para consulta
+RETER_CONCLUIDAS = 24 * 3600.0
+RETER_FALHAS = 7 * 24 * 3600.0
+INTERVALO_LIMPEZA = 3600.0
+
+TRATADORES: Dict[str, Callable[..., Any]] = {}
+
+
+def tarefa(tipo: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Registra a função decorada como tratador das tarefas de `tipo`"""
+    def registrar(funcao: Callable[..., Any]) -> Callable[..., Any]:
+        TRATADORES[tipo] = funcao
+        return funcao
+    return registrar
+
+
+def espera_para(tentativas: int) -> float:
+    """Segundos até a próxima tentativa depois de `tentativas` falhas"""
+    return min(ESPERA_MAXIMA, ESPERA_INICIAL * 2 ** max(tentativas - 1, 0))
+
+
+def enfileirar(tipo: str, argumentos: Optional[Dict[str, Any]] = None, chave: Optional[str] = None,
+               atraso: float = 0.0, max_tentativas: int = MAX_TENTATIVAS) -> Optional[int]:
+    """
+    Grava a tarefa na fila (bloqueante) e retorna o id
+
+    Returns:
+        None se já havia uma tarefa pendente com a mesma chave
+    """
+    if tipo not in TRATADORES:
+        raise ValueError(f"Tipo de tarefa não registrado: {tipo}")
+    agora = time.time()
+    return tarefa_repo.enfileirar_tarefa(Tarefa(
+        id=None, tipo=tipo, argumentos=json.dumps(argumentos or {}, sort_keys=True),
+        chave=chave, max_tentativas=max_tentativas, executar_em=agora + atraso, criada_em=agora,
+    ))
+
+
+async def agendar(tipo: str, argumentos: Optional[Dict[str, Any]] = None, chave: Optional[str] = None,
+                  atraso: float = 0.0, max_tentativas: int = MAX_TENTATIVAS) -> Optional[int]:
+    """Enfileira a tarefa e acorda os trabalhadores deste processo (usar nas rotas)"""
+    id_tarefa = await executar_banco(enfileirar, tipo, argumentos, chave, atraso, max_tentativas)
+    if id_tarefa is not None and atraso <= 0:
+        fila.acordar()
+    return id_tarefa
+
+
+class FilaTarefas:
+    """
+    Trabalhadores que consomem a tabela `tarefa` no event loop atual
+
+    Args:
+        trabalhadores: Tarefas executadas ao mesmo tempo por este processo
+        intervalo: Espera entre consultas quando a fila está vazia
+    """
+
+    def __init__(self, trabalhadores: int = TRABALHADORES, intervalo: float = INTERVALO):
+        self.trabalhadores = trabalhadores
+        self.intervalo = intervalo
+        self._tarefas: List[asyncio.Task] = []
+        self._acordar: Optional[asyncio.Event] = None
+        self._encerrando = False
+        self._ultima_limpeza = 0.0
+
+    @property
+    def ativa(self) -> bool:
+        return any(not t.done() for t in self._tarefas)
+
+    def iniciar(self) -> None:
+        """Cria os trabalhadores (chamar no startup, dentro do event loop)"""
+        if self.ativa:
+            return
+        self._encerrando = False
+        self._acordar = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tarefas = [
+            loop.create_task(self._trabalhar(), name=f"tarefas-{i}") for i in range(self.trabalhadores)
+        ]
+
+    def acordar(self) -> None:
+        """Avisa que há tarefa nova, sem esperar o próximo intervalo"""
+        if self._acordar is not None:
+            self._acordar.set()
+
+    async def encerrar(self, prazo: float = PRAZO_ENCERRAMENTO) -> None:
+        """
+        Executa as tarefas já vencidas e para os trabalhadores
+
+        O que não terminar em `prazo` segundos é interrompido e volta para a
+        fila, para o próximo startup.
+        """
+        if not self._tarefas:
+            return
+        self._encerrando = True
+        self.acordar()
+        _, pendentes = await asyncio.wait(self._tarefas, timeout=prazo)
+        for pendente in pendentes:
+            pendente.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        if pendentes:
+            logger.warning("Fila de tarefas encerrada com %d tarefa(s) interrompida(s)", len(pendentes))
+        self._tarefas = []
+        self._acordar = None
+
+    async def processar_pendentes(self) -> int:
+        """Executa, uma a uma, as tarefas vencidas até a fila esvaziar; retorna quantas"""
+        executadas = 0
+        while (reservada := await self._reservar()) is not None:
+            await self._executar(reservada)
+            executadas += 1
+        return executadas
+
+    async def _reservar(self) -> Optional[Tarefa]:
+        agora = time.time()
+        return await executar_banco(tarefa_repo.reservar_proxima_tarefa, agora, agora + BLOQUEIO)
+
+    async def _trabalhar(self) -> None:
+        while True:
+            # Limpa o aviso antes de consultar: um aviso que chegue durante a
+            # consulta não se perde
+            self._acordar.clear()
+            try:
+                reservada = await self._reservar()
+            except Exception:
+                logger.exception("Falha ao consultar a fila de tarefas")
+                reservada = None
+            if reservada is not None:
+                await self._executar(reservada)
+                continue
+            if self._encerrando:
+                return
+            await self._limpar()
+            try:
+                await asyncio.wait_for(self._acordar.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _executar(self, reservada: Tarefa) -> None:
+        try:
+            tratador = TRATADORES.get(reservada.tipo)
+            if tratador is None:
+                raise LookupError(f"Tipo de tarefa não registrado: {reservada.tipo}")
+            argumentos = json.loads(reservada.argumentos)
+            if asyncio.iscoroutinefunction(tratador):
+                await tratador(**argumentos)
+            else:
+                await executar_io(tratador, **argumentos)
+        except asyncio.CancelledError:
+            await asyncio.shield(executar_banco(tarefa_repo.devolver_tarefa, reservada))
+            raise
+        except Exception as e:
+            agora = time.time()
+            await executar_banco(
+                tarefa_repo.falhar_tarefa, reservada, f"{type(e).__name__}: {e}",
+                agora + espera_para(reservada.tentativas), agora,
+            )
+            logger.warning("Tarefa %s (%s) falhou na tentativa %d: %s",
+                           reservada.id, reservada.tipo, reservada.tentativas, e)
+        else:
+            await executar_banco(tarefa_repo.concluir_tarefa, reservada, time.time())
+
+    async def _limpar(self) -> None:
+        agora = time.time()
+        if agora - self._ultima_limpeza < INTERVALO_LIMPEZA:
+            return
+        self._ultima_limpeza = agora
+        try:
+            await executar_banco(
+                tarefa_repo.excluir_tarefas_encerradas, agora - RETER_CONCLUIDAS, agora - RETER_FALHAS
+            )
+        except Exception:
+            logger.exception("Falha ao limpar tarefas antigas")
+
+
+fila = FilaTarefas()
+
+
+def estatisticas_tarefas(limite: int = 20) -> Dict[str, Any]:
+    """Contagem por estado e as tarefas mais recentes/falhas (bloqueante)"""
+    def resumo(t: Tarefa) -> Dict[str, Any]:
+        return {
+            "id": t.id, "tipo": t.tipo, "chave": t.chave, "estado": t.estado,
+            "tentativas": t.tentativas, "max_tentativas": t.max_tentativas,
+            "executar_em": t.executar_em, "criada_em": t.criada_em,
+            "concluida_em": t.concluida_em, "erro": t.erro,
+        }
+    contagem = tarefa_repo.contar_tarefas_por_estado()
+    return {
+        "estados": {estado: contagem.get(estado, 0)
+                    for estado in ("pendente", "executando", "concluida", "falhou")},
+        "recentes": [resumo(t) for t in tarefa_repo.obter_tarefas_recentes(limite)],
+        "falhas": [resumo(t) for t in tarefa_repo.obter_tarefas_recentes(limite, "falhou")],
+    }
+
+
+if __name__ == "__main__":
+    from util.executor import encerrar_executores
+    from util.migracoes import aplicar_migracoes
+    import util.armazenamento, util.imagens   # registram os tratadores
+
+    aplicar_migracoes()
+    try:
+        print(f"⚙️  {asyncio.run(fila.processar_pendentes())} tarefa(s) executada(s)")
+    finally:
+        encerrar_executores()
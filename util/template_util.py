@@ -1,7 +1,58 @@
+"""
+Criação e configuração dos objetos Jinja2Templates
+
+Em produção (AMBIENTE=producao) os templates não são reverificados no
+disco a cada renderização (auto_reload desligado). O bytecode compilado
+fica em PASTA_CACHE_BYTECODE e sobrevive a reinícios e a novos workers.
+`precompilar_templates` carrega todos os templates no startup, para que a
+primeira requisição depois de um deploy não pague a compilação.
+
+Uso pela linha de comando (preenche o cache de bytecode no build):
+    python -m util.template_util
+"""
+import os
+import time
 from typing import List, Optional, Union
-from jinja2 import FileSystemLoader
+from jinja2 import FileSystemBytecodeCache, FileSystemLoader
 from fastapi.templating import Jinja2Templates
 
+PASTA_TEMPLATES = "templates"
+PASTA_CACHE_BYTECODE = os.path.join(".cache", "jinja")
+EXTENSOES_TEMPLATES = ("html",)
+
+PRODUCAO = os.environ.get("AMBIENTE", "").lower() == "producao"
+
+
+def configurar_cache_templates(templates: Jinja2Templates,
+                               pasta_cache: str = PASTA_CACHE_BYTECODE,
+                               producao: bool = PRODUCAO) -> Jinja2Templates:
+    """
+    Liga o cache de bytecode em disco e, em produção, desliga o auto_reload
+
+    O bytecode guarda o checksum do fonte: um template alterado é
+    recompilado mesmo com o cache antigo no disco.
+    """
+    os.makedirs(pasta_cache, exist_ok=True)
+    templates.env.bytecode_cache = FileSystemBytecodeCache(pasta_cache)
+    templates.env.auto_reload = not producao
+    return templates
+
+
+def precompilar_templates(templates: Jinja2Templates) -> int:
+    """
+    Compila (ou lê do cache de bytecode) todos os templates do loader
+
+    Os templates ficam no cache em memória do Environment; chame no
+    startup, antes de aceitar requisições.
+
+    Returns:
+        Quantidade de templates carregados
+    """
+    nomes = templates.env.list_templates(extensions=EXTENSOES_TEMPLATES)
+    for nome in nomes:
+        templates.env.get_template(nome)
+    return len(nomes)
+
 
 def criar_templates(diretorio_especifico: Optional[Union[str, List[str]]] = None) -> Jinja2Templates:
     """
@@ -48,5 +99,12 @@ def criar_templates(diretorio_especifico: Optional[Union[str, List[str]]] = None
     # Configurar o loader com múltiplos diretórios
     # O FileSystemLoader tentará encontrar templates em ordem nos diretórios listados
     templates.env.loader = FileSystemLoader(diretorios)
+    configurar_cache_templates(templates)
     
-    return templates
\ No newline at end of file
+    return templates
+
+
+if __name__ == "__main__":
+    inicio = time.perf_counter()
+    total = precompilar_templates(configurar_cache_templates(Jinja2Templates(directory=PASTA_TEMPLATES)))
+    print(f"✅ {total} templates compilados em {(time.perf_counter() - inicio) * 1000:.0f} ms ({PASTA_CACHE_BYTECODE})")
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Limite de tentativas de login por IP e por email (token bucket em memória)
+
+Cada chave tem um balde com até `capacidade` fichas, repostas a uma por
+`intervalo` segundos. Uma tentativa de login gasta uma ficha do IP e uma do
+email; sem ficha em algum dos dois, a rota responde 429 sem chegar ao
+bcrypt. Login correto devolve as fichas do email, para que o administrador
+não fique preso pelos próprios erros de digitação.
+
+    espera = reservar_tentativa(ip, email)
+    if espera:
+        ...   # 429 com Retry-After: espera
+
+O estado é por processo e usado só no event loop (sem lock). Baldes cheios
+não são guardados, e a quantidade de chaves é limitada: quando passa de
+`maximo_chaves`, sai a chave atualizada há mais tempo.
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+MAXIMO_CHAVES = 10_000
+
+# Um IP: 20 tentativas seguidas, depois 10 por minuto
+CAPACIDADE_IP = 20
+INTERVALO_IP = 6.0
+
+# Um email: 10 tentativas seguidas, depois 2 por minuto
+CAPACIDADE_EMAIL = 10
+INTERVALO_EMAIL = 30.0
+
+
+class BaldeDeFichas:
+    """
+    Token bucket por chave
+
+    Args:
+        nome: Identificação (diagnóstico)
+        capacidade: Fichas de um balde cheio (rajada máxima)
+        intervalo: Segundos para repor uma ficha
+        maximo_chaves: Baldes guardados ao mesmo tempo
+    """
+
+    def __init__(self, nome: str, capacidade: int, intervalo: float, maximo_chaves: int = MAXIMO_CHAVES):
+        self.nome = nome
+        self.capacidade = capacidade
+        self.intervalo = intervalo
+        self.maximo_chaves = maximo_chaves
+        # chave -> (fichas, momento da última atualização)
+        self._baldes: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def fichas(self, chave: Hashable, agora: Optional[float] = None) -> float:
+        """Fichas disponíveis para `chave` agora"""
+        balde = self._baldes.get(chave)
+        if balde is None:
+            return float(self.capacidade)
+        fichas, atualizado_em = balde
+        agora = time.monotonic() if agora is None else agora
+        return min(self.capacidade, fichas + (agora - atualizado_em) / self.intervalo)
+
+    def espera(self, chave: Hashable, agora: Optional[float] = None) -> float:
+        """Segundos até `chave` ter uma ficha (0 se já tem)"""
+        fichas = self.fichas(chave, agora)
+        return 0.0 if fichas >= 1 else (1 - fichas) * self.intervalo
+
+    def consumir(self, chave: Hashable, agora: Optional[float] = None) -> None:
+        """Gasta uma ficha de `chave` (quem chama confere `espera` antes)"""
+        agora = time.monotonic() if agora is None else agora
+        fichas = self.fichas(chave, agora)
+        self._baldes[chave] = (max(0.0, fichas - 1), agora)
+        self._baldes.move_to_end(chave)
+        self._descartar_excedentes(agora)
+
+    def restaurar(self, chave: Hashable) -> None:
+        """Enche de novo o balde de `chave`"""
+        self._baldes.pop(chave, None)
+
+    def limpar(self) -> None:
+        self._baldes.clear()
+
+    def _descartar_excedentes(self, agora: float) -> None:
+        while len(self._baldes) > self.maximo_chaves:
+            self._baldes.popitem(last=False)
+        # Os mais antigos à frente que já encheram não precisam ficar guardados
+        while self._baldes:
+            chave = next(iter(self._baldes))
+            if self.fichas(chave, agora) < self.capacidade:
+                break
+            del self._baldes[chave]
+
+    def __len__(self) -> int:
+        return len(self._baldes)
+
+
+tentativas_por_ip = BaldeDeFichas("ip", CAPACIDADE_IP, INTERVALO_IP)
+tentativas_por_email = BaldeDeFichas("email", CAPACIDADE_EMAIL, INTERVALO_EMAIL)
+
+
+def _chave_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def reservar_tentativa(ip: str, email: str) -> int:
+    """
+    Gasta uma ficha do IP e uma do email, se os dois tiverem
+
+    Returns:
+        0 se a tentativa pode seguir; senão, os segundos (arredondados para
+        cima) até poder tentar de novo, sem gastar nada
+    """
+    agora = time.monotonic()
+    chave_email = _chave_email(email)
+    espera = max(tentativas_por_ip.espera(ip, agora), tentativas_por_email.espera(chave_email, agora))
+    if espera > 0:
+        return max(1, math.ceil(espera))
+    tentativas_por_ip.consumir(ip, agora)
+    tentativas_por_email.consumir(chave_email, agora)
+    return 0
+
+
+def login_bem_sucedido(email: str) -> None:
+    """Devolve as fichas do email (as do IP continuam gastas)"""
+    tentativas_por_email.restaurar(_chave_email(email))
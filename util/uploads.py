@@ -0,0 +1,190 @@
+"""
+Recebimento de uploads: limites de tamanho e validação pelo conteúdo
+
+Dois níveis de proteção:
+- `LimiteUploadMiddleware` limita o corpo inteiro da requisição por rota.
+  Recusa com 413 pelo Content-Length, antes de ler qualquer byte, ou assim
+  que o total recebido passa do limite, sem esperar o fim do envio
+- `receber_upload` copia o arquivo em blocos, no executor de I/O, para um
+  temporário (util/armazenamento.py, que renomeia para o nome final de forma
+  atômica). No caminho identifica o formato pelos primeiros bytes ("magic
+  bytes") e aplica o limite do tipo. O Content-Type e a extensão enviados
+  pelo cliente não são usados: a extensão gravada é a do formato detectado
+
+    url = await receber_upload(capa_file, "imagem")   # UploadError se inválido
+
+O corpo multipart é lido pelo Starlette de forma assíncrona, em pedaços,
+então um cliente lento ocupa só a própria requisição; a cópia e o hash
+rodam fora do event loop.
+"""
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from util.armazenamento import salvar_arquivo
+from util.executor import executar_io
+
+MB = 1024 * 1024
+
+# Folga para os demais campos do formulário (texto rico, títulos...)
+FOLGA_FORMULARIO = 2 * MB
+
+
+class UploadError(ValueError):
+    """Upload recusado; `status` é o código HTTP correspondente (413 ou 415)"""
+
+    def __init__(self, mensagem: str, status: int):
+        super().__init__(mensagem)
+        self.status = status
+
+
+@dataclass(slots=True)
+class TipoUpload:
+    nome: str
+    tamanho_maximo: int                  # bytes
+    formatos: Tuple[str, ...]            # extensões aceitas (sem ponto)
+
+
+# Assinatura -> extensão. (deslocamento, bytes)
+ASSINATURAS = (
+    ((0, b"\xff\xd8\xff"), "jpg"),
+    ((0, b"\x89PNG\r\n\x1a\n"), "png"),
+    ((0, b"GIF87a"), "gif"),
+    ((0, b"GIF89a"), "gif"),
+    ((4, b"ftypavif"), "avif"),
+    ((4, b"ftypavis"), "avif"),
+)
+TAMANHO_CABECALHO = 16
+
+TIPOS_UPLOAD: Dict[str, TipoUpload] = {
+    "imagem": TipoUpload("imagem", 8 * MB, ("jpg", "png", "gif", "webp", "avif")),
+}
+
+
+def detectar_formato(cabecalho: bytes) -> Optional[str]:
+    """Extensão do formato pelos primeiros bytes do arquivo, ou None"""
+    if cabecalho[:4] == b"RIFF" and cabecalho[8:12] == b"WEBP":
+        return "webp"
+    for (deslocamento, assinatura), extensao in ASSINATURAS:
+        if cabecalho[deslocamento:deslocamento + len(assinatura)] == assinatura:
+            return extensao
+    return None
+
+
+class _LeitorLimitado:
+    """Lê de `origem` devolvendo antes o cabeçalho já lido; falha ao passar do limite"""
+
+    def __init__(self, origem: BinaryIO, cabecalho: bytes, tipo: TipoUpload):
+        self.origem = origem
+        self.pendente = cabecalho
+        self.tipo = tipo
+        self.lidos = 0
+
+    def read(self, tamanho: int = -1) -> bytes:
+        if self.pendente:
+            bloco, self.pendente = self.pendente, b""
+        else:
+            bloco = self.origem.read(tamanho)
+        self.lidos += len(bloco)
+        if self.lidos > self.tipo.tamanho_maximo:
+            raise UploadError(
+                f"Arquivo maior que o limite de {self.tipo.tamanho_maximo // MB} MB para {self.tipo.nome}.", 413
+            )
+        return bloco
+
+
+def gravar_upload(origem: BinaryIO, tipo: TipoUpload, fixar: bool = False) -> str:
+    """
+    Valida e grava o conteúdo de `origem` no armazenamento (bloqueante)
+
+    Raises:
+        UploadError: formato não reconhecido (415) ou acima do limite (413);
+            nada fica gravado
+    """
+    cabecalho = origem.read(TAMANHO_CABECALHO)
+    formato = detectar_formato(cabecalho)
+    if formato not in tipo.formatos:
+        raise UploadError(
+            f"Formato não permitido para {tipo.nome}. Use: {', '.join(tipo.formatos)}.", 415
+        )
+    return salvar_arquivo(_LeitorLimitado(origem, cabecalho, tipo), f"upload.{formato}", fixar)
+
+
+async def receber_upload(arquivo: UploadFile, tipo: str = "imagem", fixar: bool = False) -> str:
+    """
+    Grava o upload validado e retorna a URL pública
+
+    O tamanho informado pelo Starlette (já recebido) é conferido antes de
+    copiar; a cópia confere de novo, bloco a bloco.
+
+    Raises:
+        UploadError: ver `gravar_upload`
+    """
+    tipo_upload = TIPOS_UPLOAD[tipo]
+    if arquivo.size is not None and arquivo.size > tipo_upload.tamanho_maximo:
+        raise UploadError(
+            f"Arquivo maior que o limite de {tipo_upload.tamanho_maximo // MB} MB para {tipo_upload.nome}.", 413
+        )
+    await arquivo.seek(0)
+    return await executar_io(gravar_upload, arquivo.file, tipo_upload, fixar)
+
+
+class LimiteUploadMiddleware:
+    """
+    Limita o tamanho do corpo de POST/PUT/PATCH por prefixo de rota
+
+    Args:
+        limites: prefixo da rota -> bytes; vale o prefixo mais longo
+        padrao: limite das demais rotas (None = sem limite)
+    """
+
+    def __init__(self, app: ASGIApp, limites: Dict[str, int], padrao: Optional[int] = None):
+        self.app = app
+        self.limites = sorted(limites.items(), key=lambda item: len(item[0]), reverse=True)
+        self.padrao = padrao
+
+    def limite_da_rota(self, caminho: str) -> Optional[int]:
+        for prefixo, limite in self.limites:
+            if caminho == prefixo or caminho.startswith(prefixo.rstrip("/") + "/"):
+                return limite
+        return self.padrao
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+        limite = self.limite_da_rota(scope["path"])
+        if limite is None:
+            await self.app(scope, receive, send)
+            return
+
+        tamanho = Headers(scope=scope).get("content-length")
+        if tamanho and tamanho.isdigit() and int(tamanho) > limite:
+            # Recusa sem ler o corpo
+            resposta = PlainTextResponse(_mensagem_limite(limite), status_code=413,
+                                         headers={"Connection": "close"})
+            await resposta(scope, receive, send)
+            return
+
+        recebidos = 0
+
+        async def receber_limitado() -> Message:
+            nonlocal recebidos
+            mensagem = await receive()
+            if mensagem["type"] == "http.request":
+                recebidos += len(mensagem.get("body", b""))
+                if recebidos > limite:
+                    # Sem Content-Length (chunked) ou mentindo: para no meio
+                    raise HTTPException(status_code=413, detail=_mensagem_limite(limite))
+            return mensagem
+
+        await self.app(scope, receber_limitado, send)
+
+
+def _mensagem_limite(limite: int) -> str:
+    return f"Requisição maior que o limite de {limite / MB:.0f} MB."
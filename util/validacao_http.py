@@ -0,0 +1,59 @@
+"""
+Requisições condicionais (RFC 9110): ETag, Last-Modified e 304
+
+    etag = formatar_etag("v12-abc", fraca=True)
+    if nao_modificado(request.headers, etag, ultima_modificacao):
+        return Response(status_code=304, headers=...)
+"""
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional
+
+
+def formatar_etag(valor: str, fraca: bool = False) -> str:
+    """Valor entre aspas, com prefixo W/ para validadores fracos"""
+    return f'W/"{valor}"' if fraca else f'"{valor}"'
+
+
+def formatar_data_http(instante: float) -> str:
+    """Data no formato dos cabeçalhos HTTP (Last-Modified)"""
+    return formatdate(instante, usegmt=True)
+
+
+def _opaca(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_corresponde(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca de If-None-Match com a ETag da resposta ("*" casa com tudo)"""
+    if if_none_match.strip() == "*":
+        return True
+    alvo = _opaca(etag)
+    return any(_opaca(candidata) == alvo for candidata in if_none_match.split(","))
+
+
+def _instante(data_http: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(data_http).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def nao_modificado(cabecalhos: Mapping[str, str], etag: Optional[str] = None,
+                   ultima_modificacao: Optional[float] = None) -> bool:
+    """
+    True se a cópia do cliente ainda vale (a resposta pode ser um 304)
+
+    If-None-Match tem precedência: quando presente, If-Modified-Since é
+    ignorado. A data é comparada em segundos inteiros, a precisão do
+    cabeçalho.
+    """
+    if_none_match = cabecalhos.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_corresponde(if_none_match, etag)
+
+    if_modified_since = cabecalhos.get("if-modified-since")
+    if if_modified_since is None or ultima_modificacao is None:
+        return False
+    instante = _instante(if_modified_since)
+    return instante is not None and int(ultima_modificacao) <= instante
@@ -0,0 +1,118 @@
+"""
+Versão do conteúdo público, compartilhada entre processos
+
+Triggers no banco (migração m0005) incrementam `versao_conteudo.versao` a
+cada INSERT/UPDATE/DELETE em experimento ou integrante, venha a escrita
+deste worker, de outro worker ou de `python importar.py`. As páginas
+públicas usam a versão para montar ETag e Last-Modified.
+
+Cada processo guarda a última versão lida e só volta ao banco depois de
+`INTERVALO_VERIFICACAO` segundos. Ao perceber que a versão mudou, esvazia
+os caches em memória: assim as gravações de outros processos também
+invalidam os caches, no máximo alguns segundos depois.
+
+As escritas deste processo passam por `escrita_de_conteudo`, que lê a
+versão antes e depois delas na mesma transação. Se ninguém mais escreveu
+no meio, a versão nova é adotada sem esvaziar nada: as funções de escrita
+já invalidaram só o que mudou.
+
+    with escrita_de_conteudo(get_connection()) as conn:
+        conn.execute(ALTERAR_EXPERIMENTO, parametros)
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from data.model.versao_model import VersaoConteudo
+from data.repo import versao_repo
+from util.cache import limpar_caches
+from util.executor import executar_banco
+
+INTERVALO_VERIFICACAO = 2.0   # segundos
+
+_lock = threading.Lock()
+_atual: Optional[VersaoConteudo] = None
+_verificada_em = 0.0
+_alteracoes = 0
+
+
+def marcar_desatualizada() -> None:
+    """Força a próxima consulta a reler a versão do banco"""
+    global _alteracoes
+    with _lock:
+        _alteracoes += 1
+
+
+def _adotar(antes: Optional[VersaoConteudo], depois: Optional[VersaoConteudo]) -> None:
+    global _atual
+    with _lock:
+        if _atual is not None and antes is not None and depois is not None and antes.versao == _atual.versao:
+            _atual = depois
+            return
+    # Outro processo escreveu desde a última leitura: a próxima relê e esvazia
+    marcar_desatualizada()
+
+
+@contextmanager
+def escrita_de_conteudo(conexao):
+    """
+    Envolve o bloco de escrita de um repositório em experimento, integrante
+    ou arquivo
+
+    Args:
+        conexao: O `get_connection()` do repositório
+
+    A transação começa com o lock de escrita (BEGIN IMMEDIATE), então a
+    versão lida antes das escritas já inclui tudo o que outros processos
+    gravaram. O commit é feito ao sair do bloco, não dentro dele.
+    """
+    with conexao as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        antes = versao_repo.ler_versao_conteudo(conn)
+        yield conn
+        # Um commit dentro do bloco deixaria a leitura de fora da transação
+        depois = versao_repo.ler_versao_conteudo(conn) if conn.in_transaction else None
+    _adotar(antes, depois)
+
+
+def _precisa_verificar() -> bool:
+    return (_atual is None or _alteracoes
+            or time.monotonic() - _verificada_em >= INTERVALO_VERIFICACAO)
+
+
+def verificar_versao() -> Optional[VersaoConteudo]:
+    """
+    Relê a versão do banco (bloqueante)
+
+    Se mudou desde a última leitura, esvazia os caches em memória.
+    """
+    global _atual, _verificada_em, _alteracoes
+    alteracoes = _alteracoes
+    lida = versao_repo.obter_versao_conteudo()
+    with _lock:
+        mudou = _atual is not None and lida != _atual
+        _atual = lida
+        _verificada_em = time.monotonic()
+        # Uma escrita durante a leitura obriga a reler na próxima vez
+        _alteracoes -= alteracoes
+    if mudou:
+        limpar_caches()
+    return lida
+
+
+async def obter_versao() -> Optional[VersaoConteudo]:
+    """Versão atual; só consulta o banco quando a leitura anterior venceu"""
+    if _precisa_verificar():
+        return await executar_banco(verificar_versao)
+    return _atual
+
+
+def redefinir() -> None:
+    """Esquece a versão lida (testes)"""
+    global _atual, _verificada_em, _alteracoes
+    with _lock:
+        _atual = None
+        _verificada_em = 0.0
+        _alteracoes = 0